@@ -1,8 +1,11 @@
 # backend/api/app.py
-from flask import Flask, jsonify, request
+from flask import Flask, jsonify, request, Response, stream_with_context, g
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 import sys
 import os
+import threading
+import time
 
 # Add the src directory to path (it's in the parent folder)
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
@@ -11,12 +14,175 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 from src.capturer import PacketCapturer
 from src.parser import ProtocolParser
 from src.statistics import TrafficStatistics
-from src.detector import IssueDetector
+from src.detector import IssueDetector, RealtimeDetector
 from src.filters import PacketFilter
 from src.storage import PacketStorage
+from src.filter_expr import compile_filter, FilterSyntaxError
+from src.batch import PacketBatch
+from src.sessions import CaptureSessionStore, CaptureNotFoundError
+from src.pagination import InvalidCursorError, DEFAULT_PAGE_SIZE
+from src.jobs import JobManager, JobNotFoundError, JobQueueFullError
+from src.statistics import StatsAccumulator
+from src.registry import ComponentRegistry
+from src.latency import LatencyTracker
+from src.capturer import scapy_available
+from src.pipeline import AnalysisPipeline, PIPELINE_OUTPUTS, project
+from src.serialization import get_serializer, negotiate_encoding, compress, compact_packets, MIN_COMPRESS_SIZE
+from src.result_cache import ResultCache, digest_packets
+from src.streaming import CaptureStream, packet_summary, DEFAULT_FLUSH_INTERVAL, DEFAULT_MAX_BATCH
+from src.metrics import REGISTRY as metrics, HTTP_REQUEST_SECONDS, CONTENT_TYPE as METRICS_CONTENT_TYPE
+
+class FastJSONProvider(DefaultJSONProvider):
+    """jsonify() through the fastest installed serializer (orjson if available)"""
+    
+    serializer = get_serializer()
+    
+    def dumps(self, obj, **kwargs):
+        return self.serializer.dumps(obj).decode('utf-8')
+    
+    def loads(self, s, **kwargs):
+        return self.serializer.loads(s)
 
 app = Flask(__name__)
-CORS(app)
+app.json = FastJSONProvider(app)
+CORS(app, expose_headers=['ETag'])
+
+# Captures live server-side; clients refer to them by capture_id
+sessions = CaptureSessionStore()
+
+# Analysis results addressed by capture digest + parameters (GET /api/cache)
+result_cache = ResultCache()
+
+# Long-lived analyzer components, built once instead of per request.
+# The dev server starts a thread per request, so per-thread components
+# would be rebuilt every time; these are all shared, and IssueDetector
+# keeps each run's state in the RuleEngine that run_checks() builds.
+components = ComponentRegistry()
+components.register('parser', ProtocolParser)
+components.register('statistics', TrafficStatistics)
+components.register('detector', IssueDetector)
+components.register('storage', PacketStorage)
+components.register('pipeline', lambda: AnalysisPipeline(components.get('parser'), components.get('detector')))
+
+# Request latency per endpoint (GET /api/latency)
+latency = LatencyTracker()
+
+def warm_up():
+    """Import Scapy and build shared components before the first request"""
+    start = time.perf_counter()
+    scapy_available()
+    components.warm_up()
+    print(f"🔥 Components warmed up in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_latency(response):
+    start = g.pop('request_start', None)
+    if start is not None:
+        elapsed = time.perf_counter() - start
+        endpoint = request.endpoint or 'unknown'
+        latency.record(endpoint, elapsed)
+        HTTP_REQUEST_SECONDS.labels(endpoint, request.method, response.status_code).observe(elapsed)
+    return response
+
+@app.after_request
+def compress_response(response):
+    """gzip/deflate large responses when the client's Accept-Encoding allows it"""
+    encoding = negotiate_encoding(request.headers.get('Accept-Encoding'))
+    if (encoding is None or response.is_streamed or response.direct_passthrough
+            or 'Content-Encoding' in response.headers or response.status_code in (204, 304)):
+        return response
+    
+    body = response.get_data()
+    if len(body) < MIN_COMPRESS_SIZE:
+        return response
+    response.set_data(compress(body, encoding))
+    response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    return response
+
+def wants_compact(data=None):
+    """Clients opt into the compact {fields, rows} packet list with compact=true"""
+    value = (data or {}).get('compact', request.args.get('compact', ''))
+    return value is True or str(value).lower() in ('1', 'true')
+
+def packet_list(packets, compact):
+    return compact_packets(packets) if compact else packets
+
+# Long-running capture/analysis work runs here instead of in request threads
+jobs = JobManager()
+
+def filter_packets(packets, expression):
+    """Apply an optional filter expression (compiled once and cached)"""
+    if not expression:
+        return packets
+    return compile_filter(expression).apply(packets)
+
+def filter_error(error):
+    return jsonify({
+        'success': False,
+        'error': f'Invalid filter expression: {error}'
+    }), 400
+
+def capture_not_found(error):
+    return jsonify({
+        'success': False,
+        'error': f'Unknown or expired capture: {error.args[0]}'
+    }), 404
+
+def capture_digest(data):
+    """Content digest of the request's capture (computed once per session version)"""
+    capture_id = data.get('capture_id')
+    if capture_id:
+        return sessions.get(capture_id).cached('digest', digest_packets)
+    return digest_packets(data.get('packets', []))
+
+def analysis_key(data, name):
+    return (capture_digest(data), name, data.get('filter') or None)
+
+def run_analysis(data, name, compute, key=None):
+    """
+    Run compute(packets) on the request's packets (the server-side session
+    for a capture_id). Results are cached by capture digest, analysis and
+    filter, so they are reused until the packets change.
+    """
+    key = key or analysis_key(data, name)
+    
+    def compute_result():
+        capture_id = data.get('capture_id')
+        packets = sessions.get(capture_id).packets if capture_id else data.get('packets', [])
+        return compute(filter_packets(packets, data.get('filter')))
+    
+    return result_cache.get_or_compute(key, compute_result)
+
+def conditional_analysis(data, name, compute, render, *variant):
+    """
+    Respond with render(result) tagged with an ETag derived from the capture
+    digest, parameters and response encoding. If the client already holds
+    that ETag (If-None-Match) skip the analysis: GET answers 304, and other
+    methods answer 412 Precondition Failed as RFC 7232 requires.
+    """
+    key = analysis_key(data, name)
+    # gzip and identity bodies are different representations, so tag them apart
+    encoding = negotiate_encoding(request.headers.get('Accept-Encoding'))
+    etag = result_cache.etag(key, *variant, encoding)
+    if request.if_none_match.contains(etag):
+        result_cache.record_not_modified()
+        response = app.response_class(status=304 if request.method in ('GET', 'HEAD') else 412)
+    else:
+        response = jsonify(render(run_analysis(data, name, compute, key)))
+    response.set_etag(etag)
+    response.vary.add('Accept-Encoding')
+    return response
+
+def packet_summaries(packets):
+    """JSON-serializable view of packets for the frontend"""
+    if isinstance(packets, PacketBatch):
+        packets = packets.to_packets()
+    return [packet_summary(packet) for packet in packets]
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
@@ -38,26 +204,17 @@ def capture_packets():
         capturer = PacketCapturer(use_real_capture=use_real)
         capturer.start_capture(count)
         
-        # Convert to JSON-serializable format
-        serializable_packets = []
-        for packet in capturer.captured_packets:
-            serializable_packet = {
-                'number': packet.get('number'),
-                'timestamp': packet.get('timestamp'),
-                'protocol': packet.get('protocol'),
-                'summary': packet.get('summary'),
-                'length': packet.get('length'),
-                'src_ip': packet.get('src_ip'),
-                'dst_ip': packet.get('dst_ip'),
-                'real_packet': packet.get('real_packet', False)
-            }
-            serializable_packets.append(serializable_packet)
+        # Keep the capture server-side; later requests only send its ID
+        mode = 'real' if use_real else 'simulation'
+        session = sessions.create(list(capturer.captured_packets), source=mode)
+        serializable_packets = packet_summaries(session.packets)
         
         return jsonify({
             'success': True,
-            'packets': serializable_packets,
+            'capture_id': session.capture_id,
+            'packets': packet_list(serializable_packets, wants_compact(data)),
             'total': len(serializable_packets),
-            'mode': 'real' if use_real else 'simulation'
+            'mode': mode
         })
         
     except Exception as e:
@@ -66,22 +223,123 @@ def capture_packets():
             'error': str(e)
         }), 500
 
+def new_capture_stream(args):
+    """
+    Build a capturer feeding a CaptureStream from a streaming request's
+    query arguments. Returns (capturer, stream, run_capture); the caller
+    runs run_capture() off the request thread or event loop.
+    """
+    count = args.get('count', 100, type=int)
+    timeout = args.get('timeout', 30, type=float)
+    use_real = args.get('realCapture', 'false').lower() == 'true'
+    flush_interval = args.get('flushInterval', DEFAULT_FLUSH_INTERVAL, type=float)
+    max_batch = args.get('maxBatch', DEFAULT_MAX_BATCH, type=int)
+    detect = args.get('detect', 'true').lower() == 'true'
+    mode = 'real' if use_real else 'simulation'
+    
+    capturer = PacketCapturer(use_real_capture=use_real)
+    stream = CaptureStream(flush_interval=max(flush_interval, 0.05), max_batch=max(max_batch, 1))
+    capturer.add_listener(stream.publish)
+    if detect:
+        # Sliding-window detection; alerts ride along with the next batch
+        capturer.add_listener(RealtimeDetector(on_alert=stream.alert).observe)
+    
+    def run_capture():
+        try:
+            capturer.start_capture(count, timeout)
+            session = sessions.create(list(capturer.captured_packets), source=mode)
+            stream.close(capture_id=session.capture_id, mode=mode)
+        except Exception as e:
+            stream.close(error=str(e))
+    
+    return capturer, stream, run_capture
+
+# Headers for Server-Sent Events responses
+SSE_HEADERS = {
+    'Cache-Control': 'no-cache',
+    'X-Accel-Buffering': 'no'
+}
+
+@app.route('/api/capture/stream', methods=['GET'])
+def stream_capture():
+    """
+    Capture packets and push them as Server-Sent Events while they arrive.
+    Sends a 'batch' event (packet summaries plus stats delta) every
+    flushInterval seconds and a final 'complete' event with the capture_id.
+    Sliding-window alerts arrive in each batch's 'alerts' (detect=false turns them off).
+    """
+    capturer, stream, run_capture = new_capture_stream(request.args)
+    
+    # The capture never waits on the client; a slow client gets coalesced updates
+    threading.Thread(target=run_capture, daemon=True).start()
+    
+    def events():
+        try:
+            yield from stream.events()
+        finally:
+            capturer.stop()  # Client went away or the stream finished
+    
+    return Response(stream_with_context(events()), mimetype='text/event-stream', headers=SSE_HEADERS)
+
+@app.route('/api/pipeline', methods=['POST'])
+def run_pipeline():
+    """
+    Run several analyses in one pass over a capture.
+    Body: capture_id (or packets), optional filter, outputs (any of
+    packets/analyses/statistics/issues) and optional fields projection,
+    e.g. {"packets": ["number", "protocol"]}.
+    """
+    try:
+        data = request.get_json() or {}
+        outputs = data.get('outputs') or ['analyses', 'statistics', 'issues']
+        fields = data.get('fields') or {}
+        unknown = [name for name in outputs if name not in PIPELINE_OUTPUTS]
+        if unknown:
+            return jsonify({
+                'success': False,
+                'error': f"Unknown outputs {unknown}, expected any of {list(PIPELINE_OUTPUTS)}"
+            }), 400
+        
+        pipeline = components.get('pipeline')
+        compact = wants_compact(data)
+        
+        def render(results):
+            response = {name: project(results[name], fields.get(name)) for name in outputs}
+            if 'packets' in response:
+                response['packets'] = packet_list(response['packets'], compact)
+            return dict(response, success=True)
+        
+        # Cache the full results; projection is applied per request
+        return conditional_analysis(data, ('pipeline',) + tuple(sorted(outputs)),
+                                    lambda packets: pipeline.run(packets, outputs), render,
+                                    sorted(fields.items()), compact)
+        
+    except FilterSyntaxError as e:
+        return filter_error(e)
+    except CaptureNotFoundError as e:
+        return capture_not_found(e)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @app.route('/api/analyze', methods=['POST'])
 def analyze_packets():
     """Analyze packets using your existing ProtocolParser"""
     try:
         data = request.get_json()
-        packets = data.get('packets', [])
         
         # Use your EXISTING ProtocolParser
-        parser = ProtocolParser()
-        analyses = [parser.parse_packet(packet) for packet in packets]
-        
-        return jsonify({
-            'success': True,
-            'analyses': analyses
-        })
+        parser = components.get('parser')
+        return conditional_analysis(data, 'analyze',
+                                    lambda packets: [parser.parse_packet(packet) for packet in packets],
+                                    lambda analyses: {'success': True, 'analyses': analyses})
         
+    except FilterSyntaxError as e:
+        return filter_error(e)
+    except CaptureNotFoundError as e:
+        return capture_not_found(e)
     except Exception as e:
         return jsonify({
             'success': False,
@@ -93,17 +351,16 @@ def get_statistics():
     """Generate statistics using your existing TrafficStatistics"""
     try:
         data = request.get_json()
-        packets = data.get('packets', [])
         
         # Use your EXISTING TrafficStatistics
-        stats = TrafficStatistics()
-        statistics = stats.generate_statistics(packets)
-        
-        return jsonify({
-            'success': True,
-            'statistics': statistics
-        })
+        stats = components.get('statistics')
+        return conditional_analysis(data, 'statistics', stats.generate_statistics,
+                                    lambda statistics: {'success': True, 'statistics': statistics})
         
+    except FilterSyntaxError as e:
+        return filter_error(e)
+    except CaptureNotFoundError as e:
+        return capture_not_found(e)
     except Exception as e:
         return jsonify({
             'success': False,
@@ -115,17 +372,16 @@ def detect_issues():
     """Detect issues using your existing IssueDetector"""
     try:
         data = request.get_json()
-        packets = data.get('packets', [])
         
         # Use your EXISTING IssueDetector
-        detector = IssueDetector()
-        issues = detector.analyze_packets(packets)
-        
-        return jsonify({
-            'success': True,
-            'issues': issues
-        })
+        detector = components.get('detector')
+        return conditional_analysis(data, 'issues', detector.analyze_packets,
+                                    lambda issues: {'success': True, 'issues': issues})
         
+    except FilterSyntaxError as e:
+        return filter_error(e)
+    except CaptureNotFoundError as e:
+        return capture_not_found(e)
     except Exception as e:
         return jsonify({
             'success': False,
@@ -133,16 +389,154 @@ def detect_issues():
         }), 500
         
        
+def capture_job(job, data):
+    """Background capture; progress follows the packets captured so far"""
+    count = data.get('count', 10)
+    use_real = data.get('realCapture', False)
+    mode = 'real' if use_real else 'simulation'
+    
+    capturer = PacketCapturer(use_real_capture=use_real)
+    job.on_cancel(capturer.stop)
+    capturer.add_listener(lambda packet: job.update(packet['number'] / max(count, 1),
+                                                    f"{packet['number']} packets captured"))
+    capturer.start_capture(count, data.get('timeout', 30))
+    job.check_cancelled()
+    
+    session = sessions.create(list(capturer.captured_packets), source=mode)
+    return {
+        'capture_id': session.capture_id,
+        'packets': packet_summaries(session.packets),
+        'total': len(session.packets),
+        'mode': mode
+    }
+
+def analyze_job(job, data):
+    parser = components.get('parser')
+    
+    def parse_all(packets):
+        analyses = []
+        for chunk in job.track(packets):
+            analyses.extend(parser.parse_packet(packet) for packet in chunk)
+        return analyses
+    
+    return {'analyses': run_analysis(data, 'analyze', parse_all)}
+
+def statistics_job(job, data):
+    def generate(packets):
+        accumulator = StatsAccumulator()
+        for chunk in job.track(packets):
+            accumulator.update_batch(chunk)
+        return accumulator.snapshot()
+    
+    return {'statistics': run_analysis(data, 'statistics', generate)}
+
+def detect_job(job, data):
+    detector = components.get('detector')
+    
+    def detect(packets):
+        if not packets:
+            return []
+        # One pass in chunks, so progress and cancellation follow the packets
+        engine = detector.engine()
+        for chunk in job.track(packets):
+            engine.feed(chunk)
+        results = engine.finish()
+        return [issue for check in detector.checks for issue in results[check]]
+    
+    return {'issues': run_analysis(data, 'issues', detect)}
+
+JOB_TYPES = {
+    'capture': capture_job,
+    'analyze': analyze_job,
+    'statistics': statistics_job,
+    'detect-issues': detect_job
+}
+
+def job_not_found(error):
+    return jsonify({
+        'success': False,
+        'error': f'Unknown or expired job: {error.args[0]}'
+    }), 404
+
+@app.route('/api/jobs', methods=['POST'])
+def submit_job():
+    """
+    Queue a capture or analysis job and return its job_id at once.
+    The body is {"type": ..., plus the same fields as the matching endpoint}.
+    """
+    try:
+        data = request.get_json() or {}
+        job_type = data.get('type')
+        if job_type not in JOB_TYPES:
+            return jsonify({
+                'success': False,
+                'error': f"Unknown job type {job_type!r}, expected one of {sorted(JOB_TYPES)}"
+            }), 400
+        
+        # Reject bad input now rather than in a failed job
+        if data.get('filter'):
+            compile_filter(data['filter'])
+        if data.get('capture_id'):
+            sessions.get(data['capture_id'])
+        
+        job = jobs.submit(job_type, JOB_TYPES[job_type], data)
+        return jsonify({
+            'success': True,
+            'job': job.info()
+        }), 202
+        
+    except FilterSyntaxError as e:
+        return filter_error(e)
+    except CaptureNotFoundError as e:
+        return capture_not_found(e)
+    except JobQueueFullError as e:
+        return jsonify({
+            'success': False,
+            'error': f'Job queue is full: {e}'
+        }), 429
+
+@app.route('/api/jobs', methods=['GET'])
+def list_jobs():
+    return jsonify({
+        'success': True,
+        'jobs': jobs.list()
+    })
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Poll a job's status, progress and (once finished) result"""
+    try:
+        return jsonify({
+            'success': True,
+            'job': jobs.get(job_id).info()
+        })
+    except JobNotFoundError as e:
+        return job_not_found(e)
+
+@app.route('/api/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    """Cancel a queued or running job"""
+    try:
+        return jsonify({
+            'success': True,
+            'job': jobs.cancel(job_id).info()
+        })
+    except JobNotFoundError as e:
+        return job_not_found(e)
+
 @app.route('/api/storage/save', methods=['POST'])
 def save_capture():
     """Save capture to file"""
     try:
         data = request.get_json()
-        packets = data.get('packets', [])
+        if data.get('capture_id'):
+            packets = sessions.get(data['capture_id']).packets
+        else:
+            packets = data.get('packets', [])
         filename = data.get('filename')
         format = data.get('format', 'json')
         
-        storage = PacketStorage()
+        storage = components.get('storage')
         success = storage.save_capture(packets, filename, format)
         
         return jsonify({
@@ -150,6 +544,8 @@ def save_capture():
             'message': 'Capture saved successfully' if success else 'Failed to save capture'
         })
         
+    except CaptureNotFoundError as e:
+        return capture_not_found(e)
     except Exception as e:
         return jsonify({
             'success': False,
@@ -160,13 +556,17 @@ def save_capture():
 def load_capture_file(filename):
     """Load capture from file"""
     try:
-        storage = PacketStorage()
-        packets = storage.load_capture(filename)
+        storage = components.get('storage')
+        packets = storage.load_capture(filename, request.args.get('filter'))
         
         if packets:
+            session = sessions.create(packets, source=filename)
+            if isinstance(packets, PacketBatch):
+                packets = packets.to_packets()
             return jsonify({
                 'success': True,
-                'packets': packets
+                'capture_id': session.capture_id,
+                'packets': packet_list(packets, wants_compact())
             })
         else:
             return jsonify({
@@ -174,6 +574,48 @@ def load_capture_file(filename):
                 'error': 'Failed to load capture'
             }), 404
             
+    except FilterSyntaxError as e:
+        return filter_error(e)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/storage/captures/<filename>/packets', methods=['GET'])
+def get_capture_page(filename):
+    """
+    Read one page of a saved capture: ?offset=&limit= or ?cursor= from the
+    previous page, plus an optional ?filter=. Only the page is read from disk.
+    """
+    try:
+        storage = components.get('storage')
+        page = storage.read_page(
+            filename,
+            offset=request.args.get('offset', 0, type=int),
+            limit=request.args.get('limit', DEFAULT_PAGE_SIZE, type=int),
+            filter_expression=request.args.get('filter'),
+            cursor=request.args.get('cursor')
+        )
+        if page is None:
+            return jsonify({
+                'success': False,
+                'error': f'Capture not found: {filename}'
+            }), 404
+        
+        packets = page.pop('packets')
+        if isinstance(packets, PacketBatch):
+            packets = packets.to_packets()
+        return jsonify(dict(page, success=True, packets=packet_list(packets, wants_compact()),
+                            count=len(packets), has_more=page['next_cursor'] is not None))
+        
+    except FilterSyntaxError as e:
+        return filter_error(e)
+    except InvalidCursorError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -184,7 +626,7 @@ def load_capture_file(filename):
 def list_saved_captures():
     """List all saved captures"""
     try:
-        storage = PacketStorage()
+        storage = components.get('storage')
         captures = storage.list_captures()
         
         return jsonify({
@@ -202,7 +644,7 @@ def list_saved_captures():
 def delete_capture_file(filename):
     """Delete a capture file"""
     try:
-        storage = PacketStorage()
+        storage = components.get('storage')
         success = storage.delete_capture(filename)
         
         return jsonify({
@@ -216,9 +658,65 @@ def delete_capture_file(filename):
             'error': str(e)
         }), 500
         
+@app.route('/api/captures', methods=['GET'])
+def list_capture_sessions():
+    """List server-side capture sessions"""
+    return jsonify({
+        'success': True,
+        'captures': sessions.list()
+    })
+
+@app.route('/api/captures/<capture_id>', methods=['GET'])
+def get_capture_session(capture_id):
+    """Describe a server-side capture session"""
+    try:
+        return jsonify({
+            'success': True,
+            'capture': sessions.get(capture_id).info()
+        })
+    except CaptureNotFoundError as e:
+        return capture_not_found(e)
+
+@app.route('/api/captures/<capture_id>', methods=['DELETE'])
+def delete_capture_session(capture_id):
+    """Free a server-side capture session"""
+    deleted = sessions.delete(capture_id)
+    return jsonify({
+        'success': deleted,
+        'message': 'Capture session deleted' if deleted else 'Unknown capture session'
+    }), 200 if deleted else 404
+
+@app.route('/api/cache', methods=['GET'])
+def get_cache_stats():
+    """Result cache size, hit/miss counters and 304 responses served"""
+    return jsonify({
+        'success': True,
+        'cache': result_cache.stats()
+    })
+
+@app.route('/api/latency', methods=['GET'])
+def get_latency():
+    """p50/p90/p99 request latency per endpoint since startup (or the last reset)"""
+    return jsonify({
+        'success': True,
+        'latency': latency.snapshot()
+    })
+
+@app.route('/api/latency', methods=['DELETE'])
+def reset_latency():
+    latency.reset()
+    return jsonify({'success': True})
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Counters, gauges and histograms in the Prometheus text format"""
+    return Response(metrics.render(), content_type=METRICS_CONTENT_TYPE)
+
+warm_up()
 
 if __name__ == '__main__':
     print("🚀 Packet Analyzer API Starting...")
     print("📡 Using your existing src/ modules")
     print("🌐 API: http://localhost:5000")
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    print("⚡ For many concurrent clients run the async server: uvicorn asgi_app:app")
+    app.run(debug=os.environ.get('FLASK_DEBUG') == '1', threaded=True, host='0.0.0.0', port=5000)
\ No newline at end of file
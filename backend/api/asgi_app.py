@@ -0,0 +1,136 @@
+# api/asgi_app.py
+"""
+Async (ASGI) server mode for many concurrent clients.
+
+    cd backend/api && uvicorn asgi_app:app --host 0.0.0.0 --port 5000
+
+Streaming captures are served on the event loop: the capture runs in a
+bounded executor and an idle client costs a coroutine, not a thread, so
+thousands of streams can stay open. Every other route is the Flask app
+from app.py behind a WSGI bridge that runs requests in parallel on a pool
+of WSGI_WORKERS threads, so the route surface, sessions, jobs and caches
+are exactly the same as in the threaded server. Stream responses also go
+through the Flask app's hooks, so they get the same CORS headers and
+latency metrics as every other route.
+"""
+import asyncio
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl
+
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+from werkzeug.datastructures import MultiDict
+
+sys.path.append(os.path.dirname(__file__))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import app as flask_api
+
+# Concurrent sniffs/simulations feeding streams; more streams queue for a slot
+CAPTURE_WORKERS = 32
+# Threads running Flask routes (file I/O, CPU analysis)
+WSGI_WORKERS = 64
+
+capture_executor = ThreadPoolExecutor(max_workers=CAPTURE_WORKERS, thread_name_prefix='capture')
+
+STREAM_PATH = '/api/capture/stream'
+
+
+class ParallelWsgiInstance(WsgiToAsgiInstance):
+    # asgiref runs WSGI apps thread-sensitively, i.e. every request on one
+    # shared thread; Flask routes are thread-safe, so run them on the
+    # loop's default executor instead
+    run_wsgi_app = sync_to_async(WsgiToAsgiInstance.__dict__['run_wsgi_app'].func,
+                                 thread_sensitive=False)
+
+
+class ParallelWsgiToAsgi(WsgiToAsgi):
+    """WsgiToAsgi that serves requests concurrently on the default executor"""
+    
+    async def __call__(self, scope, receive, send):
+        await ParallelWsgiInstance(self.wsgi_application)(scope, receive, send)
+
+
+wsgi_app = ParallelWsgiToAsgi(flask_api.app)
+
+
+def stream_response_start(scope):
+    """
+    Status and headers for a stream response, passed through the Flask
+    app's request hooks (CORS, latency and metrics) like any other route.
+    """
+    headers = [(name.decode('latin-1'), value.decode('latin-1')) for name, value in scope['headers']]
+    with flask_api.app.test_request_context(scope['path'], method=scope['method'], headers=headers,
+                                            query_string=scope.get('query_string', b'')):
+        flask_api.app.preprocess_request()
+        response = flask_api.app.response_class(iter(()), mimetype='text/event-stream',
+                                                headers=flask_api.SSE_HEADERS)
+        response = flask_api.app.process_response(response)
+    return {'type': 'http.response.start', 'status': response.status_code,
+            'headers': [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                        for name, value in response.headers.items()]}
+
+
+async def stream_capture(scope, receive, send):
+    """Native async version of GET /api/capture/stream"""
+    args = MultiDict(parse_qsl(scope.get('query_string', b'').decode('latin-1')))
+    capturer, stream, run_capture = flask_api.new_capture_stream(args)
+    loop = asyncio.get_running_loop()
+    loop.run_in_executor(capture_executor, run_capture)
+
+    disconnected = asyncio.Event()
+
+    async def watch_disconnect():
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+        disconnected.set()
+        capturer.stop()
+
+    watcher = asyncio.create_task(watch_disconnect())
+    try:
+        await send(stream_response_start(scope))
+        async for chunk in stream.async_events():
+            if disconnected.is_set():
+                break
+            await send({'type': 'http.response.body', 'body': chunk.encode('utf-8'), 'more_body': True})
+        if not disconnected.is_set():
+            await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+    finally:
+        # The capture thread notices stop() and finishes on its own
+        capturer.stop()
+        watcher.cancel()
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            # Flask routes run in parallel on the loop's default executor
+            asyncio.get_running_loop().set_default_executor(
+                ThreadPoolExecutor(max_workers=WSGI_WORKERS, thread_name_prefix='wsgi'))
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            flask_api.jobs.shutdown(wait=False)
+            capture_executor.shutdown(wait=False)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    """ASGI entry point: streams on the event loop, everything else via Flask"""
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+    elif scope['type'] == 'http' and scope['path'] == STREAM_PATH and scope['method'] == 'GET':
+        await stream_capture(scope, receive, send)
+    else:
+        await wsgi_app(scope, receive, send)
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    print("🚀 Packet Analyzer API (async) Starting...")
+    print("🌐 API: http://localhost:5000")
+    uvicorn.run(app, host='0.0.0.0', port=5000, log_level='warning')
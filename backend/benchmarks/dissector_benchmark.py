@@ -0,0 +1,79 @@
+# benchmarks/dissector_benchmark.py
+"""
+Compare packets/s of the struct/memoryview fast path against Scapy.
+
+Usage:
+    python benchmarks/dissector_benchmark.py                 # synthetic trace
+    python benchmarks/dissector_benchmark.py trace.pcap      # your own trace
+"""
+import os
+import random
+import socket
+import struct
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.parser import ProtocolParser
+from src.pcap_reader import PcapReader
+
+
+def synthetic_trace(count=50000):
+    """Build a mix of Ethernet/IPv4 TCP and UDP frames"""
+    records = []
+    for i in range(count):
+        src = socket.inet_aton(f"10.0.{i % 250}.{(i * 7) % 250 + 1}")
+        dst = socket.inet_aton(f"192.168.1.{(i * 13) % 250 + 1}")
+        if i % 3:
+            l4 = struct.pack('!HHIIHHHH', 40000 + i % 1000, 443, i, i, (5 << 12) | 0x18, 65535, 0, 0)
+            proto = 6
+        else:
+            l4 = struct.pack('!HHHH', 50000 + i % 1000, 53, 8, 0)
+            proto = 17
+        payload = b'x' * random.randint(0, 200)
+        ip = struct.pack('!BBHHHBBH4s4s', 0x45, 0, 20 + len(l4) + len(payload), i & 0xFFFF, 0, 64,
+                         proto, 0, src, dst)
+        frame = b'\x00\x11\x22\x33\x44\x55\x66\x77\x88\x99\xaa\xbb\x08\x00' + ip + l4 + payload
+        records.append((1, frame))
+    return records
+
+
+def run(parser, packets):
+    start = time.perf_counter()
+    for packet_info in packets:
+        parser.parse_packet(packet_info)
+    elapsed = time.perf_counter() - start
+    return len(packets) / elapsed if elapsed else float('inf')
+
+
+def main():
+    if len(sys.argv) > 1:
+        records = [(r.linktype, r.data) for r in PcapReader(sys.argv[1])]
+        source = sys.argv[1]
+    else:
+        records = synthetic_trace()
+        source = 'synthetic trace'
+
+    packets = [
+        {'number': i, 'protocol': 'TCP', 'real_packet': True, 'raw_bytes': data, 'linktype': linktype}
+        for i, (linktype, data) in enumerate(records, 1)
+    ]
+    print(f"📦 {len(packets)} packets from {source}")
+
+    fast_rate = run(ProtocolParser(use_fast_path=True), packets)
+    print(f"⚡ Fast path:  {fast_rate:,.0f} packets/s")
+
+    try:
+        import scapy.all  # noqa: F401
+    except ImportError:
+        print("💡 Scapy not installed - skipping Scapy path")
+        return
+
+    scapy_rate = run(ProtocolParser(use_fast_path=False), packets)
+    print(f"🐢 Scapy path: {scapy_rate:,.0f} packets/s")
+    print(f"🚀 Speedup:    {fast_rate / scapy_rate:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+# benchmarks/load_test.py
+"""
+Load-test a running API server and report requests/s and tail latency.
+
+Request mode keeps `--concurrency` keep-alive connections busy against one
+endpoint for `--duration` seconds. Stream mode opens `--streams` capture
+streams at once and reports how many stayed connected and how long the
+first event took. Only the standard library is needed.
+
+Usage:
+    python benchmarks/load_test.py --endpoint /api/health --concurrency 100
+    python benchmarks/load_test.py --endpoint /api/statistics --method POST \\
+        --body '{"capture_id": "<id>"}'
+    python benchmarks/load_test.py --streams 2000 --duration 30
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from urllib.parse import urlsplit
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.latency import LatencyHistogram
+
+
+class HttpConnection:
+    """Minimal HTTP/1.1 keep-alive client on asyncio streams"""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def request(self, method, path, body=None, headers=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+        payload = body.encode('utf-8') if body else b''
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}",
+                 "Connection: keep-alive", f"Content-Length: {len(payload)}"]
+        if payload:
+            lines.append("Content-Type: application/json")
+        lines.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode('latin-1') + payload)
+        await self.writer.drain()
+
+        status, response_headers = await self.read_head()
+        if 'content-length' in response_headers:
+            await self.reader.readexactly(int(response_headers['content-length']))
+        elif response_headers.get('transfer-encoding') == 'chunked':
+            await self.read_chunked()
+        elif status not in (204, 304):
+            await self.reader.read()  # Body ends when the server closes
+            await self.close()
+        if response_headers.get('connection', '').lower() == 'close':
+            await self.close()
+        return status
+
+    async def read_head(self):
+        head = await self.reader.readuntil(b"\r\n\r\n")
+        status_line, *header_lines = head.decode('latin-1').split("\r\n")
+        headers = {}
+        for line in header_lines:
+            if ':' in line:
+                name, value = line.split(':', 1)
+                headers[name.strip().lower()] = value.strip()
+        if status_line.startswith('HTTP/1.0') and headers.get('connection', '').lower() != 'keep-alive':
+            headers['connection'] = 'close'
+        return int(status_line.split()[1]), headers
+
+    async def read_chunked(self):
+        while True:
+            size = int((await self.reader.readline()).split(b';')[0], 16)
+            await self.reader.readexactly(size + 2)
+            if size == 0:
+                return
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except OSError:
+                pass
+        self.reader = self.writer = None
+
+
+async def request_worker(target, args, deadline, histogram, results):
+    connection = HttpConnection(target.hostname, target.port or 80)
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            status = await connection.request(args.method, args.endpoint, args.body)
+        except (OSError, asyncio.IncompleteReadError, ValueError):
+            results['errors'] += 1
+            await connection.close()
+            continue
+        histogram.record(time.perf_counter() - start)
+        results['ok' if status < 400 else 'errors'] += 1
+    await connection.close()
+
+
+async def stream_client(target, args, deadline, first_event, results):
+    path = f"/api/capture/stream?count={args.stream_packets}&flushInterval={args.flush_interval}"
+    start = time.perf_counter()
+    try:
+        reader, writer = await asyncio.open_connection(target.hostname, target.port or 80)
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: {target.hostname}\r\n"
+                     f"Accept: text/event-stream\r\n\r\n".encode('latin-1'))
+        await writer.drain()
+        await reader.readuntil(b"\r\n\r\n")
+        results['connected'] += 1
+
+        seen_first = False
+        while time.perf_counter() < deadline:
+            line = await asyncio.wait_for(reader.readline(), timeout=max(deadline - time.perf_counter(), 0.01))
+            if not line:
+                break
+            if line.startswith(b'event:'):
+                results['events'] += 1
+                if not seen_first:
+                    first_event.record(time.perf_counter() - start)
+                    seen_first = True
+        results['held'] += 1
+        writer.close()
+    except asyncio.TimeoutError:
+        results['held'] += 1
+    except (OSError, asyncio.IncompleteReadError):
+        results['errors'] += 1
+
+
+def print_latency(label, histogram):
+    snapshot = histogram.snapshot()
+    print(f"   {label}: p50 {snapshot['p50_ms']} ms, p90 {snapshot['p90_ms']} ms, "
+          f"p99 {snapshot['p99_ms']} ms, max {snapshot['max_ms']} ms")
+
+
+async def run_requests(target, args):
+    histogram = LatencyHistogram()
+    results = {'ok': 0, 'errors': 0}
+    start = time.perf_counter()
+    deadline = start + args.duration
+    await asyncio.gather(*(request_worker(target, args, deadline, histogram, results)
+                           for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+
+    print(f"🎯 {args.method} {args.endpoint} with {args.concurrency} connections for {elapsed:.1f}s")
+    print(f"   Requests: {results['ok']} ok, {results['errors']} errors")
+    print(f"   Throughput: {results['ok'] / elapsed:,.1f} requests/s")
+    print_latency("Latency", histogram)
+
+
+async def run_streams(target, args):
+    first_event = LatencyHistogram()
+    results = {'connected': 0, 'held': 0, 'events': 0, 'errors': 0}
+    deadline = time.perf_counter() + args.duration
+    await asyncio.gather(*(stream_client(target, args, deadline, first_event, results)
+                           for _ in range(args.streams)))
+
+    print(f"📡 {args.streams} capture streams for {args.duration:.0f}s")
+    print(f"   Connected: {results['connected']}, held to the end: {results['held']}, "
+          f"errors: {results['errors']}")
+    print(f"   Events received: {results['events']}")
+    print_latency("Time to first event", first_event)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the Packet Analyzer API")
+    parser.add_argument('--url', default='http://localhost:5000', help='Server base URL')
+    parser.add_argument('--endpoint', default='/api/health', help='Path to request')
+    parser.add_argument('--method', default='GET')
+    parser.add_argument('--body', help='JSON request body')
+    parser.add_argument('--concurrency', type=int, default=50, help='Concurrent connections')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds to run')
+    parser.add_argument('--streams', type=int, default=0, help='Open this many capture streams instead')
+    parser.add_argument('--stream-packets', type=int, default=100, help='Packets per streamed capture')
+    parser.add_argument('--flush-interval', type=float, default=1.0)
+    args = parser.parse_args()
+
+    if args.body:
+        json.loads(args.body)  # Fail early on malformed JSON
+    target = urlsplit(args.url)
+    asyncio.run(run_streams(target, args) if args.streams else run_requests(target, args))
+
+
+if __name__ == "__main__":
+    main()
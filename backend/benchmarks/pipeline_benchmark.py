@@ -0,0 +1,54 @@
+# benchmarks/pipeline_benchmark.py
+"""
+Measure how statistics + issue detection scale with ParallelPipeline workers.
+
+Usage:
+    python benchmarks/pipeline_benchmark.py                 # synthetic trace
+    python benchmarks/pipeline_benchmark.py trace.pcap      # your own trace
+"""
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.capturer import PacketCapturer
+from src.pipeline import ParallelPipeline
+from dissector_benchmark import synthetic_trace
+
+
+def load_packets():
+    capturer = PacketCapturer()
+    if len(sys.argv) > 1:
+        return list(capturer.iter_pcap(sys.argv[1])), sys.argv[1]
+
+    packets = []
+    for number, (linktype, data) in enumerate(synthetic_trace(200000), start=1):
+        fields = capturer.dissector.dissect(data, linktype)
+        packet_info = {'number': number, 'timestamp': number * 0.001, 'length': len(data),
+                       'protocol': fields['protocol'], 'summary': fields['summary'],
+                       'real_packet': True}
+        capturer._apply_fields(packet_info, fields)
+        packets.append(packet_info)
+    return packets, 'synthetic trace'
+
+
+def main():
+    packets, source = load_packets()
+    print(f"📦 {len(packets)} packets from {source}")
+
+    baseline = None
+    workers = 1
+    while workers <= (os.cpu_count() or 1):
+        pipeline = ParallelPipeline(workers=workers)
+        start = time.perf_counter()
+        pipeline.run(packets)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"⚙️  {workers:>3} workers: {len(packets) / elapsed:>12,.0f} packets/s "
+              f"(speedup {baseline / elapsed:.1f}x)")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# benchmarks/serialization_benchmark.py
+"""
+Measure serialize time and bytes on the wire for a large packet response.
+
+Compares every installed serializer (stdlib json, orjson), the plain and
+compact packet representations, and identity/gzip/deflate encodings.
+
+Usage:
+    python benchmarks/serialization_benchmark.py            # 100k packets
+    python benchmarks/serialization_benchmark.py 500000
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.capturer import PacketCapturer
+from src.streaming import packet_summary
+from src.serialization import SERIALIZERS, compact_packets, compress
+from dissector_benchmark import synthetic_trace
+
+
+def load_packets(count):
+    capturer = PacketCapturer()
+    packets = []
+    for number, (linktype, data) in enumerate(synthetic_trace(count), start=1):
+        fields = capturer.dissector.dissect(data, linktype)
+        packet_info = {'number': number, 'timestamp': 1700000000.0 + number * 0.001,
+                       'length': len(data), 'protocol': fields['protocol'],
+                       'summary': fields['summary'], 'real_packet': True}
+        capturer._apply_fields(packet_info, fields)
+        packets.append(packet_summary(packet_info))
+    return packets
+
+
+def timed(func, repeat=3):
+    """Best of repeat runs, in seconds, plus the last result"""
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    packets = load_packets(count)
+    print(f"📦 {count:,} packet summaries")
+
+    # What the API sent before: stdlib json with indentation-free jsonify defaults
+    baseline, body = timed(lambda: json.dumps({'packets': packets}).encode('utf-8'))
+    print(f"📏 Baseline stdlib jsonify: {baseline * 1000:8.1f} ms  {len(body) / 1024:10,.0f} KB\n")
+
+    print(f"{'serializer':<8} {'layout':<8} {'encoding':<8} {'encode ms':>10} {'compress ms':>12} {'KB':>10}")
+    for name, serializer_class in SERIALIZERS.items():
+        serializer = serializer_class()
+        for layout in ('dicts', 'compact'):
+            payload = {'packets': compact_packets(packets) if layout == 'compact' else packets}
+            encode_time, body = timed(lambda: serializer.dumps(payload))
+            for encoding in (None, 'gzip', 'deflate'):
+                compress_time, wire = timed(lambda: compress(body, encoding), repeat=1)
+                print(f"{name:<8} {layout:<8} {encoding or 'identity':<8} {encode_time * 1000:>10.1f} "
+                      f"{compress_time * 1000:>12.1f} {len(wire) / 1024:>10,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,9 @@ setup(
     install_requires=[
         "scapy>=2.4.5",
     ],
+    extras_require={
+        "fast": ["orjson>=3.6"],  # Faster JSON responses and capture files
+    },
     entry_points={
         'console_scripts': [
             'packetanalyzer=cli:main',
@@ -0,0 +1,88 @@
+# src/aggregation.py
+
+DEFAULT_AGGREGATION_WINDOW = 60.0   # seconds of quiet before a repeating issue opens a new entry
+MAX_SAMPLES = 3                     # packet references kept per aggregated issue
+
+
+def _sample(packet, timestamp):
+    return {'number': packet.get('number'), 'timestamp': timestamp}
+
+
+class IssueAggregator:
+    """
+    Folds repeated issues into one entry per (type, key, time window).
+
+    Issues reported with the same type and key while they keep recurring
+    (no gap longer than `window` seconds of packet time) become a single
+    entry with a count, first/last seen and up to max_samples packet
+    references, so the output grows with distinct problems rather than
+    with packets. Issues reported without a key are kept as they are.
+    """
+
+    def __init__(self, window=DEFAULT_AGGREGATION_WINDOW, max_samples=MAX_SAMPLES):
+        self.window = window
+        self.max_samples = max_samples
+        self.issues = []   # Entries in the order they were first reported
+        self._open = {}    # (type, key) -> latest entry
+
+    def __len__(self):
+        return len(self.issues)
+
+    def add(self, issue, key=None, packet=None):
+        """Report one occurrence; returns the entry it was counted in"""
+        timestamp = packet.get('timestamp') if packet is not None else None
+        group = (issue['type'], key)
+        entry = self._open.get(group) if key is not None else None
+
+        if entry is not None and not self._gap(entry, timestamp):
+            entry['count'] += 1
+            if timestamp is not None:
+                if entry['first_seen'] is None or timestamp < entry['first_seen']:
+                    entry['first_seen'] = timestamp
+                if entry['last_seen'] is None or timestamp > entry['last_seen']:
+                    entry['last_seen'] = timestamp
+            if packet is not None and len(entry['samples']) < self.max_samples:
+                entry['samples'].append(_sample(packet, timestamp))
+            return entry
+
+        entry = dict(issue)
+        entry.setdefault('count', 1)
+        entry.setdefault('first_seen', timestamp)
+        entry.setdefault('last_seen', timestamp)
+        entry.setdefault('samples', [_sample(packet, timestamp)] if packet is not None else [])
+        self.issues.append(entry)
+        if key is not None:
+            self._open[group] = entry
+        return entry
+
+    def _gap(self, entry, timestamp):
+        """True if timestamp is too long after the entry's last occurrence"""
+        if timestamp is None or entry['last_seen'] is None:
+            return False
+        return timestamp - entry['last_seen'] > self.window
+
+
+def merge_issues(issues, window=DEFAULT_AGGREGATION_WINDOW, max_samples=MAX_SAMPLES):
+    """
+    Merge aggregated issues from several partial runs (e.g. pipeline shards).
+
+    Entries describing the same problem (equal type, description and
+    details) whose time spans are within window seconds of each other are
+    combined; the result keeps first-seen order.
+    """
+    merged = []
+    latest = {}
+    for issue in sorted(issues, key=lambda issue: (issue.get('first_seen') is None, issue.get('first_seen') or 0)):
+        identity = (issue['type'], issue['description'], issue['details'])
+        entry = latest.get(identity)
+        first_seen = issue.get('first_seen')
+        if (entry is None or first_seen is None or entry['last_seen'] is None
+                or first_seen - entry['last_seen'] > window):
+            entry = latest[identity] = dict(issue, samples=list(issue.get('samples', ())))
+            merged.append(entry)
+            continue
+        entry['count'] = entry.get('count', 1) + issue.get('count', 1)
+        if issue.get('last_seen') is not None:
+            entry['last_seen'] = max(entry['last_seen'], issue['last_seen'])
+        entry['samples'] = (entry['samples'] + issue.get('samples', []))[:max_samples]
+    return merged
@@ -0,0 +1,384 @@
+# src/batch.py
+import socket
+from array import array
+from collections import Counter
+from collections.abc import Mapping
+
+from src.dissector import format_tcp_flags
+
+# Letters used by Scapy-style flag strings, mapped back to their bits
+_TCP_FLAG_BITS = {letter: 1 << i for i, letter in enumerate('FSRPAUECN')}
+
+# Bits in the 'flags' column
+_REAL_PACKET = 0x01
+_HAS_PORTS = 0x02
+_HAS_TCP_SEQ = 0x04     # tcp_seq, tcp_ack and tcp_window are set
+_HAS_PAYLOAD = 0x08     # payload_length is set
+
+# Largest value the uint32 length columns can hold
+_MAX_LENGTH = 0xFFFFFFFF
+
+
+def parse_tcp_flags(flags):
+    """Convert a Scapy-style flag string ('SA') to bits"""
+    bits = 0
+    for letter in flags or '':
+        bits |= _TCP_FLAG_BITS.get(letter, 0)
+    return bits
+
+
+class PacketRow(Mapping):
+    """
+    Read-only, dict-compatible view of one packet in a PacketBatch.
+    Lets existing code keep calling packet.get('protocol') on batches.
+    """
+
+    __slots__ = ('_batch', '_index')
+
+    def __init__(self, batch, index):
+        self._batch = batch
+        self._index = index
+
+    def __getitem__(self, key):
+        value = self._batch._field(self._index, key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __iter__(self):
+        return iter(self._batch._row_keys(self._index))
+
+    def __len__(self):
+        return len(self._batch._row_keys(self._index))
+
+    def copy(self):
+        """Materialize the row as a plain dict"""
+        return dict(self.items())
+
+    def __repr__(self):
+        return f"PacketRow({self.copy()!r})"
+
+
+class PacketBatch:
+    """
+    Columnar container for packets.
+
+    Each field is stored in a typed array instead of a per-packet dict:
+    timestamps as float64, lengths as uint32 (jumbo and offloaded frames
+    exceed 64 KiB), ports as uint16, protocols as interned uint8 codes and
+    IPv4 addresses as uint32. IPv6 addresses are interned and the address
+    column holds their index. Roughly 33 bytes per packet.
+
+    The TCP sequence columns (TCP_COLUMNS) stay empty until a packet carries
+    sequence numbers or a payload length, then hold a value for every row
+    (14 more bytes per packet), so captures without them keep the footprint.
+    The dns_query column works the same way: it starts with the first DNS
+    query and holds 1 + the index of the interned query name (0 for none).
+
+    Only COLUMNS are stored, so the dict round trip is lossy: a row's
+    'summary' is rebuilt from the columns ("TCP 10.0.0.1:1234 > 10.0.0.2:80 S")
+    rather than kept as captured, and any other keys are dropped. Keep the
+    original dicts where the exact records matter (e.g. saved JSON captures).
+    """
+
+    TCP_COLUMNS = ('tcp_seq', 'tcp_ack', 'tcp_window', 'payload_length')
+    DNS_COLUMNS = ('dns_query',)
+    COLUMNS = ('number', 'timestamp', 'length', 'protocol', 'ip_version',
+               'src_ip', 'dst_ip', 'src_port', 'dst_port', 'tcp_flags', 'flags') + TCP_COLUMNS + DNS_COLUMNS
+
+    def __init__(self):
+        self.number = array('I')
+        self.timestamp = array('d')
+        self.length = array('I')
+        self.protocol = array('B')
+        self.ip_version = array('B')
+        self.src_ip = array('I')
+        self.dst_ip = array('I')
+        self.src_port = array('H')
+        self.dst_port = array('H')
+        self.tcp_flags = array('H')
+        self.flags = array('B')
+        self.tcp_seq = array('I')
+        self.tcp_ack = array('I')
+        self.tcp_window = array('H')
+        self.payload_length = array('I')
+        self.dns_query = array('I')
+
+        self.protocols = []          # code -> protocol name
+        self._protocol_codes = {}    # protocol name -> code
+        self.ipv6_addresses = []     # index -> 16 packed bytes
+        self._ipv6_index = {}        # 16 packed bytes -> index
+        self.dns_names = []          # dns_query value - 1 -> query name
+        self._dns_index = {}         # query name -> dns_query value
+
+    @classmethod
+    def from_packets(cls, packets):
+        """Build a batch from an iterable of packet_info dicts"""
+        batch = cls()
+        batch.extend(packets)
+        return batch
+
+    # ------------------------------------------------------------------
+    # Building
+    # ------------------------------------------------------------------
+
+    def append(self, packet_info):
+        """Append one packet_info dict"""
+        self.number.append(packet_info.get('number', len(self.number) + 1) or 0)
+        self.timestamp.append(packet_info.get('timestamp', 0) or 0.0)
+        self.length.append(min(max(packet_info.get('length', 0) or 0, 0), _MAX_LENGTH))
+        self.protocol.append(self.protocol_code(packet_info.get('protocol', 'Unknown')))
+
+        version, src, dst = self._encode_addresses(packet_info.get('src_ip'), packet_info.get('dst_ip'))
+        self.ip_version.append(version)
+        self.src_ip.append(src)
+        self.dst_ip.append(dst)
+
+        flags = _REAL_PACKET if packet_info.get('real_packet', False) else 0
+        src_port = packet_info.get('src_port')
+        dst_port = packet_info.get('dst_port')
+        if src_port is not None and dst_port is not None:
+            flags |= _HAS_PORTS
+        self.src_port.append(src_port or 0)
+        self.dst_port.append(dst_port or 0)
+        self.tcp_flags.append(parse_tcp_flags(packet_info.get('tcp_flags')))
+
+        seq = packet_info.get('tcp_seq')
+        payload_length = packet_info.get('payload_length')
+        if seq is not None or payload_length is not None or self.tcp_seq:
+            if not self.tcp_seq:
+                self._add_tcp_columns(len(self.flags))
+            if seq is not None:
+                flags |= _HAS_TCP_SEQ
+            if payload_length is not None:
+                flags |= _HAS_PAYLOAD
+            self.tcp_seq.append(seq or 0)
+            self.tcp_ack.append(packet_info.get('tcp_ack') or 0)
+            self.tcp_window.append(packet_info.get('tcp_window') or 0)
+            self.payload_length.append(min(payload_length or 0, _MAX_LENGTH))
+
+        query = packet_info.get('dns_query')
+        if query is not None or self.dns_query:
+            if not self.dns_query:
+                self.dns_query.frombytes(bytes(self.dns_query.itemsize * len(self.flags)))
+            self.dns_query.append(self._intern_dns(query) if query is not None else 0)
+        self.flags.append(flags)
+
+    def extend(self, packets):
+        """Append every packet_info dict from an iterable"""
+        append = self.append
+        for packet_info in packets:
+            append(packet_info)
+
+    def extend_batch(self, other):
+        """Append the rows of another batch with the same protocol and IPv6 tables"""
+        has_tcp = bool(self.tcp_seq) or bool(other.tcp_seq)
+        if has_tcp and not self.tcp_seq:
+            self._add_tcp_columns(len(self))
+        has_dns = bool(self.dns_query) or bool(other.dns_query)
+        if has_dns and not self.dns_query:
+            self.dns_query.frombytes(bytes(self.dns_query.itemsize * len(self)))
+        for name in self.COLUMNS:
+            if (name in self.TCP_COLUMNS and not has_tcp) or (name in self.DNS_COLUMNS and not has_dns):
+                continue
+            column = getattr(other, name)
+            if name in self.DNS_COLUMNS:
+                if other.dns_names is not self.dns_names:
+                    column = array('I', (self._intern_dns(other.dns_names[value - 1]) if value else 0
+                                         for value in column))
+            if name in self.TCP_COLUMNS + self.DNS_COLUMNS and not column:
+                column = array(column.typecode, bytes(column.itemsize * len(other)))
+            getattr(self, name).extend(column)
+
+    @property
+    def has_tcp_columns(self):
+        return bool(self.tcp_seq)
+
+    def _add_tcp_columns(self, rows):
+        """Start the TCP sequence columns, zero-filled for the first rows"""
+        for name in self.TCP_COLUMNS:
+            column = getattr(self, name)
+            column.frombytes(bytes(column.itemsize * rows))
+
+    def protocol_code(self, name):
+        """Return the interned uint8 code for a protocol name"""
+        code = self._protocol_codes.get(name)
+        if code is None:
+            if len(self.protocols) > 0xFF:
+                raise ValueError("PacketBatch supports at most 256 distinct protocols")
+            code = len(self.protocols)
+            self.protocols.append(name)
+            self._protocol_codes[name] = code
+        return code
+
+    def _encode_addresses(self, src_ip, dst_ip):
+        """Encode an address pair as (ip_version, src, dst) column values"""
+        if not src_ip or not dst_ip:
+            return 0, 0, 0
+        try:
+            if ':' in src_ip:
+                return 6, self._intern_ipv6(src_ip), self._intern_ipv6(dst_ip)
+            return (4, int.from_bytes(socket.inet_aton(src_ip), 'big'),
+                    int.from_bytes(socket.inet_aton(dst_ip), 'big'))
+        except (OSError, TypeError):
+            return 0, 0, 0  # Not an IP address (e.g. 'N/A')
+
+    def _intern_dns(self, name):
+        value = self._dns_index.get(name)
+        if value is None:
+            self.dns_names.append(name)
+            value = self._dns_index[name] = len(self.dns_names)
+        return value
+
+    def _intern_ipv6(self, address):
+        packed = socket.inet_pton(socket.AF_INET6, address)
+        index = self._ipv6_index.get(packed)
+        if index is None:
+            index = len(self.ipv6_addresses)
+            self.ipv6_addresses.append(packed)
+            self._ipv6_index[packed] = index
+        return index
+
+    # ------------------------------------------------------------------
+    # Access
+    # ------------------------------------------------------------------
+
+    def __len__(self):
+        return len(self.number)
+
+    def __iter__(self):
+        for index in range(len(self.number)):
+            yield PacketRow(self, index)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.take(range(*index.indices(len(self))))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("PacketBatch index out of range")
+        return PacketRow(self, index)
+
+    def take(self, indices):
+        """Return a new batch holding the packets at the given indices"""
+        result = PacketBatch()
+        result.protocols = list(self.protocols)
+        result._protocol_codes = dict(self._protocol_codes)
+        # The IPv6 table is append-only, so sharing it keeps indices valid
+        result.ipv6_addresses = self.ipv6_addresses
+        result._ipv6_index = self._ipv6_index
+        result.dns_names = self.dns_names
+        result._dns_index = self._dns_index
+
+        indices = list(indices)
+        for name in self.COLUMNS:
+            source = getattr(self, name)
+            if source:
+                getattr(result, name).extend(source[i] for i in indices)
+        return result
+
+    def to_packets(self):
+        """Materialize every row as a plain dict (for JSON and legacy callers)"""
+        return [row.copy() for row in self]
+
+    def protocol_name(self, code):
+        return self.protocols[code]
+
+    def protocol_counts(self):
+        """Return {protocol name: packet count} computed from the code column"""
+        return {self.protocols[code]: count for code, count in Counter(self.protocol).items()}
+
+    def ip_string(self, version, value):
+        """Format a stored address column value"""
+        if version == 4:
+            return socket.inet_ntoa(value.to_bytes(4, 'big'))
+        if version == 6:
+            return socket.inet_ntop(socket.AF_INET6, self.ipv6_addresses[value])
+        return None
+
+    def nbytes(self):
+        """Approximate memory used by the column arrays"""
+        columns = sum(getattr(self, name).itemsize * len(getattr(self, name)) for name in self.COLUMNS)
+        return columns + 16 * len(self.ipv6_addresses) + sum(len(name) for name in self.dns_names)
+
+    def to_numpy(self):
+        """
+        Return the columns as zero-copy NumPy arrays.
+        NumPy is optional - raises ImportError when it is not installed.
+        """
+        import numpy as np
+        return {name: np.frombuffer(getattr(self, name), dtype=getattr(self, name).typecode)
+                for name in self.COLUMNS}
+
+    # ------------------------------------------------------------------
+    # Row view support
+    # ------------------------------------------------------------------
+
+    def _row_keys(self, index):
+        keys = ['number', 'timestamp', 'length', 'protocol', 'summary', 'real_packet']
+        flags = self.flags[index]
+        if self.ip_version[index]:
+            keys += ['src_ip', 'dst_ip']
+        if flags & _HAS_PORTS:
+            keys += ['src_port', 'dst_port']
+        if self.tcp_flags[index]:
+            keys.append('tcp_flags')
+        if flags & _HAS_TCP_SEQ:
+            keys += ['tcp_seq', 'tcp_ack', 'tcp_window']
+        if flags & _HAS_PAYLOAD:
+            keys.append('payload_length')
+        if self.dns_query and self.dns_query[index]:
+            keys.append('dns_query')
+        return keys
+
+    def _field(self, index, key):
+        if key == 'number':
+            return self.number[index]
+        if key == 'timestamp':
+            return self.timestamp[index]
+        if key == 'length':
+            return self.length[index]
+        if key == 'protocol':
+            return self.protocols[self.protocol[index]]
+        if key == 'real_packet':
+            return bool(self.flags[index] & _REAL_PACKET)
+        if key in ('src_ip', 'dst_ip'):
+            column = self.src_ip if key == 'src_ip' else self.dst_ip
+            return self.ip_string(self.ip_version[index], column[index])
+        if key in ('src_port', 'dst_port'):
+            if not self.flags[index] & _HAS_PORTS:
+                return None
+            return (self.src_port if key == 'src_port' else self.dst_port)[index]
+        if key == 'tcp_flags':
+            return format_tcp_flags(self.tcp_flags[index]) or None
+        if key in ('tcp_seq', 'tcp_ack', 'tcp_window'):
+            if not self.flags[index] & _HAS_TCP_SEQ:
+                return None
+            return getattr(self, key)[index]
+        if key == 'payload_length':
+            if not self.flags[index] & _HAS_PAYLOAD:
+                return None
+            return self.payload_length[index]
+        if key == 'dns_query':
+            value = self.dns_query[index] if self.dns_query else 0
+            return self.dns_names[value - 1] if value else None
+        if key == 'summary':
+            return self._summary(index)
+        return None
+
+    def _summary(self, index):
+        """Rebuild a summary line from the decoded columns (not the captured one)"""
+        protocol = self.protocols[self.protocol[index]]
+        version = self.ip_version[index]
+        if not version:
+            return protocol
+
+        src = self.ip_string(version, self.src_ip[index])
+        dst = self.ip_string(version, self.dst_ip[index])
+        if self.flags[index] & _HAS_PORTS:
+            summary = f"{protocol} {src}:{self.src_port[index]} > {dst}:{self.dst_port[index]}"
+        else:
+            summary = f"{protocol} {src} > {dst}"
+        if self.tcp_flags[index]:
+            summary += f" {format_tcp_flags(self.tcp_flags[index])}"
+        return summary
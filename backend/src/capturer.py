@@ -1,35 +1,97 @@
 # src/capturer.py
 import time
 import random
+import struct
+from functools import lru_cache
+
+from src.pcap_reader import PcapReader, LINKTYPE_ETHERNET
+from src.dissector import PacketDissector
+from src.batch import PacketBatch
+from src.ringbuffer import PacketRing, DEFAULT_MAX_PACKETS, DEFAULT_MAX_BYTES, DROP_OLDEST
+from src.metrics import PACKETS_CAPTURED, PACKETS_DROPPED
+
+# Decoded header fields copied onto each packet_info record
+PACKET_FIELDS = ('src_ip', 'dst_ip', 'src_port', 'dst_port', 'tcp_flags',
+                 'tcp_seq', 'tcp_ack', 'tcp_window', 'payload_length', 'dns_query')
+
+# getsockopt() level/option for Linux packet socket statistics
+SOL_PACKET = 263
+PACKET_STATISTICS = 6
+
+@lru_cache(maxsize=None)
+def scapy_available():
+    """Import Scapy once per process and remember whether it worked"""
+    try:
+        import scapy.all
+        return True
+    except ImportError:
+        return False
 
 class PacketCapturer:
     """
     Packet capturer with real Scapy capability and simulation fallback
     """
     
-    def __init__(self, use_real_capture=False):
-        self.captured_packets = []
+    def __init__(self, use_real_capture=False, pcap_file=None, packet_filter=None,
+                 max_packets=DEFAULT_MAX_PACKETS, max_bytes=DEFAULT_MAX_BYTES, overflow=DROP_OLDEST):
+        # Bounded store: long captures drop the oldest packets (or block) instead of growing forever
+        self.ring = PacketRing(max_packets, max_bytes, overflow)
         self.packet_count = 0
         self.use_real_capture = use_real_capture
+        self.pcap_file = pcap_file
+        self.packet_filter = packet_filter  # PacketFilter pushed down to the kernel
+        self.capture_stats = None
+        self.listeners = []  # Callbacks run for every stored packet (e.g. streaming)
+        self.stop_requested = False
         self.scapy_available = self._check_scapy()
+        self.dissector = PacketDissector()
         
         print("✅ PacketCapturer created!")
-        if self.scapy_available and use_real_capture:
+        if pcap_file:
+            print(f"📂 Offline capture source: {pcap_file}")
+        elif self.scapy_available and use_real_capture:
             print("🔍 Real packet capture enabled")
         else:
             print("💡 Simulation mode (safe for development)")
     
+    @property
+    def captured_packets(self):
+        """Captured packets (a PacketRing that behaves like a list)"""
+        return self.ring
+    
+    @captured_packets.setter
+    def captured_packets(self, packets):
+        self.ring.clear()
+        self.ring.extend(packets)
+    
+    def add_listener(self, callback):
+        """Call callback(packet_info) for every packet as it is captured"""
+        self.listeners.append(callback)
+    
+    def stop(self):
+        """Ask a running capture to finish early"""
+        self.stop_requested = True
+    
+    def _store(self, packet_info, source):
+        """Keep a captured packet and hand it to the listeners"""
+        ring = self.ring
+        dropped = ring.dropped_packets
+        ring.append(packet_info)
+        PACKETS_CAPTURED.labels(source).inc()
+        if ring.dropped_packets != dropped:
+            PACKETS_DROPPED.labels('buffer').inc(ring.dropped_packets - dropped)
+        for callback in self.listeners:
+            callback(packet_info)
+    
     def _check_scapy(self):
-        """Check if Scapy is available"""
-        try:
-            import scapy.all
-            return True
-        except ImportError:
-            return False
+        """Check if Scapy is available (imported only on the first call)"""
+        return scapy_available()
     
     def start_capture(self, count=5, timeout=30):
-        """Start packet capture - real or simulated"""
-        if self.use_real_capture and self.scapy_available:
+        """Start packet capture - offline file, real or simulated"""
+        if self.pcap_file:
+            self.read_pcap(self.pcap_file, count)
+        elif self.use_real_capture and self.scapy_available:
             self._real_capture(count,timeout)
         else:
             self._simulated_capture(count,timeout)
@@ -42,32 +104,69 @@ class PacketCapturer:
             
             print(f"🎯 Capturing {count} REAL packets (timeout: {timeout}...")
             
+            bpf, residual = self._kernel_filter()
+            stats = self._new_capture_stats(bpf, residual)
+            
             packets_captured = 0
+            user_space_match = None  # Set once we know what the kernel will filter
             
             def process_packet(packet):
                 nonlocal packets_captured
-                packets_captured += 1
+                stats['packets_received'] += 1
                 
-                # Detect protocol from real packet
-                protocol = self._detect_protocol(packet)
+                # Detect protocol from raw bytes, falling back to Scapy layers
+                raw_bytes = bytes(packet)
+                linktype = scapy.conf.l2types.layer2num.get(packet.__class__, LINKTYPE_ETHERNET)
+                fields = self.dissector.dissect(raw_bytes, linktype)
+                if fields:
+                    protocol = fields['protocol']
+                    summary = fields['summary']
+                else:
+                    protocol = self._detect_protocol(packet)
+                    summary = packet.summary()
                 
                 packet_info = {
-                    'number': packets_captured,
-                    'timestamp': time.time(),
+                    'number': packets_captured + 1,
+                    'timestamp': float(packet.time),
                     'length': len(packet),
                     'protocol': protocol,
-                    'summary': packet.summary(),
+                    'summary': summary,
                     'real_packet': True,
-                    'raw_packet': packet 
+                    'raw_bytes': raw_bytes,
+                    'linktype': linktype
                 }
-                self.captured_packets.append(packet_info)
-                print(f"📦 #{packet_info['number']}: {protocol} - {packet.summary()}")
+                self._apply_fields(packet_info, fields)
+                
+                # Rules the kernel could not run are checked here
+                if user_space_match and not user_space_match(packet_info):
+                    return
                 
-                if packets_captured >= count:
-                    return True  # Stop capture
-                return False
+                packets_captured += 1
+                self._store(packet_info, 'live')
+                print(f"📦 #{packet_info['number']}: {protocol} - {summary}")
+            
+            def stop_capture(packet):
+                return packets_captured >= count or self.stop_requested
+            
+            sock = self._open_socket(scapy, bpf, stats)
+            user_space_match = self._user_space_match(stats, residual)
+            try:
+                scapy.sniff(prn=process_packet, stop_filter=stop_capture, timeout=timeout,
+                            opened_socket=sock, store=False)
+            finally:
+                stats['packets_kept'] = packets_captured
+                # Everything received but not kept was rejected by the user-space filter
+                stats['user_space_filtered'] = stats['packets_received'] - packets_captured
+                if sock is not None:
+                    stats['socket_dropped'] = self._socket_drops(sock)
+                    if stats['socket_dropped']:
+                        PACKETS_DROPPED.labels('socket').inc(stats['socket_dropped'])
+                    sock.close()
             
-            scapy.sniff(count=count, prn=process_packet, timeout=10)
+            self.packet_count = len(self.captured_packets)
+            stats['buffer_dropped'] = self.ring.dropped_packets
+            self.capture_stats = stats
+            self._show_capture_stats(stats)
             print("✅ Real capture completed!")
             
         except Exception as e:
@@ -75,6 +174,158 @@ class PacketCapturer:
             print("🔄 Falling back to simulation...")
             self._simulated_capture(count)
     
+    def _kernel_filter(self):
+        """Split the packet filter into a BPF string and a user-space residual"""
+        if self.packet_filter is None:
+            return None, None
+        return self.packet_filter.kernel_filter()
+    
+    def _new_capture_stats(self, bpf, residual):
+        return {
+            'kernel_filter': bpf,
+            'user_space_filter': str(residual) if residual else None,
+            # Packets the kernel filter rejects are never counted anywhere
+            'packets_received': 0,       # Delivered to user space (passed the kernel filter)
+            'packets_kept': 0,           # Passed the user-space filter and stored
+            'user_space_filtered': 0,    # packets_received - packets_kept
+            'socket_dropped': None,      # Lost to a full socket buffer/ring (Linux only)
+            'buffer_dropped': 0          # Overwritten or refused by the capture ring
+        }
+    
+    def _open_socket(self, scapy, bpf, stats):
+        """
+        Open the listening socket, with the BPF program attached so rejected
+        packets never leave the kernel. If the filter cannot be attached every
+        rule is checked in user space instead. Opening the socket here lets
+        its drop counter be read afterwards; returns None if it cannot be
+        opened, and sniff() opens its own.
+        """
+        if bpf:
+            try:
+                return scapy.conf.L2listen(filter=bpf)
+            except Exception as e:
+                print(f"⚠️  Kernel filter unavailable ({e}), filtering in user space")
+                stats['kernel_filter'] = None
+                stats['user_space_filter'] = str(self.packet_filter.compile())
+        try:
+            return scapy.conf.L2listen()
+        except Exception:
+            return None
+    
+    def _user_space_match(self, stats, residual):
+        """Predicate for the rules left to user space once the socket is open"""
+        if stats['kernel_filter'] is None and self.packet_filter is not None:
+            # No kernel program attached: every rule runs here
+            compiled = self.packet_filter.compile()
+            return compiled.predicate if compiled else None
+        return residual.predicate if residual else None
+    
+    def _socket_drops(self, sock):
+        """
+        Packets a Linux packet socket dropped because its buffer or ring was
+        full (tp_drops), or None. Filter rejects are not included.
+        """
+        try:
+            raw = sock.ins.getsockopt(SOL_PACKET, PACKET_STATISTICS, 8)
+            _, drops = struct.unpack('II', raw)
+            return drops
+        except Exception:
+            return None
+    
+    def _show_capture_stats(self, stats):
+        if stats['buffer_dropped']:
+            print(f"⚠️  Capture buffer full: {stats['buffer_dropped']} packets dropped ({self.ring.policy})")
+        if stats['socket_dropped']:
+            print(f"⚠️  Socket buffer full: {stats['socket_dropped']} packets dropped before reaching the capturer")
+        if not stats['kernel_filter'] and not stats['user_space_filter']:
+            return
+        print(f"🔍 Kernel filter: {stats['kernel_filter'] or 'none'}")
+        print(f"   User-space filter: {stats['user_space_filter'] or 'none'}")
+        print(f"   Received from kernel: {stats['packets_received']}")
+        print(f"   Filtered in user space: {stats['user_space_filtered']}")
+        print(f"   Kept: {stats['packets_kept']}")
+    
+    def read_pcap(self, filepath, count=None):
+        """Read packets from a pcap/pcapng file into captured_packets"""
+        print(f"📂 Reading packets from {filepath}...")
+        
+        for packet_info in self.iter_pcap(filepath, count):
+            if self.stop_requested:
+                break
+            self._store(packet_info, 'pcap')
+        
+        self.packet_count = len(self.captured_packets)
+        print(f"✅ Read {self.packet_count} packets from file")
+        if self.ring.dropped_packets:
+            print(f"⚠️  Capture buffer full: {self.ring.dropped_packets} packets dropped (use iter_pcap() to stream)")
+    
+    def iter_pcap(self, filepath, count=None):
+        """
+        Stream packet_info records from a pcap/pcapng file.
+        
+        Records are produced one at a time, so traces far larger than
+        memory can be analyzed without storing them in captured_packets.
+        """
+        decode = self._scapy_decoder() if self.scapy_available else None
+        
+        for number, record in enumerate(PcapReader(filepath), start=1):
+            if count is not None and number > count:
+                break
+            yield self._record_to_packet_info(number, record, decode)
+    
+    def to_batch(self):
+        """Return captured packets as a columnar PacketBatch"""
+        return PacketBatch.from_packets(self.captured_packets)
+    
+    def _scapy_decoder(self):
+        """Return a function that turns (linktype, bytes) into a Scapy packet"""
+        try:
+            import scapy.all as scapy
+        except ImportError:
+            return None
+        
+        def decode(linktype, data):
+            cls = scapy.conf.l2types.get(linktype, scapy.Raw)
+            return cls(data)
+        
+        return decode
+    
+    def _record_to_packet_info(self, number, record, decode=None):
+        """Build the same packet_info dict as a live capture from a file record"""
+        packet_info = {
+            'number': number,
+            'timestamp': record.timestamp,
+            'length': record.original_length,
+            'protocol': 'Unknown',
+            'summary': f"Link type {record.linktype} frame ({record.captured_length} bytes)",
+            'real_packet': True,
+            'raw_bytes': record.data,
+            'linktype': record.linktype
+        }
+        
+        fields = self.dissector.dissect(record.data, record.linktype)
+        if fields:
+            packet_info['protocol'] = fields['protocol']
+            packet_info['summary'] = fields['summary']
+            self._apply_fields(packet_info, fields)
+        elif decode:
+            try:
+                packet = decode(record.linktype, record.data)
+                packet_info['protocol'] = self._detect_protocol(packet)
+                packet_info['summary'] = packet.summary()
+            except Exception:
+                pass  # Keep the undecoded record
+        
+        return packet_info
+    
+    def _apply_fields(self, packet_info, fields):
+        """Copy decoded header fields onto a packet_info record"""
+        if not fields:
+            return
+        for key in PACKET_FIELDS:
+            if key in fields:
+                packet_info[key] = fields[key]
+    
     def _detect_protocol(self, packet):
         """Detect protocol from real Scapy packet - IMPROVED VERSION"""
         try:
@@ -85,7 +336,7 @@ class PacketCapturer:
             if packet.haslayer(TCP):
                 return "TCP"
             elif packet.haslayer(UDP):
-                return "UDP" 
+                return "DNS" if packet.haslayer(scapy.DNS) else "UDP" 
             elif packet.haslayer(ICMP):
                 return "ICMP"
             elif packet.haslayer(IPv6):
@@ -126,6 +377,8 @@ class PacketCapturer:
         dest_ips = ['8.8.8.8', '93.184.216.34', '151.101.1.69']
         
         for i in range(count):
+            if self.stop_requested:
+                break
             protocol = random.choice(protocols)
             src_ip = random.choice(source_ips)
             dst_ip = random.choice(dest_ips)
@@ -140,7 +393,7 @@ class PacketCapturer:
                 'summary': f"{protocol} {src_ip} → {dst_ip}",
                 'real_packet': False
             }
-            self.captured_packets.append(packet_info)
+            self._store(packet_info, 'simulated')
             print(f"📦 #{i+1}: {packet_info['summary']} ({packet_info['length']} bytes)")
         
         print("✅ Capture simulation completed!")
@@ -13,6 +13,8 @@ from src.filters import PacketFilter
 from src.statistics import TrafficStatistics
 from src.detector import IssueDetector
 from src.storage import PacketStorage
+from src.pipeline import ParallelPipeline
+from src.ringbuffer import DEFAULT_MAX_PACKETS, DEFAULT_MAX_BYTES, DROP_OLDEST, BLOCK
 
 class PacketAnalyzerCLI:
     """
@@ -27,6 +29,7 @@ class PacketAnalyzerCLI:
         self.stats = TrafficStatistics()
         self.detector = IssueDetector()
         self.storage = PacketStorage() 
+        self.pipeline_result = None  # Set when --workers runs the parallel pipeline
         
     def run(self):
         """Main CLI entry point"""
@@ -39,6 +42,8 @@ Examples:
   python src/cli.py --capture --stats         # Capture and show statistics
   python src/cli.py --capture --analyze       # Capture and analyze packets
   python src/cli.py --load capture.json --stats --detect-issues  # Load and analyze saved capture
+  python src/cli.py --pcap trace.pcapng --stats --detect-issues  # Analyze an offline pcap/pcapng trace
+  python src/cli.py --pcap trace.pcap --filter "tcp and dst port 443"  # Filter with an expression
             '''
         )
         
@@ -55,6 +60,15 @@ Examples:
                           help='Capture timeout in seconds (default: 30)')
         parser.add_argument('--interface', type=str, 
                           help='Network interface to use')
+        parser.add_argument('--pcap', type=str,
+                          help='Read packets from a pcap/pcapng file instead of sniffing')
+        parser.add_argument('--max-packets', type=int, default=DEFAULT_MAX_PACKETS,
+                          help=f'Capture buffer size in packets (default: {DEFAULT_MAX_PACKETS})')
+        parser.add_argument('--max-buffer-mb', type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024),
+                          help=f'Capture buffer size in MB (default: {DEFAULT_MAX_BYTES // (1024 * 1024)})')
+        parser.add_argument('--overflow', choices=[DROP_OLDEST, BLOCK], default=DROP_OLDEST,
+                          help='What to do when the capture buffer is full (default: drop_oldest); '
+                               'block waits up to a second for a consumer, then drops new packets')
         
         # Analysis options
         parser.add_argument('--analyze', action='store_true', 
@@ -63,8 +77,12 @@ Examples:
                           help='Show traffic statistics')
         parser.add_argument('--detect-issues', action='store_true', 
                           help='Detect network issues')
+        parser.add_argument('--live-detect', action='store_true',
+                          help='Raise sliding-window alerts while capturing or reading a pcap')
         parser.add_argument('--parse-all', action='store_true', 
                           help='Parse all captured packets')
+        parser.add_argument('--workers', type=int, default=1,
+                          help='Worker processes for statistics and issue detection (default: 1, 0 = all cores)')
         
         # Filter options
         parser.add_argument('--filter-protocol', type=str, 
@@ -73,12 +91,14 @@ Examples:
                           help='Filter by source IP')
         parser.add_argument('--filter-dst-ip', type=str, 
                           help='Filter by destination IP')
+        parser.add_argument('--filter', type=str,
+                          help='Filter expression, e.g. "tcp and dst port 443 and net 10.0.0.0/8"')
         
         # Storage options
         parser.add_argument('--save', type=str, 
                   help='Save capture to file (provide filename)')
-        parser.add_argument('--save-format', choices=['json', 'pkl'], default='json',
-                  help='File format for saving (default: json)')
+        parser.add_argument('--save-format', choices=['json', 'pkl', 'pcol'], default='json',
+                  help='File format for saving: json, pkl or pcol (binary columnar) (default: json)')
         parser.add_argument('--load', type=str,
                   help='Load capture from file')
         parser.add_argument('--list-captures', action='store_true',
@@ -101,28 +121,38 @@ Examples:
             self.run_demo()
             return
         
+        # Set up filters before capturing so they can run in the kernel
+        filtering = any([args.filter_protocol, args.filter_src_ip, args.filter_dst_ip, args.filter])
+        if filtering and not self.configure_filters(args):
+            return
+        
         # Handle packet loading first
         packets_loaded = False
         if args.load:
             packets_loaded = self.load_capture(args)
+        elif args.pcap:
+            packets_loaded = self.read_pcap(args)
 
         # Capture packets if requested (and no packets loaded)
         if args.capture and not packets_loaded:
             self.capture_packets(args)
         elif not packets_loaded:
             # If no capture but analysis requested, and no packets loaded, we need packets
-            if any([args.analyze, args.stats, args.detect_issues, args.parse_all]):
+            if any([args.analyze, args.stats, args.detect_issues, args.live_detect, args.parse_all]):
                 print("📡 No packets captured yet. Capturing 10 packets for analysis...")
                 self.capture_packets(args)
         
         # Apply filters if specified
-        if any([args.filter_protocol, args.filter_src_ip, args.filter_dst_ip]):
+        if filtering:
             self.apply_filters(args)
         
         # Perform analysis if requested
         if args.analyze:
             self.analyze_packets(args)
         
+        if args.workers != 1 and (args.stats or args.detect_issues):
+            self.run_pipeline(args)
+        
         if args.stats:
             self.show_statistics()
         
@@ -185,7 +215,10 @@ Examples:
     def capture_packets(self, args):
         """Capture packets based on CLI arguments"""
         print(f"\n📡 CAPTURING {args.count} PACKETS...")
-        self.capturer = PacketCapturer(use_real_capture=True)
+        packet_filter = self.filters if self.filters.compile() else None
+        self.capturer = PacketCapturer(use_real_capture=True, packet_filter=packet_filter,
+                                       **self._buffer_options(args))
+        self._attach_live_detector(args)
         self.capturer.start_capture(args.count, args.timeout)
         
         if self.capturer.captured_packets:
@@ -193,20 +226,52 @@ Examples:
         else:
             print("❌ No packets captured")
     
-    def apply_filters(self, args):
-        """Apply filters based on CLI arguments"""
-        if not self.capturer or not self.capturer.captured_packets:
-            print("❌ No packets available for filtering")
+    def _attach_live_detector(self, args):
+        """Print sliding-window alerts as packets arrive (--live-detect)"""
+        if not args.live_detect:
             return
         
-        print(f"\n🔍 APPLYING FILTERS...")
+        def show_alert(alert):
+            print(f"🚨 [{alert['severity']}] {alert['type']}: {alert['details']}")
         
+        self.capturer.add_listener(self.detector.realtime(on_alert=show_alert).observe)
+    
+    def _buffer_options(self, args):
+        """Capture buffer budgets from CLI arguments"""
+        return {
+            'max_packets': args.max_packets,
+            'max_bytes': args.max_buffer_mb * 1024 * 1024,
+            'overflow': args.overflow
+        }
+    
+    def configure_filters(self, args):
+        """Add filter rules from CLI arguments"""
         if args.filter_protocol:
             self.filters.add_protocol_filter(args.filter_protocol.upper())
         
         if args.filter_src_ip or args.filter_dst_ip:
-            self.filters.add_ip_filter(args.filter_src_ip, args.filter_dst_ip)
+            try:
+                self.filters.add_ip_filter(args.filter_src_ip, args.filter_dst_ip)
+            except ValueError as e:
+                print(f"❌ Invalid IP filter: {e}")
+                return False
+        
+        if args.filter:
+            try:
+                self.filters.add_expression_filter(args.filter)
+            except ValueError as e:
+                print(f"❌ Invalid filter expression: {e}")
+                return False
+        
+        return True
+    
+    def apply_filters(self, args):
+        """Apply filters based on CLI arguments"""
+        if not self.capturer or not self.capturer.captured_packets:
+            print("❌ No packets available for filtering")
+            return
         
+        print(f"\n🔍 APPLYING FILTERS...")
         filtered_packets = self.filters.apply_filters(self.capturer.captured_packets)
         
         if filtered_packets:
@@ -248,9 +313,22 @@ Examples:
             return
         
         print(f"\n📊 GENERATING TRAFFIC STATISTICS...")
-        statistics = self.stats.generate_statistics(self.capturer.captured_packets)
+        if self.pipeline_result and self.pipeline_result['statistics']:
+            statistics = self.pipeline_result['statistics']
+        else:
+            statistics = self.stats.generate_statistics(self.capturer.captured_packets)
         self.stats.display_statistics(statistics)
     
+    def run_pipeline(self, args):
+        """Compute statistics and issues on a process pool"""
+        if not self.capturer or not self.capturer.captured_packets:
+            return
+        
+        pipeline = ParallelPipeline(workers=args.workers or None)
+        print(f"\n⚙️  ANALYZING {len(self.capturer.captured_packets)} PACKETS ON {pipeline.workers} WORKERS...")
+        self.pipeline_result = pipeline.run(self.capturer.captured_packets,
+                                            stats=args.stats, detect=args.detect_issues)
+    
     def detect_issues(self):
         """Detect network issues"""
         if not self.capturer or not self.capturer.captured_packets:
@@ -258,7 +336,10 @@ Examples:
             return
         
         print(f"\n🚨 DETECTING NETWORK ISSUES...")
-        issues = self.detector.analyze_packets(self.capturer.captured_packets)
+        if self.pipeline_result and self.pipeline_result['issues'] is not None:
+            self.detector.detected_issues = self.pipeline_result['issues']
+        else:
+            issues = self.detector.analyze_packets(self.capturer.captured_packets)
         self.detector.display_issues()
         
     def save_capture(self, args):
@@ -288,6 +369,19 @@ Examples:
             print(f"❌ Failed to load packets from {args.load}")
         return False
 
+    def read_pcap(self, args):
+        """Read packets from an offline pcap/pcapng trace"""
+        print(f"\n📂 READING {args.pcap}...")
+        try:
+            self.capturer = PacketCapturer(pcap_file=args.pcap, **self._buffer_options(args))
+            self._attach_live_detector(args)
+            self.capturer.read_pcap(args.pcap)
+        except (OSError, ValueError) as e:
+            print(f"❌ Failed to read {args.pcap}: {e}")
+            return False
+        
+        return bool(self.capturer.captured_packets)
+
     def list_captures(self):
         """List all saved captures"""
         self.storage.list_captures()
@@ -0,0 +1,364 @@
+# src/columnar.py
+import json
+import mmap
+import struct
+import sys
+from bisect import bisect_right
+import zlib
+from array import array
+
+from src.batch import PacketBatch
+from src.filter_expr import AndNode, OrNode, ProtocolNode, IpVersionNode, NetNode
+from src.metrics import STORAGE_BYTES
+
+MAGIC = b'PCOL'
+FORMAT_VERSION = 1
+DEFAULT_BLOCK_SIZE = 65536
+
+# File header: magic, format version, reserved
+_HEADER = struct.Struct('<4sHH')
+# File trailer: footer length, magic
+_TRAILER = struct.Struct('<I4s')
+
+_BYTES_READ = STORAGE_BYTES.labels('read', 'pcol')
+_BYTES_WRITTEN = STORAGE_BYTES.labels('write', 'pcol')
+
+
+class ColumnarFormatError(ValueError):
+    """Raised when a file is not a valid columnar capture"""
+
+
+def _column_bytes(column):
+    """Little-endian bytes of a typed array column"""
+    if sys.byteorder == 'big':
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column.tobytes()
+
+
+def _block_index_entry(batch, offset, length, sizes):
+    """Summarize one block so readers can skip it without decoding"""
+    ipv4 = [address for version, src, dst in zip(batch.ip_version, batch.src_ip, batch.dst_ip)
+            if version == 4 for address in (src, dst)]
+    return {
+        'offset': offset,
+        'length': length,
+        'count': len(batch),
+        'sizes': sizes,
+        'ts_min': min(batch.timestamp),
+        'ts_max': max(batch.timestamp),
+        'number_min': min(batch.number),
+        'number_max': max(batch.number),
+        'protocols': sorted(set(batch.protocol)),
+        'ip_min': min(ipv4) if ipv4 else None,
+        'ip_max': max(ipv4) if ipv4 else None,
+        'has_ipv6': 6 in batch.ip_version
+    }
+
+
+def write_columnar(filepath, packets, block_size=DEFAULT_BLOCK_SIZE, compress=True, metadata=None,
+                   extras=None):
+    """
+    Write packets (list of dicts or a PacketBatch) as a columnar capture file.
+
+    Layout: header | blocks | IPv6 address table | extras | JSON footer | trailer.
+    Each block holds block_size packets as fixed-width little-endian
+    columns (zlib-compressed as a whole when compress=True). The footer
+    indexes every block by offset, time range, protocol set and IPv4
+    min/max so readers can skip blocks without touching them. extras is an
+    optional {name: bytes} of side data stored uncompressed in the same
+    file, so it is published together with the packets.
+    """
+    batch = packets if isinstance(packets, PacketBatch) else PacketBatch.from_packets(packets)
+    blocks = []
+
+    with open(filepath, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, 0))
+
+        for start in range(0, len(batch), block_size):
+            block = batch[start:start + block_size]
+            columns = [_column_bytes(getattr(block, name)) for name in PacketBatch.COLUMNS]
+            data = b''.join(columns)
+            if compress:
+                data = zlib.compress(data, 6)
+            offset = f.tell()
+            f.write(data)
+            blocks.append(_block_index_entry(block, offset, len(data), [len(c) for c in columns]))
+
+        ipv6_offset = f.tell()
+        f.write(b''.join(batch.ipv6_addresses))
+
+        extra_regions = {}
+        for name, data in (extras or {}).items():
+            extra_regions[name] = [f.tell(), len(data)]
+            f.write(data)
+
+        footer = json.dumps({
+            'version': FORMAT_VERSION,
+            'columns': [[name, getattr(batch, name).typecode] for name in PacketBatch.COLUMNS],
+            'compression': 'zlib' if compress else None,
+            'protocols': batch.protocols,
+            'ipv6_offset': ipv6_offset,
+            'ipv6_count': len(batch.ipv6_addresses),
+            'dns_names': batch.dns_names,
+            'extras': extra_regions,
+            'total_packets': len(batch),
+            'blocks': blocks,
+            'metadata': metadata or {}
+        }, separators=(',', ':')).encode('utf-8')
+        f.write(footer)
+        f.write(_TRAILER.pack(len(footer), MAGIC))
+        _BYTES_WRITTEN.inc(f.tell())
+
+    return len(blocks)
+
+
+def block_may_match(node, block, protocols):
+    """
+    Conservatively decide from the block index whether any packet in the
+    block can match a filter node. False means the block can be skipped.
+    """
+    if isinstance(node, AndNode):
+        return all(block_may_match(child, block, protocols) for child in node.children)
+    if isinstance(node, OrNode):
+        return any(block_may_match(child, block, protocols) for child in node.children)
+    if isinstance(node, ProtocolNode) and node.port is None:
+        return any(protocols[code].upper() in node.names for code in block['protocols'])
+    if isinstance(node, IpVersionNode):
+        return block['has_ipv6'] if node.version == 6 else block['ip_min'] is not None
+    if isinstance(node, NetNode):
+        if node.network.version == 6:
+            return block['has_ipv6']
+        if block['ip_min'] is None:
+            return False
+        return (int(node.network.network_address) <= block['ip_max'] and
+                int(node.network.broadcast_address) >= block['ip_min'])
+    return True
+
+
+class ColumnarReader:
+    """
+    Memory-mapped reader for columnar capture files.
+
+    Only the footer is parsed on open; blocks are decoded on demand, so a
+    reader can stream the file block by block, read a packet range, or skip
+    blocks using the index.
+    """
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self._file = open(filepath, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ColumnarFormatError(f"{filepath} is empty")
+
+        try:
+            self._read_footer()
+        except Exception:
+            self.close()
+            raise
+
+    def _read_footer(self):
+        view = self._map
+        if len(view) < _HEADER.size + _TRAILER.size:
+            raise ColumnarFormatError(f"{self.filepath} is too short for a columnar capture")
+        magic, version, _ = _HEADER.unpack_from(view, 0)
+        footer_length, trailer_magic = _TRAILER.unpack_from(view, len(view) - _TRAILER.size)
+        if magic != MAGIC or trailer_magic != MAGIC:
+            raise ColumnarFormatError(f"{self.filepath} is not a columnar capture")
+        if version > FORMAT_VERSION:
+            raise ColumnarFormatError(f"Unsupported columnar format version {version}")
+
+        footer_start = len(view) - _TRAILER.size - footer_length
+        footer = json.loads(bytes(view[footer_start:footer_start + footer_length]))
+        self.footer = footer
+        self.blocks = footer['blocks']
+        self.protocols = footer['protocols']
+        self.metadata = footer.get('metadata', {})
+        self.total_packets = footer['total_packets']
+        self.columns = footer['columns']
+        self.dns_names = footer.get('dns_names', [])
+        self._dns_index = {name: i + 1 for i, name in enumerate(self.dns_names)}
+        self.extras = footer.get('extras', {})
+
+        start = footer['ipv6_offset']
+        self.ipv6_addresses = [bytes(view[start + 16 * i:start + 16 * (i + 1)])
+                               for i in range(footer['ipv6_count'])]
+
+        # Packet index where each block starts, for range reads
+        self.block_starts = []
+        position = 0
+        for block in self.blocks:
+            self.block_starts.append(position)
+            position += block['count']
+
+    def __len__(self):
+        return self.total_packets
+
+    def close(self):
+        if getattr(self, '_map', None) is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _new_batch(self):
+        batch = PacketBatch()
+        batch.protocols = list(self.protocols)
+        batch._protocol_codes = {name: code for code, name in enumerate(self.protocols)}
+        batch.ipv6_addresses = self.ipv6_addresses
+        batch._ipv6_index = {packed: i for i, packed in enumerate(self.ipv6_addresses)}
+        batch.dns_names = self.dns_names
+        batch._dns_index = self._dns_index
+        return batch
+
+    def read_extra(self, name, start=0, stop=None):
+        """Bytes [start, stop) of a side data region stored with write_columnar(extras=...)"""
+        offset, length = self.extras[name]
+        stop = length if stop is None else min(stop, length)
+        _BYTES_READ.inc(max(stop - start, 0))
+        return self._map[offset + start:offset + max(stop, start)]
+
+    def read_block(self, index):
+        """Decode one block into a PacketBatch"""
+        block = self.blocks[index]
+        data = memoryview(self._map)[block['offset']:block['offset'] + block['length']]
+        _BYTES_READ.inc(block['length'])
+        if self.footer['compression'] == 'zlib':
+            data = memoryview(zlib.decompress(data))
+
+        batch = self._new_batch()
+        position = 0
+        for (name, typecode), size in zip(self.columns, block['sizes']):
+            column = array(typecode)
+            column.frombytes(data[position:position + size])
+            if sys.byteorder == 'big':
+                column.byteswap()
+            if typecode != getattr(batch, name).typecode:
+                # Written with an older column type (e.g. uint16 lengths)
+                column = array(getattr(batch, name).typecode, column)
+            setattr(batch, name, column)
+            position += size
+        return batch
+
+    def block_matches(self, block, start_time=None, end_time=None, protocols=None, node=None):
+        """Check a block's index entry against time, protocol and filter constraints"""
+        if start_time is not None and block['ts_max'] < start_time:
+            return False
+        if end_time is not None and block['ts_min'] > end_time:
+            return False
+        if protocols is not None:
+            wanted = {name.upper() for name in protocols}
+            if not any(self.protocols[code].upper() in wanted for code in block['protocols']):
+                return False
+        if node is not None and not block_may_match(node, block, self.protocols):
+            return False
+        return True
+
+    def iter_batches(self, start_time=None, end_time=None, protocols=None, compiled_filter=None):
+        """
+        Stream matching packets one block at a time.
+        Blocks the index rules out are never read or decompressed.
+        """
+        node = compiled_filter.ast if compiled_filter is not None else None
+        for index, block in enumerate(self.blocks):
+            if not self.block_matches(block, start_time, end_time, protocols, node):
+                continue
+            batch = self.read_block(index)
+
+            if start_time is not None or end_time is not None:
+                low = float('-inf') if start_time is None else start_time
+                high = float('inf') if end_time is None else end_time
+                batch = batch.take(i for i, ts in enumerate(batch.timestamp) if low <= ts <= high)
+            if protocols is not None:
+                codes = {code for code, name in enumerate(batch.protocols)
+                         if name.upper() in {p.upper() for p in protocols}}
+                batch = batch.take(i for i, code in enumerate(batch.protocol) if code in codes)
+            if compiled_filter is not None:
+                batch = compiled_filter.apply(batch)
+            if len(batch):
+                yield batch
+
+    def read_range(self, start=0, stop=None):
+        """Read packets [start, stop) by position, decoding only the blocks involved"""
+        stop = self.total_packets if stop is None else min(stop, self.total_packets)
+        result = self._new_batch()
+        for index, block_start in enumerate(self.block_starts):
+            block_stop = block_start + self.blocks[index]['count']
+            if block_stop <= start or block_start >= stop:
+                continue
+            batch = self.read_block(index)
+            self._extend(result, batch[max(start - block_start, 0):stop - block_start])
+        return result
+
+    def scan(self, position=0, limit=None, compiled_filter=None, skip=0):
+        """
+        Collect up to limit matching packets from packet index position on,
+        after passing over the first skip matches.
+
+        Returns (batch, next_position); next_position is where a follow-up
+        scan resumes, or None once the file is exhausted. Blocks the filter
+        index rules out are never decoded.
+        """
+        result = self._new_batch()
+        next_position = self._scan(position, limit, compiled_filter, skip,
+                                   lambda batch, block_start, rows: self._extend(result, batch.take(rows)))
+        return result, next_position
+
+    def scan_positions(self, position=0, limit=None, compiled_filter=None, skip=0):
+        """Like scan(), but return the packet indexes of the matches instead of the packets"""
+        positions = []
+        next_position = self._scan(position, limit, compiled_filter, skip,
+                                   lambda batch, block_start, rows: positions.extend(block_start + i for i in rows))
+        return positions, next_position
+
+    def _scan(self, position, limit, compiled_filter, skip, collect):
+        """Pass each block's matching rows to collect(batch, block_start, rows); returns next_position"""
+        node = compiled_filter.ast if compiled_filter is not None else None
+        first_block = max(bisect_right(self.block_starts, position) - 1, 0)
+        collected = 0
+
+        for index in range(first_block, len(self.blocks)):
+            block, block_start = self.blocks[index], self.block_starts[index]
+            if node is not None and not block_may_match(node, block, self.protocols):
+                continue
+            batch = self.read_block(index)
+            offset = max(position - block_start, 0)
+            if compiled_filter is not None:
+                mask = compiled_filter.mask(batch)
+                rows = [i for i in range(offset, len(batch)) if mask[i]]
+            else:
+                rows = range(offset, len(batch))
+
+            if skip >= len(rows):
+                skip -= len(rows)
+                continue
+            rows = rows[skip:]
+            skip = 0
+            if limit is not None and len(rows) >= limit - collected:
+                rows = rows[:limit - collected]
+                collect(batch, block_start, rows)
+                next_position = block_start + rows[-1] + 1 if rows else position
+                return next_position if next_position < self.total_packets else None
+            collect(batch, block_start, rows)
+            collected += len(rows)
+
+        return None
+
+    @staticmethod
+    def _extend(result, batch):
+        result.extend_batch(batch)
+
+    def read_all(self, **constraints):
+        """Read every matching packet into one PacketBatch"""
+        result = self._new_batch()
+        for batch in self.iter_batches(**constraints):
+            self._extend(result, batch)
+        return result
@@ -1,175 +1,629 @@
 # src/detector.py
-from collections import defaultdict, Counter
+import copy
+import threading
 import time
+from collections import Counter, OrderedDict, deque
+
+from src.rules import DetectionRule, RuleEngine, RULES, register_rule, load_plugin_rules
+from src.windows import SlidingCounter, DEFAULT_WINDOW, DEFAULT_BUCKET, DEFAULT_MAX_KEYS
+from src.tcp_analysis import TcpTracker, DUP_ACK_THRESHOLD
+from src.sketches import LinearCounter, HyperLogLog
+from src.batch import parse_tcp_flags
+from src.flows import SYN, RST, ACK
+
+# Well-known ports that deserve a closer look
+SUSPICIOUS_PORTS = {
+    23: 'Telnet (unencrypted, often targeted)',
+    135: 'Windows RPC (common attack vector)',
+    139: 'NetBIOS (often scanned)',
+    445: 'SMB (common in ransomware attacks)',
+    1433: 'SQL Server (common target)',
+    3389: 'RDP (common brute force target)'
+}
+
+# Share of retransmitted segments that makes a conversation's retransmissions MEDIUM
+RETRANSMISSION_RATE = 0.05
+
+# Distinct destination ports / hosts one source must probe to count as a scan
+SCAN_PORT_THRESHOLD = 100
+SCAN_HOST_THRESHOLD = 50
+
+# SYNs a service must receive, with fewer than this share answered, to count as a flood
+SYN_FLOOD_THRESHOLD = 200
+SYN_ACK_RATIO = 0.5
+
+# Bounds on the per-source and per-destination state of the scan and flood rules
+MAX_TRACKED_SOURCES = 4096
+MAX_TRACKED_TARGETS = 4096
+# Recent UDP requests the scan rule remembers to recognize their replies
+MAX_TRACKED_REQUESTS = 16384
+
+# Ports below this are well-known services; UDP from one to a higher port is a reply
+WELL_KNOWN_PORT_LIMIT = 1024
+
+# Alerts kept in RealtimeDetector.alerts
+MAX_ALERTS = 1000
+
+
+def suspicious_port(packet):
+    """The suspicious port a packet uses, or None"""
+    src_port = packet.get('src_port')
+    dst_port = packet.get('dst_port')
+    if src_port is not None or dst_port is not None:
+        # Destination first, as the service port is usually the destination
+        port = dst_port if dst_port in SUSPICIOUS_PORTS else src_port
+        return port if port in SUSPICIOUS_PORTS else None
+    # No decoded ports (e.g. simulated packets): fall back to the summary
+    summary = packet.get('summary', '').lower()
+    for port in SUSPICIOUS_PORTS:
+        if f':{port}' in summary or f'>{port}' in summary:
+            return port
+    return None
+
+
+def address_class(packet):
+    """'broadcast', 'multicast' or None for the packet's destination"""
+    address = packet.get('dst_ip') or packet.get('summary', '')
+    if 'ff02::' in address:
+        return 'multicast'
+    if '224.0.0.' in address or '255.255.255.255' in address:
+        return 'broadcast'
+    return None
+
+
+def host_pair(packet):
+    """The packet's two addresses in sorted order (same for both directions), or None"""
+    src_ip = packet.get('src_ip')
+    dst_ip = packet.get('dst_ip')
+    if not src_ip or not dst_ip:
+        return None
+    return (src_ip, dst_ip) if src_ip <= dst_ip else (dst_ip, src_ip)
+
+
+def dns_query(packet):
+    """The queried name of a DNS query packet, or None"""
+    query = packet.get('dns_query')
+    if query is not None:
+        return query
+    # Records without decoded DNS fields only have the Scapy summary line
+    summary = packet.get('summary', '')
+    if 'DNS' in summary and 'Qry' in summary:
+        return summary
+    return None
+
+
+@register_rule
+class HighRetransmissionsRule(DetectionRule):
+    """Retransmissions, duplicate ACKs, zero windows and reordering from TCP sequence numbers"""
+
+    name = 'high_retransmissions'
+    protocols = ('TCP',)
+    flow_local = True
+
+    def reset(self):
+        super().reset()
+        self.ended = []
+        self.tracker = TcpTracker(on_expire=self._ended)
+
+    def _ended(self, connection):
+        if connection.anomalies:
+            self.ended.append(connection)
+
+    def on_packet(self, packet):
+        if packet.get('tcp_seq') is not None:
+            self.tracker.observe(packet)
+
+    def on_flow(self, flow):
+        # Without sequence numbers (simulated or summary-only packets) only
+        # the amount of traffic in a conversation hints at retransmissions
+        if not self.tracker.segments and flow.packets > 5:
+            self.report({
+                'type': 'POTENTIAL_RETRANSMISSION',
+                'severity': 'MEDIUM',
+                'description': f'High TCP activity in conversation: {flow.label()}',
+                'details': f'Found {flow.packets} TCP packets in this conversation',
+                'educational_note': 'High TCP packet counts might indicate retransmissions due to network congestion or packet loss',
+                'count': flow.packets,
+                'first_seen': flow.first_seen,
+                'last_seen': flow.last_seen
+            })
+
+    def finalize(self, context):
+        connections = self.ended + [connection for connection in self.tracker if connection.anomalies]
+        for connection in sorted(connections, key=lambda connection: connection.first_seen):
+            self._report_connection(connection)
+
+    def _report_connection(self, connection):
+        label = connection.label()
+        seen = {'first_seen': connection.first_seen, 'last_seen': connection.last_seen}
+        if connection.retransmissions:
+            rate = connection.retransmissions / connection.segments
+            self.report({
+                'type': 'TCP_RETRANSMISSION',
+                'severity': 'MEDIUM' if rate >= RETRANSMISSION_RATE else 'LOW',
+                'description': f'TCP retransmissions in conversation: {label}',
+                'details': f'{connection.retransmissions} of {connection.segments} segments were retransmitted ({rate*100:.1f}%)',
+                'educational_note': 'Retransmitted segments mean data was lost or acknowledged too late, usually because of congestion or a lossy link',
+                'count': connection.retransmissions,
+                **seen
+            })
+        if connection.fast_retransmits:
+            self.report({
+                'type': 'DUPLICATE_ACKS',
+                'severity': 'LOW',
+                'description': f'Duplicate ACKs in conversation: {label}',
+                'details': f'{connection.duplicate_acks} duplicate ACKs, {connection.fast_retransmits} run(s) of {DUP_ACK_THRESHOLD} or more',
+                'educational_note': 'Repeated ACKs for the same data tell the sender a segment is missing and trigger a fast retransmit',
+                'count': connection.duplicate_acks,
+                **seen
+            })
+        if connection.zero_windows:
+            self.report({
+                'type': 'ZERO_WINDOW',
+                'severity': 'MEDIUM',
+                'description': f'TCP zero window in conversation: {label}',
+                'details': f'{connection.zero_windows} segments advertised a zero receive window',
+                'educational_note': 'A zero window means the receiving application is not reading data fast enough, so the sender has to stop',
+                'count': connection.zero_windows,
+                **seen
+            })
+        if connection.out_of_order:
+            self.report({
+                'type': 'OUT_OF_ORDER',
+                'severity': 'LOW',
+                'description': f'Out-of-order TCP segments in conversation: {label}',
+                'details': f'{connection.out_of_order} segments arrived after later data',
+                'educational_note': 'Reordering is common with multiple network paths, but receivers may mistake it for loss',
+                'count': connection.out_of_order,
+                **seen
+            })
+
+
+@register_rule
+class UnusualTrafficPatternsRule(DetectionRule):
+    """Packet rate over the whole capture"""
+
+    name = 'unusual_traffic_patterns'
+
+    def merge(self, other):
+        """Only the capture-wide totals matter, and the context carries those"""
+
+    def finalize(self, context):
+        if context.packets > 20 and context.duration > 0:
+            packet_rate = context.packets / context.duration
+            if packet_rate > 50:  # More than 50 packets per second
+                self.report({
+                    'type': 'HIGH_TRAFFIC_RATE',
+                    'severity': 'LOW',
+                    'description': 'Unusually high packet rate detected',
+                    'details': f'Packet rate: {packet_rate:.1f} packets/second',
+                    'educational_note': 'High packet rates might indicate network scanning, DDoS attempts, or legitimate heavy traffic'
+                })
+
+
+@register_rule
+class SuspiciousPortsRule(DetectionRule):
+    """Traffic to or from well-known risky ports"""
+
+    name = 'suspicious_ports'
+    flow_local = True
+
+    def on_packet(self, packet):
+        port = suspicious_port(packet)
+        if port is None:
+            return
+        hosts = host_pair(packet)
+        details = SUSPICIOUS_PORTS[port]
+        if hosts:
+            details += f' - between {hosts[0]} and {hosts[1]}'
+        self.report({
+            'type': 'SUSPICIOUS_PORT',
+            'severity': 'MEDIUM',
+            'description': f'Traffic on potentially suspicious port {port}',
+            'details': details,
+            'educational_note': 'Monitor traffic on these ports for potential security issues'
+        }, key=(port, hosts), packet=packet)
+
+
+@register_rule
+class BroadcastStormsRule(DetectionRule):
+    """Share of broadcast and multicast traffic"""
+
+    name = 'broadcast_storms'
+
+    def reset(self):
+        super().reset()
+        self.broadcast = 0
+        self.multicast = 0
+
+    def on_packet(self, packet):
+        kind = address_class(packet)
+        if kind == 'multicast':
+            self.multicast += 1
+        elif kind == 'broadcast':
+            self.broadcast += 1
+
+    def merge(self, other):
+        self.broadcast += other.broadcast
+        self.multicast += other.multicast
+
+    def finalize(self, context):
+        total = context.packets
+        if self.broadcast > total * 0.3:  # More than 30% broadcast
+            self.report({
+                'type': 'POTENTIAL_BROADCAST_STORM',
+                'severity': 'HIGH',
+                'description': 'High volume of broadcast traffic detected',
+                'details': f'{self.broadcast} broadcast packets ({self.broadcast/total*100:.1f}% of total)',
+                'educational_note': 'Broadcast storms can degrade network performance and may indicate misconfigured devices'
+            })
+
+        if self.multicast > total * 0.5:  # More than 50% multicast
+            self.report({
+                'type': 'HIGH_MULTICAST_TRAFFIC',
+                'severity': 'MEDIUM',
+                'description': 'High volume of multicast traffic detected',
+                'details': f'{self.multicast} multicast packets ({self.multicast/total*100:.1f}% of total)',
+                'educational_note': 'Excessive multicast traffic might indicate issues with multicast applications or network configuration'
+            })
+
+
+@register_rule
+class MalformedPacketsRule(DetectionRule):
+    """TCP packets too small to be well formed"""
+
+    name = 'malformed_packets'
+    protocols = ('TCP',)
+    flow_local = True
+
+    def on_packet(self, packet):
+        length = packet.get('length', 0)
+        # Check for unusually small packets (might be malformed)
+        if length < 60:
+            hosts = host_pair(packet)
+            between = f' between {hosts[0]} and {hosts[1]}' if hosts else ''
+            self.report({
+                'type': 'UNUSUALLY_SMALL_PACKET',
+                'severity': 'LOW',
+                'description': 'Very small TCP packet detected',
+                'details': f'TCP packets under 60 bytes{between}',
+                'educational_note': 'Very small TCP packets might be keep-alives, but could also indicate malformed traffic'
+            }, key=hosts or (), packet=packet)
+
+
+@register_rule
+class DnsIssuesRule(DetectionRule):
+    """The same DNS query sent over and over"""
+
+    name = 'dns_issues'
+    protocols = ('DNS', 'UDP', 'TCP')
+
+    def reset(self):
+        super().reset()
+        self.dns_packets = 0
+        self.queries = Counter()
+
+    def on_packet(self, packet):
+        if packet.get('protocol') == 'DNS' or 'DNS' in packet.get('summary', ''):
+            self.dns_packets += 1
+            query = dns_query(packet)
+            if query is not None:
+                self.queries[query] += 1
+
+    def merge(self, other):
+        self.dns_packets += other.dns_packets
+        self.queries.update(other.queries)
+
+    def finalize(self, context):
+        # Check for repeated DNS queries (might indicate issues)
+        if self.dns_packets <= 5 or sum(self.queries.values()) <= 3:
+            return
+        for query, count in self.queries.items():
+            if count > 2:  # Same query repeated multiple times
+                self.report({
+                    'type': 'REPEATED_DNS_QUERIES',
+                    'severity': 'LOW',
+                    'description': 'Repeated DNS queries detected',
+                    'details': f'Query repeated {count} times: {query[:100]}...',
+                    'educational_note': 'Repeated DNS queries might indicate DNS resolution issues or misconfigured applications',
+                    'count': count
+                })
+
+
+class _ScanSource:
+    """Distinct ports and hosts one source has probed"""
+
+    __slots__ = ('ports', 'hosts', 'probes', 'first_seen', 'last_seen')
+
+    def __init__(self, timestamp):
+        self.ports = LinearCounter()
+        self.hosts = HyperLogLog()
+        self.probes = 0
+        self.first_seen = timestamp
+        self.last_seen = timestamp
+
+    def merge(self, other):
+        self.ports.merge(other.ports)
+        self.hosts.merge(other.hosts)
+        self.probes += other.probes
+        self.first_seen = min(self.first_seen, other.first_seen)
+        self.last_seen = max(self.last_seen, other.last_seen)
+
+
+@register_rule
+class PortScanRule(DetectionRule):
+    """Sources probing many ports (vertical) or many hosts (horizontal)"""
+
+    name = 'port_scans'
+    protocols = ('TCP', 'UDP', 'DNS')
+
+    def __init__(self, port_threshold=SCAN_PORT_THRESHOLD, host_threshold=SCAN_HOST_THRESHOLD,
+                 max_sources=MAX_TRACKED_SOURCES, max_requests=MAX_TRACKED_REQUESTS):
+        super().__init__()
+        self.port_threshold = port_threshold
+        self.host_threshold = host_threshold
+        self.max_sources = max_sources
+        self.max_requests = max_requests
+
+    def reset(self):
+        super().reset()
+        # Per-source sketches, least recently seen first; a few hundred bytes each
+        self.sources = OrderedDict()
+        # Recent UDP 5-tuples, least recently seen first, to tell replies from probes
+        self.requests = OrderedDict()
+        self.scans = {}
+
+    def on_packet(self, packet):
+        dst_ip = packet.get('dst_ip')
+        dst_port = packet.get('dst_port')
+        if dst_port is None or not dst_ip:
+            return
+        src_ip = packet.get('src_ip')
+        if packet.get('protocol') == 'TCP':
+            # Connection attempts and stealth probes (SYN, FIN, NULL, Xmas), not replies
+            if parse_tcp_flags(packet.get('tcp_flags')) & (ACK | RST):
+                return
+        elif self._is_udp_reply(src_ip, packet.get('src_port'), dst_ip, dst_port):
+            return
+
+        timestamp = packet.get('timestamp', 0) or 0
+        sources = self.sources
+        source = sources.get(src_ip)
+        if source is None:
+            source = sources[src_ip] = _ScanSource(timestamp)
+            if len(sources) > self.max_sources:
+                self._check(*sources.popitem(last=False))
+        else:
+            sources.move_to_end(src_ip)
+        source.probes += 1
+        source.last_seen = timestamp
+        source.ports.add(dst_port)
+        source.hosts.add(dst_ip)
+
+    def _is_udp_reply(self, src_ip, src_port, dst_ip, dst_port):
+        """Whether a UDP datagram answers an earlier one (or comes from a service port)"""
+        requests = self.requests
+        reverse = (dst_ip, dst_port, src_ip, src_port)
+        if reverse in requests:
+            requests.move_to_end(reverse)
+            return True
+        if src_port is not None and src_port < WELL_KNOWN_PORT_LIMIT <= dst_port:
+            # Reply whose request predates the capture or was evicted
+            return True
+        requests[(src_ip, src_port, dst_ip, dst_port)] = None
+        requests.move_to_end((src_ip, src_port, dst_ip, dst_port))
+        if len(requests) > self.max_requests:
+            requests.popitem(last=False)
+        return False
+
+    def merge(self, other):
+        """Fold in the sources another instance saw (e.g. over other flows of the capture)"""
+        for table, other_table in ((self.scans, other.scans), (self.sources, other.sources)):
+            for src_ip, source in other_table.items():
+                existing = table.get(src_ip)
+                if existing is None:
+                    table[src_ip] = source
+                else:
+                    existing.merge(source)
+        if len(self.sources) > self.max_sources:
+            by_last_seen = sorted(self.sources.items(), key=lambda item: item[1].last_seen)
+            excess = len(by_last_seen) - self.max_sources
+            for src_ip, source in by_last_seen[:excess]:
+                self._check(src_ip, source)
+            self.sources = OrderedDict(by_last_seen[excess:])
+        else:
+            self.sources = OrderedDict(sorted(self.sources.items(), key=lambda item: item[1].last_seen))
+
+    def _check(self, src_ip, source):
+        """Remember a source if its sketches cross a threshold"""
+        if source.ports.count() >= self.port_threshold or source.hosts.count() >= self.host_threshold:
+            self.scans[src_ip] = source
+
+    def finalize(self, context):
+        for src_ip, source in self.sources.items():
+            self._check(src_ip, source)
+        for src_ip, source in sorted(self.scans.items(), key=lambda item: item[1].first_seen):
+            ports, hosts = source.ports.count(), source.hosts.count()
+            wide, deep = hosts >= self.host_threshold, ports >= self.port_threshold
+            kind = 'block' if wide and deep else 'horizontal' if wide else 'vertical'
+            self.report({
+                'type': 'PORT_SCAN',
+                'severity': 'HIGH',
+                'description': f'{kind.capitalize()} port scan from {src_ip}',
+                'details': f'~{ports}{"+" if source.ports.saturated else ""} ports on ~{hosts} hosts '
+                           f'in {source.probes} probes over {source.last_seen - source.first_seen:.1f}s',
+                'educational_note': 'Vertical scans try many ports on one host, horizontal scans one port on many hosts; both map services before an attack',
+                'count': source.probes,
+                'first_seen': source.first_seen,
+                'last_seen': source.last_seen
+            })
+
+
+class _SynTarget:
+    """Handshakes started and answered for one destination service"""
+
+    __slots__ = ('syns', 'syn_acks', 'sources')
+
+    def __init__(self):
+        self.syns = 0
+        self.syn_acks = 0
+        self.sources = HyperLogLog()
+
+    def merge(self, other):
+        self.syns += other.syns
+        self.syn_acks += other.syn_acks
+        self.sources.merge(other.sources)
+
+
+@register_rule
+class SynFloodRule(DetectionRule):
+    """Services receiving many SYNs that go unanswered"""
+
+    name = 'syn_floods'
+    protocols = ('TCP',)
+
+    def __init__(self, syn_threshold=SYN_FLOOD_THRESHOLD, answer_ratio=SYN_ACK_RATIO,
+                 max_targets=MAX_TRACKED_TARGETS):
+        super().__init__()
+        self.syn_threshold = syn_threshold
+        self.answer_ratio = answer_ratio
+        self.max_targets = max_targets
+
+    def reset(self):
+        super().reset()
+        # (dst_ip, dst_port) -> _SynTarget, least recently seen first
+        self.targets = OrderedDict()
+        self.floods = {}
+
+    def on_packet(self, packet):
+        flags = parse_tcp_flags(packet.get('tcp_flags'))
+        if not flags & SYN or flags & RST:
+            return
+        targets = self.targets
+        if flags & ACK:
+            # SYN-ACK: the service answered; only count targets already seen
+            target = targets.get((packet.get('src_ip'), packet.get('src_port')))
+            if target is not None:
+                target.syn_acks += 1
+            return
+
+        key = (packet.get('dst_ip'), packet.get('dst_port'))
+        target = targets.get(key)
+        if target is None:
+            target = targets[key] = _SynTarget()
+            if len(targets) > self.max_targets:
+                self._check(*targets.popitem(last=False))
+        else:
+            targets.move_to_end(key)
+        target.syns += 1
+        target.sources.add(packet.get('src_ip'))
+
+    def merge(self, other):
+        """Fold in the targets another instance saw (e.g. over other flows of the capture)"""
+        for table, other_table in ((self.floods, other.floods), (self.targets, other.targets)):
+            for key, target in other_table.items():
+                existing = table.get(key)
+                if existing is None:
+                    table[key] = target
+                else:
+                    existing.merge(target)
+        while len(self.targets) > self.max_targets:
+            self._check(*self.targets.popitem(last=False))
+
+    def _check(self, key, target):
+        if target.syns >= self.syn_threshold and target.syn_acks < target.syns * self.answer_ratio:
+            self.floods[key] = target
+
+    def finalize(self, context):
+        for key, target in self.targets.items():
+            self._check(key, target)
+        for (dst_ip, dst_port), target in sorted(self.floods.items(), key=lambda item: -item[1].syns):
+            answered = target.syn_acks / target.syns
+            self.report({
+                'type': 'SYN_FLOOD',
+                'severity': 'HIGH',
+                'description': f'Possible SYN flood against {dst_ip}:{dst_port}',
+                'details': f'{target.syns} SYNs, {target.syn_acks} SYN-ACKs ({answered*100:.1f}% answered) '
+                           f'from ~{target.sources.count()} sources',
+                'educational_note': 'A SYN flood opens half-open connections faster than the server can answer them, often from spoofed addresses',
+                'count': target.syns
+            })
+
 
 class IssueDetector:
     """
     Detects potential network issues and anomalies
     Educational tool for understanding network troubleshooting
+    
+    Detection is done by rules (see src/rules.py) that a RuleEngine runs in
+    one pass over the packets. Pass rules=[...] to choose them; by default
+    every registered rule runs, including third-party plugins.
+    
+    Every run works on its own copies of the rules, so a single detector is
+    safe to share between threads; detected_issues and rule_timings only
+    record the latest run, for display_issues() and profiling.
     """
     
-    def __init__(self):
+    # Built-in checks, in report order
+    CHECKS = ('high_retransmissions', 'unusual_traffic_patterns', 'suspicious_ports',
+              'broadcast_storms', 'malformed_packets', 'dns_issues', 'port_scans', 'syn_floods')
+    
+    # Checks that only look at single packets or single flows, so they give
+    # the same answer on flow-sharded partitions of a capture
+    FLOW_LOCAL_CHECKS = ('high_retransmissions', 'suspicious_ports', 'malformed_packets')
+    
+    def __init__(self, rules=None):
+        if rules is None:
+            load_plugin_rules()
+            rules = RULES.values()
+        self.rules = {rule.name: rule() if isinstance(rule, type) else rule for rule in rules}
+        self.checks = tuple(self.rules)
+        self.flow_local_checks = tuple(name for name, rule in self.rules.items() if rule.flow_local)
+        # Capture-wide checks whose partial runs can be merged (see DetectionRule.merge)
+        self.mergeable_checks = tuple(name for name, rule in self.rules.items()
+                                      if not rule.flow_local and rule.merge)
+        self.rule_timings = {}
         self.detected_issues = []
         print("🚨 IssueDetector initialized!")
     
-    def analyze_packets(self, packets):
-        """Analyze packets for potential network issues"""
+    def analyze_packets(self, packets, flow_table=None):
+        """
+        Analyze packets for potential network issues
+        
+        Args:
+            packets: List of packet dictionaries or a PacketBatch
+            flow_table: Optional FlowTable already built over these packets
+        """
         if not packets:
             print("No packets to analyze for issues")
             return []
         
-        self.detected_issues = []
-        
-        # Run all detection methods
-        self._detect_high_retransmissions(packets)
-        self._detect_unusual_traffic_patterns(packets)
-        self._detect_suspicious_ports(packets)
-        self._detect_broadcast_storms(packets)
-        self._detect_malformed_packets(packets)
-        self._detect_dns_issues(packets)
+        # Run all detection rules in one pass
+        results = self.run_checks(packets, self.checks, flow_table)
+        self.detected_issues = [issue for check in self.checks for issue in results[check]]
         
         return self.detected_issues
     
-    def _detect_high_retransmissions(self, packets):
-        """Detect potential TCP retransmission issues"""
-        tcp_packets = [p for p in packets if p.get('protocol') == 'TCP']
-        
-        if len(tcp_packets) < 3:
-            return
-        
-        # Look for patterns that might indicate retransmissions
-        conversations = defaultdict(list)
-        for packet in tcp_packets:
-            summary = packet.get('summary', '')
-            if '>' in summary:
-                # Extract conversation key
-                parts = summary.split('>')
-                if len(parts) == 2:
-                    conv_key = parts[0].strip() + ">" + parts[1].split('/')[0].strip()
-                    conversations[conv_key].append(packet)
-        
-        # Check for repeated sequences that might indicate retransmissions
-        for conv, conv_packets in conversations.items():
-            if len(conv_packets) > 5:
-                self.detected_issues.append({
-                    'type': 'POTENTIAL_RETRANSMISSION',
-                    'severity': 'MEDIUM',
-                    'description': f'High TCP activity in conversation: {conv}',
-                    'details': f'Found {len(conv_packets)} TCP packets in this conversation',
-                    'educational_note': 'High TCP packet counts might indicate retransmissions due to network congestion or packet loss'
-                })
-    
-    def _detect_unusual_traffic_patterns(self, packets):
-        """Detect unusual traffic patterns"""
-        if len(packets) > 20:
-            # Check packet rate
-            duration = max(p.get('timestamp', 0) for p in packets) - min(p.get('timestamp', 0) for p in packets)
-            if duration > 0:
-                packet_rate = len(packets) / duration
-                if packet_rate > 50:  # More than 50 packets per second
-                    self.detected_issues.append({
-                        'type': 'HIGH_TRAFFIC_RATE',
-                        'severity': 'LOW',
-                        'description': 'Unusually high packet rate detected',
-                        'details': f'Packet rate: {packet_rate:.1f} packets/second',
-                        'educational_note': 'High packet rates might indicate network scanning, DDoS attempts, or legitimate heavy traffic'
-                    })
-    
-    def _detect_suspicious_ports(self, packets):
-        """Detect traffic on suspicious or unusual ports"""
-        suspicious_ports = {
-            23: 'Telnet (unencrypted, often targeted)',
-            135: 'Windows RPC (common attack vector)',
-            139: 'NetBIOS (often scanned)',
-            445: 'SMB (common in ransomware attacks)',
-            1433: 'SQL Server (common target)',
-            3389: 'RDP (common brute force target)'
-        }
-        
-        for packet in packets:
-            summary = packet.get('summary', '').lower()
-            for port, description in suspicious_ports.items():
-                if f':{port}' in summary or f'>{port}' in summary:
-                    self.detected_issues.append({
-                        'type': 'SUSPICIOUS_PORT',
-                        'severity': 'MEDIUM',
-                        'description': f'Traffic on potentially suspicious port {port}',
-                        'details': f'{description} - Packet: {summary[:100]}...',
-                        'educational_note': 'Monitor traffic on these ports for potential security issues'
-                    })
-                    break
+    def engine(self, checks=None, flow_table=None):
+        """RuleEngine over the named checks (all by default), for incremental feed()"""
+        checks = self.checks if checks is None else checks
+        unknown = [check for check in checks if check not in self.rules]
+        if unknown:
+            raise ValueError(f"Unknown checks: {', '.join(unknown)}")
+        # Fresh copies of the configured rules hold this call's state, so one
+        # detector can serve several threads at once
+        return RuleEngine([copy.copy(self.rules[check]) for check in checks], flow_table)
     
-    def _detect_broadcast_storms(self, packets):
-        """Detect potential broadcast/multicast storms"""
-        broadcast_packets = []
-        multicast_packets = []
-        
-        for packet in packets:
-            summary = packet.get('summary', '')
-            # Check for broadcast/multicast addresses
-            if 'ff02::' in summary or '224.0.0.' in summary or '255.255.255.255' in summary:
-                if 'ff02::' in summary:
-                    multicast_packets.append(packet)
-                else:
-                    broadcast_packets.append(packet)
-        
-        if len(broadcast_packets) > len(packets) * 0.3:  # More than 30% broadcast
-            self.detected_issues.append({
-                'type': 'POTENTIAL_BROADCAST_STORM',
-                'severity': 'HIGH',
-                'description': 'High volume of broadcast traffic detected',
-                'details': f'{len(broadcast_packets)} broadcast packets ({len(broadcast_packets)/len(packets)*100:.1f}% of total)',
-                'educational_note': 'Broadcast storms can degrade network performance and may indicate misconfigured devices'
-            })
-        
-        if len(multicast_packets) > len(packets) * 0.5:  # More than 50% multicast
-            self.detected_issues.append({
-                'type': 'HIGH_MULTICAST_TRAFFIC',
-                'severity': 'MEDIUM',
-                'description': 'High volume of multicast traffic detected',
-                'details': f'{len(multicast_packets)} multicast packets ({len(multicast_packets)/len(packets)*100:.1f}% of total)',
-                'educational_note': 'Excessive multicast traffic might indicate issues with multicast applications or network configuration'
-            })
+    def run_checks(self, packets, checks, flow_table=None):
+        """Run the named checks and return {check name: issues}"""
+        engine = self.engine(checks, flow_table)
+        results = engine.run(packets)
+        self.rule_timings = engine.timings
+        return results
     
-    def _detect_malformed_packets(self, packets):
-        """Detect potentially malformed or unusual packets"""
-        for packet in packets:
-            length = packet.get('length', 0)
-            summary = packet.get('summary', '')
-            
-            # Check for unusually small packets (might be malformed)
-            if length < 60 and 'TCP' in summary:
-                self.detected_issues.append({
-                    'type': 'UNUSUALLY_SMALL_PACKET',
-                    'severity': 'LOW',
-                    'description': 'Very small TCP packet detected',
-                    'details': f'Packet size: {length} bytes - {summary[:80]}...',
-                    'educational_note': 'Very small TCP packets might be keep-alives, but could also indicate malformed traffic'
-                })
-    
-    def _detect_dns_issues(self, packets):
-        """Detect potential DNS-related issues"""
-        dns_packets = [p for p in packets if 'DNS' in p.get('summary', '')]
-        
-        if len(dns_packets) > 5:
-            # Check for repeated DNS queries (might indicate issues)
-            dns_queries = []
-            for packet in dns_packets:
-                summary = packet.get('summary', '')
-                if 'Qry' in summary:
-                    dns_queries.append(summary)
-            
-            if len(dns_queries) > 3:
-                query_counts = Counter(dns_queries)
-                for query, count in query_counts.items():
-                    if count > 2:  # Same query repeated multiple times
-                        self.detected_issues.append({
-                            'type': 'REPEATED_DNS_QUERIES',
-                            'severity': 'LOW',
-                            'description': 'Repeated DNS queries detected',
-                            'details': f'Query repeated {count} times: {query[:100]}...',
-                            'educational_note': 'Repeated DNS queries might indicate DNS resolution issues or misconfigured applications'
-                        })
+    def realtime(self, **options):
+        """Sliding-window detector for a running capture (see RealtimeDetector)"""
+        return RealtimeDetector(**options)
     
     def display_issues(self):
         """Display detected issues in educational format"""
@@ -200,7 +654,140 @@ class IssueDetector:
                     print(f"   {i}. {issue['type']}")
                     print(f"      📝 {issue['description']}")
                     print(f"      🔍 {issue['details']}")
+                    occurrences = self._occurrences(issue)
+                    if occurrences:
+                        print(f"      🔁 {occurrences}")
                     print(f"      💡 {issue['educational_note']}")
                     print()
         
-        print("="*70)
\ No newline at end of file
+        print("="*70)
+    
+    @staticmethod
+    def _occurrences(issue):
+        """'N occurrences over Xs (e.g. packets #1, #5)' line for aggregated issues"""
+        count = issue.get('count', 1)
+        if count <= 1:
+            return None
+        line = f"{count} occurrences"
+        if issue.get('first_seen') is not None and issue.get('last_seen') is not None:
+            line += f" over {issue['last_seen'] - issue['first_seen']:.1f}s"
+        numbers = [f"#{sample['number']}" for sample in issue.get('samples', []) if sample.get('number') is not None]
+        if numbers:
+            line += f" (e.g. packets {', '.join(numbers)})"
+        return line
+
+
+class RealtimeDetector:
+    """
+    Streaming mode of IssueDetector for a running capture.
+
+    observe() takes packets as they arrive (e.g. as a PacketCapturer
+    listener) and checks the thresholds continuously over sliding windows:
+    packet rate, broadcast/multicast share, repeated DNS queries and traffic
+    per suspicious port. Alerts are returned, passed to on_alert and kept
+    in `alerts`. A condition that keeps holding alerts again at most once
+    per window. Memory stays bounded however long the capture runs.
+    """
+
+    def __init__(self, window=DEFAULT_WINDOW, bucket=DEFAULT_BUCKET, on_alert=None,
+                 rate_threshold=50, broadcast_fraction=0.3, multicast_fraction=0.5,
+                 dns_repeats=3, port_threshold=20, min_packets=20, max_keys=DEFAULT_MAX_KEYS):
+        self.traffic = SlidingCounter(window, bucket, max_keys=3)
+        self.dns_queries = SlidingCounter(window, bucket, max_keys)
+        self.ports = SlidingCounter(window, bucket, max_keys)
+        self.window = self.traffic.window
+        self.on_alert = on_alert
+        self.rate_threshold = rate_threshold
+        self.broadcast_fraction = broadcast_fraction
+        self.multicast_fraction = multicast_fraction
+        self.dns_repeats = dns_repeats
+        self.port_threshold = port_threshold
+        self.min_packets = min_packets
+        self.max_keys = max_keys
+        self.packets = 0
+        self.alerts = deque(maxlen=MAX_ALERTS)
+        self._last_fired = OrderedDict()   # (type, key) -> timestamp of the last alert, oldest first
+        self._lock = threading.Lock()
+
+    def observe(self, packet):
+        """Account one packet and return the alerts it raised"""
+        timestamp = packet.get('timestamp')
+        if timestamp is None:
+            timestamp = time.time()
+        raised = []
+        with self._lock:
+            self.packets += 1
+            packets = self.traffic.add('packets', timestamp)
+            kind = address_class(packet)
+            if kind:
+                self.traffic.add(kind, timestamp)
+            if packets >= self.min_packets:
+                self._check_traffic(packets, timestamp, raised)
+
+            query = dns_query(packet)
+            if query is not None:
+                count = self.dns_queries.add(query, timestamp)
+                if count >= self.dns_repeats:
+                    self._raise(raised, timestamp, 'REPEATED_DNS_QUERIES', query, 'LOW',
+                                'Repeated DNS queries detected',
+                                f'Query repeated {count} times in {self.window:g}s: {query[:100]}...',
+                                'Repeated DNS queries might indicate DNS resolution issues or misconfigured applications')
+
+            port = suspicious_port(packet)
+            if port is not None:
+                count = self.ports.add(port, timestamp)
+                if count >= self.port_threshold:
+                    self._raise(raised, timestamp, 'SUSPICIOUS_PORT', port, 'MEDIUM',
+                                f'Sustained traffic on potentially suspicious port {port}',
+                                f'{SUSPICIOUS_PORTS[port]} - {count} packets in {self.window:g}s',
+                                'Monitor traffic on these ports for potential security issues')
+
+        if self.on_alert:
+            for alert in raised:
+                self.on_alert(alert)
+        return raised
+
+    def _check_traffic(self, packets, timestamp, raised):
+        traffic = self.traffic
+        rate = packets / traffic.span()
+        if rate > self.rate_threshold:
+            self._raise(raised, timestamp, 'HIGH_TRAFFIC_RATE', None, 'LOW',
+                        'Unusually high packet rate detected',
+                        f'Packet rate: {rate:.1f} packets/second over the last {traffic.span():g}s',
+                        'High packet rates might indicate network scanning, DDoS attempts, or legitimate heavy traffic')
+
+        broadcast = traffic.get('broadcast')
+        if broadcast > packets * self.broadcast_fraction:
+            self._raise(raised, timestamp, 'POTENTIAL_BROADCAST_STORM', None, 'HIGH',
+                        'High volume of broadcast traffic detected',
+                        f'{broadcast} broadcast packets ({broadcast/packets*100:.1f}% of the last {traffic.span():g}s)',
+                        'Broadcast storms can degrade network performance and may indicate misconfigured devices')
+
+        multicast = traffic.get('multicast')
+        if multicast > packets * self.multicast_fraction:
+            self._raise(raised, timestamp, 'HIGH_MULTICAST_TRAFFIC', None, 'MEDIUM',
+                        'High volume of multicast traffic detected',
+                        f'{multicast} multicast packets ({multicast/packets*100:.1f}% of the last {traffic.span():g}s)',
+                        'Excessive multicast traffic might indicate issues with multicast applications or network configuration')
+
+    def _raise(self, raised, timestamp, issue_type, key, severity, description, details, note):
+        fired = self._last_fired.get((issue_type, key))
+        if fired is not None and timestamp - fired < self.window:
+            return
+        self._last_fired[(issue_type, key)] = timestamp
+        self._last_fired.move_to_end((issue_type, key))
+        if len(self._last_fired) > self.max_keys:
+            # Forget the least recent alert; at worst it repeats within its window
+            self._last_fired.popitem(last=False)
+
+        alert = {
+            'type': issue_type,
+            'severity': severity,
+            'description': description,
+            'details': details,
+            'educational_note': note,
+            'timestamp': timestamp,
+            'window': self.window
+        }
+        self.alerts.append(alert)
+        raised.append(alert)
@@ -0,0 +1,277 @@
+# src/dissector.py
+import socket
+import struct
+
+from src.pcap_reader import (
+    LINKTYPE_NULL, LINKTYPE_ETHERNET, LINKTYPE_RAW,
+    LINKTYPE_LINUX_SLL, LINKTYPE_IPV4, LINKTYPE_IPV6
+)
+
+ETHERTYPE_IPV4 = 0x0800
+ETHERTYPE_ARP = 0x0806
+ETHERTYPE_IPV6 = 0x86DD
+ETHERTYPE_VLAN = (0x8100, 0x88A8, 0x9100)
+
+IPPROTO_ICMP = 1
+IPPROTO_TCP = 6
+IPPROTO_UDP = 17
+IPPROTO_ICMPV6 = 58
+
+# IPv6 extension headers we can walk past to reach the transport header
+_IPV6_EXTENSION_HEADERS = (0, 43, 60)
+_IPV6_FRAGMENT = 44
+
+# Tunnels are left to Scapy, which decodes the inner packet
+_TUNNEL_PROTOCOLS = (4, 41, 47)
+
+# UDP port whose payload is decoded as a DNS message
+DNS_PORT = 53
+_DNS_MAX_NAME = 255
+
+# ICMPv6 types that the Scapy path reports as 'ICMPv6'
+ICMPV6_ROUTER_ADVERTISEMENT = 134
+ICMPV6_MLD2_REPORT = 143
+
+# Same letters and order Scapy uses when printing TCP flags
+_TCP_FLAG_LETTERS = 'FSRPAUECN'
+
+_ETHER = struct.Struct('!6s6sH')
+_VLAN = struct.Struct('!HH')
+_SLL = struct.Struct('!HHH8sH')
+_IPV4 = struct.Struct('!BBHHHBBH4s4s')
+_IPV6 = struct.Struct('!IHBB16s16s')
+_IPV6_EXT = struct.Struct('!BB')
+_TCP = struct.Struct('!HHIIHHHH')
+_UDP = struct.Struct('!HHHH')
+_ICMP = struct.Struct('!BBH')
+_DNS = struct.Struct('!HHHHHH')
+
+
+def format_mac(raw):
+    """Format 6 raw bytes as a colon separated MAC address"""
+    return ':'.join('%02x' % b for b in raw)
+
+
+def format_tcp_flags(bits):
+    """Convert the TCP flag bits to Scapy-style letters, e.g. 0x12 -> 'SA'"""
+    return ''.join(letter for i, letter in enumerate(_TCP_FLAG_LETTERS) if bits & (1 << i))
+
+
+class PacketDissector:
+    """
+    Fast-path dissector that decodes Ethernet/IPv4/IPv6/TCP/UDP/ICMP headers
+    straight from raw bytes with struct.unpack_from over a memoryview.
+
+    dissect() returns a flat dict of decoded fields, or None when the frame
+    uses something it does not understand so callers can fall back to Scapy.
+    """
+
+    def dissect(self, data, linktype=LINKTYPE_ETHERNET):
+        """Decode a frame and return its header fields (or None)"""
+        view = memoryview(data)
+        fields = {'layers': []}
+
+        try:
+            if linktype == LINKTYPE_ETHERNET:
+                offset, ethertype = self._dissect_ethernet(view, fields)
+            elif linktype == LINKTYPE_LINUX_SLL:
+                _, _, _, _, ethertype = _SLL.unpack_from(view, 0)
+                fields['layers'].append('CookedLinux')
+                offset = _SLL.size
+            elif linktype in (LINKTYPE_RAW, LINKTYPE_IPV4, LINKTYPE_IPV6):
+                ethertype = ETHERTYPE_IPV6 if view[0] >> 4 == 6 else ETHERTYPE_IPV4
+                offset = 0
+            elif linktype == LINKTYPE_NULL:
+                family = struct.unpack_from('=I', view, 0)[0]
+                ethertype = ETHERTYPE_IPV4 if family == socket.AF_INET else ETHERTYPE_IPV6
+                fields['layers'].append('Loopback')
+                offset = 4
+            else:
+                return None
+
+            if ethertype == ETHERTYPE_IPV4:
+                offset, ip_proto = self._dissect_ipv4(view, offset, fields)
+            elif ethertype == ETHERTYPE_IPV6:
+                offset, ip_proto = self._dissect_ipv6(view, offset, fields)
+            elif ethertype == ETHERTYPE_ARP:
+                fields['protocol'] = 'ARP'
+                fields['layers'].append('ARP')
+                return self._finish(fields)
+            else:
+                return None
+
+            if ip_proto is None:
+                return self._finish(fields)
+            if ip_proto in _TUNNEL_PROTOCOLS:
+                return None
+
+            if ip_proto == IPPROTO_TCP:
+                self._dissect_tcp(view, offset, fields)
+            elif ip_proto == IPPROTO_UDP:
+                self._dissect_udp(view, offset, fields)
+            elif ip_proto == IPPROTO_ICMP and fields['ip_version'] == 4:
+                self._dissect_icmp(view, offset, fields, 'ICMP')
+            elif ip_proto == IPPROTO_ICMPV6 and fields['ip_version'] == 6:
+                self._dissect_icmp(view, offset, fields, 'ICMPv6')
+
+            return self._finish(fields)
+
+        except (struct.error, IndexError, KeyError):
+            return None  # Truncated or malformed header
+
+    def _dissect_ethernet(self, view, fields):
+        dst, src, ethertype = _ETHER.unpack_from(view, 0)
+        fields['eth_src'] = format_mac(src)
+        fields['eth_dst'] = format_mac(dst)
+        fields['eth_type'] = ethertype
+        fields['layers'].append('Ether')
+        offset = _ETHER.size
+
+        # Skip 802.1Q / 802.1ad VLAN tags
+        while ethertype in ETHERTYPE_VLAN:
+            fields['vlan'] = _VLAN.unpack_from(view, offset)[0] & 0x0FFF
+            ethertype = _VLAN.unpack_from(view, offset)[1]
+            offset += _VLAN.size
+
+        return offset, ethertype
+
+    def _dissect_ipv4(self, view, offset, fields):
+        (ver_ihl, _, total_length, _, frag, ttl, proto, _,
+         src, dst) = _IPV4.unpack_from(view, offset)
+        if ver_ihl >> 4 != 4:
+            raise IndexError("not an IPv4 header")
+
+        fields['ip_version'] = 4
+        fields['src_ip'] = socket.inet_ntoa(src)
+        fields['dst_ip'] = socket.inet_ntoa(dst)
+        fields['ttl'] = ttl
+        fields['ip_proto'] = proto
+        fields['ip_length'] = total_length
+        fields['protocol'] = 'IP'
+        fields['layers'].append('IP')
+        fields['_ip_end'] = offset + total_length
+
+        # Non-first fragments carry no transport header
+        if frag & 0x1FFF:
+            return offset, None
+        return offset + (ver_ihl & 0x0F) * 4, proto
+
+    def _dissect_ipv6(self, view, offset, fields):
+        _, payload_length, next_header, hop_limit, src, dst = _IPV6.unpack_from(view, offset)
+
+        fields['ip_version'] = 6
+        fields['src_ip'] = socket.inet_ntop(socket.AF_INET6, src)
+        fields['dst_ip'] = socket.inet_ntop(socket.AF_INET6, dst)
+        fields['hop_limit'] = hop_limit
+        fields['ip_length'] = payload_length
+        fields['protocol'] = 'IPv6'
+        fields['layers'].append('IPv6')
+        offset += _IPV6.size
+        fields['_ip_end'] = offset + payload_length
+
+        while next_header in _IPV6_EXTENSION_HEADERS or next_header == _IPV6_FRAGMENT:
+            following, ext_length = _IPV6_EXT.unpack_from(view, offset)
+            if next_header == _IPV6_FRAGMENT:
+                if struct.unpack_from('!H', view, offset + 2)[0] & 0xFFF8:
+                    fields['ip_proto'] = following
+                    return offset, None
+                offset += 8
+            else:
+                offset += (ext_length + 1) * 8
+            next_header = following
+
+        fields['ip_proto'] = next_header
+        return offset, next_header
+
+    def _dissect_tcp(self, view, offset, fields):
+        (sport, dport, seq, ack, offset_flags, window,
+         _, _) = _TCP.unpack_from(view, offset)
+        header_length = (offset_flags >> 12) * 4
+
+        fields['src_port'] = sport
+        fields['dst_port'] = dport
+        fields['tcp_seq'] = seq
+        fields['tcp_ack'] = ack
+        fields['tcp_flags'] = format_tcp_flags(offset_flags & 0x01FF)
+        fields['tcp_window'] = window
+        # Use the IP length, not the frame length: frames may be padded or snapped
+        fields['payload_length'] = max(fields['_ip_end'] - offset - header_length, 0)
+        fields['protocol'] = 'TCP'
+        fields['layers'].append('TCP')
+
+    def _dissect_udp(self, view, offset, fields):
+        sport, dport, length, _ = _UDP.unpack_from(view, offset)
+        fields['src_port'] = sport
+        fields['dst_port'] = dport
+        fields['udp_length'] = length
+        fields['payload_length'] = max(length - _UDP.size, 0)
+        fields['protocol'] = 'UDP'
+        fields['layers'].append('UDP')
+        if DNS_PORT in (sport, dport):
+            self._dissect_dns(view, offset + _UDP.size, min(fields['_ip_end'], len(view)), fields)
+
+    def _dissect_dns(self, view, offset, end, fields):
+        """DNS header and the first question's name; a malformed message stays plain UDP"""
+        try:
+            _, flags, questions, _, _, _ = _DNS.unpack_from(view, offset)
+            name = self._dns_name(view, offset + _DNS.size, end) if questions else None
+        except (struct.error, IndexError, ValueError):
+            return
+        fields['protocol'] = 'DNS'
+        fields['dns_response'] = bool(flags & 0x8000)
+        if name is not None and not fields['dns_response']:
+            fields['dns_query'] = name
+
+    def _dns_name(self, view, offset, end):
+        """Read an uncompressed domain name, e.g. 'example.com.'"""
+        labels = []
+        length = 0
+        while True:
+            if offset >= end:
+                raise IndexError("DNS name runs past the message")
+            size = view[offset]
+            if size == 0:
+                break
+            if size & 0xC0:
+                raise ValueError("compressed name in a question")
+            length += size + 1
+            if length > _DNS_MAX_NAME:
+                raise ValueError("DNS name too long")
+            labels.append(bytes(view[offset + 1:offset + 1 + size]).decode('ascii', 'replace'))
+            offset += size + 1
+        return '.'.join(labels) + '.'
+
+    def _dissect_icmp(self, view, offset, fields, name):
+        icmp_type, icmp_code, _ = _ICMP.unpack_from(view, offset)
+        fields['icmp_type'] = icmp_type
+        fields['icmp_code'] = icmp_code
+        fields['layers'].append(name)
+
+        if name == 'ICMP':
+            fields['protocol'] = 'ICMP'
+        elif icmp_type in (ICMPV6_ROUTER_ADVERTISEMENT, ICMPV6_MLD2_REPORT):
+            # Scapy's protocol detection only names these two ICMPv6 messages
+            fields['protocol'] = 'ICMPv6'
+
+    def _finish(self, fields):
+        """Build the Scapy-style summary line"""
+        layers = fields.pop('layers')
+        fields.pop('_ip_end', None)
+        summary = ' / '.join(layers)
+
+        if 'src_port' in fields:
+            summary += (f" {fields['src_ip']}:{fields['src_port']} > "
+                        f"{fields['dst_ip']}:{fields['dst_port']}")
+            if 'tcp_flags' in fields:
+                summary += f" {fields['tcp_flags']}"
+        elif 'src_ip' in fields:
+            summary += f" {fields['src_ip']} > {fields['dst_ip']}"
+
+        if fields.get('protocol') == 'DNS':
+            # Scapy-style DNS layer summary
+            summary += ' / DNS Ans' if fields['dns_response'] else ' / DNS Qry'
+            if 'dns_query' in fields:
+                summary += f' "{fields["dns_query"]}"'
+
+        fields['summary'] = summary
+        return fields
@@ -0,0 +1,642 @@
+# src/filter_expr.py
+import ipaddress
+import re
+from functools import lru_cache
+
+from src.batch import PacketBatch, _HAS_PORTS
+from src.metrics import record_selectivity
+
+# Well-known application ports for protocol names that are not headers
+APPLICATION_PORTS = {
+    'dns': 53,
+    'http': 80,
+    'https': 443,
+}
+
+# Application protocols decoders name instead of the transport that carries them
+CARRIED_BY = {
+    'DNS': 'UDP',
+}
+
+_COMPARISONS = {
+    '<': lambda a, b: a < b,
+    '<=': lambda a, b: a <= b,
+    '>': lambda a, b: a > b,
+    '>=': lambda a, b: a >= b,
+    '==': lambda a, b: a == b,
+    '=': lambda a, b: a == b,
+    '!=': lambda a, b: a != b,
+}
+
+_TOKEN = re.compile(r'\s*(\(|\)|&&|\|\||!=|<=|>=|==|[<>=!]|[^\s()!<>=&|]+)')
+
+# Protocol names with a direct pcap-filter primitive
+_BPF_PROTOCOLS = {
+    'TCP': 'tcp',
+    'UDP': 'udp',
+    'ICMP': 'icmp',
+    'ARP': 'arp',
+}
+
+# Legacy records only carry a summary line; recover IPv4 endpoints from it
+_SUMMARY_IPS = re.compile(r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}')
+_SUMMARY_PORTS = re.compile(r':(\d+) > [^:\s]+:(\d+)')
+# IPv6 layer name, a compressed address or a full 8-group one (MACs have 6)
+_SUMMARY_IPV6 = re.compile(r'\bIPv6\b|[0-9A-Fa-f]*::[0-9A-Fa-f]|(?:[0-9A-Fa-f]{1,4}:){7}[0-9A-Fa-f]{1,4}')
+# "src > dst" with IPv6-looking sides, and whether TCP/UDP precedes it (then sides may end in :port)
+_SUMMARY_IPV6_PAIR = re.compile(r'(\b(?:TCP|UDP) )?([0-9A-Fa-f:]*:[0-9A-Fa-f:]*:[\w:]*) (>|→) '
+                                r'([0-9A-Fa-f:]*:[0-9A-Fa-f:]*:[\w:]*)')
+
+
+class FilterSyntaxError(ValueError):
+    """Raised when a filter expression cannot be parsed"""
+
+
+def packet_addresses(packet):
+    """Return (src_ip, dst_ip) from decoded fields, falling back to the summary"""
+    src_ip = packet.get('src_ip')
+    dst_ip = packet.get('dst_ip')
+    if not src_ip or not dst_ip:
+        summary = packet.get('summary', '')
+        found = _SUMMARY_IPS.findall(summary) or _summary_ipv6_addresses(packet, summary)
+        if not src_ip and found:
+            src_ip = found[0]
+        if not dst_ip and len(found) > 1:
+            dst_ip = found[1]
+    return src_ip, dst_ip
+
+
+def _summary_ipv6_addresses(packet, summary):
+    """IPv6 (src, dst) from a summary line ("TCP 2001:db8::1:443 > 2001:db8::2:50000 S"), or ()"""
+    match = _SUMMARY_IPV6_PAIR.search(summary)
+    if not match:
+        return ()
+    transport, src, separator, dst = match.groups()
+    # Dissector and Scapy summaries append ports to TCP/UDP addresses ("→" lines never did)
+    with_port = packet.get('src_port') is not None or (transport is not None and separator == '>')
+    addresses = tuple(_summary_ipv6(token, with_port) for token in (src, dst))
+    return addresses if all(addresses) else ()
+
+
+def _summary_ipv6(token, with_port):
+    candidates = (token.rsplit(':', 1)[0], token) if with_port else (token,)
+    for candidate in candidates:
+        try:
+            return str(ipaddress.IPv6Address(candidate))
+        except ValueError:
+            continue
+    return None
+
+
+def packet_ip_version(packet):
+    """Return 4, 6 or None from decoded fields, falling back to the summary"""
+    src_ip = packet_addresses(packet)[0] or ''
+    if '.' in src_ip:
+        return 4
+    if ':' in src_ip:
+        return 6
+    if not packet.get('src_ip') and _SUMMARY_IPV6.search(packet.get('summary', '')):
+        return 6
+    return None
+
+
+def packet_ports(packet):
+    """Return (src_port, dst_port) from decoded fields, falling back to the summary"""
+    src_port = packet.get('src_port')
+    dst_port = packet.get('dst_port')
+    if src_port is None or dst_port is None:
+        match = _SUMMARY_PORTS.search(packet.get('summary', ''))
+        if match:
+            return int(match.group(1)), int(match.group(2))
+    return src_port, dst_port
+
+
+# ----------------------------------------------------------------------
+# Masks are bytes with one 0/1 byte per packet. Combining them goes through
+# Python big ints so AND/OR/NOT run in C instead of a per-packet loop.
+# ----------------------------------------------------------------------
+
+def _mask_and(a, b):
+    n = len(a)
+    return (int.from_bytes(a, 'big') & int.from_bytes(b, 'big')).to_bytes(n, 'big')
+
+
+def _mask_or(a, b):
+    n = len(a)
+    return (int.from_bytes(a, 'big') | int.from_bytes(b, 'big')).to_bytes(n, 'big')
+
+
+def _mask_not(a):
+    n = len(a)
+    return (int.from_bytes(a, 'big') ^ int.from_bytes(b'\x01' * n, 'big')).to_bytes(n, 'big')
+
+
+# ----------------------------------------------------------------------
+# AST nodes
+# ----------------------------------------------------------------------
+
+class FilterNode:
+    """Base class for filter expression nodes"""
+
+    def compile(self):
+        """Return a predicate function(packet_info) -> bool"""
+        raise NotImplementedError
+
+    def mask(self, batch):
+        """Return a bytes mask (1 = match) over a PacketBatch"""
+        predicate = self.compile()
+        return bytes(predicate(row) for row in batch)
+
+    def to_bpf(self):
+        """Return an equivalent pcap-filter string, or None if not expressible"""
+        return None
+
+
+class AndNode(FilterNode):
+    def __init__(self, children):
+        self.children = children
+
+    def compile(self):
+        predicates = [child.compile() for child in self.children]
+        if len(predicates) == 2:
+            first, second = predicates
+            return lambda packet: first(packet) and second(packet)
+        return lambda packet: all(predicate(packet) for predicate in predicates)
+
+    def mask(self, batch):
+        result = self.children[0].mask(batch)
+        for child in self.children[1:]:
+            result = _mask_and(result, child.mask(batch))
+        return result
+
+    def to_bpf(self):
+        parts = [child.to_bpf() for child in self.children]
+        if None in parts:
+            return None
+        return ' and '.join(f"({part})" for part in parts)
+
+    def __str__(self):
+        return ' and '.join(_wrap(child) for child in self.children)
+
+
+class OrNode(FilterNode):
+    def __init__(self, children):
+        self.children = children
+
+    def compile(self):
+        predicates = [child.compile() for child in self.children]
+        if len(predicates) == 2:
+            first, second = predicates
+            return lambda packet: first(packet) or second(packet)
+        return lambda packet: any(predicate(packet) for predicate in predicates)
+
+    def mask(self, batch):
+        result = self.children[0].mask(batch)
+        for child in self.children[1:]:
+            result = _mask_or(result, child.mask(batch))
+        return result
+
+    def to_bpf(self):
+        parts = [child.to_bpf() for child in self.children]
+        if None in parts:
+            return None
+        return ' or '.join(f"({part})" for part in parts)
+
+    def __str__(self):
+        return ' or '.join(_wrap(child) for child in self.children)
+
+
+class NotNode(FilterNode):
+    def __init__(self, child):
+        self.child = child
+
+    def compile(self):
+        predicate = self.child.compile()
+        return lambda packet: not predicate(packet)
+
+    def mask(self, batch):
+        return _mask_not(self.child.mask(batch))
+
+    def to_bpf(self):
+        child = self.child.to_bpf()
+        return f"not ({child})" if child is not None else None
+
+    def __str__(self):
+        return f"not {_wrap(self.child)}"
+
+
+class ProtocolNode(FilterNode):
+    """Matches the packet's protocol name (tcp, udp, icmp, dns, ...)"""
+
+    def __init__(self, name):
+        self.name = name.upper()
+        self.port = APPLICATION_PORTS.get(name.lower())
+        # 'udp' also matches packets decoded as DNS
+        self.names = frozenset([self.name] + [app for app, transport in CARRIED_BY.items()
+                                              if transport == self.name])
+
+    def compile(self):
+        names, port = self.names, self.port
+        if port is None:
+            return lambda packet: packet.get('protocol', '').upper() in names
+
+        def match(packet):
+            if packet.get('protocol', '').upper() in names:
+                return True
+            return port in packet_ports(packet)
+        return match
+
+    def mask(self, batch):
+        codes = {code for code, protocol in enumerate(batch.protocols) if protocol.upper() in self.names}
+        result = bytes(code in codes for code in batch.protocol)
+        if self.port is not None:
+            result = _mask_or(result, PortNode(self.port, self.port).mask(batch))
+        return result
+
+    def to_bpf(self):
+        if self.port is not None:
+            # Decoders never name these protocols before TCP/UDP, so the port decides
+            return f"port {self.port}"
+        return _BPF_PROTOCOLS.get(self.name)
+
+    def __str__(self):
+        return self.name.lower()
+
+
+class IpVersionNode(FilterNode):
+    """'ip' matches IPv4 packets, 'ip6' matches IPv6 packets"""
+
+    def __init__(self, version):
+        self.version = version
+
+    def compile(self):
+        version = self.version
+        return lambda packet: packet_ip_version(packet) == version
+
+    def mask(self, batch):
+        version = self.version
+        return bytes(v == version for v in batch.ip_version)
+
+    def to_bpf(self):
+        return str(self)
+
+    def __str__(self):
+        return 'ip6' if self.version == 6 else 'ip'
+
+
+class NetNode(FilterNode):
+    """host/net match on source, destination or either address"""
+
+    def __init__(self, network, direction=None, keyword='net'):
+        self.network = network
+        self.direction = direction
+        self.keyword = keyword
+
+    def compile(self):
+        network = self.network
+        direction = self.direction
+        host = str(network.network_address) if self.keyword == 'host' else None
+
+        def in_network(address):
+            if not address:
+                return False
+            if host is not None:
+                return address == host
+            try:
+                return ipaddress.ip_address(address) in network
+            except ValueError:
+                return False
+
+        def match(packet):
+            src_ip, dst_ip = packet_addresses(packet)
+            if direction == 'src':
+                return in_network(src_ip)
+            if direction == 'dst':
+                return in_network(dst_ip)
+            return in_network(src_ip) or in_network(dst_ip)
+        return match
+
+    def mask(self, batch):
+        network = self.network
+        if network.version == 4:
+            low = int(network.network_address)
+            high = int(network.broadcast_address)
+            src = bytes(v == 4 and low <= a <= high for v, a in zip(batch.ip_version, batch.src_ip))
+            dst = bytes(v == 4 and low <= a <= high for v, a in zip(batch.ip_version, batch.dst_ip))
+        else:
+            # IPv6 addresses are interned, so test each distinct address once
+            hits = {i for i, packed in enumerate(batch.ipv6_addresses)
+                    if ipaddress.IPv6Address(packed) in network}
+            src = bytes(v == 6 and a in hits for v, a in zip(batch.ip_version, batch.src_ip))
+            dst = bytes(v == 6 and a in hits for v, a in zip(batch.ip_version, batch.dst_ip))
+
+        if self.direction == 'src':
+            return src
+        if self.direction == 'dst':
+            return dst
+        return _mask_or(src, dst)
+
+    def to_bpf(self):
+        return str(self)
+
+    def __str__(self):
+        prefix = f"{self.direction} " if self.direction else ''
+        if self.keyword == 'host':
+            return f"{prefix}host {self.network.network_address}"
+        return f"{prefix}net {self.network}"
+
+
+class PortNode(FilterNode):
+    """port / portrange match on source, destination or either port"""
+
+    def __init__(self, low, high, direction=None):
+        self.low = low
+        self.high = high
+        self.direction = direction
+
+    def compile(self):
+        low, high, direction = self.low, self.high, self.direction
+
+        def in_range(port):
+            return port is not None and low <= port <= high
+
+        def match(packet):
+            src_port, dst_port = packet_ports(packet)
+            if direction == 'src':
+                return in_range(src_port)
+            if direction == 'dst':
+                return in_range(dst_port)
+            return in_range(src_port) or in_range(dst_port)
+        return match
+
+    def mask(self, batch):
+        low, high = self.low, self.high
+        has_ports = [flag & _HAS_PORTS for flag in batch.flags]
+        src = bytes(bool(h) and low <= p <= high for h, p in zip(has_ports, batch.src_port))
+        dst = bytes(bool(h) and low <= p <= high for h, p in zip(has_ports, batch.dst_port))
+        if self.direction == 'src':
+            return src
+        if self.direction == 'dst':
+            return dst
+        return _mask_or(src, dst)
+
+    def to_bpf(self):
+        return str(self)
+
+    def __str__(self):
+        prefix = f"{self.direction} " if self.direction else ''
+        if self.low == self.high:
+            return f"{prefix}port {self.low}"
+        return f"{prefix}portrange {self.low}-{self.high}"
+
+
+class LengthNode(FilterNode):
+    """len <op> N, greater N, less N"""
+
+    def __init__(self, op, value):
+        self.op = '==' if op == '=' else op
+        self.value = value
+
+    def compile(self):
+        compare = _COMPARISONS[self.op]
+        value = self.value
+        return lambda packet: compare(packet.get('length', 0) or 0, value)
+
+    def mask(self, batch):
+        compare = _COMPARISONS[self.op]
+        value = self.value
+        return bytes(compare(length, value) for length in batch.length)
+
+    def to_bpf(self):
+        op = '=' if self.op == '==' else self.op
+        return f"len {op} {self.value}"
+
+    def __str__(self):
+        return f"len {self.op} {self.value}"
+
+
+def split_bpf(node):
+    """
+    Split a filter into (bpf, residual) for kernel pushdown.
+
+    Top-level 'and' terms that translate to pcap-filter syntax go into the
+    BPF string; the rest come back as a residual node (or None) that must
+    still be checked in user space. Either part may be None.
+    """
+    children = node.children if isinstance(node, AndNode) else [node]
+    pushed, residual = [], []
+    for child in children:
+        bpf = child.to_bpf()
+        if bpf is None:
+            residual.append(child)
+        else:
+            pushed.append(bpf)
+
+    if not pushed:
+        bpf = None
+    elif len(pushed) == 1:
+        bpf = pushed[0]
+    else:
+        bpf = ' and '.join(f"({part})" for part in pushed)
+
+    if not residual:
+        return bpf, None
+    return bpf, residual[0] if len(residual) == 1 else AndNode(residual)
+
+
+def _wrap(node):
+    """Parenthesize nested boolean nodes when printing"""
+    if isinstance(node, (AndNode, OrNode)):
+        return f"({node})"
+    return str(node)
+
+
+# ----------------------------------------------------------------------
+# Parser
+# ----------------------------------------------------------------------
+
+class _Parser:
+    def __init__(self, expression):
+        self.expression = expression
+        self.tokens = self._tokenize(expression)
+        self.position = 0
+
+    def _tokenize(self, expression):
+        tokens = []
+        position = 0
+        while position < len(expression):
+            if expression[position:].strip() == '':
+                break
+            match = _TOKEN.match(expression, position)
+            if not match:
+                raise FilterSyntaxError(f"Unexpected character at {position}: {expression[position:]!r}")
+            tokens.append(match.group(1))
+            position = match.end()
+        return tokens
+
+    def peek(self):
+        return self.tokens[self.position].lower() if self.position < len(self.tokens) else None
+
+    def next(self):
+        token = self.peek()
+        if token is None:
+            raise FilterSyntaxError(f"Unexpected end of expression: {self.expression!r}")
+        raw = self.tokens[self.position]
+        self.position += 1
+        return raw
+
+    def parse(self):
+        if not self.tokens:
+            raise FilterSyntaxError("Empty filter expression")
+        node = self.parse_or()
+        if self.peek() is not None:
+            raise FilterSyntaxError(f"Unexpected token {self.tokens[self.position]!r}")
+        return node
+
+    def parse_or(self):
+        children = [self.parse_and()]
+        while self.peek() in ('or', '||'):
+            self.next()
+            children.append(self.parse_and())
+        return children[0] if len(children) == 1 else OrNode(children)
+
+    def parse_and(self):
+        children = [self.parse_not()]
+        while self.peek() in ('and', '&&'):
+            self.next()
+            children.append(self.parse_not())
+        return children[0] if len(children) == 1 else AndNode(children)
+
+    def parse_not(self):
+        if self.peek() in ('not', '!'):
+            self.next()
+            return NotNode(self.parse_not())
+        return self.parse_primary()
+
+    def parse_primary(self):
+        token = self.peek()
+        if token == '(':
+            self.next()
+            node = self.parse_or()
+            if self.peek() != ')':
+                raise FilterSyntaxError("Missing closing parenthesis")
+            self.next()
+            return node
+        if token in (')', None):
+            raise FilterSyntaxError(f"Expected a filter primitive in {self.expression!r}")
+
+        direction = None
+        if token in ('src', 'dst'):
+            direction = self.next().lower()
+            token = self.peek()
+
+        if token in ('host', 'net'):
+            keyword = self.next().lower()
+            return NetNode(self._network(self.next(), keyword), direction, keyword)
+        if token == 'port':
+            self.next()
+            port = self._number(self.next(), 65535)
+            return PortNode(port, port, direction)
+        if token == 'portrange':
+            self.next()
+            low, _, high = self.next().partition('-')
+            return PortNode(self._number(low, 65535), self._number(high, 65535), direction)
+        if direction:
+            raise FilterSyntaxError(f"'{direction}' must be followed by host, net, port or portrange")
+
+        if token == 'len':
+            self.next()
+            op = self.next()
+            if op not in _COMPARISONS:
+                raise FilterSyntaxError(f"Expected a comparison after 'len', got {op!r}")
+            return LengthNode(op, self._number(self.next()))
+        if token in ('greater', 'less'):
+            self.next()
+            return LengthNode('>=' if token == 'greater' else '<=', self._number(self.next()))
+        if token == 'ip':
+            self.next()
+            return IpVersionNode(4)
+        if token in ('ip6', 'ipv6'):
+            self.next()
+            return IpVersionNode(6)
+        if token in ('icmp6', 'icmpv6'):
+            self.next()
+            return ProtocolNode('ICMPv6')
+
+        word = self.next()
+        if not re.match(r'^[A-Za-z][\w-]*$', word):
+            raise FilterSyntaxError(f"Unknown filter primitive {word!r}")
+        return ProtocolNode(word)
+
+    def _network(self, value, keyword):
+        try:
+            network = ipaddress.ip_network(value, strict=False)
+        except ValueError:
+            raise FilterSyntaxError(f"Invalid address for '{keyword}': {value!r}")
+        if keyword == 'host' and network.num_addresses != 1:
+            raise FilterSyntaxError(f"'host' needs a single address, got {value!r}")
+        return network
+
+    def _number(self, value, maximum=None):
+        if not value.isdigit():
+            raise FilterSyntaxError(f"Expected a number, got {value!r}")
+        number = int(value)
+        if maximum is not None and number > maximum:
+            raise FilterSyntaxError(f"{number} is out of range (max {maximum})")
+        return number
+
+
+class CompiledFilter:
+    """
+    A parsed and compiled filter expression.
+    Call it with a packet_info dict, or use apply()/mask() on collections.
+    """
+
+    def __init__(self, expression, ast):
+        self.expression = expression
+        self.ast = ast
+        self.predicate = ast.compile()
+
+    def __call__(self, packet):
+        return self.predicate(packet)
+
+    def mask(self, batch):
+        """Vectorized evaluation over a PacketBatch (one 0/1 byte per packet)"""
+        return self.ast.mask(batch)
+
+    def apply(self, packets):
+        """Return the matching packets (a PacketBatch stays a PacketBatch)"""
+        if isinstance(packets, PacketBatch):
+            mask = self.mask(packets)
+            matched = packets.take(i for i, hit in enumerate(mask) if hit)
+        else:
+            predicate = self.predicate
+            matched = [packet for packet in packets if predicate(packet)]
+        record_selectivity(len(packets), len(matched))
+        return matched
+
+    def split_bpf(self):
+        """Return (bpf string or None, residual CompiledFilter or None)"""
+        bpf, residual = split_bpf(self.ast)
+        return bpf, CompiledFilter(str(residual), residual) if residual else None
+
+    def __str__(self):
+        return str(self.ast)
+
+    def __repr__(self):
+        return f"CompiledFilter({self.expression!r})"
+
+
+@lru_cache(maxsize=256)
+def compile_filter(expression):
+    """
+    Parse and compile a BPF-like filter expression, for example:
+
+        tcp and dst port 443 and net 10.0.0.0/8
+        (udp or icmp) and not host 192.168.1.1
+        src portrange 1024-65535 and len > 1000
+
+    Compiled filters are cached, so the CLI, API and storage can share them.
+    Raises FilterSyntaxError for invalid expressions.
+    """
+    return CompiledFilter(expression, _Parser(expression).parse())
@@ -1,13 +1,27 @@
 # src/filters.py
+import ipaddress
+
+from src.batch import PacketBatch
+from src.flows import FlowTable
+from src.filter_expr import (
+    compile_filter, CompiledFilter, AndNode, OrNode, ProtocolNode, NetNode, PortNode
+)
+from src.metrics import record_selectivity
+
+
 class PacketFilter:
     """
     Custom filtering system for network packets
     Educational tool for understanding packet filtering concepts
+    
+    Every rule is kept as a filter expression node; apply_filters() compiles
+    them into one short-circuiting predicate and makes a single pass.
     """
     
     def __init__(self):
         self.filters = []
         self.protocol_filters = []  # Special handling for protocol filters
+        self.flow_filters = []  # Evaluated against the flow table
         print("🔍 PacketFilter initialized!")
     
     def add_protocol_filter(self, protocol):
@@ -17,32 +31,14 @@ class PacketFilter:
     
     def add_ip_filter(self, src_ip=None, dst_ip=None):
         """Filter by source and/or destination IP"""
-        def ip_filter(packet_info):
-            packet_src_ip = packet_info.get('src_ip')
-            packet_dst_ip = packet_info.get('dst_ip')
-            summary = packet_info.get('summary', '')
-            
-            # Try to extract IPs from summary if direct fields are not available
-            if not packet_src_ip or not packet_dst_ip:
-                # Simple IP extraction from summary
-                import re
-                ip_pattern = r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}'
-                ips_in_summary = re.findall(ip_pattern, summary)
-                
-                if not packet_src_ip and ips_in_summary:
-                    packet_src_ip = ips_in_summary[0]
-                if not packet_dst_ip and len(ips_in_summary) > 1:
-                    packet_dst_ip = ips_in_summary[1]
-            
-            # Apply filters
-            if src_ip and packet_src_ip != src_ip:
-                return False
-            if dst_ip and packet_dst_ip != dst_ip:
-                return False
-            
-            return True
+        nodes = []
+        if src_ip:
+            nodes.append(NetNode(ipaddress.ip_network(src_ip), 'src', 'host'))
+        if dst_ip:
+            nodes.append(NetNode(ipaddress.ip_network(dst_ip), 'dst', 'host'))
+        if nodes:
+            self._add_node(nodes)
         
-        self.filters.append(ip_filter)
         filter_desc = []
         if src_ip:
             filter_desc.append(f"Source: {src_ip}")
@@ -52,60 +48,136 @@ class PacketFilter:
     
     def add_port_filter(self, port=None, src_port=None, dst_port=None):
         """Filter by port numbers"""
-        def port_filter(packet_info):
-            summary = packet_info.get('summary', '').lower()
-            
-            # Look for port patterns in the summary
-            if port:
-                port_str = str(port)
-                if f":{port_str} " not in summary and f">{port_str}" not in summary:
-                    return False
-            
-            if src_port:
-                src_port_str = str(src_port)
-                if f":{src_port_str} >" not in summary:
-                    return False
-            
-            if dst_port:
-                dst_port_str = str(dst_port)
-                if f">{dst_port_str}" not in summary:
-                    return False
-            
-            return True
+        nodes = []
+        if port:
+            nodes.append(PortNode(int(port), int(port)))
+        if src_port:
+            nodes.append(PortNode(int(src_port), int(src_port), 'src'))
+        if dst_port:
+            nodes.append(PortNode(int(dst_port), int(dst_port), 'dst'))
+        if nodes:
+            self._add_node(nodes)
         
-        self.filters.append(port_filter)
         print(f"✅ Added port filter - Port: {port}, Src: {src_port}, Dst: {dst_port}")
     
-    def apply_filters(self, packets):
-        """Apply all filters to a list of packets"""
+    def add_expression_filter(self, expression):
+        """Filter with a BPF-like expression, e.g. 'tcp and dst port 443'"""
+        compiled = compile_filter(expression)
+        self.filters.append(compiled)
+        print(f"✅ Added expression filter: {compiled}")
+    
+    def add_flow_filter(self, min_packets=None, min_bytes=None, tcp_state=None):
+        """Keep packets whose 5-tuple flow matches the given criteria"""
+        def flow_filter(flow):
+            if flow is None:
+                return False
+            if min_packets is not None and flow.packets < min_packets:
+                return False
+            if min_bytes is not None and flow.bytes < min_bytes:
+                return False
+            if tcp_state is not None and flow.tcp_state != tcp_state.upper():
+                return False
+            return True
+        
+        self.flow_filters.append(flow_filter)
+        print(f"✅ Added flow filter - Min packets: {min_packets}, Min bytes: {min_bytes}, TCP state: {tcp_state}")
+    
+    def _add_node(self, nodes):
+        node = nodes[0] if len(nodes) == 1 else AndNode(nodes)
+        self.filters.append(CompiledFilter(str(node), node))
+    
+    def compile(self):
+        """
+        Combine all rules into a single CompiledFilter (or None without rules).
+        Protocol filters are OR-ed together; every other rule is AND-ed.
+        """
+        nodes = []
+        if self.protocol_filters:
+            protocols = [ProtocolNode(protocol) for protocol in self.protocol_filters]
+            nodes.append(protocols[0] if len(protocols) == 1 else OrNode(protocols))
+        nodes.extend(compiled.ast for compiled in self.filters)
+        
+        if not nodes:
+            return None
+        node = nodes[0] if len(nodes) == 1 else AndNode(nodes)
+        return CompiledFilter(str(node), node)
+    
+    def kernel_filter(self):
+        """
+        Split the rules for live capture: returns (bpf, residual) where bpf is
+        a pcap-filter string the kernel can run (or None) and residual is a
+        CompiledFilter for the rules it cannot express (or None).
+        Flow filters need the flow table and always stay in apply_filters().
+        """
+        compiled = self.compile()
+        if compiled is None:
+            return None, None
+        return compiled.split_bpf()
+    
+    def apply_filters(self, packets, flow_table=None):
+        """
+        Apply all filters to a list of packets
+        
+        Args:
+            packets: List of packet dictionaries or a PacketBatch
+            flow_table: FlowTable for flow filters (built from packets if omitted)
+        """
         if not packets:
             return []
         
-        filtered_packets = packets
+        if self.flow_filters and flow_table is None:
+            flow_table = FlowTable(idle_timeout=None, active_timeout=None)
+            flow_table.update_batch(packets)
         
-        # Apply protocol filters (OR logic for multiple protocols)
-        if self.protocol_filters:
+        if isinstance(packets, PacketBatch):
+            return self._apply_batch_filters(packets, flow_table)
+        
+        compiled = self.compile()
+        predicate = compiled.predicate if compiled else None
+        flow_filters = self.flow_filters
+        
+        if predicate and flow_filters:
             filtered_packets = [
-                p for p in filtered_packets 
-                if p.get('protocol', '').upper() in self.protocol_filters
+                p for p in packets
+                if predicate(p) and all(f(flow_table.get(p)) for f in flow_filters)
             ]
+        elif predicate:
+            filtered_packets = [p for p in packets if predicate(p)]
+        elif flow_filters:
+            filtered_packets = [p for p in packets if all(f(flow_table.get(p)) for f in flow_filters)]
+        else:
+            filtered_packets = list(packets)
         
-        # Apply other filters (AND logic)
-        for filter_func in self.filters:
-            filtered_packets = [p for p in filtered_packets if filter_func(p)]
-        
+        record_selectivity(len(packets), len(filtered_packets))
         print(f"📊 Filters applied: {len(packets)} → {len(filtered_packets)} packets")
         return filtered_packets
     
+    def _apply_batch_filters(self, batch, flow_table=None):
+        """Apply filters to a PacketBatch and return the matching sub-batch"""
+        compiled = self.compile()
+        if compiled:
+            indices = [i for i, hit in enumerate(compiled.mask(batch)) if hit]
+        else:
+            indices = range(len(batch))
+        
+        for flow_filter in self.flow_filters:
+            indices = [i for i in indices if flow_filter(flow_table.get(batch[i]))]
+        
+        filtered = batch.take(indices)
+        record_selectivity(len(batch), len(filtered))
+        print(f"📊 Filters applied: {len(batch)} → {len(filtered)} packets")
+        return filtered
+    
     def clear_filters(self):
         """Clear all filters"""
         self.filters = []
         self.protocol_filters = []
+        self.flow_filters = []
         print("🧹 All filters cleared")
     
     def show_active_filters(self):
         """Display currently active filters"""
-        if not self.filters and not self.protocol_filters:
+        if not self.filters and not self.protocol_filters and not self.flow_filters:
             print("No active filters")
             return
         
@@ -113,5 +185,9 @@ class PacketFilter:
         for i, protocol in enumerate(self.protocol_filters):
             print(f"  {i+1}. Protocol: {protocol}")
         
-        for i, filter_func in enumerate(self.filters, start=len(self.protocol_filters) + 1):
-            print(f"  {i}. {filter_func.__name__}")
\ No newline at end of file
+        start = len(self.protocol_filters) + 1
+        for i, compiled in enumerate(self.filters, start=start):
+            print(f"  {i}. {compiled}")
+        
+        for i, flow_filter in enumerate(self.flow_filters, start=start + len(self.filters)):
+            print(f"  {i}. {flow_filter.__name__}")
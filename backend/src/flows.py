@@ -0,0 +1,304 @@
+# src/flows.py
+import copy
+from collections import OrderedDict
+
+from src.batch import PacketBatch, parse_tcp_flags
+from src.dissector import format_tcp_flags
+
+# TCP flag bits
+FIN = 0x01
+SYN = 0x02
+RST = 0x04
+ACK = 0x10
+
+# Defaults sized for long offline traces and live captures alike
+DEFAULT_IDLE_TIMEOUT = 300       # seconds without packets before a flow ends
+DEFAULT_ACTIVE_TIMEOUT = 3600    # maximum lifetime of a single flow record
+DEFAULT_MAX_FLOWS = 65536
+
+
+def flow_key(protocol, src_ip, src_port, dst_ip, dst_port):
+    """
+    Normalized bidirectional 5-tuple: both directions of a conversation
+    map to the same key because the endpoints are stored in sorted order.
+    """
+    a = (src_ip, src_port or 0)
+    b = (dst_ip, dst_port or 0)
+    if b < a:
+        a, b = b, a
+    return (protocol, a[0], a[1], b[0], b[1])
+
+
+def packet_flow_key(packet):
+    """Flow key for a packet_info dict, or None if it has no addresses"""
+    src_ip = packet.get('src_ip')
+    dst_ip = packet.get('dst_ip')
+    if not src_ip or not dst_ip:
+        return None
+    return flow_key(packet.get('protocol', 'Unknown'), src_ip, packet.get('src_port'),
+                    dst_ip, packet.get('dst_port'))
+
+
+class Flow:
+    """Per-flow counters and TCP state"""
+
+    __slots__ = ('key', 'protocol', 'src_ip', 'src_port', 'dst_ip', 'dst_port',
+                 'packets', 'bytes', 'packets_fwd', 'packets_rev', 'bytes_fwd', 'bytes_rev',
+                 'first_seen', 'last_seen', 'tcp_flags', 'tcp_state')
+
+    def __init__(self, key, protocol, src_ip, src_port, dst_ip, dst_port, timestamp):
+        self.key = key
+        self.protocol = protocol
+        # The first packet seen decides which side is the initiator
+        self.src_ip = src_ip
+        self.src_port = src_port or 0
+        self.dst_ip = dst_ip
+        self.dst_port = dst_port or 0
+        self.packets = 0
+        self.bytes = 0
+        self.packets_fwd = 0
+        self.packets_rev = 0
+        self.bytes_fwd = 0
+        self.bytes_rev = 0
+        self.first_seen = timestamp
+        self.last_seen = timestamp
+        self.tcp_flags = 0
+        self.tcp_state = 'NEW' if protocol == 'TCP' else None
+
+    def add(self, src_ip, length, timestamp, flags=0):
+        """Account one packet sent by src_ip"""
+        self.packets += 1
+        self.bytes += length
+        if src_ip == self.src_ip:
+            self.packets_fwd += 1
+            self.bytes_fwd += length
+        else:
+            self.packets_rev += 1
+            self.bytes_rev += length
+        if timestamp < self.first_seen:
+            self.first_seen = timestamp
+        if timestamp > self.last_seen:
+            self.last_seen = timestamp
+        if self.tcp_state is not None:
+            self.tcp_flags |= flags
+            self._advance_tcp_state(flags)
+
+    def _advance_tcp_state(self, flags):
+        """Simplified TCP connection state machine"""
+        state = self.tcp_state
+        if flags & RST:
+            self.tcp_state = 'RESET'
+        elif flags & FIN:
+            self.tcp_state = 'CLOSED' if state == 'CLOSING' else 'CLOSING'
+        elif state in ('RESET', 'CLOSED', 'CLOSING'):
+            return
+        elif flags & SYN and flags & ACK:
+            self.tcp_state = 'SYN_RECEIVED'
+        elif flags & SYN:
+            self.tcp_state = 'SYN_SENT'
+        elif flags & ACK and state in ('NEW', 'SYN_RECEIVED'):
+            # Flows first seen mid-stream are treated as established
+            self.tcp_state = 'ESTABLISHED'
+
+    @property
+    def duration(self):
+        return self.last_seen - self.first_seen
+
+    def label(self):
+        """Human-readable 'src → dst' description of the conversation"""
+        if self.src_port or self.dst_port:
+            return f"{self.src_ip}:{self.src_port} → {self.dst_ip}:{self.dst_port}"
+        return f"{self.src_ip} → {self.dst_ip}"
+
+    def merge(self, other):
+        """Fold another record of the same flow into this one"""
+        later = other.last_seen >= self.last_seen
+        self.packets += other.packets
+        self.bytes += other.bytes
+        if other.src_ip == self.src_ip:
+            self.packets_fwd += other.packets_fwd
+            self.packets_rev += other.packets_rev
+            self.bytes_fwd += other.bytes_fwd
+            self.bytes_rev += other.bytes_rev
+        else:
+            self.packets_fwd += other.packets_rev
+            self.packets_rev += other.packets_fwd
+            self.bytes_fwd += other.bytes_rev
+            self.bytes_rev += other.bytes_fwd
+        self.first_seen = min(self.first_seen, other.first_seen)
+        self.last_seen = max(self.last_seen, other.last_seen)
+        self.tcp_flags |= other.tcp_flags
+        if later and other.tcp_state:
+            self.tcp_state = other.tcp_state
+
+    def to_dict(self):
+        return {
+            'protocol': self.protocol,
+            'src_ip': self.src_ip,
+            'src_port': self.src_port,
+            'dst_ip': self.dst_ip,
+            'dst_port': self.dst_port,
+            'packets': self.packets,
+            'bytes': self.bytes,
+            'packets_fwd': self.packets_fwd,
+            'packets_rev': self.packets_rev,
+            'first_seen': self.first_seen,
+            'last_seen': self.last_seen,
+            'duration': self.duration,
+            'tcp_flags': format_tcp_flags(self.tcp_flags) if self.tcp_state else None,
+            'tcp_state': self.tcp_state
+        }
+
+
+class FlowTable:
+    """
+    Flow table keyed by the normalized bidirectional 5-tuple.
+
+    Flows end after idle_timeout seconds without packets or active_timeout
+    seconds after they started; the table never holds more than max_flows
+    records, evicting the least recently seen flow when full. Ended flows
+    are handed to on_expire (if given) and then forgotten. Timeouts use
+    packet timestamps, so offline traces age flows exactly like live ones.
+    Pass None for a timeout to disable it.
+    """
+
+    def __init__(self, idle_timeout=DEFAULT_IDLE_TIMEOUT, active_timeout=DEFAULT_ACTIVE_TIMEOUT,
+                 max_flows=DEFAULT_MAX_FLOWS, on_expire=None):
+        self.idle_timeout = idle_timeout
+        self.active_timeout = active_timeout
+        self.max_flows = max_flows
+        self.on_expire = on_expire
+        self._flows = OrderedDict()  # Least recently seen first
+        self.expired_flows = 0
+        self.evicted_flows = 0
+
+    def __len__(self):
+        return len(self._flows)
+
+    def __iter__(self):
+        return iter(self._flows.values())
+
+    def __contains__(self, key):
+        return key in self._flows
+
+    def update(self, packet):
+        """Account a packet_info dict; returns its Flow (or None)"""
+        src_ip = packet.get('src_ip')
+        dst_ip = packet.get('dst_ip')
+        if not src_ip or not dst_ip:
+            return None
+        length = packet.get('length', 0) or 0
+        return self.observe(packet.get('protocol', 'Unknown'), src_ip, packet.get('src_port'),
+                            dst_ip, packet.get('dst_port'), packet.get('timestamp', 0) or 0,
+                            length, parse_tcp_flags(packet.get('tcp_flags')))
+
+    def update_batch(self, batch):
+        """Account every packet of a PacketBatch (or iterable of packets)"""
+        if not isinstance(batch, PacketBatch):
+            for packet in batch:
+                self.update(packet)
+            return
+
+        protocols = batch.protocols
+        for i in range(len(batch)):
+            version = batch.ip_version[i]
+            if not version:
+                continue
+            self.observe(protocols[batch.protocol[i]],
+                         batch.ip_string(version, batch.src_ip[i]), batch.src_port[i],
+                         batch.ip_string(version, batch.dst_ip[i]), batch.dst_port[i],
+                         batch.timestamp[i], batch.length[i], batch.tcp_flags[i])
+
+    def observe(self, protocol, src_ip, src_port, dst_ip, dst_port, timestamp, length, tcp_flags=0):
+        """Account one packet given its decoded fields"""
+        key = flow_key(protocol, src_ip, src_port, dst_ip, dst_port)
+        flows = self._flows
+
+        flow = flows.get(key)
+        if flow is not None and self._timed_out(flow, timestamp):
+            self._expire(key)
+            flow = None
+
+        if flow is None:
+            flow = Flow(key, protocol, src_ip, src_port, dst_ip, dst_port, timestamp)
+            flows[key] = flow
+            if self.max_flows and len(flows) > self.max_flows:
+                self._evict_oldest()
+        else:
+            flows.move_to_end(key)
+
+        flow.add(src_ip, length, timestamp, tcp_flags)
+        self._expire_idle(timestamp)
+        return flow
+
+    def get(self, packet):
+        """Return the Flow a packet_info dict belongs to (or None)"""
+        key = packet_flow_key(packet)
+        return self._flows.get(key) if key else None
+
+    def top(self, n=5, by='packets'):
+        """Return the n largest flows by 'packets' or 'bytes'"""
+        return sorted(self._flows.values(),
+                      key=lambda flow: (-getattr(flow, by), flow.first_seen))[:n]
+
+    def expire_all(self):
+        """End every flow (e.g. when a capture finishes)"""
+        for key in list(self._flows):
+            self._expire(key)
+
+    def merge(self, other):
+        """
+        Fold copies of another table's flows into this one. The result is
+        ordered, and past max_flows evicted, by last_seen, as one table that
+        saw both tables' packets in time order would be.
+        """
+        flows = self._flows
+        for key, flow in other._flows.items():
+            existing = flows.get(key)
+            if existing is None:
+                flows[key] = copy.copy(flow)
+            else:
+                existing.merge(flow)
+        self._flows = OrderedDict(sorted(flows.items(), key=lambda item: item[1].last_seen))
+        while self.max_flows and len(self._flows) > self.max_flows:
+            self._evict_oldest()
+        self.expired_flows += other.expired_flows
+        self.evicted_flows += other.evicted_flows
+        return self
+
+    def stats(self):
+        return {
+            'active_flows': len(self._flows),
+            'expired_flows': self.expired_flows,
+            'evicted_flows': self.evicted_flows
+        }
+
+    def _timed_out(self, flow, now):
+        if self.idle_timeout is not None and now - flow.last_seen > self.idle_timeout:
+            return True
+        if self.active_timeout is not None and now - flow.first_seen > self.active_timeout:
+            return True
+        return False
+
+    def _expire_idle(self, now):
+        """Expire idle flows from the least recently seen end of the table"""
+        if self.idle_timeout is None:
+            return
+        flows = self._flows
+        while flows:
+            key, flow = next(iter(flows.items()))
+            if now - flow.last_seen <= self.idle_timeout:
+                break
+            self._expire(key)
+
+    def _expire(self, key):
+        flow = self._flows.pop(key)
+        self.expired_flows += 1
+        if self.on_expire:
+            self.on_expire(flow)
+
+    def _evict_oldest(self):
+        key, flow = self._flows.popitem(last=False)
+        self.evicted_flows += 1
+        if self.on_expire:
+            self.on_expire(flow)
@@ -0,0 +1,216 @@
+# src/jobs.py
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_WORKERS = 4
+DEFAULT_MAX_PENDING = 64       # queued + running jobs before submit() refuses
+DEFAULT_RETENTION = 600        # seconds a finished job's result is kept
+DEFAULT_MAX_RETAINED = 256     # finished jobs kept at most
+
+# Job states
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED_STATES = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class JobNotFoundError(KeyError):
+    """Raised when a job ID is unknown or its result has expired"""
+
+
+class JobQueueFullError(RuntimeError):
+    """Raised when too many jobs are already queued or running"""
+
+
+class JobCancelled(Exception):
+    """Raised inside a job once it has been cancelled"""
+
+
+class Job:
+    """
+    One unit of background work with progress and cooperative cancellation.
+    The job function receives the Job and should call report() or track()
+    as it goes; both raise JobCancelled once cancel() was requested. Code
+    that must not be interrupted mid-way (such as a capture callback) can
+    use update() plus on_cancel() instead.
+    """
+
+    def __init__(self, kind, job_id=None):
+        self.job_id = job_id or uuid.uuid4().hex
+        self.kind = kind
+        self.status = QUEUED
+        self.progress = 0.0
+        self.message = None
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self._cancel_requested = threading.Event()
+        self._cancel_callbacks = []
+        self._future = None
+        self._lock = threading.Lock()
+
+    @property
+    def cancel_requested(self):
+        return self._cancel_requested.is_set()
+
+    def check_cancelled(self):
+        if self._cancel_requested.is_set():
+            raise JobCancelled(self.job_id)
+
+    def update(self, progress, message=None):
+        """Record progress (0.0-1.0) without checking for cancellation"""
+        self.progress = max(0.0, min(float(progress), 1.0))
+        if message is not None:
+            self.message = message
+
+    def report(self, progress, message=None):
+        """Record progress and stop here if the job was cancelled"""
+        self.update(progress, message)
+        self.check_cancelled()
+
+    def track(self, items, chunk_size=1000):
+        """Yield items in chunks, reporting progress after each one"""
+        total = len(items)
+        for start in range(0, total, chunk_size):
+            self.check_cancelled()
+            yield items[start:start + chunk_size]
+            self.report(min(start + chunk_size, total) / total)
+
+    def on_cancel(self, callback):
+        """Run callback() when the job is cancelled (e.g. to stop a capture)"""
+        with self._lock:
+            self._cancel_callbacks.append(callback)
+            cancelled = self.cancel_requested
+        if cancelled:
+            callback()
+
+    def cancel(self):
+        """Request cancellation; a queued job never starts"""
+        with self._lock:
+            if self.status in FINISHED_STATES:
+                return False
+            self._cancel_requested.set()
+            callbacks = list(self._cancel_callbacks)
+            if self._future is not None and self._future.cancel():
+                self._finish(CANCELLED)
+        for callback in callbacks:
+            callback()
+        return True
+
+    def _finish(self, status, result=None, error=None):
+        self.status = status
+        self.result = result
+        self.error = error
+        self.finished = time.time()
+        if status == SUCCEEDED:
+            self.progress = 1.0
+
+    def info(self, include_result=True):
+        info = {
+            'job_id': self.job_id,
+            'type': self.kind,
+            'status': self.status,
+            'progress': round(self.progress, 3),
+            'message': self.message,
+            'created': self.created,
+            'started': self.started,
+            'finished': self.finished,
+            'error': self.error
+        }
+        if include_result and self.status == SUCCEEDED:
+            info['result'] = self.result
+        return info
+
+
+class JobManager:
+    """
+    Runs jobs on a bounded thread pool and keeps their results for a while.
+
+    At most max_pending jobs may be queued or running; beyond that submit()
+    raises JobQueueFullError so callers can push back instead of piling up
+    work. Finished jobs are kept for retention seconds (and at most
+    max_retained of them) so clients can poll for results.
+    """
+
+    def __init__(self, workers=DEFAULT_WORKERS, max_pending=DEFAULT_MAX_PENDING,
+                 retention=DEFAULT_RETENTION, max_retained=DEFAULT_MAX_RETAINED):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.retention = retention
+        self.max_retained = max_retained
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='job')
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, kind, func, *args, **kwargs):
+        """Queue func(job, *args, **kwargs) and return its Job"""
+        job = Job(kind)
+        with self._lock:
+            self._expire(time.time())
+            if self.pending() >= self.max_pending:
+                raise JobQueueFullError(f"{self.max_pending} jobs already queued or running")
+            self._jobs[job.job_id] = job
+            job._future = self._executor.submit(self._run, job, func, args, kwargs)
+        return job
+
+    def _run(self, job, func, args, kwargs):
+        with job._lock:
+            if job.cancel_requested:
+                job._finish(CANCELLED)
+                return
+            job.status = RUNNING
+            job.started = time.time()
+        try:
+            result = func(job, *args, **kwargs)
+        except JobCancelled:
+            job._finish(CANCELLED)
+        except Exception as e:
+            traceback.print_exc()
+            job._finish(FAILED, error=str(e))
+        else:
+            job._finish(CANCELLED if job.cancel_requested else SUCCEEDED, result)
+
+    def get(self, job_id):
+        """Return the Job for job_id or raise JobNotFoundError"""
+        with self._lock:
+            self._expire(time.time())
+            job = self._jobs.get(job_id)
+        if job is None:
+            raise JobNotFoundError(job_id)
+        return job
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        job.cancel()
+        return job
+
+    def list(self):
+        with self._lock:
+            self._expire(time.time())
+            return [job.info(include_result=False) for job in self._jobs.values()]
+
+    def pending(self):
+        """Number of jobs queued or running"""
+        return sum(1 for job in self._jobs.values() if job.status not in FINISHED_STATES)
+
+    def shutdown(self, wait=True):
+        for job in list(self._jobs.values()):
+            job.cancel()
+        self._executor.shutdown(wait=wait)
+
+    def _expire(self, now):
+        """Drop finished jobs past their retention (lock held)"""
+        finished = [job for job in self._jobs.values() if job.status in FINISHED_STATES]
+        excess = len(finished) - self.max_retained
+        for job in finished:
+            if excess > 0 or now - job.finished > self.retention:
+                del self._jobs[job.job_id]
+                excess -= 1
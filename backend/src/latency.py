@@ -0,0 +1,97 @@
+# src/latency.py
+import bisect
+import threading
+
+# Bucket upper bounds grow by 25% from 0.1 ms to about 2 minutes,
+# so any percentile is accurate to within one bucket (~25%)
+_GROWTH = 1.25
+_FIRST_BOUND = 0.0001
+
+
+def _bucket_bounds(first=_FIRST_BOUND, growth=_GROWTH, last=120.0):
+    bounds = []
+    bound = first
+    while bound < last:
+        bounds.append(bound)
+        bound *= growth
+    bounds.append(bound)
+    return bounds
+
+
+class LatencyHistogram:
+    """
+    Fixed-memory latency histogram with log-spaced buckets.
+
+    record() is O(log buckets) and memory does not grow with the number
+    of samples, so it can stay on for every request.
+    """
+
+    BOUNDS = _bucket_bounds()
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS) + 1)  # last bucket: overflow
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        index = bisect.bisect_left(self.BOUNDS, seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def percentile(self, p):
+        """Upper bound of the bucket holding the p-th percentile (0-100)"""
+        if not self.count:
+            return None
+        rank = max(1, round(self.count * p / 100.0))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                if index >= len(self.BOUNDS):
+                    return self.max
+                return min(self.BOUNDS[index], self.max)
+        return self.max
+
+    def snapshot(self):
+        """Summary in milliseconds"""
+        def ms(value):
+            return None if value is None else round(value * 1000, 3)
+
+        return {
+            'count': self.count,
+            'mean_ms': ms(self.total / self.count) if self.count else None,
+            'p50_ms': ms(self.percentile(50)),
+            'p90_ms': ms(self.percentile(90)),
+            'p99_ms': ms(self.percentile(99)),
+            'max_ms': ms(self.max) if self.count else None
+        }
+
+
+class LatencyTracker:
+    """One LatencyHistogram per key (e.g. per API endpoint)"""
+
+    def __init__(self):
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def record(self, key, seconds):
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, LatencyHistogram())
+        histogram.record(seconds)
+
+    def snapshot(self):
+        with self._lock:
+            items = list(self._histograms.items())
+        return {key: histogram.snapshot() for key, histogram in sorted(items)}
+
+    def reset(self):
+        with self._lock:
+            self._histograms = {}
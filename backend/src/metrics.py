@@ -0,0 +1,301 @@
+# src/metrics.py
+import bisect
+import os
+import threading
+import time
+
+# Seconds; covers per-packet work (microseconds) up to slow API calls
+DEFAULT_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01,
+                   0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+# Bytes, for sizes
+SIZE_BUCKETS = (1024, 16384, 131072, 1048576, 8388608, 67108864, 536870912)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+               for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+class _NullTimer:
+    """Timer handed out while metrics are disabled: does nothing"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ('_metric', '_start')
+
+    def __init__(self, metric):
+        self._metric = metric
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._metric.observe(time.perf_counter() - self._start)
+        return False
+
+
+class _Metric:
+    """Base for metric families; labels() returns the child for one label set"""
+
+    kind = None
+
+    def __init__(self, registry, name, documentation, labelnames=()):
+        self._registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lookup = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._children[()] = self._lookup[()] = self._new_child()
+
+    def labels(self, *values, **kwargs):
+        if kwargs:
+            values = tuple(kwargs[name] for name in self.labelnames)
+        child = self._lookup.get(values)
+        if child is None:
+            key = tuple(str(value) for value in values)
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.get(key)
+                if child is None:
+                    child = self._children[key] = self._new_child()
+                # Also keyed by the raw values so repeat lookups skip str()
+                self._lookup[values] = child
+        return child
+
+    def _unlabelled(self):
+        try:
+            return self._children[()]
+        except KeyError:
+            raise ValueError(f"{self.name} needs labels {self.labelnames}")
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            children = sorted(self._children.items())
+        for values, child in children:
+            lines.extend(child.samples(self.name, self.labelnames, values))
+        return lines
+
+
+class _CounterChild:
+    __slots__ = ('_registry', 'value', '_lock')
+
+    def __init__(self, registry):
+        self._registry = registry
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        if not self._registry.enabled:
+            return
+        with self._lock:
+            self.value += amount
+
+    def samples(self, name, labelnames, values):
+        return [f"{name}{_format_labels(labelnames, values)} {_format_value(self.value)}"]
+
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ()
+
+    def set(self, value):
+        if self._registry.enabled:
+            self.value = value
+
+    def dec(self, amount=1):
+        self.inc(-amount)
+
+
+class _HistogramChild:
+    __slots__ = ('_registry', '_bounds', 'counts', 'sum', 'count', '_lock')
+
+    def __init__(self, registry, bounds):
+        self._registry = registry
+        self._bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        if not self._registry.enabled:
+            return
+        index = bisect.bisect_left(self._bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def time(self):
+        """Context manager observing the elapsed seconds"""
+        return _Timer(self) if self._registry.enabled else _NULL_TIMER
+
+    def samples(self, name, labelnames, values):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self._bounds + (float('inf'),), self.counts):
+            cumulative += count
+            labels = _format_labels(labelnames, values, [('le', _format_value(float(bound)))])
+            lines.append(f"{name}_bucket{labels} {cumulative}")
+        labels = _format_labels(labelnames, values)
+        lines.append(f"{name}_sum{labels} {_format_value(self.sum)}")
+        lines.append(f"{name}_count{labels} {self.count}")
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonically increasing total"""
+
+    kind = 'counter'
+
+    def _new_child(self):
+        return _CounterChild(self._registry)
+
+    def inc(self, amount=1):
+        self._unlabelled().inc(amount)
+
+
+class Gauge(_Metric):
+    """Value that can go up and down"""
+
+    kind = 'gauge'
+
+    def _new_child(self):
+        return _GaugeChild(self._registry)
+
+    def set(self, value):
+        self._unlabelled().set(value)
+
+    def inc(self, amount=1):
+        self._unlabelled().inc(amount)
+
+    def dec(self, amount=1):
+        self._unlabelled().dec(amount)
+
+
+class Histogram(_Metric):
+    """Distribution over fixed buckets, with sum and count"""
+
+    kind = 'histogram'
+
+    def __init__(self, registry, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(registry, name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self._registry, self.buckets)
+
+    def observe(self, value):
+        self._unlabelled().observe(value)
+
+    def time(self):
+        return self._unlabelled().time()
+
+
+class MetricsRegistry:
+    """
+    Holds every metric and renders them in the Prometheus text format.
+
+    While disabled, updates return after one attribute check and timers
+    skip the clock entirely, so instrumentation can stay in hot paths.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, documentation, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(self, name, documentation, labelnames, **kwargs)
+            elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} already registered with a different type or labels")
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+# Process-wide registry; PACKET_ANALYZER_METRICS=0 disables collection
+REGISTRY = MetricsRegistry(enabled=os.environ.get('PACKET_ANALYZER_METRICS', '1') != '0')
+
+# Hot-path metrics shared by the analyzer modules
+PACKETS_CAPTURED = REGISTRY.counter(
+    'packet_analyzer_packets_captured_total', 'Packets stored by the capturer', ['source'])
+PACKETS_DROPPED = REGISTRY.counter(
+    'packet_analyzer_packets_dropped_total', 'Packets lost before analysis', ['reason'])
+PARSE_SECONDS = REGISTRY.histogram(
+    'packet_analyzer_parse_seconds', 'Time to parse one packet', ['path'])
+FILTER_PACKETS_IN = REGISTRY.counter(
+    'packet_analyzer_filter_packets_in_total', 'Packets checked by a filter')
+FILTER_PACKETS_OUT = REGISTRY.counter(
+    'packet_analyzer_filter_packets_out_total', 'Packets that passed a filter')
+FILTER_SELECTIVITY = REGISTRY.gauge(
+    'packet_analyzer_filter_selectivity', 'Fraction of packets kept by the last filter run')
+DETECTOR_RULE_SECONDS = REGISTRY.histogram(
+    'packet_analyzer_detector_rule_seconds', 'Runtime of one detector rule over a capture', ['rule'])
+DETECTOR_ISSUES = REGISTRY.counter(
+    'packet_analyzer_detector_issues_total', 'Issues reported per detector rule', ['rule'])
+STORAGE_BYTES = REGISTRY.counter(
+    'packet_analyzer_storage_bytes_total', 'Capture file bytes read or written', ['operation', 'format'])
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    'packet_analyzer_http_request_seconds', 'API request latency', ['endpoint', 'method', 'status'])
+
+
+def record_selectivity(total, kept):
+    """Count one filter run: packets in, packets kept and the kept fraction"""
+    if REGISTRY.enabled and total:
+        FILTER_PACKETS_IN.inc(total)
+        FILTER_PACKETS_OUT.inc(kept)
+        FILTER_SELECTIVITY.set(kept / total)
@@ -0,0 +1,47 @@
+# src/pagination.py
+import base64
+import binascii
+import json
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a page cursor is malformed or belongs to another query"""
+
+
+def clamp_page_size(limit):
+    """Keep a requested page size between 1 and MAX_PAGE_SIZE"""
+    if limit is None:
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(int(limit), MAX_PAGE_SIZE))
+
+
+def encode_cursor(filename, position, filter_expression=None):
+    """
+    Opaque cursor for the page starting at packet index position.
+    The capture and filter are bound in, so a cursor cannot be replayed
+    against a different query.
+    """
+    state = {'file': filename, 'pos': position, 'filter': filter_expression or None}
+    raw = json.dumps(state, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, filename, filter_expression=None):
+    """Validate a cursor and return (packet position, filter expression)"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        state = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        position = state['pos']
+    except (binascii.Error, UnicodeError, ValueError, KeyError, TypeError):
+        raise InvalidCursorError("Malformed page cursor")
+
+    if state.get('file') != filename:
+        raise InvalidCursorError("Cursor belongs to another capture")
+    if filter_expression is not None and state.get('filter') != (filter_expression or None):
+        raise InvalidCursorError("Cursor was issued for a different filter")
+    if not isinstance(position, int) or position < 0:
+        raise InvalidCursorError("Malformed page cursor")
+    return position, state.get('filter')
@@ -1,11 +1,22 @@
 # src/parser.py
+from src.dissector import PacketDissector, ICMPV6_ROUTER_ADVERTISEMENT, ICMPV6_MLD2_REPORT
+from src.metrics import PARSE_SECONDS
+
+# Per-path parse timers, bound once so the hot path skips the label lookup
+PARSE_FAST = PARSE_SECONDS.labels('fast')
+PARSE_SCAPY = PARSE_SECONDS.labels('scapy')
+PARSE_SIMULATED = PARSE_SECONDS.labels('simulated')
+
+
 class ProtocolParser:
     """
     Parses network protocol headers for educational purposes.
     Shows exactly what happens at each layer of the network stack.
     """
     
-    def __init__(self):
+    def __init__(self, use_fast_path=True):
+        self.use_fast_path = use_fast_path
+        self.dissector = PacketDissector()
         print("🔍 ProtocolParser initialized!")
     
     def parse_packet(self, packet_info):
@@ -16,9 +27,17 @@ class ProtocolParser:
             return self._create_empty_analysis()
     
         if packet_info.get('real_packet', False):
-            return self._parse_real_packet(packet_info)
+            # Decode raw bytes directly; Scapy handles anything the fast path can't
+            if self.use_fast_path and packet_info.get('raw_bytes') is not None:
+                with PARSE_FAST.time():
+                    analysis = self._parse_raw_bytes(packet_info)
+                if analysis:
+                    return analysis
+            with PARSE_SCAPY.time():
+                return self._parse_real_packet(packet_info)
         else:
-            return self._parse_simulated_packet(packet_info)
+            with PARSE_SIMULATED.time():
+                return self._parse_simulated_packet(packet_info)
     def _create_empty_analysis(self):
         """Return analysis structure for empty/invalid packets"""
         return {
@@ -58,6 +77,9 @@ class ProtocolParser:
             
             # Get the actual packet object
             raw_packet = packet_info.get('raw_packet')
+            if not raw_packet and packet_info.get('raw_bytes') is not None:
+                l2_class = scapy.conf.l2types.get(packet_info.get('linktype', 1), Ether)
+                raw_packet = l2_class(packet_info['raw_bytes'])
             if not raw_packet:
                 return self._create_basic_analysis(packet_info, "No raw packet data available")
             
@@ -66,79 +88,33 @@ class ProtocolParser:
             # Ethernet Layer (Layer 2)
             if Ether in raw_packet:
                 eth = raw_packet[Ether]
-                layers['ethernet'] = {
-                    'source_mac': eth.src,
-                    'destination_mac': eth.dst,
-                    'type': eth.type,
-                    'description': 'Data Link Layer - Local network delivery between devices',
-                    'educational_note': 'MAC addresses identify devices on the same local network'
-                }
+                layers['ethernet'] = self._ethernet_layer(eth.src, eth.dst, eth.type)
             
             # IPv4 Layer (Layer 3)  
             if IP in raw_packet:
                 ip = raw_packet[IP]
-                layers['ip'] = {
-                    'version': 4,
-                    'source_ip': ip.src,
-                    'destination_ip': ip.dst,
-                    'time_to_live': ip.ttl,
-                    'protocol': ip.proto,
-                    'length': ip.len,
-                    'description': 'Network Layer - Routes packets between different networks using IPv4',
-                    'educational_note': f'TTL: {ip.ttl} (prevents infinite routing loops)'
-                }
+                layers['ip'] = self._ipv4_layer(ip.src, ip.dst, ip.ttl, ip.proto, ip.len)
             
             # IPv6 Layer (Layer 3)
             elif IPv6 in raw_packet:
                 ipv6 = raw_packet[IPv6]
-                layers['ipv6'] = {
-                    'version': 6,
-                    'source_ip': ipv6.src,
-                    'destination_ip': ipv6.dst,
-                    'hop_limit': ipv6.hlim,
-                    'length': ipv6.plen,
-                    'description': 'Network Layer - Next-generation Internet Protocol with larger address space',
-                    'educational_note': 'IPv6 uses 128-bit addresses vs IPv4 32-bit addresses'
-                }
+                layers['ipv6'] = self._ipv6_layer(ipv6.src, ipv6.dst, ipv6.hlim, ipv6.plen)
             
             # TCP Layer (Layer 4)
             if TCP in raw_packet:
                 tcp = raw_packet[TCP]
-                layers['tcp'] = {
-                    'source_port': tcp.sport,
-                    'destination_port': tcp.dport,
-                    'sequence_number': tcp.seq,
-                    'acknowledgment_number': tcp.ack,
-                    'flags': self._parse_tcp_flags(tcp.flags),
-                    'window_size': tcp.window,
-                    'description': 'Transport Layer - Reliable, connection-oriented communication',
-                    'educational_note': 'Sequence numbers ensure data arrives in correct order'
-                }
+                layers['tcp'] = self._tcp_layer(tcp.sport, tcp.dport, tcp.seq, tcp.ack, tcp.flags, tcp.window)
             
             # UDP Layer (Layer 4)
             if UDP in raw_packet:
                 udp = raw_packet[UDP]
-                layers['udp'] = {
-                    'source_port': udp.sport,
-                    'destination_port': udp.dport,
-                    'length': udp.len,
-                    'description': 'Transport Layer - Fast, connectionless communication',
-                    'educational_note': 'Used for DNS, VoIP, and other time-sensitive applications'
-                }
+                layers['udp'] = self._udp_layer(udp.sport, udp.dport, udp.len)
             
             # Special protocols
             if scapy.ICMPv6ND_RA in raw_packet:
-                layers['icmpv6'] = {
-                    'type': 'Router Advertisement',
-                    'description': 'ICMPv6 - Router discovery and configuration',
-                    'educational_note': 'Helps devices automatically configure IPv6 addresses'
-                }
+                layers['icmpv6'] = self._icmpv6_layer(ICMPV6_ROUTER_ADVERTISEMENT)
             elif scapy.ICMPv6MLReport2 in raw_packet:
-                layers['icmpv6'] = {
-                    'type': 'Multicast Listener Report',
-                    'description': 'ICMPv6 - Multicast group management',
-                    'educational_note': 'Devices use this to join/leave multicast groups'
-                }
+                layers['icmpv6'] = self._icmpv6_layer(ICMPV6_MLD2_REPORT)
             
             if layers:
                 return {
@@ -154,6 +130,109 @@ class ProtocolParser:
             return self._create_basic_analysis(packet_info, f"Parsing error: {str(e)}")
 
     
+    def _parse_raw_bytes(self, packet_info):
+        """Fast path: build the layers dict from raw bytes without Scapy"""
+        fields = self.dissector.dissect(packet_info['raw_bytes'], packet_info.get('linktype', 1))
+        if fields is None:
+            return None
+        
+        layers = {}
+        
+        if 'eth_src' in fields:
+            layers['ethernet'] = self._ethernet_layer(fields['eth_src'], fields['eth_dst'], fields['eth_type'])
+        
+        if fields.get('ip_version') == 4:
+            layers['ip'] = self._ipv4_layer(fields['src_ip'], fields['dst_ip'], fields['ttl'],
+                                            fields['ip_proto'], fields['ip_length'])
+        elif fields.get('ip_version') == 6:
+            layers['ipv6'] = self._ipv6_layer(fields['src_ip'], fields['dst_ip'], fields['hop_limit'],
+                                              fields['ip_length'])
+        
+        if 'tcp_seq' in fields:
+            layers['tcp'] = self._tcp_layer(fields['src_port'], fields['dst_port'], fields['tcp_seq'],
+                                            fields['tcp_ack'], fields['tcp_flags'], fields['tcp_window'])
+        elif 'udp_length' in fields:
+            layers['udp'] = self._udp_layer(fields['src_port'], fields['dst_port'], fields['udp_length'])
+        
+        if fields.get('protocol') == 'ICMPv6':
+            layers['icmpv6'] = self._icmpv6_layer(fields['icmp_type'])
+        
+        if not layers:
+            return None
+        
+        return {
+            'packet_number': packet_info.get('number', 0),
+            'protocol': packet_info.get('protocol', 'Mixed'),
+            'layers': layers,
+            'summary': f"Parsed {len(layers)} protocol layers"
+        }
+    
+    def _ethernet_layer(self, src, dst, eth_type):
+        return {
+            'source_mac': src,
+            'destination_mac': dst,
+            'type': eth_type,
+            'description': 'Data Link Layer - Local network delivery between devices',
+            'educational_note': 'MAC addresses identify devices on the same local network'
+        }
+    
+    def _ipv4_layer(self, src, dst, ttl, proto, length):
+        return {
+            'version': 4,
+            'source_ip': src,
+            'destination_ip': dst,
+            'time_to_live': ttl,
+            'protocol': proto,
+            'length': length,
+            'description': 'Network Layer - Routes packets between different networks using IPv4',
+            'educational_note': f'TTL: {ttl} (prevents infinite routing loops)'
+        }
+    
+    def _ipv6_layer(self, src, dst, hop_limit, length):
+        return {
+            'version': 6,
+            'source_ip': src,
+            'destination_ip': dst,
+            'hop_limit': hop_limit,
+            'length': length,
+            'description': 'Network Layer - Next-generation Internet Protocol with larger address space',
+            'educational_note': 'IPv6 uses 128-bit addresses vs IPv4 32-bit addresses'
+        }
+    
+    def _tcp_layer(self, sport, dport, seq, ack, flags, window):
+        return {
+            'source_port': sport,
+            'destination_port': dport,
+            'sequence_number': seq,
+            'acknowledgment_number': ack,
+            'flags': self._parse_tcp_flags(flags),
+            'window_size': window,
+            'description': 'Transport Layer - Reliable, connection-oriented communication',
+            'educational_note': 'Sequence numbers ensure data arrives in correct order'
+        }
+    
+    def _udp_layer(self, sport, dport, length):
+        return {
+            'source_port': sport,
+            'destination_port': dport,
+            'length': length,
+            'description': 'Transport Layer - Fast, connectionless communication',
+            'educational_note': 'Used for DNS, VoIP, and other time-sensitive applications'
+        }
+    
+    def _icmpv6_layer(self, icmp_type):
+        if icmp_type == ICMPV6_ROUTER_ADVERTISEMENT:
+            return {
+                'type': 'Router Advertisement',
+                'description': 'ICMPv6 - Router discovery and configuration',
+                'educational_note': 'Helps devices automatically configure IPv6 addresses'
+            }
+        return {
+            'type': 'Multicast Listener Report',
+            'description': 'ICMPv6 - Multicast group management',
+            'educational_note': 'Devices use this to join/leave multicast groups'
+        }
+    
     def _parse_tcp_flags(self, flags):
         """Convert TCP flags to human-readable format"""
         flag_descriptions = {
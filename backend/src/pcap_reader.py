@@ -0,0 +1,205 @@
+# src/pcap_reader.py
+import struct
+
+# Link-layer header types (see tcpdump.org/linktypes.html)
+LINKTYPE_NULL = 0
+LINKTYPE_ETHERNET = 1
+LINKTYPE_RAW = 101
+LINKTYPE_LINUX_SLL = 113
+LINKTYPE_IPV4 = 228
+LINKTYPE_IPV6 = 229
+
+# Classic pcap magic numbers (microsecond and nanosecond resolution)
+_PCAP_MAGIC_US = 0xA1B2C3D4
+_PCAP_MAGIC_NS = 0xA1B23C4D
+
+# pcapng block types
+_PCAPNG_SHB = 0x0A0D0D0A
+_PCAPNG_IDB = 0x00000001
+_PCAPNG_PB = 0x00000002
+_PCAPNG_SPB = 0x00000003
+_PCAPNG_EPB = 0x00000006
+_PCAPNG_BYTE_ORDER_MAGIC = 0x1A2B3C4D
+_PCAPNG_OPT_IF_TSRESOL = 9
+
+# Large read buffer so sequential reads run at disk speed
+DEFAULT_BUFFER_SIZE = 1 << 20
+
+
+class PcapFormatError(ValueError):
+    """Raised when a capture file is not valid pcap/pcapng"""
+
+
+class PcapRecord:
+    """A single packet record read from a capture file"""
+
+    __slots__ = ('timestamp', 'data', 'captured_length', 'original_length', 'linktype')
+
+    def __init__(self, timestamp, data, original_length, linktype):
+        self.timestamp = timestamp
+        self.data = data
+        self.captured_length = len(data)
+        self.original_length = original_length
+        self.linktype = linktype
+
+
+class PcapReader:
+    """
+    Streaming reader for pcap and pcapng capture files.
+    Records are read one at a time through a buffered file handle, so the
+    whole file is never held in memory no matter how large it is.
+    """
+
+    def __init__(self, filepath, buffer_size=DEFAULT_BUFFER_SIZE):
+        self.filepath = filepath
+        self.buffer_size = buffer_size
+        self.format = None
+        self.records_read = 0
+        self.bytes_read = 0
+
+    def __iter__(self):
+        with open(self.filepath, 'rb', buffering=self.buffer_size) as f:
+            magic = f.read(4)
+            if len(magic) < 4:
+                raise PcapFormatError(f"File too short: {self.filepath}")
+
+            if struct.unpack('<I', magic)[0] == _PCAPNG_SHB:
+                self.format = 'pcapng'
+                records = self._read_pcapng(f, magic)
+            else:
+                self.format = 'pcap'
+                records = self._read_pcap(f, magic)
+
+            for record in records:
+                self.records_read += 1
+                self.bytes_read += record.captured_length
+                yield record
+
+    def _read_pcap(self, f, magic):
+        """Yield records from a classic pcap file"""
+        for endian in ('<', '>'):
+            value = struct.unpack(endian + 'I', magic)[0]
+            if value in (_PCAP_MAGIC_US, _PCAP_MAGIC_NS):
+                break
+        else:
+            raise PcapFormatError(f"Unknown capture file magic: {magic.hex()}")
+
+        ts_divisor = 1e9 if value == _PCAP_MAGIC_NS else 1e6
+        header = f.read(20)
+        if len(header) < 20:
+            raise PcapFormatError("Truncated pcap global header")
+        _, _, _, _, _, linktype = struct.unpack(endian + 'HHiIII', header)
+
+        record_header = struct.Struct(endian + 'IIII')
+        header_size = record_header.size
+        read = f.read
+
+        while True:
+            raw_header = read(header_size)
+            if len(raw_header) < header_size:
+                return  # Clean EOF or truncated trailing header
+            ts_sec, ts_frac, incl_len, orig_len = record_header.unpack(raw_header)
+            data = read(incl_len)
+            if len(data) < incl_len:
+                return  # Truncated final record (capture still being written)
+            yield PcapRecord(ts_sec + ts_frac / ts_divisor, data, orig_len, linktype)
+
+    def _read_pcapng(self, f, first_bytes):
+        """Yield records from a pcapng file (SHB/IDB/EPB/SPB/PB blocks)"""
+        endian = '<'
+        interfaces = []  # (linktype, snaplen, ticks per second)
+        pending = first_bytes
+        read = f.read
+
+        while True:
+            head = pending + read(8 - len(pending))
+            pending = b''
+            if len(head) < 8:
+                return
+
+            block_type = struct.unpack(endian + 'I', head[:4])[0]
+
+            if block_type == _PCAPNG_SHB:
+                # Byte order is only known once the section header is read
+                bom = read(4)
+                if len(bom) < 4:
+                    return
+                if struct.unpack('<I', bom)[0] == _PCAPNG_BYTE_ORDER_MAGIC:
+                    endian = '<'
+                elif struct.unpack('>I', bom)[0] == _PCAPNG_BYTE_ORDER_MAGIC:
+                    endian = '>'
+                else:
+                    raise PcapFormatError("Invalid pcapng byte-order magic")
+                block_length = struct.unpack(endian + 'I', head[4:8])[0]
+                read(block_length - 12)  # Skip version, section length and options
+                interfaces = []  # Interface ids are scoped to a section
+                continue
+
+            block_length = struct.unpack(endian + 'I', head[4:8])[0]
+            if block_length < 12:
+                raise PcapFormatError(f"Invalid pcapng block length: {block_length}")
+            body = read(block_length - 8)
+            if len(body) < block_length - 8:
+                return
+            body = memoryview(body)[:-4]  # Drop trailing block length
+
+            if block_type == _PCAPNG_IDB:
+                linktype, _, snaplen = struct.unpack_from(endian + 'HHI', body, 0)
+                ticks = self._parse_if_tsresol(body[8:], endian)
+                interfaces.append((linktype, snaplen, ticks))
+
+            elif block_type == _PCAPNG_EPB:
+                if_id, ts_high, ts_low, cap_len, orig_len = struct.unpack_from(endian + 'IIIII', body, 0)
+                linktype, _, ticks = self._interface(interfaces, if_id)
+                timestamp = ((ts_high << 32) | ts_low) / ticks
+                yield PcapRecord(timestamp, bytes(body[20:20 + cap_len]), orig_len, linktype)
+
+            elif block_type == _PCAPNG_SPB:
+                orig_len = struct.unpack_from(endian + 'I', body, 0)[0]
+                linktype, snaplen, _ = self._interface(interfaces, 0)
+                cap_len = min(orig_len, snaplen) if snaplen else orig_len
+                # Simple packet blocks carry no timestamp
+                yield PcapRecord(0.0, bytes(body[4:4 + cap_len]), orig_len, linktype)
+
+            elif block_type == _PCAPNG_PB:
+                if_id, _, ts_high, ts_low, cap_len, orig_len = struct.unpack_from(endian + 'HHIIII', body, 0)
+                linktype, _, ticks = self._interface(interfaces, if_id)
+                timestamp = ((ts_high << 32) | ts_low) / ticks
+                yield PcapRecord(timestamp, bytes(body[20:20 + cap_len]), orig_len, linktype)
+
+            # Any other block type (statistics, name resolution, ...) is skipped
+
+    def _interface(self, interfaces, if_id):
+        """Look up the interface a packet block refers to"""
+        if if_id >= len(interfaces):
+            raise PcapFormatError(f"Packet block refers to undeclared interface {if_id} "
+                                  f"({len(interfaces)} declared in this section)")
+        return interfaces[if_id]
+
+    def _parse_if_tsresol(self, options, endian):
+        """Return timestamp ticks per second from interface description options"""
+        offset = 0
+        while offset + 4 <= len(options):
+            code, length = struct.unpack_from(endian + 'HH', options, offset)
+            if code == 0:
+                break
+            if code == _PCAPNG_OPT_IF_TSRESOL and length >= 1:
+                value = options[offset + 4]
+                if value & 0x80:
+                    return 2 ** (value & 0x7F)
+                return 10 ** value
+            offset += 4 + ((length + 3) & ~3)
+        return 1000000  # Default resolution is microseconds
+
+
+def write_pcap(filepath, records, linktype=LINKTYPE_ETHERNET):
+    """
+    Write (timestamp, data) pairs to a classic pcap file.
+    Mainly useful for building test traces and exporting captures.
+    """
+    with open(filepath, 'wb') as f:
+        f.write(struct.pack('<IHHiIII', _PCAP_MAGIC_US, 2, 4, 0, 0, 65535, linktype))
+        for timestamp, data in records:
+            ts_sec, ts_usec = divmod(int(round(timestamp * 1e6)), 1000000)
+            f.write(struct.pack('<IIII', ts_sec, ts_usec, len(data), len(data)))
+            f.write(data)
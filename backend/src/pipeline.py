@@ -0,0 +1,286 @@
+# src/pipeline.py
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+from src.aggregation import merge_issues
+from src.batch import PacketBatch
+from src.flows import flow_key, packet_flow_key, DEFAULT_MAX_FLOWS
+from src.parser import ProtocolParser
+from src.rules import RuleContext
+from src.statistics import StatsAccumulator
+from src.detector import IssueDetector
+from src.streaming import packet_summary
+
+# Shards per worker: more, smaller shards even out skewed flow sizes
+SHARDS_PER_WORKER = 4
+
+# Outputs AnalysisPipeline can produce
+PIPELINE_OUTPUTS = ('packets', 'analyses', 'statistics', 'issues')
+
+# Per-process analysis objects, created once by _init_worker
+_worker = {}
+
+
+def flow_shard(key, shards):
+    """Stable shard index for a flow key (crc32, so it is the same in every process)"""
+    return zlib.crc32(repr(key).encode()) % shards
+
+
+def shard_packets(packets, shards):
+    """
+    Split packets into shards so every packet of a flow lands in the same shard.
+    Returns a list of (indices, packets) pairs; packets without addresses are
+    spread round-robin. A PacketBatch is split into sub-batches.
+    """
+    buckets = [[] for _ in range(shards)]
+
+    if isinstance(packets, PacketBatch):
+        protocols = packets.protocols
+        for i in range(len(packets)):
+            version = packets.ip_version[i]
+            if not version:
+                buckets[i % shards].append(i)
+                continue
+            key = flow_key(protocols[packets.protocol[i]],
+                           packets.ip_string(version, packets.src_ip[i]), packets.src_port[i],
+                           packets.ip_string(version, packets.dst_ip[i]), packets.dst_port[i])
+            buckets[flow_shard(key, shards)].append(i)
+        return [(indices, packets.take(indices)) for indices in buckets]
+
+    shard_lists = [[] for _ in range(shards)]
+    for i, packet in enumerate(packets):
+        key = packet_flow_key(packet)
+        shard = flow_shard(key, shards) if key else i % shards
+        buckets[shard].append(i)
+        shard_lists[shard].append(packet)
+    return list(zip(buckets, shard_lists))
+
+
+def _init_worker():
+    _worker['parser'] = ProtocolParser()
+    _worker['detector'] = IssueDetector()
+
+
+def analyze_shard(packets, parse=True, stats=True, detect=True, max_conversations=DEFAULT_MAX_FLOWS):
+    """
+    Run parsing, statistics and detection over one shard.
+    Flow-local checks return their issues; mergeable capture-wide checks
+    return their rule state and the shard's totals for the parent to merge.
+    Module-level so it can be sent to a process pool.
+    """
+    if not _worker:
+        _init_worker()
+
+    result = {'analyses': None, 'stats': None, 'issues': None, 'rules': None, 'context': None}
+    if stats:
+        result['stats'] = StatsAccumulator(max_conversations)
+        result['stats'].update_batch(packets)
+    if parse:
+        parser = _worker['parser']
+        result['analyses'] = [parser.parse_packet(packet) for packet in packets]
+    if detect:
+        detector = _worker['detector']
+        engine = detector.engine(detector.flow_local_checks + detector.mergeable_checks)
+        engine.feed(packets)
+        result['issues'] = engine.finish(detector.flow_local_checks)
+        engine.finish(detector.mergeable_checks, finalize=False)
+        result['rules'] = {rule.name: rule for rule in engine.rules if rule.name in detector.mergeable_checks}
+        result['context'] = engine.context
+        result['context'].flows = None  # Only per-flow hooks need it, and those have run
+    return result
+
+
+class ParallelPipeline:
+    """
+    Runs ProtocolParser, StatsAccumulator and IssueDetector over a capture
+    on a process pool.
+
+    Packets are sharded by a hash of their bidirectional 5-tuple, so each
+    flow is seen by exactly one worker and per-flow detectors stay correct.
+    Unless analyses are requested (the parser needs the raw records), list
+    input is shipped to the workers as PacketBatch columns, not dicts.
+    Capture-wide checks run in the workers too and hand back their partial
+    state, which is merged (DetectionRule.merge) and finalized once; only
+    rules that cannot merge are run over the whole capture in the parent.
+    Partial results are merged in shard order, never completion order, so
+    the output is the same on every run.
+    """
+
+    def __init__(self, workers=None, shards=None, max_conversations=DEFAULT_MAX_FLOWS):
+        self.workers = workers or os.cpu_count() or 1
+        self.shards = shards or self.workers * SHARDS_PER_WORKER
+        self.max_conversations = max_conversations
+        self.detector = IssueDetector()
+        print(f"⚙️  ParallelPipeline initialized with {self.workers} workers!")
+
+    def run(self, packets, parse=False, stats=True, detect=True):
+        """
+        Analyze packets and return {'statistics', 'issues', 'analyses'}.
+
+        Args:
+            packets: List of packet dictionaries or a PacketBatch
+            parse: Also return a ProtocolParser analysis for every packet
+            stats: Compute traffic statistics
+            detect: Run the issue detector
+        """
+        result = {'statistics': None, 'issues': None, 'analyses': None}
+        if not packets:
+            return result
+
+        columns = packets if parse or isinstance(packets, PacketBatch) else PacketBatch.from_packets(packets)
+        shards = shard_packets(columns, self.shards)
+        options = {'parse': parse, 'stats': stats, 'detect': detect,
+                   'max_conversations': self.max_conversations}
+        partials = self._map(shards, options)
+
+        if stats:
+            merged = StatsAccumulator(self.max_conversations)
+            for partial in partials:
+                merged.merge(partial['stats'])
+            result['statistics'] = merged.snapshot()
+
+        if detect:
+            detector = self.detector
+            merged_issues = self._finalize_merged(partials, detector.mergeable_checks)
+            remaining = [check for check in detector.checks
+                         if check not in detector.flow_local_checks and check not in merged_issues]
+            capture_issues = detector.run_checks(packets, remaining) if remaining else {}
+
+            issues = []
+            for check in detector.checks:
+                if check in merged_issues:
+                    issues.extend(merged_issues[check])
+                elif check in capture_issues:
+                    issues.extend(capture_issues[check])
+                else:
+                    # A problem seen in several shards is one aggregated issue
+                    issues.extend(merge_issues([issue for partial in partials
+                                                for issue in partial['issues'][check]]))
+            result['issues'] = issues
+
+        if parse:
+            analyses = [None] * len(packets)
+            for (indices, _), partial in zip(shards, partials):
+                for index, analysis in zip(indices, partial['analyses']):
+                    analyses[index] = analysis
+            result['analyses'] = analyses
+
+        return result
+
+    @staticmethod
+    def _finalize_merged(partials, checks):
+        """Merge each shard's state of the mergeable checks and finalize them once"""
+        context = RuleContext()
+        for partial in partials:
+            context.merge(partial['context'])
+
+        results = {}
+        for check in checks:
+            rule = partials[0]['rules'][check]
+            for partial in partials[1:]:
+                rule.merge(partial['rules'][check])
+            if rule.finalize:
+                rule.finalize(context)
+            results[check] = rule.issues
+        return results
+
+    def _map(self, shards, options):
+        """Run analyze_shard over every shard, keeping shard order"""
+        work = [shard for _, shard in shards]
+        if self.workers == 1:
+            return [analyze_shard(shard, **options) for shard in work]
+
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker) as pool:
+            futures = [pool.submit(analyze_shard, shard, **options) for shard in work]
+            return [future.result() for future in futures]
+
+
+def project(value, fields):
+    """
+    Trim a result to the requested keys: a dict keeps only those keys and
+    a list of dicts is trimmed item by item. fields=None keeps everything.
+    """
+    if fields is None:
+        return value
+    if isinstance(value, dict):
+        return {key: value[key] for key in fields if key in value}
+    if isinstance(value, list):
+        return [project(item, fields) for item in value]
+    return value
+
+
+class AnalysisPipeline:
+    """
+    Produces any mix of packet summaries, per-packet analyses, statistics
+    and issues from one traversal of a capture.
+
+    Each packet is visited once and handed to every requested consumer,
+    the detector's rule engine included; its per-flow and capture-wide
+    checks run after the loop. The engine keeps its own flow table, so
+    conversations the statistics table evicts are still checked.
+    """
+
+    def __init__(self, parser=None, detector=None):
+        self.parser = parser or ProtocolParser()
+        self.detector = detector or IssueDetector()
+
+    def run(self, packets, outputs=PIPELINE_OUTPUTS, fields=None):
+        """
+        Analyze packets and return {output: result} for each requested output.
+
+        Args:
+            packets: List of packet dictionaries or a PacketBatch
+            outputs: Any of 'packets', 'analyses', 'statistics', 'issues'
+            fields: Optional {output: [keys]} projection to trim the response
+        """
+        outputs = list(dict.fromkeys(outputs))
+        unknown = [name for name in outputs if name not in PIPELINE_OUTPUTS]
+        if unknown:
+            raise ValueError(f"Unknown pipeline outputs: {', '.join(unknown)}")
+        fields = fields or {}
+
+        want_summaries = 'packets' in outputs
+        want_analyses = 'analyses' in outputs
+        accumulator = StatsAccumulator() if 'statistics' in outputs else None
+        engine = self.detector.engine() if 'issues' in outputs and packets else None
+        summaries, analyses = [], []
+
+        if isinstance(packets, PacketBatch) and accumulator is not None:
+            # Columnar statistics are cheaper per column than per row
+            accumulator.update_batch(packets)
+            update = None
+        else:
+            update = accumulator.update if accumulator is not None else None
+        detect = engine.on_packet if engine is not None else None
+
+        if want_summaries or want_analyses or update or detect:
+            parse = self.parser.parse_packet
+            for packet in packets:
+                if update:
+                    update(packet)
+                if detect:
+                    detect(packet)
+                if want_summaries:
+                    summaries.append(packet_summary(packet))
+                if want_analyses:
+                    analyses.append(parse(packet))
+
+        result = {}
+        if want_summaries:
+            result['packets'] = summaries
+        if want_analyses:
+            result['analyses'] = analyses
+        if 'statistics' in outputs:
+            result['statistics'] = accumulator.snapshot()
+        if 'issues' in outputs:
+            result['issues'] = self._detect(engine)
+
+        return {name: project(result[name], fields.get(name)) for name in outputs}
+
+    def _detect(self, engine):
+        if engine is None:
+            return []
+        results = engine.finish()
+        self.detector.rule_timings = engine.timings
+        return [issue for rule in engine.rules for issue in results[rule.name]]
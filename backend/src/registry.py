@@ -0,0 +1,64 @@
+# src/registry.py
+import threading
+import time
+
+# Component scopes
+SHARED = 'shared'          # One instance for the whole process (must be thread-safe)
+PER_THREAD = 'per_thread'  # One instance per worker thread (for stateful components)
+
+
+class ComponentRegistry:
+    """
+    Application-wide home for long-lived analyzer components.
+
+    Components are registered with a factory and built once on first use
+    (or by warm_up() at startup) instead of on every request. Stateless
+    components are shared; components that keep per-call state get one
+    instance per thread.
+    """
+
+    def __init__(self):
+        self._factories = {}
+        self._shared = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def register(self, name, factory, scope=SHARED):
+        if scope not in (SHARED, PER_THREAD):
+            raise ValueError(f"Unknown component scope: {scope}")
+        with self._lock:
+            self._factories[name] = (factory, scope)
+            self._shared.pop(name, None)
+
+    def get(self, name):
+        """Return the component instance for the calling thread"""
+        try:
+            factory, scope = self._factories[name]
+        except KeyError:
+            raise KeyError(f"No component registered as {name!r}")
+
+        if scope == PER_THREAD:
+            instances = self._local.__dict__
+            if name not in instances:
+                instances[name] = factory()
+            return instances[name]
+
+        instance = self._shared.get(name)
+        if instance is None:
+            with self._lock:
+                instance = self._shared.get(name)
+                if instance is None:
+                    instance = self._shared[name] = factory()
+        return instance
+
+    def warm_up(self, names=None):
+        """Build components ahead of the first request; returns seconds per component"""
+        timings = {}
+        for name in names or list(self._factories):
+            start = time.perf_counter()
+            self.get(name)
+            timings[name] = time.perf_counter() - start
+        return timings
+
+    def __contains__(self, name):
+        return name in self._factories
@@ -0,0 +1,114 @@
+# src/result_cache.py
+import hashlib
+import threading
+from collections import OrderedDict
+
+from src.batch import PacketBatch
+from src.serialization import get_serializer
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+_serializer = get_serializer()
+
+
+def digest_packets(packets):
+    """Content digest of a capture: equal packets give equal digests"""
+    digest = hashlib.blake2b(digest_size=16)
+    if isinstance(packets, PacketBatch):
+        digest.update(b'batch')
+        for name in PacketBatch.COLUMNS:
+            digest.update(getattr(packets, name).tobytes())
+        digest.update(_serializer.dumps(packets.protocols))
+        digest.update(b''.join(packets.ipv6_addresses))
+    else:
+        digest.update(_serializer.dumps(list(packets)))
+    return digest.hexdigest()
+
+
+def result_size(value):
+    """Bytes charged for a cached result: the size of its JSON encoding"""
+    return len(_serializer.dumps(value))
+
+
+class ResultCache:
+    """
+    Content-addressed LRU cache of analysis results, bounded by memory.
+
+    Keys are built from the capture digest and the analysis parameters, so
+    a result is shared by every request over the same packets and never
+    goes stale: a changed capture has a different digest. The least
+    recently used results are evicted once max_bytes is exceeded.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, sizeof=result_size):
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.not_modified = 0
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def etag(key, *variant):
+        """Strong ETag for a key plus anything else that shapes the response"""
+        return hashlib.blake2b(repr((key, variant)).encode('utf-8'), digest_size=16).hexdigest()
+
+    def get_or_compute(self, key, compute):
+        """Return the cached result for key, computing and storing it on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def put(self, key, value):
+        size = self.sizeof(value)
+        if size > self.max_bytes:
+            return  # Would evict everything else for one entry
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= old[1]
+            self._entries[key] = (value, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+
+    def record_not_modified(self):
+        with self._lock:
+            self.not_modified += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'bytes': self.current_bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+            'evictions': self.evictions,
+            'not_modified': self.not_modified
+        }
@@ -0,0 +1,282 @@
+# src/ringbuffer.py
+import threading
+from collections.abc import Sequence
+
+# Overflow policies
+DROP_OLDEST = 'drop_oldest'
+BLOCK = 'block'
+
+# Defaults sized so a long capture on a busy link stays well within memory
+DEFAULT_MAX_PACKETS = 1000000
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# Seconds a 'block' producer waits for a consumer before dropping packets instead
+DEFAULT_BLOCK_TIMEOUT = 1.0
+
+
+def packet_size(packet_info):
+    """Bytes a packet_info record is charged against the byte budget"""
+    raw_bytes = packet_info.get('raw_bytes')
+    if raw_bytes is not None:
+        return len(raw_bytes)
+    return packet_info.get('length', 0) or 0
+
+
+class RingView(Sequence):
+    """
+    Read-only window onto a PacketRing, addressed by sequence number.
+
+    Nothing is copied: items are read from the ring's slots on access.
+    Reading an item that the producer has since overwritten raises
+    IndexError, so a slow consumer finds out instead of reading the
+    wrong packet.
+    """
+
+    __slots__ = ('_ring', 'start', 'stop')
+
+    def __init__(self, ring, start, stop):
+        self._ring = ring
+        self.start = start  # First sequence number in the view
+        self.stop = stop    # One past the last sequence number
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            first, last, step = index.indices(len(self))
+            if step != 1:
+                return [self[i] for i in range(first, last, step)]
+            return RingView(self._ring, self.start + first, self.start + max(first, last))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("RingView index out of range")
+        return self._ring._get(self.start + index)
+
+    def __iter__(self):
+        get = self._ring._get
+        for seq in range(self.start, self.stop):
+            yield get(seq)
+
+    def __eq__(self, other):
+        if isinstance(other, (list, tuple, RingView)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def iter_held(self):
+        """
+        Iterate the packets of the view, skipping any the producer has
+        overwritten (or a consumer released) before they are reached.
+        Never raises; packets come out in sequence order, at most once.
+        """
+        ring = self._ring
+        slots, size = ring._slots, ring.max_packets
+        seq, stop = self.start, self.stop
+        while seq < stop:
+            index = seq % size
+            entry = slots[index] if index < len(slots) else None
+            if entry is not None and entry[0] == seq:
+                yield entry[2]
+                seq += 1
+            else:
+                # Gone: resume at the oldest packet still held
+                seq = max(seq + 1, ring.first_seq)
+
+    @property
+    def stale(self):
+        """Number of packets in the view that were already overwritten"""
+        return max(0, min(self._ring.first_seq, self.stop) - self.start)
+
+    def __repr__(self):
+        return f"RingView(seq {self.start}-{self.stop})"
+
+
+class PacketRing(Sequence):
+    """
+    Fixed-capacity ring buffer of packet_info records with packet and byte budgets.
+
+    When either budget is exceeded the 'drop_oldest' policy overwrites the
+    oldest packets, while 'block' makes the producer wait until a consumer
+    calls consume(). A producer that waits block_timeout seconds in vain
+    refuses the packet, and keeps refusing new packets without waiting
+    until a consumer shows up, so a ring nobody consumes degrades to
+    dropping instead of hanging. Every packet gets a sequence number,
+    which consumers use with view() and read_since() to read without
+    copying. Slots are allocated as packets arrive, not up front.
+    """
+
+    def __init__(self, max_packets=DEFAULT_MAX_PACKETS, max_bytes=DEFAULT_MAX_BYTES,
+                 policy=DROP_OLDEST, block_timeout=DEFAULT_BLOCK_TIMEOUT):
+        if policy not in (DROP_OLDEST, BLOCK):
+            raise ValueError(f"Unknown overflow policy: {policy}")
+        if max_packets < 1:
+            raise ValueError("max_packets must be at least 1")
+        self.max_packets = max_packets
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self.block_timeout = block_timeout
+
+        self._slots = []     # (seq, size, packet_info), grown up to max_packets
+        self._stalled = False  # A blocked producer timed out with no consumer
+        self.first_seq = 0   # Oldest packet still held
+        self.next_seq = 0    # Sequence number of the next packet
+        self.bytes = 0
+        self._lock = threading.Lock()
+        self._space = threading.Condition(self._lock)
+
+        # Drop counters
+        self.dropped_packets = 0
+        self.dropped_bytes = 0
+        self.rejected_packets = 0   # New packets refused (oversized or block timeout)
+
+    # ------------------------------------------------------------------
+    # Producer side
+    # ------------------------------------------------------------------
+
+    def append(self, packet_info):
+        """Store a packet; returns False if it had to be refused"""
+        size = packet_size(packet_info)
+        with self._lock:
+            if self.max_bytes is not None and size > self.max_bytes:
+                self._reject(size)
+                return False
+
+            if not self._make_room(size):
+                self._reject(size)
+                return False
+
+            seq = self.next_seq
+            index = seq % self.max_packets
+            if index == len(self._slots):
+                self._slots.append((seq, size, packet_info))
+            else:
+                self._slots[index] = (seq, size, packet_info)
+            self.next_seq = seq + 1
+            self.bytes += size
+            return True
+
+    def extend(self, packets):
+        for packet_info in packets:
+            self.append(packet_info)
+
+    def _make_room(self, size):
+        """Free space for one packet of the given size (lock held)"""
+        if self.policy == BLOCK:
+            if not self._full(size):
+                return True
+            if self._stalled:
+                return False
+            if self._space.wait_for(lambda: not self._full(size), self.block_timeout):
+                return True
+            self._stalled = True
+            return False
+        while self._full(size):
+            self._discard_oldest(dropped=True)
+        return True
+
+    def _full(self, size):
+        if self.next_seq - self.first_seq >= self.max_packets:
+            return True
+        return self.max_bytes is not None and self.bytes + size > self.max_bytes
+
+    def _discard_oldest(self, dropped):
+        index = self.first_seq % self.max_packets
+        _, size, _ = self._slots[index]
+        self._slots[index] = None
+        self.first_seq += 1
+        self.bytes -= size
+        if dropped:
+            self.dropped_packets += 1
+            self.dropped_bytes += size
+
+    def _reject(self, size):
+        self.rejected_packets += 1
+        self.dropped_packets += 1
+        self.dropped_bytes += size
+
+    # ------------------------------------------------------------------
+    # Consumer side
+    # ------------------------------------------------------------------
+
+    def view(self):
+        """Zero-copy view of every packet currently held"""
+        return RingView(self, self.first_seq, self.next_seq)
+
+    def read_since(self, seq):
+        """
+        Return (view, missed) for packets with sequence number >= seq.
+        missed counts packets that were overwritten before they were read.
+        """
+        first, stop = self.first_seq, self.next_seq
+        missed = max(0, first - seq)
+        return RingView(self, max(seq, first), stop), missed
+
+    def consume(self, count=None):
+        """Release the oldest count packets (all by default) and wake blocked producers"""
+        with self._lock:
+            available = self.next_seq - self.first_seq
+            count = available if count is None else min(count, available)
+            for _ in range(count):
+                self._discard_oldest(dropped=False)
+            self._stalled = False
+            self._space.notify_all()
+        return count
+
+    def clear(self):
+        self.consume()
+
+    def snapshot(self):
+        """List of the packets currently held, copied under the lock"""
+        with self._lock:
+            slots, size = self._slots, self.max_packets
+            return [slots[seq % size][2] for seq in range(self.first_seq, self.next_seq)]
+
+    def _get(self, seq):
+        slots = self._slots
+        index = seq % self.max_packets
+        entry = slots[index] if index < len(slots) else None
+        if entry is None or entry[0] != seq:
+            raise IndexError(f"Packet {seq} was overwritten")
+        return entry[2]
+
+    # ------------------------------------------------------------------
+    # Sequence protocol (acts like the old captured_packets list)
+    # ------------------------------------------------------------------
+
+    def __len__(self):
+        return self.next_seq - self.first_seq
+
+    def __getitem__(self, index):
+        return self.view()[index]
+
+    def __iter__(self):
+        # Lazily over the packets held now; ones overwritten meanwhile are skipped
+        return self.view().iter_held()
+
+    def __eq__(self, other):
+        if isinstance(other, (list, tuple, RingView, PacketRing)):
+            return self.snapshot() == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def stats(self):
+        return {
+            'packets': len(self),
+            'bytes': self.bytes,
+            'max_packets': self.max_packets,
+            'max_bytes': self.max_bytes,
+            'policy': self.policy,
+            'total_packets': self.next_seq,
+            'dropped_packets': self.dropped_packets,
+            'dropped_bytes': self.dropped_bytes,
+            'rejected_packets': self.rejected_packets
+        }
+
+    def __reduce__(self):
+        # Locks cannot be pickled; a ring pickles as a plain list of packets
+        return (list, (list(self),))
+
+    def __repr__(self):
+        return f"PacketRing({len(self)}/{self.max_packets} packets, {self.bytes} bytes, {self.policy})"
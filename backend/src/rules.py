@@ -0,0 +1,286 @@
+# src/rules.py
+import time
+from functools import lru_cache
+
+from src.aggregation import IssueAggregator, DEFAULT_AGGREGATION_WINDOW
+from src.batch import PacketBatch
+from src.flows import FlowTable, DEFAULT_MAX_FLOWS
+from src.metrics import REGISTRY, DETECTOR_RULE_SECONDS, DETECTOR_ISSUES
+
+# Entry point group third-party packages use to ship detection rules
+ENTRY_POINT_GROUP = 'packet_analyzer.rules'
+
+# Registered rule classes by name, in registration (report) order
+RULES = {}
+
+# Timed runs clock one packet in this many and scale up, to keep timing cheap
+TIMING_SAMPLE = 16
+
+
+class DetectionRule:
+    """
+    Base class for IssueDetector rules.
+
+    A rule overrides any of three hooks and calls report() for each issue:
+      on_packet(packet) - every packet whose protocol is in `protocols`
+                          (None means every protocol)
+      on_flow(flow)     - every flow of those protocols, once the packets
+                          have been seen
+      finalize(context) - once at the end, with capture-wide totals
+    Rules with flow_local = True only look at single packets or flows, so
+    they give the same answer on flow-sharded partitions of a capture.
+    Other rules can define merge(other) to fold in the state another
+    instance built over another partition; finalize() then runs once on
+    the merged rule.
+    Per-packet findings should be reported with a key and the packet, so
+    repeats are aggregated (see IssueAggregator) instead of listed.
+    """
+
+    name = None
+    protocols = None
+    flow_local = False
+    aggregation_window = DEFAULT_AGGREGATION_WINDOW
+
+    def __init__(self):
+        self.aggregator = IssueAggregator(self.aggregation_window)
+
+    def reset(self):
+        """Clear per-run state (called before every run)"""
+        self.aggregator = IssueAggregator(self.aggregation_window)
+
+    @property
+    def issues(self):
+        return self.aggregator.issues
+
+    def report(self, issue, key=None, packet=None):
+        """
+        Report an issue. Issues of the same type and key that keep recurring
+        are merged into one entry with a count, first/last seen and samples.
+        """
+        self.aggregator.add(issue, key, packet)
+
+    on_packet = None
+    on_flow = None
+    finalize = None
+    merge = None
+
+
+def register_rule(rule_class):
+    """Class decorator adding a rule to the default IssueDetector rule set"""
+    if not rule_class.name:
+        raise ValueError(f"{rule_class.__name__} needs a name")
+    RULES[rule_class.name] = rule_class
+    return rule_class
+
+
+def _rule_entry_points():
+    """Entry points in ENTRY_POINT_GROUP on every supported Python"""
+    from importlib.metadata import entry_points
+
+    found = entry_points()
+    if hasattr(found, 'select'):
+        return found.select(group=ENTRY_POINT_GROUP)
+    # Python 3.8/3.9: a dict of group name to entry points
+    return found.get(ENTRY_POINT_GROUP, [])
+
+
+@lru_cache(maxsize=None)
+def load_plugin_rules():
+    """Register rules published under the packet_analyzer.rules entry point (once)"""
+    loaded = []
+    for entry_point in _rule_entry_points():
+        try:
+            rule_class = entry_point.load()
+        except Exception as e:
+            print(f"⚠️  Could not load detection rule {entry_point.name}: {e}")
+            continue
+        register_rule(rule_class)
+        loaded.append(rule_class.name)
+    return tuple(loaded)
+
+
+class RuleContext:
+    """Capture-wide totals handed to finalize()"""
+
+    __slots__ = ('packets', 'first_seen', 'last_seen', 'flows')
+
+    def __init__(self, flows=None):
+        self.packets = 0
+        self.first_seen = None
+        self.last_seen = None
+        self.flows = flows
+
+    @property
+    def duration(self):
+        if self.first_seen is None:
+            return 0
+        return self.last_seen - self.first_seen
+
+    def merge(self, other):
+        """Fold in the totals of a run over another part of the capture"""
+        self.packets += other.packets
+        if other.first_seen is not None:
+            self.observe_timestamps(other.first_seen, other.last_seen)
+        return self
+
+    def observe_timestamps(self, low, high):
+        if self.first_seen is None or low < self.first_seen:
+            self.first_seen = low
+        if self.last_seen is None or high > self.last_seen:
+            self.last_seen = high
+
+
+class RuleEngine:
+    """
+    Runs a set of rules over a capture in a single pass.
+
+    Each packet is handed only to the rules registered for its protocol
+    (the dispatch list is built once per protocol). Packets can arrive in
+    several feed() calls, or one at a time through on_packet(); finish()
+    runs the per-flow and finalize hooks and returns {rule name: issues}.
+    The engine's own flow table holds at most max_flows flows; a flow
+    evicted to make room is handed to the per-flow hooks right away, so
+    large captures lose no flows (a later packet of it starts a new one). With timed=True (the default while metrics
+    are enabled) the time spent in each rule is kept in `timings`; per-packet
+    hooks are clocked on a sample of packets and scaled up.
+    """
+
+    def __init__(self, rules, flow_table=None, timed=None, max_flows=DEFAULT_MAX_FLOWS):
+        self.rules = list(rules)
+        for rule in self.rules:
+            rule.reset()
+        self.timed = REGISTRY.enabled if timed is None else timed
+        self.timings = {rule.name: 0.0 for rule in self.rules}
+        self.context = RuleContext()
+
+        # Build the flow table during the packet pass unless one was given,
+        # holding only the protocols the per-flow hooks ask for
+        flow_rules = [rule for rule in self.rules if rule.on_flow]
+        self._own_flows = bool(flow_rules) and flow_table is None
+        if any(rule.protocols is None for rule in flow_rules):
+            self._flow_protocols = None
+        else:
+            self._flow_protocols = {protocol for rule in flow_rules for protocol in rule.protocols}
+        if self._own_flows:
+            self.context.flows = FlowTable(idle_timeout=None, active_timeout=None, max_flows=max_flows,
+                                           on_expire=self._flow_evicted)
+        else:
+            self.context.flows = flow_table
+        self._dispatch = {}
+        self._countdown = 1 if self.timed else -1
+
+    def _flow_evicted(self, flow):
+        """Judge a flow pushed out of the engine's table before it is forgotten"""
+        for rule in self.rules:
+            if rule.on_flow and (rule.protocols is None or flow.protocol in rule.protocols):
+                start = time.perf_counter()
+                rule.on_flow(flow)
+                self.timings[rule.name] += time.perf_counter() - start
+
+    def _callbacks(self, protocol):
+        """on_packet hooks of the rules interested in a protocol"""
+        callbacks = self._dispatch.get(protocol)
+        if callbacks is None:
+            callbacks = self._dispatch[protocol] = [
+                (rule.name, rule.on_packet) for rule in self.rules
+                if rule.on_packet and (rule.protocols is None or protocol in rule.protocols)]
+        return callbacks
+
+    def feed(self, packets):
+        """Hand a chunk of packets (list or PacketBatch) to the per-packet hooks"""
+        if not packets:
+            return
+        context = self.context
+        context.packets += len(packets)
+        update_flows = context.flows.update if self._own_flows else None
+        if isinstance(packets, PacketBatch):
+            context.observe_timestamps(min(packets.timestamp), max(packets.timestamp))
+            if update_flows:
+                context.flows.update_batch(packets)  # Columnar path, cheaper than per row
+                update_flows = None
+            low = high = None
+        else:
+            low = high = packets[0].get('timestamp', 0) or 0
+
+        callbacks_for = self._callbacks
+        flow_protocols = self._flow_protocols
+        timings = self.timings
+        clock = time.perf_counter
+        countdown = 1 if self.timed else -1
+        for packet in packets:
+            if low is not None:
+                timestamp = packet.get('timestamp', 0) or 0
+                if timestamp < low:
+                    low = timestamp
+                elif timestamp > high:
+                    high = timestamp
+            protocol = packet.get('protocol', 'Unknown')
+            if update_flows and (flow_protocols is None or protocol in flow_protocols):
+                update_flows(packet)
+            countdown -= 1
+            if countdown:
+                for _, callback in callbacks_for(protocol):
+                    callback(packet)
+            else:
+                countdown = TIMING_SAMPLE
+                for name, callback in callbacks_for(protocol):
+                    start = clock()
+                    callback(packet)
+                    timings[name] += (clock() - start) * TIMING_SAMPLE
+        if low is not None:
+            context.observe_timestamps(low, high)
+
+    def on_packet(self, packet):
+        """Hand one packet to the per-packet hooks, for callers running their own loop"""
+        context = self.context
+        context.packets += 1
+        timestamp = packet.get('timestamp', 0) or 0
+        context.observe_timestamps(timestamp, timestamp)
+        protocol = packet.get('protocol', 'Unknown')
+        if self._own_flows and (self._flow_protocols is None or protocol in self._flow_protocols):
+            context.flows.update(packet)
+        self._countdown -= 1
+        if self._countdown:
+            for _, callback in self._callbacks(protocol):
+                callback(packet)
+        else:
+            self._countdown = TIMING_SAMPLE
+            for name, callback in self._callbacks(protocol):
+                start = time.perf_counter()
+                callback(packet)
+                self.timings[name] += (time.perf_counter() - start) * TIMING_SAMPLE
+
+    def finish(self, checks=None, finalize=True):
+        """
+        Run the per-flow and finalize hooks and return {rule name: issues}.
+        checks limits both to the named rules; finalize=False leaves the
+        finalize hooks for later (e.g. after merging partial runs).
+        """
+        context = self.context
+        rules = self.rules if checks is None else [rule for rule in self.rules if rule.name in checks]
+        for rule in rules:
+            start = time.perf_counter()
+            if rule.on_flow and context.flows is not None:
+                protocols = rule.protocols
+                for flow in context.flows:
+                    if protocols is None or flow.protocol in protocols:
+                        rule.on_flow(flow)
+            if finalize and rule.finalize:
+                rule.finalize(context)
+            self.timings[rule.name] += time.perf_counter() - start
+
+        results = {}
+        for rule in rules:
+            DETECTOR_RULE_SECONDS.labels(rule.name).observe(self.timings[rule.name])
+            DETECTOR_ISSUES.labels(rule.name).inc(len(rule.issues))
+            results[rule.name] = rule.issues
+        return results
+
+    def run(self, packets):
+        """feed() every packet and finish()"""
+        self.feed(packets)
+        return self.finish()
+
+    def slowest(self, n=3):
+        """The n rules that took the longest, as (name, seconds)"""
+        return sorted(self.timings.items(), key=lambda item: -item[1])[:n]
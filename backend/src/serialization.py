@@ -0,0 +1,124 @@
+# src/serialization.py
+import gzip
+import json
+import zlib
+
+from src.batch import PacketBatch
+
+try:
+    import orjson
+except ImportError:  # Optional: pip install orjson
+    orjson = None
+
+# Responses smaller than this are sent uncompressed
+MIN_COMPRESS_SIZE = 1024
+COMPRESSION_LEVEL = 1  # ~3x faster than 6 for ~20% more bytes on packet JSON
+
+
+def _default(value):
+    """Fallback for values JSON has no type for (bytes, packet rows, ...)"""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value).hex()
+    if hasattr(value, 'keys'):
+        return {key: value[key] for key in value.keys()}
+    return str(value)
+
+
+class StdlibSerializer:
+    """Standard library json, compact separators"""
+
+    name = 'json'
+
+    def dumps(self, obj):
+        return json.dumps(obj, separators=(',', ':'), ensure_ascii=False,
+                          default=_default).encode('utf-8')
+
+    def loads(self, data):
+        return json.loads(data)
+
+
+class OrjsonSerializer:
+    """orjson: several times faster, produces the same JSON"""
+
+    name = 'orjson'
+
+    def dumps(self, obj):
+        # Statistics use integer keys (traffic timeline seconds)
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+
+SERIALIZERS = {'json': StdlibSerializer}
+if orjson is not None:
+    SERIALIZERS['orjson'] = OrjsonSerializer
+
+
+def get_serializer(name=None):
+    """Return the named serializer, or the fastest one installed"""
+    if name is None:
+        name = 'orjson' if 'orjson' in SERIALIZERS else 'json'
+    try:
+        return SERIALIZERS[name]()
+    except KeyError:
+        raise ValueError(f"Serializer {name!r} is not available (have: {', '.join(SERIALIZERS)})")
+
+
+def compact_packets(packets, fields=None):
+    """
+    Packets as {'fields': [...], 'rows': [[...], ...]}: field names are sent
+    once instead of in every packet, which roughly halves the JSON size.
+    By default the fields are every key that appears in any packet.
+    """
+    if isinstance(packets, PacketBatch):
+        packets = packets.to_packets()
+    if fields is None:
+        fields = list(dict.fromkeys(key for packet in packets for key in packet))
+    return {
+        'fields': list(fields),
+        'rows': [[packet.get(field) for field in fields] for packet in packets]
+    }
+
+
+def expand_packets(compact):
+    """Inverse of compact_packets (missing fields come back as None)"""
+    fields = compact['fields']
+    return [dict(zip(fields, row)) for row in compact['rows']]
+
+
+def negotiate_encoding(accept_encoding):
+    """
+    Pick 'gzip' or 'deflate' from an Accept-Encoding header, honouring
+    q-values; None means send the body uncompressed.
+    """
+    if not accept_encoding:
+        return None
+    weights = {}
+    for part in accept_encoding.split(','):
+        coding, _, params = part.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        weights[coding.strip().lower()] = quality
+
+    wildcard = weights.get('*', 0.0)
+    best, best_quality = None, 0.0
+    for coding in ('gzip', 'deflate'):
+        quality = weights.get(coding, wildcard)
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def compress(body, encoding, level=COMPRESSION_LEVEL):
+    """Compress a response body for the negotiated Content-Encoding"""
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=level, mtime=0)
+    if encoding == 'deflate':
+        return zlib.compress(body, level)
+    return body
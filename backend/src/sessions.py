@@ -0,0 +1,127 @@
+# src/sessions.py
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+DEFAULT_MAX_SESSIONS = 16
+DEFAULT_SESSION_TTL = 3600  # seconds since last use
+
+
+class CaptureNotFoundError(KeyError):
+    """Raised when a capture ID is unknown or has expired"""
+
+
+class CaptureSession:
+    """
+    One server-side capture: its packets plus cached analysis results.
+    Every change to the packets bumps the version and drops the cache.
+    """
+
+    def __init__(self, capture_id, packets, source=None):
+        self.capture_id = capture_id
+        self.packets = packets
+        self.source = source
+        self.version = 1
+        self.created = time.time()
+        self.last_used = self.created
+        self._results = {}
+        self._lock = threading.Lock()
+
+    def replace(self, packets):
+        """Swap in new packets and invalidate cached results"""
+        with self._lock:
+            self.packets = packets
+            self.version += 1
+            self._results = {}
+
+    def cached(self, key, compute):
+        """
+        Return the cached result for key, computing it on a miss.
+        Results computed against an older version are not stored.
+        """
+        with self._lock:
+            entry = self._results.get(key)
+            version, packets = self.version, self.packets
+        if entry is not None:
+            return entry
+
+        result = compute(packets)
+        with self._lock:
+            if self.version == version:
+                self._results[key] = result
+        return result
+
+    def info(self):
+        return {
+            'capture_id': self.capture_id,
+            'packets': len(self.packets),
+            'version': self.version,
+            'source': self.source,
+            'created': self.created,
+            'last_used': self.last_used,
+            'cached_results': len(self._results)
+        }
+
+
+class CaptureSessionStore:
+    """
+    Thread-safe store of capture sessions keyed by capture ID.
+    Keeps at most max_sessions (least recently used are dropped) and
+    expires sessions unused for ttl seconds.
+    """
+
+    def __init__(self, max_sessions=DEFAULT_MAX_SESSIONS, ttl=DEFAULT_SESSION_TTL):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self, packets, source=None):
+        """Store packets and return the new CaptureSession"""
+        session = CaptureSession(uuid.uuid4().hex, packets, source)
+        with self._lock:
+            self._expire(time.time())
+            self._sessions[session.capture_id] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return session
+
+    def get(self, capture_id):
+        """Return the session for capture_id or raise CaptureNotFoundError"""
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            session = self._sessions.get(capture_id)
+            if session is None:
+                raise CaptureNotFoundError(capture_id)
+            self._sessions.move_to_end(capture_id)
+            session.last_used = now
+        return session
+
+    def update(self, capture_id, packets):
+        session = self.get(capture_id)
+        session.replace(packets)
+        return session
+
+    def delete(self, capture_id):
+        with self._lock:
+            return self._sessions.pop(capture_id, None) is not None
+
+    def list(self):
+        with self._lock:
+            self._expire(time.time())
+            return [session.info() for session in self._sessions.values()]
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def _expire(self, now):
+        """Drop sessions idle for longer than the TTL (lock held)"""
+        if self.ttl is None:
+            return
+        while self._sessions:
+            capture_id, session = next(iter(self._sessions.items()))
+            if now - session.last_used <= self.ttl:
+                break
+            del self._sessions[capture_id]
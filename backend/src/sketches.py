@@ -0,0 +1,133 @@
+# src/sketches.py
+import math
+import zlib
+
+DEFAULT_BITMAP_BITS = 1024     # linear counting bitmap (128 bytes), good to a few thousand values
+DEFAULT_PRECISION = 8          # HyperLogLog with 2**8 registers (256 bytes, ~6.5% error)
+
+_MASK64 = (1 << 64) - 1
+
+
+def hash64(value):
+    """
+    Stable 64-bit hash of an int, str or bytes value.
+    Unlike hash() it is the same in every process, so sketches built on
+    different workers can be merged.
+    """
+    if isinstance(value, str):
+        value = zlib.crc32(value.encode('utf-8')) | len(value) << 32
+    elif isinstance(value, bytes):
+        value = zlib.crc32(value) | len(value) << 32
+    # splitmix64 finalizer: spreads nearby ints (ports, addresses) over all bits
+    value = (value + 0x9E3779B97F4A7C15) & _MASK64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return value ^ (value >> 31)
+
+
+class LinearCounter:
+    """
+    Distinct-value estimate from a fixed bitmap (linear counting).
+
+    Each value sets one bit; the estimate is -m * ln(empty bits / m).
+    Exact while values are few, within a few percent up to several times
+    the number of bits, and saturates (reports m * ln m) once every bit is
+    set. Memory is bits / 8 bytes whatever the input size.
+    """
+
+    __slots__ = ('bits', 'set_bits', '_bitmap')
+
+    def __init__(self, bits=DEFAULT_BITMAP_BITS):
+        self.bits = bits
+        self.set_bits = 0
+        self._bitmap = bytearray((bits + 7) // 8)
+
+    def add(self, value):
+        """Add a value; returns True if it set a new bit"""
+        index = hash64(value) % self.bits
+        byte, mask = index >> 3, 1 << (index & 7)
+        if self._bitmap[byte] & mask:
+            return False
+        self._bitmap[byte] |= mask
+        self.set_bits += 1
+        return True
+
+    def count(self):
+        empty = self.bits - self.set_bits
+        if not empty:
+            return round(self.bits * math.log(self.bits))
+        return round(-self.bits * math.log(empty / self.bits))
+
+    @property
+    def saturated(self):
+        return self.set_bits == self.bits
+
+    def merge(self, other):
+        """Fold in another counter of the same size"""
+        if other.bits != self.bits:
+            raise ValueError("Cannot merge bitmaps of different sizes")
+        self._bitmap = bytearray(a | b for a, b in zip(self._bitmap, other._bitmap))
+        self.set_bits = sum(bin(byte).count('1') for byte in self._bitmap)
+        return self
+
+    def __len__(self):
+        return self.count()
+
+
+class HyperLogLog:
+    """
+    Distinct-value estimate for large cardinalities in 2**precision bytes.
+
+    The first `precision` bits of a value's hash pick a register, which
+    keeps the longest run of leading zeros seen in the remaining bits. The
+    standard error is about 1.04 / sqrt(2**precision); small counts use
+    the linear counting correction. The estimate is cached and only
+    recomputed after a register changes, which becomes rare as the count
+    grows, so checking it after every add() is cheap.
+    """
+
+    __slots__ = ('precision', 'registers', '_estimate')
+
+    def __init__(self, precision=DEFAULT_PRECISION):
+        if not 4 <= precision <= 16:
+            raise ValueError("HyperLogLog precision must be between 4 and 16")
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+        self._estimate = 0
+
+    def add(self, value):
+        """Add a value; returns True if the estimate may have changed"""
+        h = hash64(value)
+        width = 64 - self.precision
+        index = h >> width
+        rank = width - (h & ((1 << width) - 1)).bit_length() + 1
+        if rank <= self.registers[index]:
+            return False
+        self.registers[index] = rank
+        self._estimate = None
+        return True
+
+    def count(self):
+        if self._estimate is None:
+            self._estimate = self._compute()
+        return self._estimate
+
+    def _compute(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / sum(2.0 ** -register for register in self.registers)
+        zeros = self.registers.count(0)
+        if raw <= 2.5 * m and zeros:
+            return round(m * math.log(m / zeros))
+        return round(raw)
+
+    def merge(self, other):
+        """Fold in another sketch of the same precision"""
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLogs of different precision")
+        self.registers = bytearray(max(a, b) for a, b in zip(self.registers, other.registers))
+        self._estimate = None
+        return self
+
+    def __len__(self):
+        return self.count()
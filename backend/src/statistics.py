@@ -1,7 +1,189 @@
 # src/statistics.py
-import time
+import re
 from collections import Counter
 
+from src.batch import PacketBatch
+from src.flows import FlowTable, DEFAULT_MAX_FLOWS
+
+# Typical packet sizes by protocol, used when a packet has no length
+SIZE_ESTIMATES = {
+    'tcp': 1500,    # Typical TCP packet with data
+    'udp': 512,     # Typical UDP packet
+    'dns': 128,     # DNS query/response
+    'http': 1400,   # HTTP data
+    'icmp': 84,     # ICMP packet
+    'icmpv6': 84,   # ICMPv6 packet
+    'ip': 576,      # Typical IP packet
+    'ipv6': 1280,   # IPv6 packet
+}
+
+_SUMMARY_LENGTH = re.compile(r'len=(\d+)')
+
+
+def estimate_packet_length(packet):
+    """Estimate packet length when not provided"""
+    summary = packet.get('summary', '')
+    
+    # Try to extract length from summary first
+    if 'len=' in summary:
+        match = _SUMMARY_LENGTH.search(summary)
+        if match:
+            return int(match.group(1))
+    
+    return SIZE_ESTIMATES.get(packet.get('protocol', '').lower(), 256)  # Default fallback
+
+
+class StatsAccumulator:
+    """
+    Incremental, single-pass traffic statistics.
+    
+    Every metric is a running counter, sum or min/max, so memory does not
+    grow with the number of packets: the protocol table grows with distinct
+    protocols, the timeline with capture seconds, and conversations live in
+    a FlowTable capped at max_conversations flows. Accumulators from
+    different workers can be combined with merge().
+    """
+    
+    def __init__(self, max_conversations=DEFAULT_MAX_FLOWS):
+        self.total_packets = 0
+        self.total_bytes = 0
+        self.timestamped_packets = 0
+        self.first_timestamp = None
+        self.last_timestamp = None
+        self.protocol_counts = {}
+        self.size_buckets = {'small': 0, 'medium': 0, 'large': 0}
+        self.min_size = None
+        self.max_size = None
+        self.timeline = {}
+        # Conversations never time out here, only the least recent are evicted
+        self.flows = FlowTable(idle_timeout=None, active_timeout=None, max_flows=max_conversations)
+    
+    def update(self, packet):
+        """Add one packet_info dict"""
+        size = packet.get('length', 0)
+        if size <= 0:
+            size = estimate_packet_length(packet)
+        self._add_packet(size)
+        
+        protocol = packet.get('protocol', 'Unknown')
+        self.protocol_counts[protocol] = self.protocol_counts.get(protocol, 0) + 1
+        
+        timestamp = packet.get('timestamp', 0)
+        self._add_timestamp(timestamp)
+        
+        self.flows.update(packet)
+    
+    def update_batch(self, batch):
+        """Add every packet of a PacketBatch (or any iterable of packets)"""
+        if not isinstance(batch, PacketBatch):
+            for packet in batch:
+                self.update(packet)
+            return
+        
+        estimates = [estimate_packet_length({'protocol': name}) for name in batch.protocols]
+        for size, code in zip(batch.length, batch.protocol):
+            self._add_packet(size or estimates[code])
+        
+        for code, count in Counter(batch.protocol).items():
+            protocol = batch.protocols[code]
+            self.protocol_counts[protocol] = self.protocol_counts.get(protocol, 0) + count
+        
+        for timestamp in batch.timestamp:
+            self._add_timestamp(timestamp)
+        
+        self.flows.update_batch(batch)
+    
+    def merge(self, other):
+        """Fold another accumulator's state into this one"""
+        self.total_packets += other.total_packets
+        self.total_bytes += other.total_bytes
+        self.timestamped_packets += other.timestamped_packets
+        self.first_timestamp = self._pick(min, self.first_timestamp, other.first_timestamp)
+        self.last_timestamp = self._pick(max, self.last_timestamp, other.last_timestamp)
+        self.min_size = self._pick(min, self.min_size, other.min_size)
+        self.max_size = self._pick(max, self.max_size, other.max_size)
+        
+        for bucket, count in other.size_buckets.items():
+            self.size_buckets[bucket] += count
+        for protocol, count in other.protocol_counts.items():
+            self.protocol_counts[protocol] = self.protocol_counts.get(protocol, 0) + count
+        for second, count in other.timeline.items():
+            self.timeline[second] = self.timeline.get(second, 0) + count
+        self.flows.merge(other.flows)
+        return self
+    
+    def snapshot(self):
+        """Return the statistics dict for everything seen so far"""
+        if not self.total_packets:
+            return TrafficStatistics._create_empty_stats()
+        
+        total = self.total_packets
+        duration = self._duration()
+        traffic_rate = total / duration if duration > 0 else total
+        average_size = round(self.total_bytes / total, 2)
+        
+        return {
+            'total_packets': total,
+            'total_bytes': self.total_bytes,
+            'total_data': self.total_bytes,  # Alias for frontend compatibility
+            'capture_duration': duration,
+            'traffic_rate': round(traffic_rate, 2),
+            'protocol_distribution': {
+                protocol: {'count': count, 'percentage': round((count / total) * 100, 1)}
+                for protocol, count in self.protocol_counts.items()
+            },
+            'packet_size_distribution': dict(
+                self.size_buckets,
+                average_size=average_size,
+                min_size=self.min_size,
+                max_size=self.max_size
+            ),
+            'average_packet_size': average_size,
+            'traffic_timeline': dict(self.timeline),
+            'top_conversations': [(flow.label(), flow.packets) for flow in self.flows.top(5)]
+        }
+    
+    def _add_packet(self, size):
+        self.total_packets += 1
+        self.total_bytes += size
+        if size < 100:
+            self.size_buckets['small'] += 1
+        elif size < 1000:
+            self.size_buckets['medium'] += 1
+        else:
+            self.size_buckets['large'] += 1
+        if self.min_size is None or size < self.min_size:
+            self.min_size = size
+        if self.max_size is None or size > self.max_size:
+            self.max_size = size
+    
+    def _add_timestamp(self, timestamp):
+        second = int(timestamp)
+        self.timeline[second] = self.timeline.get(second, 0) + 1
+        if timestamp > 0:
+            self.timestamped_packets += 1
+            if self.first_timestamp is None or timestamp < self.first_timestamp:
+                self.first_timestamp = timestamp
+            if self.last_timestamp is None or timestamp > self.last_timestamp:
+                self.last_timestamp = timestamp
+    
+    def _duration(self):
+        """Capture duration with the same fallbacks as before"""
+        if self.total_packets < 2 or self.timestamped_packets < 2:
+            return 1.0  # Default to 1 second if not enough packets
+        
+        # Ensure minimum duration to avoid division by zero
+        return max(self.last_timestamp - self.first_timestamp, 0.1)
+    
+    @staticmethod
+    def _pick(func, a, b):
+        if a is None:
+            return b
+        if b is None:
+            return a
+        return func(a, b)
+
+
 class TrafficStatistics:
     """
     Generates traffic statistics and analysis
@@ -12,35 +194,17 @@ class TrafficStatistics:
         print("📊 TrafficStatistics initialized!")
     
     def generate_statistics(self, packets):
-        """Generate comprehensive traffic statistics with proper data handling"""
+        """Generate comprehensive traffic statistics in a single pass"""
         if not packets:
             print("No packets to analyze")
             return self._create_empty_stats()
         
-        # Calculate basic metrics with proper error handling
-        total_packets = len(packets)
-        total_bytes = self._calculate_total_bytes(packets)
-        duration = self._calculate_duration(packets)
-        
-        # Calculate traffic rate (avoid division by zero)
-        traffic_rate = total_packets / duration if duration > 0 else total_packets
-        
-        stats = {
-            'total_packets': total_packets,
-            'total_bytes': total_bytes,
-            'total_data': total_bytes,  # Alias for frontend compatibility
-            'capture_duration': duration,
-            'traffic_rate': round(traffic_rate, 2),
-            'protocol_distribution': self._protocol_distribution(packets),
-            'packet_size_distribution': self._packet_size_distribution(packets),
-            'average_packet_size': self._calculate_average_size(packets),
-            'traffic_timeline': self._traffic_timeline(packets),
-            'top_conversations': self._top_conversations(packets)
-        }
-        
-        return stats
+        accumulator = StatsAccumulator()
+        accumulator.update_batch(packets)
+        return accumulator.snapshot()
     
-    def _create_empty_stats(self):
+    @staticmethod
+    def _create_empty_stats():
         """Return empty statistics structure"""
         return {
             'total_packets': 0,
@@ -58,139 +222,6 @@ class TrafficStatistics:
             'top_conversations': []
         }
     
-    def _calculate_total_bytes(self, packets):
-        """Calculate total bytes with proper handling of missing lengths"""
-        total = 0
-        for packet in packets:
-            length = packet.get('length', 0)
-            if length > 0:
-                total += length
-            else:
-                # Estimate length for packets with missing data
-                total += self._estimate_packet_length(packet)
-        return total
-    
-    def _estimate_packet_length(self, packet):
-        """Estimate packet length when not provided"""
-        protocol = packet.get('protocol', '').lower()
-        summary = packet.get('summary', '')
-        
-        # Try to extract length from summary first
-        if 'len=' in summary:
-            import re
-            match = re.search(r'len=(\d+)', summary)
-            if match:
-                return int(match.group(1))
-        
-        # Typical packet sizes by protocol
-        size_estimates = {
-            'tcp': 1500,    # Typical TCP packet with data
-            'udp': 512,     # Typical UDP packet
-            'dns': 128,     # DNS query/response
-            'http': 1400,   # HTTP data
-            'icmp': 84,     # ICMP packet
-            'icmpv6': 84,   # ICMPv6 packet
-            'ip': 576,      # Typical IP packet
-            'ipv6': 1280,   # IPv6 packet
-        }
-        
-        return size_estimates.get(protocol, 256)  # Default fallback
-    
-    def _calculate_duration(self, packets):
-        """Calculate capture duration with proper timestamp handling"""
-        if len(packets) < 2:
-            return 1.0  # Default to 1 second if not enough packets
-        
-        # Get all valid timestamps
-        timestamps = [p.get('timestamp', 0) for p in packets if p.get('timestamp', 0) > 0]
-        
-        if len(timestamps) < 2:
-            return 1.0  # Fallback duration
-        
-        # Calculate actual duration
-        duration = max(timestamps) - min(timestamps)
-        
-        # Ensure minimum duration to avoid division by zero
-        return max(duration, 0.1)  # At least 0.1 seconds
-    
-    def _calculate_average_size(self, packets):
-        """Calculate average packet size"""
-        if not packets:
-            return 0
-        
-        total_bytes = self._calculate_total_bytes(packets)
-        return round(total_bytes / len(packets), 2)
-    
-    def _protocol_distribution(self, packets):
-        """Calculate protocol distribution"""
-        protocols = [p.get('protocol', 'Unknown') for p in packets]
-        distribution = Counter(protocols)
-        
-        # Add percentages
-        total = len(packets)
-        result = {}
-        for protocol, count in distribution.items():
-            percentage = (count / total) * 100
-            result[protocol] = {
-                'count': count,
-                'percentage': round(percentage, 1)
-            }
-        
-        return result
-    
-    def _traffic_timeline(self, packets):
-        """Create traffic timeline (packets per second)"""
-        if not packets:
-            return {}
-        
-        timeline = {}
-        for packet in packets:
-            timestamp = packet.get('timestamp', 0)
-            second = int(timestamp)
-            timeline[second] = timeline.get(second, 0) + 1
-        
-        return timeline
-    
-    def _packet_size_distribution(self, packets):
-        """Analyze packet size distribution"""
-        sizes = []
-        for packet in packets:
-            length = packet.get('length', 0)
-            if length == 0:
-                length = self._estimate_packet_length(packet)
-            sizes.append(length)
-        
-        if not sizes:
-            return {
-                'small': 0, 'medium': 0, 'large': 0,
-                'average_size': 0, 'min_size': 0, 'max_size': 0
-            }
-        
-        return {
-            'small': len([s for s in sizes if s < 100]),
-            'medium': len([s for s in sizes if 100 <= s < 1000]),
-            'large': len([s for s in sizes if s >= 1000]),
-            'average_size': round(sum(sizes) / len(sizes), 2),
-            'min_size': min(sizes),
-            'max_size': max(sizes)
-        }
-    
-    def _top_conversations(self, packets):
-        """Identify top conversations (source-destination pairs)"""
-        conversations = []
-        
-        for packet in packets:
-            summary = packet.get('summary', '')
-            # Extract conversation info from summary
-            if '>' in summary:
-                parts = summary.split('>')
-                if len(parts) == 2:
-                    src = parts[0].strip()
-                    dst = parts[1].split('/')[0].strip() if '/' in parts[1] else parts[1].strip()
-                    conversations.append(f"{src} → {dst}")
-        
-        return Counter(conversations).most_common(5)
-    
     def display_statistics(self, stats):
         """Display statistics in educational format"""
         print("\n" + "="*60)
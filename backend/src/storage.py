@@ -1,10 +1,36 @@
 # src/storage.py
+import io
 import json
 import pickle
+import re
+import struct
+import sys
+import tempfile
+import threading
 import time
 import os
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
 from datetime import datetime
 
+from src.batch import PacketBatch
+from src.filter_expr import compile_filter
+from src.columnar import write_columnar, ColumnarReader
+from src.serialization import get_serializer
+from src.metrics import STORAGE_BYTES
+from src.pagination import DEFAULT_PAGE_SIZE, clamp_page_size, encode_cursor, decode_cursor
+
+# Columnar copies of JSON/pickle captures used as their page index
+INDEX_DIR = '.index'
+INDEX_BLOCK_SIZE = 4096  # Small blocks so a page decodes little beyond itself
+MAX_PAGE_CHECKPOINTS = 64  # Filtered queries whose page positions are remembered
+MAX_CHECKPOINTS_PER_QUERY = 1024
+
+# Byte span (start, end) of each original record, stored in the columnar index
+_RECORD_SPAN = struct.Struct('<QQ')
+_JSON_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
 class PacketStorage:
     """
     Handles saving and loading packet captures
@@ -13,6 +39,12 @@ class PacketStorage:
     
     def __init__(self, storage_dir="captures"):
         self.storage_dir = storage_dir
+        # (index file, mtime, filter) -> sorted [(matches before position, position)]
+        self._page_checkpoints = OrderedDict()
+        self._checkpoint_lock = threading.Lock()
+        # Capture name -> lock held while its page index is built
+        self._index_locks = {}
+        self._index_locks_lock = threading.Lock()
         self._ensure_storage_dir()
         print("💾 PacketStorage initialized!")
     
@@ -27,9 +59,9 @@ class PacketStorage:
         Save packet capture to file
         
         Args:
-            packets: List of packet dictionaries
+            packets: List of packet dictionaries or a PacketBatch
             filename: Custom filename (optional)
-            format: 'json' or 'pkl' (pickle)
+            format: 'json', 'pkl' (pickle) or 'pcol' (binary columnar)
         """
         if not packets:
             print("❌ No packets to save")
@@ -51,6 +83,8 @@ class PacketStorage:
                 self._save_json(packets, filepath)
             elif format == 'pkl':
                 self._save_pickle(packets, filepath)
+            elif format == 'pcol':
+                self._save_columnar(packets, filepath)
             else:
                 print(f"❌ Unsupported format: {format}")
                 return False
@@ -65,7 +99,7 @@ class PacketStorage:
             return False
     
     def _save_json(self, packets, filepath):
-        """Save packets as JSON (human-readable)"""
+        """Save packets as compact JSON"""
         # Convert packets to JSON-serializable format
         serializable_packets = []
         for packet in packets:
@@ -74,6 +108,7 @@ class PacketStorage:
             # Remove non-serializable objects
             if 'raw_packet' in serializable_packet:
                 del serializable_packet['raw_packet']
+            serializable_packet.pop('raw_bytes', None)
             
             # Convert any non-serializable objects to strings
             for key, value in serializable_packet.items():
@@ -94,11 +129,18 @@ class PacketStorage:
             'packets': serializable_packets
         }
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(capture_data, f, indent=2, ensure_ascii=False)
+        # Compact separators: indentation roughly doubled the file size
+        with open(filepath, 'wb') as f:
+            f.write(get_serializer().dumps(capture_data))
+            STORAGE_BYTES.labels('write', 'json').inc(f.tell())
     
     def _save_pickle(self, packets, filepath):
         """Save packets as pickle (preserves objects, smaller file size)"""
+        if isinstance(packets, PacketBatch):
+            packets = packets.to_packets()
+        elif not isinstance(packets, list):
+            packets = list(packets)  # e.g. a PacketRing or RingView
+        
         capture_data = {
             'metadata': {
                 'version': '1.0',
@@ -112,13 +154,34 @@ class PacketStorage:
         
         with open(filepath, 'wb') as f:
             pickle.dump(capture_data, f)
+            STORAGE_BYTES.labels('write', 'pkl').inc(f.tell())
+    
+    def _save_columnar(self, packets, filepath):
+        """Save packets in the binary columnar format (compact, indexed, mmap-able)"""
+        batch = packets if isinstance(packets, PacketBatch) else PacketBatch.from_packets(packets)
+        metadata = {
+            'version': '1.0',
+            'capture_date': datetime.now().isoformat(),
+            'total_packets': len(batch),
+            'total_bytes': sum(batch.length),
+            'protocols': sorted(batch.protocol_counts())
+        }
+        blocks = write_columnar(filepath, batch, metadata=metadata)
+        print(f"   🧱 Blocks: {blocks}")
     
-    def load_capture(self, filename):
+    def load_capture(self, filename, filter_expression=None, start=None, stop=None,
+                     start_time=None, end_time=None):
         """
         Load packet capture from file
         
         Args:
             filename: Name of the capture file to load
+            filter_expression: Optional filter, e.g. 'tcp and port 443'
+            start, stop: Optional packet index range
+            start_time, end_time: Optional timestamp range
+        
+        Columnar (.pcol) captures return a PacketBatch and only decode the
+        blocks that the range and filter can match.
         """
         filepath = os.path.join(self.storage_dir, filename)
         
@@ -126,23 +189,308 @@ class PacketStorage:
             print(f"❌ Capture file not found: {filepath}")
             return None
         
+        # Compile first so a bad expression fails before reading the file
+        compiled = compile_filter(filter_expression) if filter_expression else None
+        
         try:
-            if filename.endswith('.json'):
-                return self._load_json(filepath)
+            if filename.endswith('.pcol'):
+                return self._load_columnar(filepath, compiled, start, stop, start_time, end_time)
+            elif filename.endswith('.json'):
+                packets = self._load_json(filepath)
             elif filename.endswith('.pkl'):
-                return self._load_pickle(filepath)
+                packets = self._load_pickle(filepath)
             else:
                 print(f"❌ Unsupported file format: {filename}")
                 return None
+            
+            if start is not None or stop is not None:
+                packets = packets[start:stop]
+            if start_time is not None or end_time is not None:
+                packets = [p for p in packets if self._in_time_range(p.get('timestamp', 0), start_time, end_time)]
+            if compiled:
+                packets = compiled.apply(packets)
+                print(f"   🔍 Filter '{compiled}': {len(packets)} packets match")
+            return packets
                 
         except Exception as e:
             print(f"❌ Error loading capture: {e}")
             return None
     
+    def _load_columnar(self, filepath, compiled, start, stop, start_time, end_time):
+        """Load a columnar capture, reading only the blocks that can match"""
+        with ColumnarReader(filepath) as reader:
+            self._display_capture_info(reader.metadata, filepath)
+            if start is not None or stop is not None:
+                batch = reader.read_range(start or 0, stop)
+                if start_time is not None or end_time is not None:
+                    batch = batch.take(i for i, ts in enumerate(batch.timestamp)
+                                       if self._in_time_range(ts, start_time, end_time))
+                if compiled:
+                    batch = compiled.apply(batch)
+            else:
+                batch = reader.read_all(start_time=start_time, end_time=end_time, compiled_filter=compiled)
+        
+        if compiled or start_time is not None or end_time is not None:
+            print(f"   🔍 {len(batch)} packets match")
+        return batch
+    
+    def stream_capture(self, filename, filter_expression=None, start_time=None, end_time=None):
+        """
+        Yield a columnar capture one PacketBatch block at a time, so captures
+        larger than memory can be processed. Blocks the index rules out are skipped.
+        """
+        compiled = compile_filter(filter_expression) if filter_expression else None
+        with ColumnarReader(os.path.join(self.storage_dir, filename)) as reader:
+            yield from reader.iter_batches(start_time=start_time, end_time=end_time,
+                                           compiled_filter=compiled)
+    
+    def open_capture(self, filename):
+        """Open a columnar capture for block-level access (caller closes it)"""
+        return ColumnarReader(os.path.join(self.storage_dir, filename))
+    
+    def index_capture(self, filename):
+        """
+        Return the path of a columnar file indexing the capture, or None.
+        
+        Columnar captures are their own index. JSON/pickle captures get a
+        columnar copy under .index/, built on first use and rebuilt when
+        the capture file changes. The copy only locates matching packets:
+        it also stores where each original record lives (in the JSON file
+        itself, or among per-record pickles kept in the index), and pages
+        are read from there, so they hold exactly what load_capture returns.
+        """
+        filepath = os.path.join(self.storage_dir, filename)
+        if not os.path.exists(filepath):
+            print(f"❌ Capture file not found: {filepath}")
+            return None
+        if filename.endswith('.pcol'):
+            return filepath
+        
+        index_path = self._index_path(filename, '.pcol')
+        if not self._index_is_current(filepath, index_path):
+            with self._build_lock(filename):
+                # Another request may have built it while this one waited
+                if not self._index_is_current(filepath, index_path):
+                    self._build_index(filename, filepath, index_path)
+        return index_path
+    
+    def _index_path(self, filename, suffix):
+        return os.path.join(self.storage_dir, INDEX_DIR, filename + suffix)
+    
+    def _build_lock(self, filename):
+        """Lock serializing index builds of one capture"""
+        with self._index_locks_lock:
+            return self._index_locks.setdefault(filename, threading.Lock())
+    
+    @staticmethod
+    def _index_is_current(filepath, index_path):
+        if not os.path.exists(index_path) or os.path.getmtime(index_path) < os.path.getmtime(filepath):
+            return False
+        with ColumnarReader(index_path) as reader:
+            return 'spans' in reader.extras  # Older indexes kept spans in a separate file
+    
+    def _build_index(self, filename, filepath, index_path):
+        """Write the index under a unique temporary name and publish it in one rename"""
+        if filename.endswith('.pkl'):
+            packets = self._load_pickle(filepath)
+            records, spans = self._pickle_records(packets)
+            extras = {'records': records}
+        else:
+            packets, spans = self._load_json_spans(filepath)
+            extras = {}
+        flat = array('Q', [offset for span in spans for offset in span])
+        if sys.byteorder == 'big':
+            flat.byteswap()
+        extras['spans'] = flat.tobytes()
+        
+        index_dir = os.path.dirname(index_path)
+        os.makedirs(index_dir, exist_ok=True)
+        fd, partial_path = tempfile.mkstemp(dir=index_dir, prefix=os.path.basename(index_path) + '.',
+                                            suffix='.partial')
+        os.close(fd)
+        try:
+            write_columnar(partial_path, packets, block_size=INDEX_BLOCK_SIZE,
+                           metadata={'source': filename}, extras=extras)
+            os.replace(partial_path, index_path)
+        except BaseException:
+            os.remove(partial_path)
+            raise
+        print(f"🗂️  Indexed {filename} for paging")
+    
+    @staticmethod
+    def _pickle_records(packets):
+        """Pickle every record separately so a page unpickles only its own"""
+        buffer = io.BytesIO()
+        spans = []
+        for packet in packets:
+            start = buffer.tell()
+            pickle.dump(packet, buffer)
+            spans.append((start, buffer.tell()))
+        return buffer.getvalue(), spans
+    
+    def _load_json_spans(self, filepath):
+        """Return (packets, byte span of each packet in the file) for a JSON capture"""
+        with open(filepath, 'rb') as f:
+            data = f.read()
+            STORAGE_BYTES.labels('read', 'json').inc(f.tell())
+        text = data.decode('utf-8')
+        decoder = json.JSONDecoder()
+        
+        def skip(position, expected=None):
+            position = _JSON_WHITESPACE.match(text, position).end()
+            if expected is not None:
+                if text[position:position + 1] != expected:
+                    raise ValueError(f"Malformed capture file: expected {expected!r} at {position}")
+                position = _JSON_WHITESPACE.match(text, position + 1).end()
+            return position
+        
+        packets, spans = [], []
+        position = skip(0, '{')
+        while text[position:position + 1] not in ('}', ''):
+            key, position = decoder.raw_decode(text, position)
+            position = skip(position, ':')
+            if key != 'packets':
+                _, position = decoder.raw_decode(text, position)
+            else:
+                position = skip(position, '[')
+                while text[position:position + 1] not in (']', ''):
+                    start = position
+                    packet, position = decoder.raw_decode(text, position)
+                    packets.append(packet)
+                    spans.append((start, position))
+                    position = skip(position)
+                    if text[position:position + 1] == ',':
+                        position = skip(position + 1)
+                position = skip(position, ']')
+            position = skip(position)
+            if text[position:position + 1] == ',':
+                position = skip(position + 1)
+        
+        if len(text) != len(data):
+            # Multi-byte characters: convert character offsets to byte offsets
+            byte_spans, chars, offset = [], 0, 0
+            for start, end in spans:
+                offset += len(text[chars:start].encode('utf-8'))
+                length = len(text[start:end].encode('utf-8'))
+                byte_spans.append((offset, offset + length))
+                chars, offset = end, offset + length
+            spans = byte_spans
+        return packets, spans
+    
+    def _read_records(self, reader, filename, positions):
+        """Read the original records at the given packet indexes of an indexed capture"""
+        def span(position):
+            return _RECORD_SPAN.unpack(reader.read_extra('spans', position * _RECORD_SPAN.size,
+                                                          (position + 1) * _RECORD_SPAN.size))
+        
+        if filename.endswith('.pkl'):
+            # Records are pickled into the index itself
+            return [pickle.loads(reader.read_extra('records', *span(position))) for position in positions]
+        
+        loads = get_serializer().loads
+        records = []
+        with open(os.path.join(self.storage_dir, filename), 'rb') as data:
+            for position in positions:
+                start, end = span(position)
+                data.seek(start)
+                records.append(loads(data.read(end - start)))
+                STORAGE_BYTES.labels('read', 'json').inc(end - start)
+        return records
+    
+    def read_page(self, filename, offset=0, limit=DEFAULT_PAGE_SIZE, filter_expression=None, cursor=None):
+        """
+        Read one page of a capture without loading the rest of it.
+        
+        Pages are addressed by offset/limit or by the opaque cursor returned
+        with the previous page. Without a filter an offset seeks straight to
+        its block; with one, blocks the index rules out are skipped, and
+        cursors resume where the last page ended instead of re-counting.
+        Filtered offsets start from the closest page already served for the
+        same filter, so walking pages by offset does not rescan the capture.
+        Pages of .pcol captures are PacketBatches; JSON/pickle pages are the
+        original records. Returns None if the capture does not exist.
+        """
+        limit = clamp_page_size(limit)
+        skip = 0
+        if cursor:
+            position, filter_expression = decode_cursor(cursor, filename, filter_expression)
+        
+        compiled = compile_filter(filter_expression) if filter_expression else None
+        index_path = self.index_capture(filename)
+        if index_path is None:
+            return None
+        
+        checkpoint = None
+        with ColumnarReader(index_path) as reader:
+            total = len(reader)
+            if not cursor:
+                offset = max(int(offset or 0), 0)
+                if compiled:
+                    # Filtered offsets count matches, resumed from the nearest known position
+                    checkpoint = (index_path, os.path.getmtime(index_path), filter_expression)
+                    matched, position = self._nearest_checkpoint(checkpoint, offset)
+                    skip = offset - matched
+                else:
+                    position = min(offset, total)
+            
+            if filename.endswith('.pcol'):
+                packets, next_position = reader.scan(position, limit, compiled, skip)
+            elif compiled:
+                positions, next_position = reader.scan_positions(position, limit, compiled, skip)
+                packets = self._read_records(reader, filename, positions)
+            else:
+                positions = range(position, min(position + limit, total))
+                next_position = positions.stop if positions.stop < total else None
+                packets = self._read_records(reader, filename, positions)
+        
+        if checkpoint and next_position is not None:
+            self._add_checkpoint(checkpoint, offset + len(packets), next_position)
+        
+        return {
+            'packets': packets,
+            'offset': None if cursor else offset,
+            'limit': limit,
+            'total_packets': total,
+            'filter': filter_expression,
+            'next_cursor': encode_cursor(filename, next_position, filter_expression)
+                           if next_position is not None else None
+        }
+    
+    def _nearest_checkpoint(self, key, matches):
+        """Return (matches before position, position) of the closest known start for a filtered offset"""
+        with self._checkpoint_lock:
+            checkpoints = self._page_checkpoints.get(key)
+            if not checkpoints:
+                return 0, 0
+            self._page_checkpoints.move_to_end(key)
+            index = bisect_right(checkpoints, (matches, float('inf'))) - 1
+            return checkpoints[index] if index >= 0 else (0, 0)
+    
+    def _add_checkpoint(self, key, matches, position):
+        with self._checkpoint_lock:
+            checkpoints = self._page_checkpoints.setdefault(key, [])
+            self._page_checkpoints.move_to_end(key)
+            index = bisect_right(checkpoints, (matches, position))
+            if index == 0 or checkpoints[index - 1] != (matches, position):
+                checkpoints.insert(index, (matches, position))
+            if len(checkpoints) > MAX_CHECKPOINTS_PER_QUERY:
+                del checkpoints[1::2]  # Thin out evenly instead of forgetting a region
+            while len(self._page_checkpoints) > MAX_PAGE_CHECKPOINTS:
+                self._page_checkpoints.popitem(last=False)
+    
+    @staticmethod
+    def _in_time_range(timestamp, start_time, end_time):
+        if start_time is not None and timestamp < start_time:
+            return False
+        if end_time is not None and timestamp > end_time:
+            return False
+        return True
+    
     def _load_json(self, filepath):
         """Load packets from JSON file"""
-        with open(filepath, 'r', encoding='utf-8') as f:
+        with open(filepath, 'rb') as f:
             capture_data = json.load(f)
+            STORAGE_BYTES.labels('read', 'json').inc(f.tell())
         
         self._display_capture_info(capture_data['metadata'], filepath)
         return capture_data['packets']
@@ -151,6 +499,7 @@ class PacketStorage:
         """Load packets from pickle file"""
         with open(filepath, 'rb') as f:
             capture_data = pickle.load(f)
+            STORAGE_BYTES.labels('read', 'pkl').inc(f.tell())
         
         self._display_capture_info(capture_data['metadata'], filepath)
         return capture_data['packets']
@@ -171,7 +520,7 @@ class PacketStorage:
         
         capture_files = []
         for filename in os.listdir(self.storage_dir):
-            if filename.endswith(('.json', '.pkl')):
+            if filename.endswith(('.json', '.pkl', '.pcol')):
                 filepath = os.path.join(self.storage_dir, filename)
                 file_info = {
                     'filename': filename,
@@ -209,6 +558,8 @@ class PacketStorage:
         
         try:
             os.remove(filepath)
+            if os.path.exists(self._index_path(filename, '.pcol')):
+                os.remove(self._index_path(filename, '.pcol'))
             print(f"🗑️  Deleted capture: {filename}")
             return True
         except Exception as e:
@@ -0,0 +1,182 @@
+# src/streaming.py
+import asyncio
+import json
+import threading
+import time
+from collections import deque
+
+from src.statistics import StatsAccumulator
+
+DEFAULT_FLUSH_INTERVAL = 0.5   # seconds between pushed updates
+DEFAULT_MAX_BATCH = 500        # packet summaries per update
+DEFAULT_MAX_PENDING = 5000     # summaries buffered for a slow client
+MAX_PENDING_ALERTS = 100       # alerts buffered for a slow client
+
+
+def packet_summary(packet):
+    """JSON-serializable view of one packet for the frontend"""
+    return {
+        'number': packet.get('number'),
+        'timestamp': packet.get('timestamp'),
+        'protocol': packet.get('protocol'),
+        'summary': packet.get('summary'),
+        'length': packet.get('length'),
+        'src_ip': packet.get('src_ip'),
+        'dst_ip': packet.get('dst_ip'),
+        'real_packet': packet.get('real_packet', False)
+    }
+
+
+def format_event(event, data):
+    """Encode one Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+class CaptureStream:
+    """
+    Batches packets from a running capture into periodic updates.
+
+    The capture thread calls publish() for every packet and never waits on
+    the client. Updates go out every flush_interval seconds (or sooner once
+    max_batch summaries are waiting). If the client falls behind, at most
+    max_pending summaries are buffered: older ones are coalesced into a
+    count, while the stats deltas keep covering every packet. Alerts from a
+    RealtimeDetector go out with the next update, without waiting for a
+    full batch.
+    """
+
+    def __init__(self, flush_interval=DEFAULT_FLUSH_INTERVAL, max_batch=DEFAULT_MAX_BATCH,
+                 max_pending=DEFAULT_MAX_PENDING):
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.max_pending = max(max_pending, max_batch)
+        self.accumulator = StatsAccumulator()
+        self.coalesced = 0        # Summaries never sent because the client was behind
+        self.updates_sent = 0
+        self._pending = deque()
+        self._alerts = deque(maxlen=MAX_PENDING_ALERTS)
+        self._coalesced_since_flush = 0
+        self._delta = self._empty_delta()
+        self._done = False
+        self._final = None
+        self._ready = threading.Condition()
+
+    @staticmethod
+    def _empty_delta():
+        return {'packets': 0, 'bytes': 0, 'protocols': {}}
+
+    def publish(self, packet_info):
+        """Record one captured packet (called from the capture thread)"""
+        with self._ready:
+            self.accumulator.update(packet_info)
+            delta = self._delta
+            delta['packets'] += 1
+            delta['bytes'] += packet_info.get('length', 0) or 0
+            protocol = packet_info.get('protocol', 'Unknown')
+            delta['protocols'][protocol] = delta['protocols'].get(protocol, 0) + 1
+
+            self._pending.append(packet_summary(packet_info))
+            if len(self._pending) > self.max_pending:
+                self._pending.popleft()
+                self._coalesced_since_flush += 1
+                self.coalesced += 1
+            if len(self._pending) >= self.max_batch:
+                self._ready.notify()
+
+    def alert(self, alert):
+        """Queue a detector alert and wake the client (called from the capture thread)"""
+        with self._ready:
+            self._alerts.append(alert)
+            self._ready.notify()
+    
+    def close(self, error=None, **info):
+        """Mark the capture finished; info is sent with the final event"""
+        with self._ready:
+            self._done = True
+            self._final = {'error': error} if error else info
+            self._ready.notify()
+
+    @property
+    def done(self):
+        return self._done
+
+    def next_update(self, timeout=None):
+        """
+        Wait for the next batch and return it, or None if nothing arrived
+        within the flush interval. Stats deltas reset after every update.
+        """
+        timeout = self.flush_interval if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        with self._ready:
+            while not self._done and not self._alerts and len(self._pending) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._ready.wait(remaining)
+
+            if not self._pending and not self._delta['packets'] and not self._alerts:
+                return None
+
+            count = min(len(self._pending), self.max_batch)
+            packets = [self._pending.popleft() for _ in range(count)]
+            self.updates_sent += 1
+            update = {
+                'seq': self.updates_sent,
+                'packets': packets,
+                'coalesced': self._coalesced_since_flush,
+                'alerts': list(self._alerts),
+                'delta': self._delta,
+                'totals': {
+                    'packets': self.accumulator.total_packets,
+                    'bytes': self.accumulator.total_bytes,
+                    'protocols': dict(self.accumulator.protocol_counts)
+                }
+            }
+            self._coalesced_since_flush = 0
+            self._alerts.clear()
+            self._delta = self._empty_delta()
+            return update
+
+    def events(self):
+        """
+        Generate Server-Sent Events: 'batch' updates, keep-alive comments
+        while idle, then one 'complete' (or 'error') event.
+        """
+        while True:
+            update = self.next_update()
+            if update is not None:
+                yield format_event('batch', update)
+                continue
+            if self._done:
+                break
+            yield ": keepalive\n\n"
+        yield self._final_event()
+
+    async def async_events(self):
+        """
+        Same events as events(), for an asyncio server: waiting happens on
+        the event loop, so an idle client does not hold a thread.
+        """
+        while True:
+            update = self.next_update(timeout=0)
+            if update is not None:
+                yield format_event('batch', update)
+                if len(self._pending) >= self.max_batch:
+                    continue  # A full batch is already waiting
+            elif self._done:
+                break
+            else:
+                yield ": keepalive\n\n"
+            await asyncio.sleep(self.flush_interval)
+        yield self._final_event()
+
+    def _final_event(self):
+        final = self._final or {}
+        if final.get('error'):
+            return format_event('error', final)
+        return format_event('complete', dict(
+            final,
+            total=self.accumulator.total_packets,
+            coalesced=self.coalesced,
+            statistics=self.accumulator.snapshot()
+        ))
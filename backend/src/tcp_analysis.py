@@ -0,0 +1,271 @@
+# src/tcp_analysis.py
+from collections import OrderedDict
+
+from src.batch import parse_tcp_flags
+from src.flows import flow_key, SYN, FIN, RST, ACK, DEFAULT_IDLE_TIMEOUT
+
+SEQ_MODULO = 1 << 32
+DEFAULT_MAX_TCP_FLOWS = 262144   # tracked connections (roughly 400 bytes each)
+MAX_HOLES = 8                    # sequence gaps remembered per direction
+DUP_ACK_THRESHOLD = 3            # duplicate ACKs that trigger a fast retransmit
+
+# Events reported by TcpTracker.observe()
+RETRANSMISSION = 'retransmission'
+OUT_OF_ORDER = 'out_of_order'
+DUPLICATE_ACK = 'duplicate_ack'
+ZERO_WINDOW = 'zero_window'
+EVENTS = (RETRANSMISSION, OUT_OF_ORDER, DUPLICATE_ACK, ZERO_WINDOW)
+
+
+def seq_diff(a, b):
+    """Signed distance a - b between two sequence numbers, modulo 2**32"""
+    diff = (a - b) % SEQ_MODULO
+    return diff - SEQ_MODULO if diff >= SEQ_MODULO // 2 else diff
+
+
+class _Direction:
+    """What one side of a connection has sent so far"""
+
+    __slots__ = ('next_seq', 'ack', 'window', 'holes')
+
+    def __init__(self):
+        self.next_seq = None   # Sequence number after the highest byte sent
+        self.ack = None        # Last acknowledgment number sent
+        self.window = None     # Last window advertised
+        self.holes = None      # [(start, end)] gaps below next_seq, oldest first
+
+    def add_hole(self, start, end):
+        if self.holes is None:
+            self.holes = []
+        self.holes.append((start, end))
+        if len(self.holes) > MAX_HOLES:
+            del self.holes[0]
+
+    def fill_hole(self, seq, end):
+        """Remove [seq, end) from a gap it falls in; True if it filled one"""
+        if not self.holes:
+            return False
+        for i, (start, stop) in enumerate(self.holes):
+            if seq_diff(seq, start) >= 0 and seq_diff(seq, stop) < 0:
+                remainder = []
+                if seq_diff(seq, start) > 0:
+                    remainder.append((start, seq))
+                if seq_diff(stop, end) > 0:
+                    remainder.append((end, stop))
+                self.holes[i:i + 1] = remainder
+                return True
+        return False
+
+
+class TcpConnection:
+    """Sequence state and anomaly counters of one TCP connection"""
+
+    __slots__ = ('key', 'src_ip', 'src_port', 'dst_ip', 'dst_port', 'first_seen', 'last_seen',
+                 'segments', 'sides', 'dup_ack_run', 'retransmissions', 'out_of_order',
+                 'duplicate_acks', 'fast_retransmits', 'zero_windows')
+
+    def __init__(self, key, src_ip, src_port, dst_ip, dst_port, timestamp):
+        self.key = key
+        # The first segment seen decides which side is "forward"
+        self.src_ip = src_ip
+        self.src_port = src_port
+        self.dst_ip = dst_ip
+        self.dst_port = dst_port
+        self.first_seen = timestamp
+        self.last_seen = timestamp
+        self.segments = 0
+        self.sides = (_Direction(), _Direction())
+        self.dup_ack_run = 0
+        self.retransmissions = 0
+        self.out_of_order = 0
+        self.duplicate_acks = 0
+        self.fast_retransmits = 0   # Runs of DUP_ACK_THRESHOLD duplicate ACKs
+        self.zero_windows = 0
+
+    @property
+    def anomalies(self):
+        return self.retransmissions + self.out_of_order + self.duplicate_acks + self.zero_windows
+
+    def label(self):
+        return f"{self.src_ip}:{self.src_port} → {self.dst_ip}:{self.dst_port}"
+
+    def to_dict(self):
+        return {
+            'src_ip': self.src_ip,
+            'src_port': self.src_port,
+            'dst_ip': self.dst_ip,
+            'dst_port': self.dst_port,
+            'first_seen': self.first_seen,
+            'last_seen': self.last_seen,
+            'segments': self.segments,
+            'retransmissions': self.retransmissions,
+            'out_of_order': self.out_of_order,
+            'duplicate_acks': self.duplicate_acks,
+            'fast_retransmits': self.fast_retransmits,
+            'zero_windows': self.zero_windows
+        }
+
+
+class TcpTracker:
+    """
+    Per-connection TCP sequence tracking.
+
+    Each direction keeps the next expected sequence number, the last ACK and
+    window it sent and up to MAX_HOLES gaps; from those a segment is
+    classified as a retransmission (data below next_seq that fills no gap,
+    keep-alives excepted), out of order (it fills a gap left by a later
+    segment), a duplicate ACK (a pure ACK repeating the last ACK and window)
+    or a zero-window advertisement. Connections picked up mid-stream start
+    clean at their first segment. State is a few hundred bytes per
+    connection: connections end after idle_timeout seconds without segments
+    (packet time), on RST, or when max_flows is reached (least recently seen
+    first), and ended connections are handed to on_expire.
+    """
+
+    def __init__(self, idle_timeout=DEFAULT_IDLE_TIMEOUT, max_flows=DEFAULT_MAX_TCP_FLOWS, on_expire=None):
+        self.idle_timeout = idle_timeout
+        self.max_flows = max_flows
+        self.on_expire = on_expire
+        self._connections = OrderedDict()  # Least recently seen first
+        self.totals = dict.fromkeys(EVENTS, 0)
+        self.segments = 0
+        self.expired_flows = 0
+        self.evicted_flows = 0
+
+    def __len__(self):
+        return len(self._connections)
+
+    def __iter__(self):
+        return iter(self._connections.values())
+
+    def observe(self, packet):
+        """Track a TCP packet_info dict; returns the events it raised"""
+        seq = packet.get('tcp_seq')
+        if seq is None or not packet.get('src_ip') or not packet.get('dst_ip'):
+            return ()
+        return self.observe_segment(
+            packet['src_ip'], packet.get('src_port') or 0, packet['dst_ip'], packet.get('dst_port') or 0,
+            packet.get('timestamp', 0) or 0, seq, packet.get('tcp_ack') or 0,
+            packet.get('tcp_window'), packet.get('payload_length') or 0,
+            parse_tcp_flags(packet.get('tcp_flags')))
+
+    def observe_segment(self, src_ip, src_port, dst_ip, dst_port, timestamp,
+                        seq, ack, window, payload_length, flags):
+        """Track one segment given its decoded header fields"""
+        key = flow_key('TCP', src_ip, src_port, dst_ip, dst_port)
+        connections = self._connections
+        connection = connections.get(key)
+        if connection is not None and self._idle(connection, timestamp):
+            self._expire(key)
+            connection = None
+        if connection is None:
+            connection = TcpConnection(key, src_ip, src_port, dst_ip, dst_port, timestamp)
+            connections[key] = connection
+            if self.max_flows and len(connections) > self.max_flows:
+                _, evicted = connections.popitem(last=False)
+                self.evicted_flows += 1
+                if self.on_expire:
+                    self.on_expire(evicted)
+        else:
+            connections.move_to_end(key)
+        connection.last_seen = max(connection.last_seen, timestamp)
+        connection.segments += 1
+        self.segments += 1
+
+        forward = src_ip == connection.src_ip and src_port == connection.src_port
+        sender = connection.sides[0 if forward else 1]
+        events = self._classify(connection, sender, seq, ack, window, payload_length, flags)
+        for event in events:
+            self.totals[event] += 1
+
+        if flags & RST:
+            connections.pop(key)
+            self._ended(connection)
+        else:
+            self._expire_idle(timestamp)
+        return events
+
+    def _classify(self, connection, sender, seq, ack, window, payload_length, flags):
+        events = []
+        length = payload_length + (1 if flags & SYN else 0) + (1 if flags & FIN else 0)
+        end = (seq + length) % SEQ_MODULO
+        # Keep-alives resend the byte before next_seq on purpose
+        keep_alive = (length <= 1 and sender.next_seq is not None and not flags & (SYN | FIN | RST)
+                      and seq_diff(seq, sender.next_seq) == -1)
+
+        if sender.next_seq is None or flags & SYN and end != sender.next_seq:
+            # First segment seen, or a new connection reusing the ports
+            sender.next_seq = end
+            sender.holes = None
+        elif length and not keep_alive:
+            ahead = seq_diff(seq, sender.next_seq)
+            if ahead > 0:
+                # Bytes in between are missing (lost or still to come)
+                sender.add_hole(sender.next_seq, seq)
+                sender.next_seq = end
+            elif ahead == 0:
+                sender.next_seq = end
+            elif sender.fill_hole(seq, end):
+                connection.out_of_order += 1
+                events.append(OUT_OF_ORDER)
+            else:
+                connection.retransmissions += 1
+                events.append(RETRANSMISSION)
+                if seq_diff(end, sender.next_seq) > 0:
+                    sender.next_seq = end
+
+        if (not length and not keep_alive and flags & ACK and not flags & (SYN | FIN | RST)
+                and ack == sender.ack and window == sender.window):
+            connection.duplicate_acks += 1
+            connection.dup_ack_run += 1
+            if connection.dup_ack_run == DUP_ACK_THRESHOLD:
+                connection.fast_retransmits += 1
+            events.append(DUPLICATE_ACK)
+        elif flags & ACK and not keep_alive:
+            connection.dup_ack_run = 0
+
+        if window == 0 and not flags & (SYN | FIN | RST):
+            connection.zero_windows += 1
+            events.append(ZERO_WINDOW)
+
+        if flags & ACK:
+            sender.ack = ack
+        sender.window = window
+        return events
+
+    def expire_all(self):
+        """End every connection (e.g. when a capture finishes)"""
+        while self._connections:
+            _, connection = self._connections.popitem(last=False)
+            self._ended(connection)
+
+    def stats(self):
+        return {
+            'active_flows': len(self._connections),
+            'expired_flows': self.expired_flows,
+            'evicted_flows': self.evicted_flows,
+            'segments': self.segments,
+            **self.totals
+        }
+
+    def _idle(self, connection, now):
+        return self.idle_timeout is not None and now - connection.last_seen > self.idle_timeout
+
+    def _expire_idle(self, now):
+        """Expire idle connections from the least recently seen end"""
+        if self.idle_timeout is None:
+            return
+        connections = self._connections
+        while connections:
+            key, connection = next(iter(connections.items()))
+            if not self._idle(connection, now):
+                break
+            self._expire(key)
+
+    def _expire(self, key):
+        self._ended(self._connections.pop(key))
+
+    def _ended(self, connection):
+        self.expired_flows += 1
+        if self.on_expire:
+            self.on_expire(connection)
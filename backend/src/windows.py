@@ -0,0 +1,91 @@
+# src/windows.py
+import math
+
+DEFAULT_WINDOW = 10.0      # seconds covered by a sliding window
+DEFAULT_BUCKET = 1.0       # seconds per bucket (the window's time resolution)
+DEFAULT_MAX_KEYS = 1024    # distinct keys tracked per window
+
+
+class SlidingCounter:
+    """
+    Per-key counts over the last `window` seconds.
+
+    Counts are kept in a ring of fixed time buckets; moving to a new bucket
+    subtracts the buckets that fell out of the window from the running
+    totals, so reading a count is a dict lookup. Memory is bounded by the
+    number of buckets and by max_keys: once that many keys are live, new
+    keys are only added to `overflow`. Time comes from packet timestamps,
+    so offline traces slide the window exactly like live captures; late
+    packets are counted in the current bucket.
+    """
+
+    def __init__(self, window=DEFAULT_WINDOW, bucket=DEFAULT_BUCKET, max_keys=DEFAULT_MAX_KEYS):
+        self.bucket = bucket
+        self.size = max(1, math.ceil(window / bucket))
+        self.window = self.size * bucket
+        self.max_keys = max_keys
+        self.totals = {}
+        self.overflow = 0
+        self._buckets = [None] * self.size
+        self._current = None     # Id (timestamp // bucket) of the newest bucket
+        self._first = None       # Id of the first bucket ever seen
+
+    def advance(self, timestamp):
+        """Slide the window forward to timestamp"""
+        bucket_id = int(timestamp // self.bucket)
+        current = self._current
+        if current is None:
+            self._current = self._first = bucket_id
+            return
+        if bucket_id <= current:
+            return
+        # Slots reused by the new buckets hold counts that left the window
+        for expired in range(max(current + 1, bucket_id - self.size + 1), bucket_id + 1):
+            self._expire(expired % self.size)
+        self._current = bucket_id
+
+    def _expire(self, slot):
+        counts = self._buckets[slot]
+        if not counts:
+            return
+        totals = self.totals
+        for key, count in counts.items():
+            remaining = totals[key] - count
+            if remaining:
+                totals[key] = remaining
+            else:
+                del totals[key]
+        self._buckets[slot] = None
+
+    def add(self, key, timestamp, count=1):
+        """Count key at timestamp; returns the key's total over the window"""
+        self.advance(timestamp)
+        totals = self.totals
+        total = totals.get(key)
+        if total is None:
+            if len(totals) >= self.max_keys:
+                self.overflow += count
+                return 0
+            total = 0
+        slot = self._current % self.size
+        counts = self._buckets[slot]
+        if counts is None:
+            counts = self._buckets[slot] = {}
+        counts[key] = counts.get(key, 0) + count
+        totals[key] = total + count
+        return total + count
+
+    def get(self, key):
+        return self.totals.get(key, 0)
+
+    def span(self):
+        """Seconds of data the window currently covers (up to `window`)"""
+        if self._current is None:
+            return 0
+        return min(self._current - self._first + 1, self.size) * self.bucket
+
+    def __len__(self):
+        return len(self.totals)
+
+    def __contains__(self, key):
+        return key in self.totals
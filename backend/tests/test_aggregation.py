@@ -0,0 +1,96 @@
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.aggregation import IssueAggregator, merge_issues
+from src.detector import IssueDetector
+from src.pipeline import ParallelPipeline
+
+
+def issue(type_='SUSPICIOUS_PORT', details='SMB'):
+    return {'type': type_, 'severity': 'MEDIUM', 'description': 'd', 'details': details,
+            'educational_note': ''}
+
+
+def smb_packet(number, timestamp=None, src_ip='10.0.0.1'):
+    return {'number': number, 'timestamp': number * 0.01 if timestamp is None else timestamp,
+            'length': 120, 'protocol': 'TCP', 'src_ip': src_ip, 'dst_ip': '10.0.0.2',
+            'src_port': 50000 + number % 7, 'dst_port': 445, 'tcp_flags': 'A',
+            'summary': f'TCP {src_ip}:50000 > 10.0.0.2:445 A'}
+
+
+class TestIssueAggregator:
+    def test_repeats_become_one_entry(self):
+        """Test repeated issues are counted with first/last seen and capped samples"""
+        aggregator = IssueAggregator(max_samples=2)
+        for number in range(1, 6):
+            aggregator.add(issue(), key=445, packet={'number': number, 'timestamp': 10.0 + number})
+        assert len(aggregator) == 1
+        entry = aggregator.issues[0]
+        assert entry['count'] == 5
+        assert (entry['first_seen'], entry['last_seen']) == (11.0, 15.0)
+        assert entry['samples'] == [{'number': 1, 'timestamp': 11.0}, {'number': 2, 'timestamp': 12.0}]
+
+    def test_keys_and_types_stay_apart(self):
+        """Test different keys or types are separate problems"""
+        aggregator = IssueAggregator()
+        aggregator.add(issue(), key=445, packet={'timestamp': 1})
+        aggregator.add(issue(), key=3389, packet={'timestamp': 1})
+        aggregator.add(issue('OTHER'), key=445, packet={'timestamp': 1})
+        assert len(aggregator) == 3
+
+    def test_quiet_gap_opens_new_window(self):
+        """Test a repeat after more than window seconds starts a new entry"""
+        aggregator = IssueAggregator(window=60)
+        for timestamp in (0, 30, 80, 200, 230):
+            aggregator.add(issue(), key=445, packet={'timestamp': timestamp})
+        assert [entry['count'] for entry in aggregator.issues] == [3, 2]
+        assert aggregator.issues[1]['first_seen'] == 200
+
+    def test_keyless_issues_are_kept(self):
+        """Test issues reported without a key are not merged"""
+        aggregator = IssueAggregator()
+        aggregator.add(issue())
+        aggregator.add(issue())
+        assert [entry['count'] for entry in aggregator.issues] == [1, 1]
+        assert aggregator.issues[0]['samples'] == []
+
+    def test_merge_partial_results(self):
+        """Test entries for the same problem from different shards are combined"""
+        first, second = IssueAggregator(), IssueAggregator()
+        for number in range(10):
+            (first if number % 2 else second).add(issue(), key=445, packet={'number': number, 'timestamp': number})
+        second.add(issue(details='RDP'), key=3389, packet={'number': 99, 'timestamp': 500})
+
+        merged = merge_issues(first.issues + second.issues)
+        assert [(entry['details'], entry['count']) for entry in merged] == [('SMB', 10), ('RDP', 1)]
+        assert (merged[0]['first_seen'], merged[0]['last_seen']) == (0, 9)
+        assert len(merged[0]['samples']) == 3
+
+
+class TestDetectorOutput:
+    def test_output_scales_with_problems(self):
+        """Test an SMB-heavy capture yields one issue per host pair, not per packet"""
+        packets = [smb_packet(number) for number in range(1, 20001)]
+        packets += [smb_packet(number, src_ip='10.0.0.9') for number in range(20001, 20011)]
+        issues = [issue for issue in IssueDetector().analyze_packets(packets) if issue['type'] == 'SUSPICIOUS_PORT']
+
+        assert [entry['count'] for entry in issues] == [20000, 10]
+        assert issues[0]['details'] == 'SMB (common in ransomware attacks) - between 10.0.0.1 and 10.0.0.2'
+        assert [sample['number'] for sample in issues[0]['samples']] == [1, 2, 3]
+
+    def test_display_shows_occurrences(self, capsys):
+        """Test the report prints counts instead of one line per packet"""
+        detector = IssueDetector()
+        detector.analyze_packets([smb_packet(number) for number in range(1, 101)])
+        detector.display_issues()
+        output = capsys.readouterr().out
+        assert output.count('SUSPICIOUS_PORT') == 1
+        assert '100 occurrences over 1.0s (e.g. packets #1, #2, #3)' in output
+
+    def test_pipeline_merges_shards(self):
+        """Test a host pair split across flow shards is still one issue"""
+        packets = [smb_packet(number) for number in range(1, 201)]
+        result = ParallelPipeline(workers=1, shards=4).run(packets, stats=False)
+        ports = [issue for issue in result['issues'] if issue['type'] == 'SUSPICIOUS_PORT']
+        assert [entry['count'] for entry in ports] == [200]
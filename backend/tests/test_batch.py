@@ -0,0 +1,127 @@
+import pytest
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.batch import PacketBatch
+from src.statistics import TrafficStatistics
+from src.filters import PacketFilter
+from src.detector import IssueDetector
+
+
+class TestPacketBatch:
+    def setup_method(self):
+        self.packets = [
+            {'number': 1, 'protocol': 'TCP', 'length': 100, 'timestamp': 1000.0,
+             'src_ip': '192.168.1.1', 'dst_ip': '10.0.0.2', 'src_port': 80, 'dst_port': 54321,
+             'tcp_flags': 'SA', 'real_packet': True},
+            {'number': 2, 'protocol': 'UDP', 'length': 50, 'timestamp': 1001.0,
+             'src_ip': '2001:db8::1', 'dst_ip': '2001:db8::2', 'src_port': 53, 'dst_port': 49152},
+            {'number': 3, 'protocol': 'TCP', 'length': 150, 'timestamp': 1002.0,
+             'src_ip': '10.0.0.2', 'dst_ip': '192.168.1.1', 'src_port': 54321, 'dst_port': 80},
+            {'number': 4, 'protocol': 'ICMP', 'length': 80, 'timestamp': 1003.0},
+            {'number': 5, 'protocol': 'TCP', 'length': 200, 'timestamp': 1004.0,
+             'src_ip': 'N/A', 'dst_ip': 'N/A'}
+        ]
+        self.batch = PacketBatch.from_packets(self.packets)
+
+    def test_length_and_columns(self):
+        """Test columns are typed arrays with one entry per packet"""
+        assert len(self.batch) == 5
+        assert self.batch.timestamp.typecode == 'd'
+        assert self.batch.length.typecode == 'I'
+        assert self.batch.protocol.typecode == 'B'
+        assert self.batch.protocols == ['TCP', 'UDP', 'ICMP']
+
+    def test_row_view_is_dict_compatible(self):
+        """Test rows behave like the original packet dicts"""
+        row = self.batch[0]
+        assert row['protocol'] == 'TCP'
+        assert row['src_ip'] == '192.168.1.1'
+        assert row['dst_port'] == 54321
+        assert row['tcp_flags'] == 'SA'
+        assert row.get('real_packet') == True
+        assert row.get('missing', 'default') == 'default'
+        assert 'summary' in row
+
+    def test_large_lengths(self):
+        """Test lengths past 64 KiB (jumbo/offloaded frames) are not clamped"""
+        batch = PacketBatch.from_packets([dict(self.packets[0], length=70000, payload_length=69946)])
+        assert batch[0]['length'] == 70000
+        assert batch[0]['payload_length'] == 69946
+
+    def test_summary_is_rebuilt(self):
+        """Test the summary comes from the columns, not the captured text"""
+        batch = PacketBatch.from_packets([dict(self.packets[0], summary='TCP 192.168.1.1:80 → 10.0.0.2:54321')])
+        assert batch[0]['summary'] == 'TCP 192.168.1.1:80 > 10.0.0.2:54321 SA'
+        assert PacketBatch.from_packets(self.packets)[3]['summary'] == 'ICMP'
+
+    def test_ipv6_round_trip(self):
+        """Test IPv6 addresses are interned and restored"""
+        row = self.batch[1]
+        assert row['src_ip'] == '2001:db8::1'
+        assert row['dst_ip'] == '2001:db8::2'
+        assert len(self.batch.ipv6_addresses) == 2
+
+    def test_missing_fields(self):
+        """Test packets without addresses or ports"""
+        assert 'src_ip' not in self.batch[3]
+        assert 'src_ip' not in self.batch[4]
+        assert self.batch[3].get('src_port') is None
+
+    def test_slicing_and_take(self):
+        """Test slices return sub-batches"""
+        sub = self.batch[1:3]
+        assert isinstance(sub, PacketBatch)
+        assert [row['number'] for row in sub] == [2, 3]
+        assert self.batch[-1]['number'] == 5
+
+    def test_to_packets(self):
+        """Test rows materialize to plain dicts"""
+        packets = self.batch.to_packets()
+        assert packets[0]['length'] == 100
+        assert isinstance(packets[0], dict)
+
+    def test_compact_memory(self):
+        """Test per-packet footprint stays small"""
+        batch = PacketBatch.from_packets(self.packets[:1] * 1000)
+        assert batch.nbytes() / len(batch) < 40
+
+    def test_tcp_sequence_columns(self):
+        """Test sequence columns start when a packet carries them and stay optional per row"""
+        segment = dict(self.packets[0], tcp_seq=4000000000, tcp_ack=7, tcp_window=0, payload_length=1400)
+        batch = PacketBatch.from_packets([self.packets[1], segment])
+        assert len(batch.tcp_seq) == 2
+        assert 'tcp_seq' not in batch[0]
+        assert batch[1]['tcp_seq'] == 4000000000
+        assert batch[1]['tcp_window'] == 0
+        assert batch.to_packets()[1]['payload_length'] == 1400
+        assert not self.batch.has_tcp_columns
+
+        merged = PacketBatch.from_packets(self.packets[:1])
+        merged.extend_batch(batch[1:])
+        assert [row.get('tcp_ack') for row in merged] == [None, 7]
+
+    def test_statistics_accept_batch(self):
+        """Test TrafficStatistics gives identical results for a batch"""
+        stats = TrafficStatistics()
+        from_list = stats.generate_statistics(self.packets)
+        from_batch = stats.generate_statistics(self.batch)
+
+        for key in ('total_packets', 'total_bytes', 'capture_duration', 'traffic_rate',
+                    'protocol_distribution', 'packet_size_distribution', 'traffic_timeline'):
+            assert from_batch[key] == from_list[key]
+
+    def test_filter_accepts_batch(self):
+        """Test PacketFilter returns a filtered batch"""
+        packet_filter = PacketFilter()
+        packet_filter.add_protocol_filter('TCP')
+        filtered = packet_filter.apply_filters(self.batch)
+
+        assert isinstance(filtered, PacketBatch)
+        assert len(filtered) == 3
+
+    def test_detector_accepts_batch(self):
+        """Test IssueDetector runs over a batch"""
+        issues = IssueDetector().analyze_packets(self.batch)
+        assert isinstance(issues, list)
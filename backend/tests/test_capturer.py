@@ -1,9 +1,12 @@
 import pytest
 import sys
 import os
+import struct
+import types
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
 
 from src.capturer import PacketCapturer
+from src.filters import PacketFilter
 
 class TestPacketCapturer:
     def test_initialization(self):
@@ -53,4 +56,99 @@ class TestPacketCapturer:
         """Test Scapy availability detection"""
         capturer = PacketCapturer()
         # Should not raise an exception
-        assert isinstance(capturer.scapy_available, bool)
\ No newline at end of file
+        assert isinstance(capturer.scapy_available, bool)
+
+def udp_frame(dport):
+    """Ethernet / IPv4 / UDP frame from 10.0.0.1:40000 to 10.0.0.2:dport"""
+    udp = struct.pack('!HHHH', 40000, dport, 8, 0)
+    ipv4 = struct.pack('!BBHHHBBH4s4s', 0x45, 0, 20 + len(udp), 1, 0, 64, 17, 0,
+                       bytes([10, 0, 0, 1]), bytes([10, 0, 0, 2]))
+    return b'\x00\x11\x22\x33\x44\x55' + b'\x66\x77\x88\x99\xaa\xbb' + b'\x08\x00' + ipv4 + udp
+
+
+class FakeFrame:
+    """Just enough of a Scapy packet for process_packet()"""
+
+    def __init__(self, data, timestamp):
+        self.data = data
+        self.time = timestamp
+
+    def __bytes__(self):
+        return self.data
+
+    def __len__(self):
+        return len(self.data)
+
+    def summary(self):
+        return 'fake frame'
+
+
+def fake_scapy(frames):
+    """Scapy stand-in whose filtered L2listen fails, so the filter falls back to user space"""
+    def l2listen(filter=None):
+        raise OSError('cannot attach BPF program')
+
+    def sniff(prn, stop_filter, timeout, opened_socket, store):
+        for frame in frames:
+            prn(frame)
+            if stop_filter(frame):
+                break
+
+    scapy_all = types.ModuleType('scapy.all')
+    scapy_all.conf = types.SimpleNamespace(L2listen=l2listen,
+                                           l2types=types.SimpleNamespace(layer2num={}))
+    scapy_all.sniff = sniff
+    inet = types.ModuleType('scapy.layers.inet')
+    inet.IP = inet.TCP = inet.UDP = inet.ICMP = object
+    package = types.ModuleType('scapy')
+    package.all = scapy_all
+    return {'scapy': package, 'scapy.all': scapy_all, 'scapy.layers': types.ModuleType('scapy.layers'),
+            'scapy.layers.inet': inet}
+
+
+class TestSocketDrops:
+    def test_drops_are_socket_overflow(self, monkeypatch):
+        """Test the socket's tp_drops is reported as socket drops, with or without a filter"""
+        opened = []
+
+        class Socket:
+            def __init__(self, filter=None):
+                self.filter = filter
+                self.ins = types.SimpleNamespace(getsockopt=lambda level, option, size: struct.pack('II', 5, 3))
+                opened.append(self)
+
+            def close(self):
+                pass
+
+        modules = fake_scapy([FakeFrame(udp_frame(port), 1.0 + i) for i, port in enumerate((53, 80))])
+        modules['scapy.all'].conf.L2listen = Socket
+        for name, module in modules.items():
+            monkeypatch.setitem(sys.modules, name, module)
+        capturer = PacketCapturer(use_real_capture=True)
+
+        capturer._real_capture(10, timeout=1)
+
+        assert [sock.filter for sock in opened] == [None]
+        assert capturer.capture_stats['socket_dropped'] == 3
+        assert capturer.capture_stats['packets_kept'] == 2
+        assert capturer.capture_stats['user_space_filtered'] == 0
+
+
+class TestKernelFilterFallback:
+    def test_full_filter_runs_in_user_space(self, monkeypatch):
+        """Test packets are checked against the whole filter when the kernel filter cannot attach"""
+        for name, module in fake_scapy([FakeFrame(udp_frame(port), 1.0 + i)
+                                        for i, port in enumerate((53, 9999, 80, 53))]).items():
+            monkeypatch.setitem(sys.modules, name, module)
+        packet_filter = PacketFilter()
+        packet_filter.add_expression_filter('udp and port 53')
+        capturer = PacketCapturer(use_real_capture=True, packet_filter=packet_filter)
+
+        capturer._real_capture(10, timeout=1)
+
+        assert [packet['dst_port'] for packet in capturer.captured_packets] == [53, 53]
+        assert capturer.capture_stats['kernel_filter'] is None
+        assert capturer.capture_stats['user_space_filter'] == str(packet_filter.compile())
+        assert capturer.capture_stats['user_space_filtered'] == 2
+        assert capturer.capture_stats['packets_kept'] == 2
+        assert capturer.capture_stats['socket_dropped'] is None  # No socket could be opened
@@ -0,0 +1,155 @@
+import pytest
+import sys
+import os
+from array import array
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.columnar import write_columnar, ColumnarReader, ColumnarFormatError
+from src.batch import PacketBatch
+from src.filter_expr import compile_filter
+from src.storage import PacketStorage
+
+
+def make_packets(count=250):
+    packets = []
+    for i in range(count):
+        if i < 100:
+            src, dst, protocol = f"10.0.0.{i % 50 + 1}", '8.8.8.8', 'UDP'
+        elif i < 200:
+            src, dst, protocol = f"192.168.1.{i % 50 + 1}", '93.184.216.34', 'TCP'
+        else:
+            src, dst, protocol = '2001:db8::1', '2001:db8::2', 'TCP'
+        packets.append({'number': i + 1, 'timestamp': 100.0 + i, 'length': 60 + i,
+                        'protocol': protocol, 'src_ip': src, 'dst_ip': dst,
+                        'src_port': 40000 + i, 'dst_port': 53 if protocol == 'UDP' else 443,
+                        'tcp_flags': 'A' if protocol == 'TCP' else None, 'real_packet': True})
+    return packets
+
+
+class TestColumnarFormat:
+    def setup_method(self):
+        self.packets = make_packets()
+
+    @pytest.mark.parametrize('compress', [True, False])
+    def test_round_trip(self, tmp_path, compress):
+        """Test every column survives a write/read cycle"""
+        path = str(tmp_path / 'trace.pcol')
+        assert write_columnar(path, self.packets, block_size=64, compress=compress) == 4
+
+        with ColumnarReader(path) as reader:
+            assert len(reader) == 250
+            batch = reader.read_all()
+        expected = PacketBatch.from_packets(self.packets)
+        assert batch.to_packets() == expected.to_packets()
+
+    def test_tcp_sequence_round_trip(self, tmp_path):
+        """Test sequence columns are written and files without them still read"""
+        packets = [dict(packet, tcp_seq=i * 1000, tcp_ack=1, tcp_window=65535, payload_length=0)
+                   if packet['protocol'] == 'TCP' else packet for i, packet in enumerate(self.packets)]
+        path = str(tmp_path / 'trace.pcol')
+        write_columnar(path, packets, block_size=64)
+
+        with ColumnarReader(path) as reader:
+            batch = reader.read_all()
+        assert batch.to_packets() == PacketBatch.from_packets(packets).to_packets()
+        assert batch[150]['tcp_seq'] == 150000
+        assert 'tcp_seq' not in batch[0]
+
+    def test_dns_query_round_trip(self, tmp_path):
+        """Test interned DNS query names are written and read back"""
+        packets = [dict(packet, protocol='DNS', dns_query=f'host{i % 3}.example.')
+                   if packet['protocol'] == 'UDP' else packet for i, packet in enumerate(self.packets)]
+        path = str(tmp_path / 'trace.pcol')
+        write_columnar(path, packets, block_size=64)
+
+        with ColumnarReader(path) as reader:
+            batch = reader.read_all()
+        assert batch.to_packets() == PacketBatch.from_packets(packets).to_packets()
+        assert batch[1]['dns_query'] == 'host1.example.'
+        assert 'dns_query' not in batch[150]
+
+    def test_extras_round_trip(self, tmp_path):
+        """Test side data regions are stored with the packets and read by range"""
+        path = str(tmp_path / 'trace.pcol')
+        write_columnar(path, self.packets, block_size=64, extras={'spans': bytes(range(32)), 'empty': b''})
+
+        with ColumnarReader(path) as reader:
+            assert reader.read_extra('spans') == bytes(range(32))
+            assert reader.read_extra('spans', 4, 8) == bytes([4, 5, 6, 7])
+            assert reader.read_extra('empty') == b''
+            assert len(reader.read_all()) == len(self.packets)
+
+    def test_reads_uint16_lengths(self, tmp_path, monkeypatch):
+        """Test files written with the old uint16 length column still load"""
+        init = PacketBatch.__init__
+
+        def old_init(batch):
+            init(batch)
+            batch.length = array('H')
+
+        monkeypatch.setattr(PacketBatch, '__init__', old_init)
+        path = str(tmp_path / 'old.pcol')
+        write_columnar(path, self.packets, block_size=64)
+        monkeypatch.undo()
+
+        with ColumnarReader(path) as reader:
+            restored = reader.read_all()
+        assert restored.length.typecode == 'I'
+        assert restored.to_packets() == PacketBatch.from_packets(self.packets).to_packets()
+
+    def test_index_skips_blocks(self, tmp_path):
+        """Test time, protocol and address constraints rule out blocks"""
+        path = str(tmp_path / 'trace.pcol')
+        write_columnar(path, self.packets, block_size=50)
+
+        with ColumnarReader(path) as reader:
+            matching = [i for i, block in enumerate(reader.blocks)
+                        if reader.block_matches(block, start_time=210, end_time=260)]
+            assert matching == [2, 3]
+
+            node = compile_filter('udp and net 10.0.0.0/8').ast
+            assert [i for i, block in enumerate(reader.blocks)
+                    if reader.block_matches(block, node=node)] == [0, 1]
+            assert [i for i, block in enumerate(reader.blocks)
+                    if reader.block_matches(block, node=compile_filter('ip6').ast)] == [4]
+
+            batches = list(reader.iter_batches(compiled_filter=compile_filter('tcp and dst port 443')))
+            assert sum(len(batch) for batch in batches) == 150
+
+    def test_range_read(self, tmp_path):
+        """Test a packet range spanning blocks decodes only what it needs"""
+        path = str(tmp_path / 'trace.pcol')
+        write_columnar(path, self.packets, block_size=64)
+
+        with ColumnarReader(path) as reader:
+            batch = reader.read_range(60, 70)
+        assert list(batch.number) == list(range(61, 71))
+
+    def test_rejects_other_files(self, tmp_path):
+        """Test a non-columnar file raises ColumnarFormatError"""
+        path = tmp_path / 'bogus.pcol'
+        path.write_bytes(b'not a columnar capture at all')
+        with pytest.raises(ColumnarFormatError):
+            ColumnarReader(str(path))
+
+    def test_storage_integration(self, tmp_path):
+        """Test PacketStorage saves, filters, range-reads and streams pcol files"""
+        storage = PacketStorage(storage_dir=str(tmp_path))
+        assert storage.save_capture(self.packets, 'trace', 'pcol')
+
+        loaded = storage.load_capture('trace.pcol')
+        assert isinstance(loaded, PacketBatch) and len(loaded) == 250
+
+        udp = storage.load_capture('trace.pcol', 'udp', start_time=150)
+        assert list(udp.number) == list(range(51, 101))
+
+        assert len(storage.load_capture('trace.pcol', start=10, stop=20)) == 10
+        assert sum(len(b) for b in storage.stream_capture('trace.pcol', 'ip6')) == 50
+        assert any(c['filename'] == 'trace.pcol' for c in storage.list_captures())
+
+    def test_smaller_than_json(self, tmp_path):
+        """Test the columnar file is far smaller than the JSON capture"""
+        storage = PacketStorage(storage_dir=str(tmp_path))
+        storage.save_capture(self.packets, 'trace', 'json')
+        storage.save_capture(self.packets, 'trace', 'pcol')
+        assert os.path.getsize(tmp_path / 'trace.pcol') * 5 < os.path.getsize(tmp_path / 'trace.json')
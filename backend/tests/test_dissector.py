@@ -0,0 +1,164 @@
+import pytest
+import sys
+import os
+import socket
+import struct
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.dissector import PacketDissector, format_tcp_flags
+from src.parser import ProtocolParser
+from src.detector import IssueDetector, RealtimeDetector, dns_query
+from src.batch import PacketBatch
+from src.filter_expr import compile_filter
+from src.pcap_reader import LINKTYPE_RAW
+
+ETH_HEADER = bytes.fromhex('00112233445566778899aabb')
+
+
+def ipv4_header(proto, payload_length, src='192.168.1.10', dst='93.184.216.34', ttl=64):
+    return struct.pack('!BBHHHBBH4s4s', 0x45, 0, 20 + payload_length, 1, 0, ttl, proto, 0,
+                       socket.inet_aton(src), socket.inet_aton(dst))
+
+
+def tcp_segment(sport=51000, dport=443, seq=1000, ack=2000, flags=0x18, payload=b''):
+    return struct.pack('!HHIIHHHH', sport, dport, seq, ack, (5 << 12) | flags, 65535, 0, 0) + payload
+
+
+def dns_query_frame(name=b'\x07example\x03com\x00', sport=40000):
+    query = bytes.fromhex('1a2b01000001000000000000') + name + b'\x00\x01\x00\x01'
+    udp = struct.pack('!HHHH', sport, 53, 8 + len(query), 0) + query
+    return ETH_HEADER + b'\x08\x00' + ipv4_header(17, len(udp), '10.0.0.2', '8.8.8.8') + udp
+
+
+def ipv4_tcp_frame(payload=b'', padding=b''):
+    tcp = tcp_segment(payload=payload)
+    return ETH_HEADER + b'\x08\x00' + ipv4_header(6, len(tcp)) + tcp + padding
+
+
+class TestPacketDissector:
+    def setup_method(self):
+        self.dissector = PacketDissector()
+
+    def test_ipv4_tcp(self):
+        """Test Ethernet/IPv4/TCP fields are decoded"""
+        fields = self.dissector.dissect(ipv4_tcp_frame(b'GET /'))
+
+        assert fields['protocol'] == 'TCP'
+        assert fields['eth_dst'] == '00:11:22:33:44:55'
+        assert fields['src_ip'] == '192.168.1.10'
+        assert fields['dst_ip'] == '93.184.216.34'
+        assert fields['ttl'] == 64
+        assert fields['src_port'] == 51000
+        assert fields['dst_port'] == 443
+        assert fields['tcp_seq'] == 1000
+        assert fields['tcp_flags'] == 'PA'
+        assert fields['payload_length'] == 5
+        assert fields['summary'] == 'Ether / IP / TCP 192.168.1.10:51000 > 93.184.216.34:443 PA'
+
+    def test_ethernet_padding_ignored(self):
+        """Test trailer padding is not counted as TCP payload"""
+        fields = self.dissector.dissect(ipv4_tcp_frame(padding=b'\x00' * 6))
+        assert fields['payload_length'] == 0
+
+    def test_ipv6_udp_with_vlan(self):
+        """Test 802.1Q tagged IPv6/UDP"""
+        udp = struct.pack('!HHHH', 5353, 53, 12, 0) + b'abcd'
+        ipv6 = struct.pack('!IHBB16s16s', 6 << 28, len(udp), 17, 255,
+                           socket.inet_pton(socket.AF_INET6, '2001:db8::1'),
+                           socket.inet_pton(socket.AF_INET6, '2001:db8::2'))
+        frame = ETH_HEADER + b'\x81\x00' + struct.pack('!HH', 100, 0x86DD) + ipv6 + udp
+
+        fields = self.dissector.dissect(frame)
+
+        assert fields['protocol'] == 'UDP'
+        assert fields['vlan'] == 100
+        assert fields['src_ip'] == '2001:db8::1'
+        assert fields['hop_limit'] == 255
+        assert fields['dst_port'] == 53
+
+    def test_dns_query_and_answer(self):
+        """Test UDP port 53 is decoded as DNS with the queried name"""
+        # Standard A query for example.com, as sent by a stub resolver
+        query = bytes.fromhex('1a2b01000001000000000000'
+                              '076578616d706c6503636f6d0000010001')
+        udp = struct.pack('!HHHH', 40000, 53, 8 + len(query), 0) + query
+        frame = ETH_HEADER + b'\x08\x00' + ipv4_header(17, len(udp), '10.0.0.2', '8.8.8.8') + udp
+
+        fields = self.dissector.dissect(frame)
+
+        assert fields['protocol'] == 'DNS'
+        assert fields['dns_query'] == 'example.com.'
+        assert fields['summary'] == 'Ether / IP / UDP 10.0.0.2:40000 > 8.8.8.8:53 / DNS Qry "example.com."'
+
+        answer = bytes.fromhex('1a2b81800001000100000000'
+                               '076578616d706c6503636f6d0000010001'
+                               'c00c000100010000012c00045db8d822')
+        udp = struct.pack('!HHHH', 53, 40000, 8 + len(answer), 0) + answer
+        frame = ETH_HEADER + b'\x08\x00' + ipv4_header(17, len(udp), '8.8.8.8', '10.0.0.2') + udp
+
+        fields = self.dissector.dissect(frame)
+
+        assert fields['protocol'] == 'DNS'
+        assert fields['dns_response'] is True
+        assert 'dns_query' not in fields
+
+    def test_dns_feeds_detectors(self):
+        """Test decoded DNS queries reach the detectors, batches and filters"""
+        packets = []
+        for number in range(1, 7):
+            fields = self.dissector.dissect(dns_query_frame(sport=40000 + number))
+            packets.append(dict(fields, number=number, timestamp=float(number), length=71))
+        assert dns_query(packets[0]) == 'example.com.'
+
+        issues = IssueDetector().analyze_packets(packets)
+        assert [issue['count'] for issue in issues if issue['type'] == 'REPEATED_DNS_QUERIES'] == [6]
+        realtime = RealtimeDetector(window=60)
+        assert any(alert['type'] == 'REPEATED_DNS_QUERIES'
+                   for packet in packets for alert in realtime.observe(packet))
+
+        batch = PacketBatch.from_packets(packets)
+        assert batch[5]['dns_query'] == 'example.com.'
+        assert len(compile_filter('udp').apply(packets)) == 6
+
+    def test_malformed_dns_stays_udp(self):
+        """Test a port 53 payload that is not DNS is left as plain UDP"""
+        fields = self.dissector.dissect(dns_query_frame(name=b'\x3fexample'))
+        assert fields['protocol'] == 'UDP'
+        assert 'dns_query' not in fields
+
+    def test_icmp_raw_ip(self):
+        """Test raw IP link type with ICMP"""
+        icmp = struct.pack('!BBHHH', 8, 0, 0, 1, 1)
+        fields = self.dissector.dissect(ipv4_header(1, len(icmp)) + icmp, LINKTYPE_RAW)
+
+        assert fields['protocol'] == 'ICMP'
+        assert fields['icmp_type'] == 8
+
+    def test_unknown_ethertype_falls_back(self):
+        """Test unsupported frames return None for the Scapy fallback"""
+        assert self.dissector.dissect(ETH_HEADER + b'\x88\xcc' + b'\x00' * 20) is None
+
+    def test_truncated_frame(self):
+        """Test truncated headers do not raise"""
+        assert self.dissector.dissect(ipv4_tcp_frame()[:30]) is None
+
+    def test_tcp_flag_letters(self):
+        """Test flag letters match Scapy's ordering"""
+        assert format_tcp_flags(0x12) == 'SA'
+        assert format_tcp_flags(0x11) == 'FA'
+        assert format_tcp_flags(0) == ''
+
+    def test_parser_fast_path_layers(self):
+        """Test ProtocolParser builds the usual layers dict from raw bytes"""
+        parser = ProtocolParser()
+        packet_info = {'number': 7, 'protocol': 'TCP', 'real_packet': True,
+                       'raw_bytes': ipv4_tcp_frame(), 'linktype': 1}
+
+        analysis = parser.parse_packet(packet_info)
+
+        assert analysis['packet_number'] == 7
+        assert set(analysis['layers']) == {'ethernet', 'ip', 'tcp'}
+        assert analysis['layers']['ip']['time_to_live'] == 64
+        assert analysis['layers']['tcp']['destination_port'] == 443
+        assert any('PSH' in flag for flag in analysis['layers']['tcp']['flags'])
+        assert analysis['summary'] == 'Parsed 3 protocol layers'
@@ -0,0 +1,152 @@
+import pytest
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.filter_expr import compile_filter, FilterSyntaxError
+from src.batch import PacketBatch
+from src.storage import PacketStorage
+
+
+def packet(protocol, src, sport, dst, dport, length=100, number=1):
+    return {'number': number, 'protocol': protocol, 'src_ip': src, 'src_port': sport,
+            'dst_ip': dst, 'dst_port': dport, 'length': length, 'timestamp': float(number),
+            'summary': f"{protocol} {src}:{sport} > {dst}:{dport}"}
+
+
+class TestFilterExpression:
+    def setup_method(self):
+        self.packets = [
+            packet('TCP', '10.0.0.5', 50000, '93.184.216.34', 443, 1500, 1),
+            packet('TCP', '93.184.216.34', 443, '10.0.0.5', 50000, 60, 2),
+            packet('UDP', '192.168.1.10', 5353, '8.8.8.8', 53, 80, 3),
+            packet('TCP', '2001:db8::1', 40000, '2001:db8::2', 80, 200, 4),
+            {'number': 5, 'protocol': 'ICMP', 'summary': 'IP / ICMP 10.1.2.3 > 10.0.0.1', 'length': 84},
+        ]
+
+    def numbers(self, expression):
+        return [p['number'] for p in compile_filter(expression).apply(self.packets)]
+
+    def test_protocol_and_port(self):
+        """Test the example expression from the docs"""
+        assert self.numbers('tcp and dst port 443 and net 10.0.0.0/8') == [1]
+        assert self.numbers('tcp and port 443') == [1, 2]
+
+    def test_boolean_operators(self):
+        """Test and/or/not, symbols and parentheses"""
+        assert self.numbers('udp or icmp') == [3, 5]
+        assert self.numbers('not tcp') == [3, 5]
+        assert self.numbers('(udp || icmp) && !host 8.8.8.8') == [5]
+
+    def test_addresses(self):
+        """Test host/net with directions, IPv6 and the summary fallback"""
+        assert self.numbers('src host 10.0.0.5') == [1]
+        assert self.numbers('net 2001:db8::/32') == [4]
+        assert self.numbers('dst net 10.0.0.0/24') == [2, 5]
+        assert self.numbers('ip6') == [4]
+
+    def test_ip_version_summary_fallback(self):
+        """Test ip and ip6 both recognise summary-only records"""
+        legacy = [{'number': 1, 'protocol': 'ICMP', 'summary': 'IP / ICMP 10.1.2.3 > 10.0.0.1'},
+                  {'number': 2, 'protocol': 'ICMPv6', 'summary': 'Ether / IPv6 / ICMPv6 fe80::1 > ff02::1'},
+                  {'number': 3, 'protocol': 'Unknown', 'summary': '02:00:00:00:00:01 > ff:ff:ff:ff:ff:ff (0x88cc)'}]
+        assert [p['number'] for p in compile_filter('ip').apply(legacy)] == [1]
+        assert [p['number'] for p in compile_filter('ip6').apply(legacy)] == [2]
+
+    def test_ports_and_length(self):
+        """Test portrange and length comparisons"""
+        assert self.numbers('dst portrange 50-100') == [3, 4]
+        assert self.numbers('len > 1000') == [1]
+        assert self.numbers('less 80') == [2, 3]
+
+    def test_application_aliases(self):
+        """Test protocol names that map to well-known ports"""
+        assert self.numbers('dns') == [3]
+        assert self.numbers('https') == [1, 2]
+
+    def test_batch_mask_matches_predicate(self):
+        """Test the vectorized mask agrees with the row predicate"""
+        # Batches are built from decoded fields, so skip the summary-only record
+        packets = self.packets[:4]
+        batch = PacketBatch.from_packets(packets)
+        for expression in ('tcp and port 443', 'not udp', 'net 10.0.0.0/8 or ip6',
+                           'src portrange 1024-65535 and len >= 100'):
+            compiled = compile_filter(expression)
+            expected = [compiled(p) for p in packets]
+            assert [bool(hit) for hit in compiled.mask(batch)] == expected, expression
+
+            filtered = compiled.apply(batch)
+            assert isinstance(filtered, PacketBatch)
+            assert len(filtered) == sum(expected)
+
+    def test_compiled_filters_are_cached(self):
+        """Test the same expression is only parsed once"""
+        assert compile_filter('tcp and port 80') is compile_filter('tcp and port 80')
+
+    @pytest.mark.parametrize('expression', [
+        '', 'tcp and', '(tcp', 'port http', 'host 10.0.0.0/8', 'src tcp', 'len ~ 5', 'port 70000'
+    ])
+    def test_syntax_errors(self, expression):
+        """Test invalid expressions raise FilterSyntaxError"""
+        with pytest.raises(FilterSyntaxError):
+            compile_filter(expression)
+
+    def test_storage_load_with_filter(self, tmp_path):
+        """Test storage queries reuse the compiled filter"""
+        storage = PacketStorage(storage_dir=str(tmp_path))
+        storage.save_capture(self.packets, 'trace', 'json')
+
+        loaded = storage.load_capture('trace.json', 'udp or icmp')
+        assert [p['number'] for p in loaded] == [3, 5]
+
+
+class TestKernelPushdown:
+    def test_expressible_filter_is_fully_pushed_down(self):
+        """Test a pure BPF expression leaves nothing for user space"""
+        bpf, residual = compile_filter('tcp and dst port 443 and net 10.0.0.0/8').split_bpf()
+        assert bpf == '(tcp) and (dst port 443) and (net 10.0.0.0/8)'
+        assert residual is None
+
+    def test_residual_keeps_untranslatable_terms(self):
+        """Test only top-level 'and' terms the kernel cannot run stay in user space"""
+        bpf, residual = compile_filter('host 10.0.0.1 and not icmp6 and len >= 100').split_bpf()
+        assert bpf == '(host 10.0.0.1) and (len >= 100)'
+        assert str(residual) == 'not icmpv6'
+
+    def test_nothing_pushed_when_or_mixes_terms(self):
+        """Test an 'or' with an untranslatable branch is not pushed down"""
+        bpf, residual = compile_filter('tcp or ipv6_hopopts').split_bpf()
+        assert bpf is None
+        assert str(residual) == 'tcp or ipv6_hopopts'
+
+    def test_packet_filter_rules(self):
+        """Test PacketFilter rules translate to a kernel filter"""
+        from src.filters import PacketFilter
+        packet_filter = PacketFilter()
+        packet_filter.add_protocol_filter('TCP')
+        packet_filter.add_protocol_filter('UDP')
+        packet_filter.add_ip_filter(dst_ip='8.8.8.8')
+        bpf, residual = packet_filter.kernel_filter()
+        assert bpf == '((tcp) or (udp)) and (dst host 8.8.8.8)'
+        assert residual is None
+
+    def test_capturer_falls_back_to_user_space(self):
+        """Test the whole filter runs in user space when BPF cannot be attached"""
+        from src.capturer import PacketCapturer
+        from src.filters import PacketFilter
+
+        class NoBpfScapy:
+            class conf:
+                @staticmethod
+                def L2listen(filter=None):
+                    raise OSError("tcpdump not found")
+
+        packet_filter = PacketFilter()
+        packet_filter.add_expression_filter('udp and port 53')
+        capturer = PacketCapturer(packet_filter=packet_filter)
+        bpf, residual = capturer._kernel_filter()
+        stats = capturer._new_capture_stats(bpf, residual)
+
+        assert capturer._open_socket(NoBpfScapy, bpf, stats) is None
+        assert stats['kernel_filter'] is None
+        assert stats['user_space_filter'] == 'udp and port 53'
@@ -73,6 +73,25 @@ class TestPacketFilter:
         
         assert len(filtered) == 2
         
+    def test_ip_filter_ipv6_summary_fallback(self):
+        """Test legacy records with IPv6 addresses only in the summary still match"""
+        legacy = [{'number': 1, 'protocol': 'TCP', 'summary': 'Ether / IPv6 / TCP 2001:db8::1:443 > 2001:db8::2:50000 SA'},
+                  {'number': 2, 'protocol': 'TCP', 'summary': 'TCP 2001:db8::2 → 2001:db8::1'},
+                  {'number': 3, 'protocol': 'ICMPv6', 'summary': 'Ether / IPv6 / ICMPv6 fe80::1 > ff02::1'},
+                  {'number': 4, 'protocol': 'Unknown', 'summary': '02:00:00:00:00:01 > ff:ff:ff:ff:ff:ff (0x88cc)'}]
+        self.filter.add_ip_filter(src_ip='2001:db8::1')
+        assert [p['number'] for p in self.filter.apply_filters(legacy)] == [1]
+        
+        self.filter.clear_filters()
+        self.filter.add_ip_filter(dst_ip='2001:db8:0::1')
+        assert [p['number'] for p in self.filter.apply_filters(legacy)] == [2]
+        
+    def test_ip_filter_invalid_address(self):
+        """Test a malformed address is reported as ValueError and adds no rule"""
+        with pytest.raises(ValueError):
+            self.filter.add_ip_filter(src_ip='foo')
+        assert self.filter.filters == []
+        
     def test_empty_filters(self):
         """Test applying no filters returns all packets"""
         filtered = self.filter.apply_filters(self.sample_packets)
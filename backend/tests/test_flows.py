@@ -0,0 +1,118 @@
+import pytest
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.flows import FlowTable, flow_key
+from src.filters import PacketFilter
+from src.detector import IssueDetector
+
+
+def tcp_packet(src, sport, dst, dport, timestamp, flags='A', length=100):
+    return {'protocol': 'TCP', 'src_ip': src, 'src_port': sport, 'dst_ip': dst, 'dst_port': dport,
+            'timestamp': timestamp, 'tcp_flags': flags, 'length': length}
+
+
+class TestFlowTable:
+    def test_key_is_bidirectional(self):
+        """Test both directions map to the same flow key"""
+        forward = flow_key('TCP', '10.0.0.1', 5000, '10.0.0.2', 80)
+        reverse = flow_key('TCP', '10.0.0.2', 80, '10.0.0.1', 5000)
+        assert forward == reverse
+
+    def test_ipv6_keys(self):
+        """Test IPv6 addresses need no string parsing"""
+        table = FlowTable()
+        table.update(tcp_packet('2001:db8::1', 443, '2001:db8::2', 50000, 1.0))
+        table.update(tcp_packet('2001:db8::2', 50000, '2001:db8::1', 443, 2.0))
+        assert len(table) == 1
+        assert next(iter(table)).packets == 2
+
+    def test_per_flow_counters(self):
+        """Test packets, bytes, direction and timestamps"""
+        table = FlowTable()
+        table.update(tcp_packet('10.0.0.1', 5000, '10.0.0.2', 80, 10.0, 'S', 60))
+        table.update(tcp_packet('10.0.0.2', 80, '10.0.0.1', 5000, 10.1, 'SA', 60))
+        flow = table.update(tcp_packet('10.0.0.1', 5000, '10.0.0.2', 80, 10.2, 'A', 52))
+
+        assert flow.packets == 3
+        assert flow.bytes == 172
+        assert flow.packets_fwd == 2 and flow.packets_rev == 1
+        assert flow.first_seen == 10.0 and flow.last_seen == 10.2
+        assert flow.tcp_state == 'ESTABLISHED'
+        assert flow.to_dict()['tcp_flags'] == 'SA'
+        assert flow.label() == '10.0.0.1:5000 → 10.0.0.2:80'
+
+    def test_tcp_close_and_reset(self):
+        """Test FIN and RST transitions"""
+        table = FlowTable()
+        table.update(tcp_packet('10.0.0.1', 1, '10.0.0.2', 2, 1.0, 'FA'))
+        flow = table.update(tcp_packet('10.0.0.2', 2, '10.0.0.1', 1, 1.1, 'FA'))
+        assert flow.tcp_state == 'CLOSED'
+
+        flow = table.update(tcp_packet('10.0.0.3', 1, '10.0.0.2', 2, 1.2, 'R'))
+        assert flow.tcp_state == 'RESET'
+
+    def test_idle_timeout_expires_flows(self):
+        """Test idle flows are expired using packet timestamps"""
+        expired = []
+        table = FlowTable(idle_timeout=30, on_expire=expired.append)
+        table.update(tcp_packet('10.0.0.1', 1, '10.0.0.2', 2, 100.0))
+        table.update(tcp_packet('10.0.0.3', 1, '10.0.0.4', 2, 200.0))
+
+        assert len(table) == 1
+        assert table.expired_flows == 1
+        assert expired[0].src_ip == '10.0.0.1'
+
+    def test_active_timeout_splits_long_flows(self):
+        """Test a flow is restarted after the active timeout"""
+        table = FlowTable(idle_timeout=None, active_timeout=60)
+        for t in range(0, 100, 10):
+            table.update(tcp_packet('10.0.0.1', 1, '10.0.0.2', 2, float(t)))
+
+        assert table.expired_flows == 1
+        assert next(iter(table)).first_seen == 70.0
+
+    def test_max_flows_evicts_least_recent(self):
+        """Test the table never exceeds max_flows"""
+        table = FlowTable(max_flows=10)
+        for i in range(50):
+            table.update(tcp_packet(f'10.0.1.{i}', 1, '10.0.0.2', 2, 1.0))
+
+        assert len(table) == 10
+        assert table.evicted_flows == 40
+
+    def test_merge_copies_and_keeps_most_recent(self):
+        """Test merged tables own their flows and keep the flows seen last, like one table would"""
+        first, second = FlowTable(max_flows=4), FlowTable(max_flows=4)
+        for i in range(4):
+            first.update(tcp_packet(f'10.0.1.{i}', 1, '10.0.0.2', 2, float(i * 2)))
+            second.update(tcp_packet(f'10.0.2.{i}', 1, '10.0.0.2', 2, float(i * 2 + 1)))
+
+        merged = FlowTable(max_flows=4).merge(first).merge(second)
+        assert [flow.last_seen for flow in merged] == [4.0, 5.0, 6.0, 7.0]
+        assert merged.evicted_flows == 4
+
+        merged.update(tcp_packet('10.0.1.3', 1, '10.0.0.2', 2, 8.0))
+        assert first.get(tcp_packet('10.0.1.3', 1, '10.0.0.2', 2, 0)).packets == 1
+
+    def test_filter_queries_flow_table(self):
+        """Test flow filters keep only packets of busy flows"""
+        packets = [tcp_packet('10.0.0.1', 1, '10.0.0.2', 2, float(t)) for t in range(4)]
+        packets.append(tcp_packet('10.0.0.9', 1, '10.0.0.2', 2, 5.0))
+
+        packet_filter = PacketFilter()
+        packet_filter.add_flow_filter(min_packets=3)
+        assert len(packet_filter.apply_filters(packets)) == 4
+
+    def test_detector_uses_flows(self):
+        """Test retransmission check counts both directions of a flow"""
+        packets = []
+        for t in range(6):
+            packets.append(tcp_packet('10.0.0.1', 5000, '10.0.0.2', 80, float(t)))
+            packets.append(tcp_packet('10.0.0.2', 80, '10.0.0.1', 5000, t + 0.5))
+
+        issues = IssueDetector().analyze_packets(packets)
+        retransmissions = [i for i in issues if i['type'] == 'POTENTIAL_RETRANSMISSION']
+        assert len(retransmissions) == 1
+        assert '10.0.0.1:5000 → 10.0.0.2:80' in retransmissions[0]['description']
@@ -0,0 +1,97 @@
+import pytest
+import sys
+import os
+import threading
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.jobs import (JobManager, JobNotFoundError, JobQueueFullError,
+                      SUCCEEDED, FAILED, CANCELLED, QUEUED)
+
+
+def wait_for(job, timeout=5):
+    deadline = time.time() + timeout
+    while job.status not in (SUCCEEDED, FAILED, CANCELLED):
+        assert time.time() < deadline, f"job still {job.status}"
+        time.sleep(0.01)
+    return job
+
+
+class TestJobManager:
+    def setup_method(self):
+        self.manager = JobManager(workers=1, max_pending=2)
+
+    def teardown_method(self):
+        self.manager.shutdown()
+
+    def test_result_and_progress(self):
+        """Test a job's result is kept and progress reaches 1.0"""
+        def total(job, items):
+            count = 0
+            for chunk in job.track(items, chunk_size=10):
+                count += len(chunk)
+            return count
+
+        job = wait_for(self.manager.submit('count', total, list(range(35))))
+        assert job.status == SUCCEEDED
+        assert self.manager.get(job.job_id).info()['result'] == 35
+        assert job.progress == 1.0
+
+    def test_failure_is_recorded(self):
+        """Test an exception marks the job failed with its message"""
+        def broken(job):
+            raise ValueError("bad capture")
+
+        job = wait_for(self.manager.submit('broken', broken))
+        assert job.status == FAILED
+        assert job.error == 'bad capture'
+        assert 'result' not in job.info()
+
+    def test_cancel_running_job(self):
+        """Test cancellation stops a job at its next progress report"""
+        started = threading.Event()
+
+        def spin(job):
+            started.set()
+            while True:
+                job.report(0.5)
+                time.sleep(0.01)
+
+        job = self.manager.submit('spin', spin)
+        started.wait(5)
+        stopped = []
+        job.on_cancel(lambda: stopped.append(True))
+        self.manager.cancel(job.job_id)
+
+        assert wait_for(job).status == CANCELLED
+        assert stopped == [True]
+
+    def test_cancel_queued_job(self):
+        """Test a queued job never starts once cancelled"""
+        release = threading.Event()
+        blocker = self.manager.submit('block', lambda job: release.wait(5))
+        queued = self.manager.submit('never', lambda job: pytest.fail("should not run"))
+        assert queued.status == QUEUED
+
+        queued.cancel()
+        release.set()
+        wait_for(blocker)
+        assert wait_for(queued).status == CANCELLED
+
+    def test_queue_is_bounded(self):
+        """Test submit refuses work beyond max_pending"""
+        release = threading.Event()
+        self.manager.submit('block', lambda job: release.wait(5))
+        self.manager.submit('block', lambda job: release.wait(5))
+        with pytest.raises(JobQueueFullError):
+            self.manager.submit('block', lambda job: release.wait(5))
+        release.set()
+
+    def test_finished_jobs_expire(self):
+        """Test results are only retained for the retention period"""
+        manager = JobManager(workers=1, retention=60)
+        job = wait_for(manager.submit('quick', lambda job: 1))
+        job.finished -= 120
+        with pytest.raises(JobNotFoundError):
+            manager.get(job.job_id)
+        manager.shutdown()
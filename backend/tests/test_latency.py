@@ -0,0 +1,43 @@
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.latency import LatencyHistogram, LatencyTracker
+
+
+class TestLatencyHistogram:
+    def test_percentiles(self):
+        """Test percentiles land within one bucket of the true value"""
+        histogram = LatencyHistogram()
+        for ms in range(1, 101):
+            histogram.record(ms / 1000.0)
+
+        assert 0.050 <= histogram.percentile(50) <= 0.050 * 1.25
+        assert 0.099 <= histogram.percentile(99) <= 0.100
+        snapshot = histogram.snapshot()
+        assert snapshot['count'] == 100
+        assert snapshot['max_ms'] == 100.0
+
+    def test_empty(self):
+        assert LatencyHistogram().snapshot()['p99_ms'] is None
+
+    def test_outliers(self):
+        """Test samples beyond the last bucket report the observed maximum"""
+        histogram = LatencyHistogram()
+        histogram.record(500.0)
+        assert histogram.percentile(99) == 500.0
+
+
+class TestLatencyTracker:
+    def test_per_key(self):
+        tracker = LatencyTracker()
+        tracker.record('capture', 0.2)
+        tracker.record('health', 0.001)
+        tracker.record('health', 0.002)
+
+        snapshot = tracker.snapshot()
+        assert list(snapshot) == ['capture', 'health']
+        assert snapshot['health']['count'] == 2
+
+        tracker.reset()
+        assert tracker.snapshot() == {}
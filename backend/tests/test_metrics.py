@@ -0,0 +1,118 @@
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import pytest
+
+from src.metrics import MetricsRegistry, REGISTRY, PACKETS_CAPTURED, FILTER_PACKETS_IN, DETECTOR_RULE_SECONDS
+from src.capturer import PacketCapturer
+from src.filter_expr import compile_filter
+from src.detector import IssueDetector
+
+
+def sample_value(text, line_prefix):
+    for line in text.splitlines():
+        if line.startswith(line_prefix + ' '):
+            return float(line.rsplit(' ', 1)[1])
+    return None
+
+
+class TestMetricsRegistry:
+    def test_counter_and_gauge(self):
+        """Test counters accumulate and gauges keep the last value"""
+        registry = MetricsRegistry()
+        counter = registry.counter('events_total', 'Events seen', ['kind'])
+        counter.labels('a').inc()
+        counter.labels('a').inc(2)
+        counter.labels('b').inc()
+        gauge = registry.gauge('ratio', 'Some ratio')
+        gauge.set(0.25)
+
+        text = registry.render()
+        assert '# TYPE events_total counter' in text
+        assert 'events_total{kind="a"} 3' in text
+        assert 'events_total{kind="b"} 1' in text
+        assert 'ratio 0.25' in text
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test histograms render cumulative le buckets, sum and count"""
+        registry = MetricsRegistry()
+        histogram = registry.histogram('work_seconds', 'Work time', buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 2.0):
+            histogram.observe(value)
+
+        text = registry.render()
+        assert 'work_seconds_bucket{le="0.1"} 1' in text
+        assert 'work_seconds_bucket{le="1"} 3' in text
+        assert 'work_seconds_bucket{le="+Inf"} 4' in text
+        assert 'work_seconds_sum 3.05' in text
+        assert 'work_seconds_count 4' in text
+
+    def test_labels_are_escaped(self):
+        """Test label values with quotes cannot break the exposition format"""
+        registry = MetricsRegistry()
+        registry.counter('odd_total', 'Odd labels', ['name']).labels('say "hi"').inc()
+        assert 'odd_total{name="say \\"hi\\""} 1' in registry.render()
+
+    def test_non_string_labels_share_a_series(self):
+        """Test labels(200) and labels('200') update the same series"""
+        registry = MetricsRegistry()
+        counter = registry.counter('status_total', 'Statuses', ['status'])
+        counter.labels(200).inc()
+        counter.labels('200').inc()
+        assert 'status_total{status="200"} 2' in registry.render()
+
+    def test_disabled_registry_records_nothing(self):
+        """Test updates and timers are no-ops while disabled"""
+        registry = MetricsRegistry(enabled=False)
+        counter = registry.counter('events_total', 'Events seen')
+        histogram = registry.histogram('work_seconds', 'Work time')
+        counter.inc()
+        with histogram.time():
+            pass
+
+        text = registry.render()
+        assert 'events_total 0' in text
+        assert 'work_seconds_count 0' in text
+
+    def test_conflicting_registration(self):
+        """Test a name cannot be reused with another type or labels"""
+        registry = MetricsRegistry()
+        registry.counter('events_total', 'Events seen')
+        assert registry.counter('events_total', 'Events seen') is registry.counter('events_total', 'x')
+        with pytest.raises(ValueError):
+            registry.gauge('events_total', 'Events seen')
+
+    def test_missing_labels(self):
+        """Test a labelled metric needs labels() before updating"""
+        registry = MetricsRegistry()
+        counter = registry.counter('events_total', 'Events seen', ['kind'])
+        with pytest.raises(ValueError):
+            counter.inc()
+        with pytest.raises(ValueError):
+            counter.labels('a', 'b')
+
+
+class TestInstrumentation:
+    def test_capture_is_counted(self):
+        """Test the capturer counts every stored packet"""
+        before = PACKETS_CAPTURED.labels('simulated').value
+        PacketCapturer().start_capture(3)
+        assert PACKETS_CAPTURED.labels('simulated').value == before + 3
+
+    def test_filter_selectivity(self):
+        """Test filtering records packets in, packets kept and selectivity"""
+        packets = [{'protocol': 'TCP'}, {'protocol': 'UDP'}, {'protocol': 'UDP'}, {'protocol': 'UDP'}]
+        before = FILTER_PACKETS_IN.labels().value
+        compile_filter('tcp').apply(packets)
+
+        text = REGISTRY.render()
+        assert FILTER_PACKETS_IN.labels().value == before + 4
+        assert sample_value(text, 'packet_analyzer_filter_selectivity') == 0.25
+
+    def test_detector_rules_are_timed(self):
+        """Test each detector rule gets its own runtime series"""
+        before = DETECTOR_RULE_SECONDS.labels('dns_issues').count
+        IssueDetector().analyze_packets([{'protocol': 'DNS', 'length': 80}])
+        assert DETECTOR_RULE_SECONDS.labels('dns_issues').count == before + 1
+        assert 'packet_analyzer_detector_rule_seconds_count{rule="suspicious_ports"}' in REGISTRY.render()
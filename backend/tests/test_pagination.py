@@ -0,0 +1,166 @@
+import pytest
+import sys
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.pagination import encode_cursor, decode_cursor, clamp_page_size, InvalidCursorError, MAX_PAGE_SIZE
+from src.columnar import write_columnar, ColumnarReader
+from src.filter_expr import compile_filter
+from src.storage import PacketStorage
+
+
+def make_packets(count=1000):
+    return [{'number': i + 1, 'timestamp': 100.0 + i, 'length': 60,
+             'protocol': 'UDP' if i % 4 == 0 else 'TCP',
+             'src_ip': '10.0.0.1', 'dst_ip': '10.0.0.2',
+             'src_port': 40000, 'dst_port': 53 if i % 4 == 0 else 443,
+             'real_packet': True} for i in range(count)]
+
+
+class TestCursors:
+    def test_round_trip(self):
+        """Test a cursor decodes to the position and filter it was issued for"""
+        cursor = encode_cursor('trace.pcol', 42, 'udp')
+        assert decode_cursor(cursor, 'trace.pcol') == (42, 'udp')
+        assert decode_cursor(cursor, 'trace.pcol', 'udp') == (42, 'udp')
+
+    @pytest.mark.parametrize('cursor, filename, expression', [
+        ('not-a-cursor!', 'trace.pcol', None),
+        (encode_cursor('other.pcol', 1), 'trace.pcol', None),
+        (encode_cursor('trace.pcol', 1, 'udp'), 'trace.pcol', 'tcp'),
+    ])
+    def test_rejects_foreign_cursors(self, cursor, filename, expression):
+        """Test malformed cursors and cursors for another query are refused"""
+        with pytest.raises(InvalidCursorError):
+            decode_cursor(cursor, filename, expression)
+
+    def test_page_size_is_clamped(self):
+        assert clamp_page_size(0) == 1
+        assert clamp_page_size(10 ** 6) == MAX_PAGE_SIZE
+
+
+class TestColumnarScan:
+    def test_scan_resumes(self, tmp_path):
+        """Test a scan stops at the limit and resumes from next_position"""
+        path = str(tmp_path / 'trace.pcol')
+        write_columnar(path, make_packets(), block_size=64)
+        udp = compile_filter('udp')
+
+        with ColumnarReader(path) as reader:
+            first, position = reader.scan(0, 100, udp)
+            second, end = reader.scan(position, 1000, udp)
+            skipped, _ = reader.scan(0, 10, udp, skip=100)
+
+        assert list(first.number) == list(range(1, 401, 4))
+        assert list(second.number) == list(range(401, 1001, 4))
+        assert list(skipped.number) == list(second.number)[:10]
+        assert end is None
+
+
+class TestStoragePages:
+    def setup_method(self):
+        self.packets = make_packets()
+
+    @pytest.mark.parametrize('format', ['pcol', 'json', 'pkl'])
+    def test_offset_pages(self, tmp_path, format):
+        """Test offset/limit pages over every storage format"""
+        storage = PacketStorage(storage_dir=str(tmp_path))
+        storage.save_capture(self.packets, 'trace', format)
+        filename = f"trace.{format}"
+
+        page = storage.read_page(filename, offset=990, limit=50)
+        assert [p['number'] for p in page['packets']] == list(range(991, 1001))
+        assert page['total_packets'] == 1000
+        assert page['next_cursor'] is None
+
+    def test_cursor_walks_filtered_capture(self, tmp_path):
+        """Test following cursors visits every match exactly once"""
+        storage = PacketStorage(storage_dir=str(tmp_path))
+        storage.save_capture(self.packets, 'trace', 'json')
+
+        numbers = []
+        page = storage.read_page('trace.json', limit=60, filter_expression='udp')
+        numbers.extend(p['number'] for p in page['packets'])
+        while page['next_cursor']:
+            page = storage.read_page('trace.json', limit=60, cursor=page['next_cursor'])
+            numbers.extend(p['number'] for p in page['packets'])
+        assert numbers == list(range(1, 1001, 4))
+
+        assert [p['number'] for p in storage.read_page('trace.json', offset=5, limit=2,
+                                                       filter_expression='udp')['packets']] == [21, 25]
+
+    @pytest.mark.parametrize('format', ['json', 'pkl'])
+    def test_pages_hold_original_records(self, tmp_path, format):
+        """Test pages match load_capture exactly, including fields the index does not store"""
+        packets = [dict(packet, summary=f"UDP 10.0.0.1 → 10.0.0.2 #{packet['number']}", info={'ttl': 64})
+                   for packet in self.packets[:300]]
+        storage = PacketStorage(storage_dir=str(tmp_path))
+        storage.save_capture(packets, 'trace', format)
+        filename = f"trace.{format}"
+        loaded = storage.load_capture(filename)
+
+        assert storage.read_page(filename, offset=250, limit=20)['packets'] == loaded[250:270]
+        page = storage.read_page(filename, offset=10, limit=5, filter_expression='udp')
+        assert page['packets'] == [p for p in loaded if p['protocol'] == 'UDP'][10:15]
+
+    def test_filtered_offsets_resume(self, tmp_path, monkeypatch):
+        """Test walking a filter by offset starts each page where the previous one ended"""
+        storage = PacketStorage(storage_dir=str(tmp_path))
+        storage.save_capture(make_packets(20000), 'trace', 'json')
+        storage.index_capture('trace.json')
+        decoded = []
+        read_block = ColumnarReader.read_block
+        monkeypatch.setattr(ColumnarReader, 'read_block',
+                            lambda reader, index: decoded.append(index) or read_block(reader, index))
+
+        numbers = []
+        for offset in range(0, 5000, 100):
+            decoded.clear()
+            page = storage.read_page('trace.json', offset=offset, limit=100, filter_expression='udp')
+            numbers.extend(p['number'] for p in page['packets'])
+            assert len(decoded) <= 2
+        assert numbers == list(range(1, 20001, 4))
+
+    def test_index_is_rebuilt_when_capture_changes(self, tmp_path):
+        """Test the JSON page index follows the capture file"""
+        storage = PacketStorage(storage_dir=str(tmp_path))
+        storage.save_capture(self.packets, 'trace', 'json')
+        storage.read_page('trace.json')
+
+        storage.save_capture(self.packets[:10], 'trace', 'json')
+        os.utime(tmp_path / 'trace.json', (10 ** 10, 10 ** 10))
+        assert storage.read_page('trace.json')['total_packets'] == 10
+
+    @pytest.mark.parametrize('format', ['json', 'pkl'])
+    def test_concurrent_index_builds(self, tmp_path, monkeypatch, format):
+        """Test simultaneous first requests build the index once, as a single published file"""
+        storage = PacketStorage(storage_dir=str(tmp_path))
+        storage.save_capture(self.packets, 'trace', format)
+        filename = f"trace.{format}"
+        builds = []
+        build_index = PacketStorage._build_index
+        barrier = threading.Barrier(8)
+
+        def counting_build(self, *args):
+            builds.append(args[0])
+            time.sleep(0.05)  # Keep the build open while the other threads arrive
+            build_index(self, *args)
+        monkeypatch.setattr(PacketStorage, '_build_index', counting_build)
+
+        def read():
+            barrier.wait()
+            return storage.read_page(filename, offset=500, limit=3)['packets']
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            pages = list(pool.map(lambda _: read(), range(8)))
+
+        assert builds == [filename]
+        assert all([p['number'] for p in page] == [501, 502, 503] for page in pages)
+        assert os.listdir(tmp_path / '.index') == [f"{filename}.pcol"]
+
+    def test_missing_capture(self, tmp_path):
+        storage = PacketStorage(storage_dir=str(tmp_path))
+        assert storage.read_page('missing.json') is None
@@ -0,0 +1,147 @@
+import pytest
+import sys
+import os
+import struct
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.pcap_reader import PcapReader, PcapFormatError, write_pcap, LINKTYPE_ETHERNET
+from src.capturer import PacketCapturer
+
+
+def make_frame(payload=b'hello'):
+    """Build a minimal Ethernet/IPv4/UDP frame"""
+    udp = struct.pack('!HHHH', 5353, 53, 8 + len(payload), 0) + payload
+    ip = struct.pack('!BBHHHBBH4s4s', 0x45, 0, 20 + len(udp), 1, 0, 64, 17, 0,
+                     bytes([10, 0, 0, 1]), bytes([10, 0, 0, 2]))
+    eth = bytes.fromhex('ffffffffffff') + bytes.fromhex('020000000001') + b'\x08\x00'
+    return eth + ip + udp
+
+
+def make_pcapng(frames):
+    """Build a little-endian pcapng file with one interface and EPB records"""
+    shb_body = struct.pack('<IHHq', 0x1A2B3C4D, 1, 0, -1)
+    shb = struct.pack('<II', 0x0A0D0D0A, 12 + len(shb_body)) + shb_body + struct.pack('<I', 12 + len(shb_body))
+
+    # Interface with nanosecond timestamp resolution (if_tsresol = 9)
+    options = struct.pack('<HHB3x', 9, 1, 9) + struct.pack('<HH', 0, 0)
+    idb_body = struct.pack('<HHI', LINKTYPE_ETHERNET, 0, 65535) + options
+    idb = struct.pack('<II', 1, 12 + len(idb_body)) + idb_body + struct.pack('<I', 12 + len(idb_body))
+
+    blocks = [shb, idb]
+    for timestamp_ns, frame in frames:
+        padded = frame + b'\x00' * (-len(frame) % 4)
+        body = struct.pack('<IIIII', 0, timestamp_ns >> 32, timestamp_ns & 0xFFFFFFFF,
+                           len(frame), len(frame)) + padded
+        blocks.append(struct.pack('<II', 6, 12 + len(body)) + body + struct.pack('<I', 12 + len(body)))
+    return b''.join(blocks)
+
+
+class TestPcapReader:
+    def setup_method(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def teardown_method(self):
+        import shutil
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_read_classic_pcap(self):
+        """Test records and timestamps come from a pcap file"""
+        path = os.path.join(self.temp_dir, 'trace.pcap')
+        write_pcap(path, [(1000.5, make_frame()), (1001.25, make_frame(b'x' * 100))])
+
+        reader = PcapReader(path)
+        records = list(reader)
+
+        assert reader.format == 'pcap'
+        assert len(records) == 2
+        assert records[0].timestamp == pytest.approx(1000.5)
+        assert records[1].timestamp == pytest.approx(1001.25)
+        assert records[0].data == make_frame()
+        assert records[0].linktype == LINKTYPE_ETHERNET
+
+    def test_read_pcapng(self):
+        """Test pcapng enhanced packet blocks with nanosecond resolution"""
+        path = os.path.join(self.temp_dir, 'trace.pcapng')
+        with open(path, 'wb') as f:
+            f.write(make_pcapng([(1500000000123456789, make_frame()), (1500000001000000000, make_frame(b'abc'))]))
+
+        reader = PcapReader(path)
+        records = list(reader)
+
+        assert reader.format == 'pcapng'
+        assert len(records) == 2
+        assert records[0].timestamp == pytest.approx(1500000000.123456789)
+        assert records[1].data == make_frame(b'abc')
+
+    def test_truncated_file_stops_cleanly(self):
+        """Test a partially written final record is ignored"""
+        path = os.path.join(self.temp_dir, 'partial.pcap')
+        write_pcap(path, [(1.0, make_frame()), (2.0, make_frame())])
+        with open(path, 'r+b') as f:
+            f.truncate(os.path.getsize(path) - 10)
+
+        assert len(list(PcapReader(path))) == 1
+
+    def test_invalid_magic(self):
+        """Test non-capture files are rejected"""
+        path = os.path.join(self.temp_dir, 'bogus.pcap')
+        with open(path, 'wb') as f:
+            f.write(b'not a pcap file at all')
+
+        with pytest.raises(PcapFormatError):
+            list(PcapReader(path))
+
+    def test_packet_before_interface(self):
+        """Test packet blocks for an undeclared interface are rejected"""
+        data = make_pcapng([(1, make_frame())])
+        shb_length = struct.unpack_from('<I', data, 4)[0]
+        idb_length = struct.unpack_from('<I', data, shb_length + 4)[0]
+        path = os.path.join(self.temp_dir, 'reordered.pcapng')
+        with open(path, 'wb') as f:
+            # Section header and packet, but the interface block is missing
+            f.write(data[:shb_length] + data[shb_length + idb_length:])
+
+        with pytest.raises(PcapFormatError, match='undeclared interface 0'):
+            list(PcapReader(path))
+
+    def test_simple_packet_without_interface(self):
+        """Test a simple packet block with no interface is rejected"""
+        data = make_pcapng([])
+        frame = make_frame()
+        body = struct.pack('<I', len(frame)) + frame + b'\x00' * (-len(frame) % 4)
+        spb = struct.pack('<II', 3, 12 + len(body)) + body + struct.pack('<I', 12 + len(body))
+        shb_length = struct.unpack_from('<I', data, 4)[0]
+        path = os.path.join(self.temp_dir, 'no_interface.pcapng')
+        with open(path, 'wb') as f:
+            f.write(data[:shb_length] + spb)
+
+        with pytest.raises(PcapFormatError):
+            list(PcapReader(path))
+
+    def test_capturer_reads_pcap(self):
+        """Test PacketCapturer produces packet_info records from a file"""
+        path = os.path.join(self.temp_dir, 'trace.pcap')
+        write_pcap(path, [(1000.0 + i, make_frame()) for i in range(5)])
+
+        capturer = PacketCapturer(pcap_file=path)
+        capturer.start_capture(3)
+
+        assert len(capturer.captured_packets) == 3
+        first = capturer.captured_packets[0]
+        assert first['number'] == 1
+        assert first['timestamp'] == pytest.approx(1000.0)
+        assert first['length'] == len(make_frame())
+        assert first['real_packet'] == True
+        assert 'protocol' in first and 'summary' in first
+
+    def test_iter_pcap_is_lazy(self):
+        """Test streaming iteration does not fill captured_packets"""
+        path = os.path.join(self.temp_dir, 'trace.pcap')
+        write_pcap(path, [(1000.0 + i, make_frame()) for i in range(10)])
+
+        capturer = PacketCapturer()
+        numbers = [p['number'] for p in capturer.iter_pcap(path)]
+
+        assert numbers == list(range(1, 11))
+        assert capturer.captured_packets == []
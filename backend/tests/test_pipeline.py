@@ -0,0 +1,173 @@
+import pytest
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src import pipeline as pipeline_module
+from src.pipeline import ParallelPipeline, AnalysisPipeline, shard_packets
+from src.parser import ProtocolParser
+from src.batch import PacketBatch
+from src.flows import packet_flow_key
+from src.statistics import TrafficStatistics, StatsAccumulator
+from src.detector import IssueDetector
+
+
+def make_packets():
+    packets = []
+    for i in range(120):
+        client = f"10.0.0.{i % 7 + 1}"
+        port = 40000 + i % 7
+        outbound = i % 2 == 0
+        packets.append({
+            'number': i + 1,
+            'timestamp': 1000.0 + i * 0.01,
+            'length': 40 if i % 11 == 0 else 600,
+            'protocol': 'TCP' if i % 5 else 'UDP',
+            'src_ip': client if outbound else '93.184.216.34',
+            'dst_ip': '93.184.216.34' if outbound else client,
+            'src_port': port if outbound else 3389,
+            'dst_port': 3389 if outbound else port,
+            'tcp_flags': 'A',
+            'summary': f"TCP {client}:{port} > 93.184.216.34:3389 A"
+        })
+    packets.append({'number': 121, 'timestamp': 1002.0, 'length': 64, 'protocol': 'ARP',
+                    'summary': 'Ether / ARP who has 10.0.0.1'})
+    return packets
+
+
+def issue_keys(issues):
+    return sorted((issue['type'], issue['details']) for issue in issues)
+
+
+class TestParallelPipeline:
+    def setup_method(self):
+        self.packets = make_packets()
+
+    def test_flows_stay_in_one_shard(self):
+        """Test both directions of a flow are sent to the same shard"""
+        shards = shard_packets(self.packets, 4)
+        seen = {}
+        for shard, (indices, packets) in enumerate(shards):
+            for packet in packets:
+                key = packet_flow_key(packet)
+                if key:
+                    assert seen.setdefault(key, shard) == shard
+        assert sorted(i for indices, _ in shards for i in indices) == list(range(len(self.packets)))
+
+    def test_matches_sequential_analysis(self):
+        """Test merged results equal the single-threaded ones"""
+        expected_stats = TrafficStatistics().generate_statistics(self.packets)
+        expected_issues = IssueDetector().analyze_packets(self.packets)
+
+        result = ParallelPipeline(workers=1, shards=5).run(self.packets)
+        assert result['statistics'] == expected_stats
+        assert issue_keys(result['issues']) == issue_keys(expected_issues)
+
+    def test_process_pool_is_deterministic(self):
+        """Test worker processes give the same answer on every run"""
+        pipeline = ParallelPipeline(workers=2)
+        first = pipeline.run(self.packets, parse=True)
+        second = pipeline.run(self.packets, parse=True)
+
+        assert first == second
+        assert first['statistics'] == TrafficStatistics().generate_statistics(self.packets)
+        assert [a['packet_number'] for a in first['analyses']] == [p['number'] for p in self.packets]
+
+    def test_matches_serial_past_flow_cap(self):
+        """Test conversations past the flow cap are evicted as in a single serial table"""
+        packets = []
+        for i in range(300):
+            # Old flows are the busiest, so keeping the wrong ones changes the top list
+            for j in range(1 + (300 - i) // 30):
+                packets.append({'number': len(packets) + 1, 'timestamp': len(packets) * 0.001, 'length': 100,
+                                'protocol': 'UDP', 'src_ip': f'10.1.{i // 256}.{i % 256}', 'dst_ip': '10.0.0.2',
+                                'src_port': 40000, 'dst_port': 5000 + j % 2})
+        serial = StatsAccumulator(max_conversations=50)
+        serial.update_batch(packets)
+
+        result = ParallelPipeline(workers=1, shards=7, max_conversations=50).run(packets)
+        assert result['statistics'] == serial.snapshot()
+        assert issue_keys(result['issues']) == issue_keys(IssueDetector().analyze_packets(packets))
+
+    def test_capture_wide_checks_merge_across_shards(self, monkeypatch):
+        """Test scans, floods and rates spread over many shards are merged, not rerun in the parent"""
+        packets = [{'number': i + 1, 'timestamp': i * 0.001, 'length': 60, 'protocol': 'TCP',
+                    'src_ip': '10.0.0.66', 'dst_ip': '10.0.0.2', 'src_port': 40000, 'dst_port': i + 1,
+                    'tcp_flags': 'S'} for i in range(300)]
+        packets += [{'number': 301 + i, 'timestamp': 0.3 + i * 0.001, 'length': 60, 'protocol': 'TCP',
+                     'src_ip': f'172.16.{i // 256}.{i % 256}', 'dst_ip': '10.0.0.3', 'src_port': 1024 + i,
+                     'dst_port': 80, 'tcp_flags': 'S'} for i in range(300)]
+        shipped = []
+        analyze_shard = pipeline_module.analyze_shard
+        monkeypatch.setattr(pipeline_module, 'analyze_shard',
+                            lambda shard, **options: shipped.append(type(shard)) or analyze_shard(shard, **options))
+        pipeline = ParallelPipeline(workers=1, shards=8)
+        monkeypatch.setattr(pipeline.detector, 'run_checks', None)  # Nothing left to run serially
+
+        issues = pipeline.run(packets)['issues']
+        assert shipped == [PacketBatch] * 8
+        assert issue_keys(issues) == issue_keys(IssueDetector().analyze_packets(packets))
+        assert {'PORT_SCAN', 'SYN_FLOOD', 'HIGH_TRAFFIC_RATE'} <= {issue['type'] for issue in issues}
+
+    def test_packet_batch_input(self):
+        """Test a PacketBatch is sharded into sub-batches"""
+        batch = PacketBatch.from_packets(self.packets)
+        result = ParallelPipeline(workers=1, shards=3).run(batch, detect=False)
+        assert result['statistics']['total_packets'] == len(self.packets)
+        assert result['issues'] is None
+
+    def test_empty_capture(self):
+        """Test nothing is computed without packets"""
+        result = ParallelPipeline(workers=1).run([])
+        assert result == {'statistics': None, 'issues': None, 'analyses': None}
+
+
+class TestAnalysisPipeline:
+    def setup_method(self):
+        self.packets = make_packets()
+        self.pipeline = AnalysisPipeline()
+
+    def test_matches_separate_endpoints(self):
+        """Test one pass gives the same results as the separate analyses"""
+        result = self.pipeline.run(self.packets)
+
+        parser = ProtocolParser()
+        assert result['analyses'] == [parser.parse_packet(p) for p in self.packets]
+        assert result['statistics'] == TrafficStatistics().generate_statistics(self.packets)
+        assert issue_keys(result['issues']) == issue_keys(IssueDetector().analyze_packets(self.packets))
+        assert len(result['packets']) == len(self.packets)
+
+    def test_single_traversal(self):
+        """Test every output, issues included, comes from one pass over the packets"""
+        class CountingList(list):
+            passes = 0
+
+            def __iter__(self):
+                CountingList.passes += 1
+                return super().__iter__()
+
+        packets = CountingList(self.packets)
+        result = self.pipeline.run(packets)
+        assert CountingList.passes == 1
+        assert issue_keys(result['issues']) == issue_keys(IssueDetector().analyze_packets(self.packets))
+
+    def test_only_requested_outputs(self):
+        result = self.pipeline.run(self.packets, ['statistics'])
+        assert list(result) == ['statistics']
+
+    def test_field_projection(self):
+        """Test fields trims lists item by item and dicts by key"""
+        result = self.pipeline.run(self.packets, ['packets', 'statistics'],
+                                   fields={'packets': ['number', 'protocol'],
+                                           'statistics': ['total_packets']})
+        assert result['packets'][0] == {'number': 1, 'protocol': 'UDP'}
+        assert result['statistics'] == {'total_packets': 121}
+
+    def test_packet_batch_input(self):
+        batch = PacketBatch.from_packets(self.packets)
+        result = self.pipeline.run(batch, ['statistics', 'issues'])
+        assert result['statistics'] == TrafficStatistics().generate_statistics(batch)
+
+    def test_unknown_output(self):
+        with pytest.raises(ValueError):
+            self.pipeline.run(self.packets, ['statistics', 'graphs'])
@@ -0,0 +1,122 @@
+import pytest
+import sys
+import os
+import threading
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.registry import ComponentRegistry, SHARED, PER_THREAD
+from src.detector import IssueDetector
+
+
+class Component:
+    built = 0
+
+    def __init__(self):
+        Component.built += 1
+
+
+class TestComponentRegistry:
+    def setup_method(self):
+        Component.built = 0
+        self.registry = ComponentRegistry()
+
+    def test_shared_component_is_built_once(self):
+        """Test concurrent callers all get the same shared instance"""
+        self.registry.register('shared', Component)
+        seen = []
+        threads = [threading.Thread(target=lambda: seen.append(self.registry.get('shared')))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert Component.built == 1
+        assert all(instance is seen[0] for instance in seen)
+
+    def test_per_thread_component(self):
+        """Test per-thread components are reused within a thread only"""
+        self.registry.register('local', Component, scope=PER_THREAD)
+        mine = self.registry.get('local')
+        assert self.registry.get('local') is mine
+
+        other = []
+        thread = threading.Thread(target=lambda: other.append(self.registry.get('local')))
+        thread.start()
+        thread.join()
+        assert other[0] is not mine
+
+    def test_warm_up_builds_everything(self):
+        self.registry.register('a', Component)
+        self.registry.register('b', Component)
+        assert set(self.registry.warm_up()) == {'a', 'b'}
+        assert Component.built == 2
+        self.registry.get('a')
+        assert Component.built == 2
+
+    def test_unknown_component(self):
+        with pytest.raises(KeyError):
+            self.registry.get('missing')
+        with pytest.raises(ValueError):
+            self.registry.register('bad', Component, scope='global')
+
+
+def smb_packet(number, src_ip='10.0.0.1'):
+    return {'number': number, 'timestamp': number * 0.01, 'length': 120, 'protocol': 'TCP',
+            'src_ip': src_ip, 'dst_ip': '10.0.0.2', 'src_port': 50000, 'dst_port': 445,
+            'tcp_flags': 'A', 'summary': f'TCP {src_ip}:50000 > 10.0.0.2:445 A'}
+
+
+def run_in_threads(target, count):
+    threads = [threading.Thread(target=target, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+class TestSharedDetector:
+    def test_concurrent_runs_stay_separate(self):
+        """Test threads sharing one IssueDetector each get their own results"""
+        detector = IssueDetector()
+        start = threading.Barrier(8)
+        results = {}
+
+        def analyze(index):
+            packets = [smb_packet(number, f'10.0.1.{index}') for number in range(1, 5001 + index)]
+            start.wait()
+            results[index] = detector.analyze_packets(packets)
+
+        run_in_threads(analyze, 8)
+        for index, issues in results.items():
+            ports = [issue for issue in issues if issue['type'] == 'SUSPICIOUS_PORT']
+            assert [issue['count'] for issue in ports] == [5000 + index]
+            assert f'10.0.1.{index}' in ports[0]['details']
+
+    def test_api_builds_detector_once(self):
+        """Test requests served on different threads reuse one detector and pipeline"""
+        pytest.importorskip('flask')
+        pytest.importorskip('flask_cors')
+        from api import app as api
+
+        built = []
+        factory, scope = api.components._factories['detector']
+        assert scope == SHARED
+
+        def counting_factory():
+            built.append(threading.get_ident())
+            return factory()
+
+        api.components.register('detector', counting_factory)
+        api.components.register('pipeline', api.components._factories['pipeline'][0])
+        statuses = []
+
+        def request(index):
+            client = api.app.test_client()
+            packets = [smb_packet(number, f'10.0.2.{index}') for number in range(1, 21)]
+            statuses.append(client.post('/api/detect-issues', json={'packets': packets}).status_code)
+            statuses.append(client.post('/api/pipeline', json={'packets': packets}).status_code)
+
+        run_in_threads(request, 6)
+        assert statuses == [200] * 12
+        assert len(built) == 1
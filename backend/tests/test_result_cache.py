@@ -0,0 +1,90 @@
+import pytest
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.result_cache import ResultCache, digest_packets
+from src.batch import PacketBatch
+
+
+def make_packets():
+    return [{'number': 1, 'protocol': 'TCP', 'length': 60, 'src_ip': '10.0.0.1', 'dst_ip': '10.0.0.2'},
+            {'number': 2, 'protocol': 'UDP', 'length': 80, 'src_ip': '10.0.0.2', 'dst_ip': '10.0.0.1'}]
+
+
+class TestDigest:
+    def test_content_addressed(self):
+        """Test equal captures share a digest and any change alters it"""
+        assert digest_packets(make_packets()) == digest_packets(make_packets())
+        changed = make_packets()
+        changed[1]['length'] = 81
+        assert digest_packets(changed) != digest_packets(make_packets())
+
+    def test_packet_batch(self):
+        assert (digest_packets(PacketBatch.from_packets(make_packets())) ==
+                digest_packets(PacketBatch.from_packets(make_packets())))
+
+
+class TestResultCache:
+    def test_hits_and_misses(self):
+        """Test a cached result is computed once and counted"""
+        cache = ResultCache()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return {'total_packets': 2}
+
+        key = (digest_packets(make_packets()), 'statistics', None)
+        assert cache.get_or_compute(key, compute) == {'total_packets': 2}
+        assert cache.get_or_compute(key, compute) == {'total_packets': 2}
+        assert len(calls) == 1
+        assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+
+    def test_memory_bound_evicts_least_recent(self):
+        """Test the byte budget evicts the least recently used results"""
+        cache = ResultCache(max_bytes=100, sizeof=lambda value: 40)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get_or_compute('a', lambda: None)
+        cache.put('c', 3)
+
+        assert 'a' in cache and 'c' in cache and 'b' not in cache
+        assert cache.current_bytes == 80
+        assert cache.evictions == 1
+
+    def test_oversized_results_are_not_stored(self):
+        cache = ResultCache(max_bytes=10)
+        cache.put('big', list(range(100)))
+        assert len(cache) == 0
+
+    def test_etag(self):
+        """Test ETags change with the key and with response variants"""
+        key = ('digest', 'pipeline', None)
+        assert ResultCache.etag(key) == ResultCache.etag(key)
+        assert ResultCache.etag(key) != ResultCache.etag(('other', 'pipeline', None))
+        assert ResultCache.etag(key, True) != ResultCache.etag(key, False)
+
+
+class TestConditionalRequests:
+    def setup_method(self):
+        pytest.importorskip('flask')
+        pytest.importorskip('flask_cors')
+        from api import app as api
+        self.client = api.app.test_client()
+        self.body = {'packets': make_packets() * 200}
+
+    def test_post_with_matching_etag_fails_precondition(self):
+        """Test a POST whose ETag still matches gets 412, not 304"""
+        first = self.client.post('/api/statistics', json=self.body)
+        again = self.client.post('/api/statistics', json=self.body,
+                                 headers={'If-None-Match': first.headers['ETag']})
+        assert again.status_code == 412
+        assert 'Accept-Encoding' in again.headers['Vary']
+
+    def test_etag_depends_on_encoding(self):
+        """Test gzip and identity responses carry different ETags"""
+        plain = self.client.post('/api/statistics', json=self.body)
+        gzipped = self.client.post('/api/statistics', json=self.body, headers={'Accept-Encoding': 'gzip'})
+        assert plain.headers['ETag'] != gzipped.headers['ETag']
+        assert 'Accept-Encoding' in plain.headers['Vary']
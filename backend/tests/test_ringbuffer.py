@@ -0,0 +1,183 @@
+import pytest
+import sys
+import os
+import pickle
+import threading
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.ringbuffer import PacketRing, RingView, BLOCK
+from src.capturer import PacketCapturer
+from src.statistics import TrafficStatistics
+
+
+def packet(number, size=100):
+    return {'number': number, 'protocol': 'TCP', 'length': size, 'raw_bytes': b'\x00' * size}
+
+
+class TestPacketRing:
+    def test_behaves_like_a_list(self):
+        """Test len, indexing, slicing and iteration"""
+        ring = PacketRing(max_packets=10)
+        ring.extend(packet(i) for i in range(5))
+
+        assert len(ring) == 5
+        assert ring[0]['number'] == 0
+        assert ring[-1]['number'] == 4
+        assert [p['number'] for p in ring[1:3]] == [1, 2]
+        assert [p['number'] for p in ring] == [0, 1, 2, 3, 4]
+        assert PacketRing() == []
+
+    def test_drop_oldest_packet_budget(self):
+        """Test the oldest packets are overwritten when the ring is full"""
+        ring = PacketRing(max_packets=3)
+        ring.extend(packet(i) for i in range(5))
+
+        assert [p['number'] for p in ring] == [2, 3, 4]
+        assert ring.dropped_packets == 2
+        assert ring.dropped_bytes == 200
+
+    def test_byte_budget(self):
+        """Test the byte budget evicts packets and refuses oversized ones"""
+        ring = PacketRing(max_packets=100, max_bytes=250)
+        ring.extend(packet(i) for i in range(3))
+        assert [p['number'] for p in ring] == [1, 2]
+        assert ring.bytes == 200
+
+        assert ring.append(packet(9, size=300)) is False
+        assert ring.rejected_packets == 1
+
+    def test_views_are_zero_copy_and_detect_overwrites(self):
+        """Test views read the ring in place and report stale entries"""
+        ring = PacketRing(max_packets=3)
+        ring.extend(packet(i) for i in range(3))
+        view = ring.view()
+        assert isinstance(view[0:2], RingView)
+        assert view[1] is ring[1]
+
+        ring.append(packet(3))
+        assert view.stale == 1
+        with pytest.raises(IndexError):
+            view[0]
+        assert view[2]['number'] == 2
+
+    def test_read_since(self):
+        """Test incremental consumers see new packets and missed counts"""
+        ring = PacketRing(max_packets=4)
+        ring.extend(packet(i) for i in range(3))
+        view, missed = ring.read_since(0)
+        assert len(view) == 3 and missed == 0
+
+        ring.extend(packet(i) for i in range(3, 8))
+        view, missed = ring.read_since(view.stop)
+        assert [p['number'] for p in view] == [4, 5, 6, 7]
+        assert missed == 1
+
+    def test_block_policy(self):
+        """Test a full ring blocks the producer until a consumer frees space"""
+        ring = PacketRing(max_packets=2, policy=BLOCK, block_timeout=5)
+        ring.extend(packet(i) for i in range(2))
+
+        producer = threading.Thread(target=ring.append, args=(packet(2),))
+        producer.start()
+        producer.join(0.05)
+        assert producer.is_alive()
+
+        ring.consume(1)
+        producer.join(1)
+        assert not producer.is_alive()
+        assert [p['number'] for p in ring] == [1, 2]
+        assert ring.dropped_packets == 0
+
+    def test_block_timeout_rejects(self):
+        """Test a blocked producer gives up after block_timeout"""
+        ring = PacketRing(max_packets=1, policy=BLOCK, block_timeout=0.01)
+        ring.append(packet(0))
+        assert ring.append(packet(1)) is False
+        assert ring.rejected_packets == 1
+
+    def test_block_without_consumer_drops(self):
+        """Test a ring nobody consumes stops waiting after the first timeout"""
+        ring = PacketRing(max_packets=2, policy=BLOCK, block_timeout=0.05)
+        ring.extend(packet(i) for i in range(2))
+        start = time.perf_counter()
+        ring.extend(packet(i) for i in range(2, 100))
+        assert time.perf_counter() - start < 1
+        assert ring.rejected_packets == 98
+
+        ring.consume(1)  # A consumer shows up: blocking resumes
+        assert ring.append(packet(100)) is True
+        assert [p['number'] for p in ring] == [1, 100]
+
+    def test_capturer_block_policy_terminates(self):
+        """Test a capture with the block policy and no consumer still finishes"""
+        capturer = PacketCapturer(max_packets=2, overflow=BLOCK)
+        capturer.ring.block_timeout = 0.05
+        capturer.start_capture(5)
+        assert len(capturer.captured_packets) == 2
+        assert capturer.ring.rejected_packets == 3
+
+    def test_slots_grow_lazily(self):
+        """Test a large ring does not allocate its capacity up front"""
+        ring = PacketRing(max_packets=1000000)
+        ring.extend(packet(i) for i in range(3))
+        assert len(ring._slots) == 3
+
+        small = PacketRing(max_packets=3)
+        small.extend(packet(i) for i in range(10))
+        assert len(small._slots) == 3
+        assert [p['number'] for p in small] == [7, 8, 9]
+
+    def test_iteration_survives_overwrites(self):
+        """Test iterating while the producer overwrites slots never raises"""
+        ring = PacketRing(max_packets=50)
+        ring.extend(packet(i) for i in range(50))
+        done = threading.Event()
+
+        def produce():
+            i = 50
+            while not done.is_set():
+                ring.append(packet(i))
+                i += 1
+
+        producer = threading.Thread(target=produce)
+        producer.start()
+        try:
+            for _ in range(200):
+                numbers = [p['number'] for p in ring]
+                assert numbers == sorted(set(numbers))
+        finally:
+            done.set()
+            producer.join()
+
+    def test_iteration_is_lazy_and_skips_overwritten(self):
+        """Test iteration reads slots in place and skips packets overwritten meanwhile"""
+        ring = PacketRing(max_packets=5)
+        ring.extend(packet(i) for i in range(5))
+        ring.snapshot = None  # Iteration must not copy the ring
+
+        numbers = []
+        for p in ring:
+            numbers.append(p['number'])
+            if p['number'] == 1:
+                ring.extend(packet(i) for i in range(5, 8))  # Overwrites 0-2
+        assert numbers == [0, 1, 3, 4]
+
+        ring.consume(2)
+        assert [p['number'] for p in ring] == [5, 6, 7]
+
+    def test_pickles_as_list(self):
+        """Test saving a ring with pickle stores plain packets"""
+        ring = PacketRing(max_packets=2)
+        ring.extend(packet(i) for i in range(3))
+        assert pickle.loads(pickle.dumps(ring)) == list(ring)
+
+    def test_capturer_uses_ring(self):
+        """Test the capturer store is bounded and works with analysis code"""
+        capturer = PacketCapturer(max_packets=4)
+        capturer.start_capture(6)
+
+        assert len(capturer.captured_packets) == 4
+        assert capturer.ring.dropped_packets == 2
+        stats = TrafficStatistics().generate_statistics(capturer.captured_packets)
+        assert stats['total_packets'] == 4
@@ -0,0 +1,185 @@
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import pytest
+
+import importlib.metadata
+
+from src.rules import DetectionRule, RuleEngine, RULES, ENTRY_POINT_GROUP, register_rule, load_plugin_rules
+from src.detector import IssueDetector
+from src.batch import PacketBatch
+
+
+def make_packet(number, protocol='TCP', src_port=40000, dst_port=80, length=100):
+    return {'number': number, 'timestamp': 100.0 + number * 0.01, 'length': length,
+            'protocol': protocol, 'src_ip': '10.0.0.1', 'dst_ip': '10.0.0.2',
+            'src_port': src_port, 'dst_port': dst_port,
+            'summary': f"{protocol} 10.0.0.1:{src_port} > 10.0.0.2:{dst_port}"}
+
+
+class CountingRule(DetectionRule):
+    """Records every hook call"""
+
+    name = 'counting'
+    protocols = ('UDP',)
+
+    def reset(self):
+        super().reset()
+        self.packets = []
+        self.flows = 0
+        self.context = None
+
+    def on_packet(self, packet):
+        self.packets.append(packet['number'])
+
+    def on_flow(self, flow):
+        self.flows += 1
+
+    def finalize(self, context):
+        self.context = context
+        self.report({'type': 'COUNTED', 'severity': 'LOW', 'description': '',
+                     'details': f"{len(self.packets)} of {context.packets}", 'educational_note': ''})
+
+
+class TestRuleEngine:
+    def test_dispatch_by_protocol(self):
+        """Test packets only reach rules registered for their protocol"""
+        rule = CountingRule()
+        packets = [make_packet(1, 'TCP'), make_packet(2, 'UDP'), make_packet(3, 'UDP')]
+        results = RuleEngine([rule]).run(packets)
+
+        assert rule.packets == [2, 3]
+        assert results['counting'][0]['details'] == '2 of 3'
+
+    def test_flow_and_finalize_hooks(self):
+        """Test per-flow hooks see each flow once and finalize sees the totals"""
+        rule = CountingRule()
+        packets = [make_packet(1, 'UDP', src_port=1000), make_packet(2, 'UDP', src_port=1000),
+                   make_packet(3, 'UDP', src_port=2000), make_packet(4, 'TCP')]
+        RuleEngine([rule]).run(packets)
+
+        assert rule.flows == 2  # The TCP flow is not one of the rule's protocols
+        assert rule.context.packets == 4
+        assert rule.context.first_seen == packets[0]['timestamp']
+        assert rule.context.last_seen == packets[3]['timestamp']
+
+    def test_chunks_match_single_run(self):
+        """Test feeding chunks gives the same issues as one run"""
+        packets = [make_packet(i, dst_port=445 if i % 3 == 0 else 80, length=50) for i in range(1, 40)]
+        detector = IssueDetector()
+        whole = detector.run_checks(packets, detector.checks)
+
+        engine = detector.engine()
+        for start in range(0, len(packets), 7):
+            engine.feed(packets[start:start + 7])
+        assert engine.finish() == whole
+
+    def test_single_packets_match_single_run(self):
+        """Test on_packet() gives the same issues as feeding the whole list"""
+        packets = [make_packet(i, dst_port=445 if i % 3 == 0 else 80, length=50) for i in range(1, 40)]
+        detector = IssueDetector()
+        engine = detector.engine()
+        for packet in packets:
+            engine.on_packet(packet)
+        assert engine.finish() == detector.run_checks(packets, detector.checks)
+
+    def test_evicted_flows_are_still_checked(self):
+        """Test flows pushed out of a full flow table reach the per-flow hooks"""
+        rule = CountingRule()
+        packets = [make_packet(i, 'UDP', src_port=1000 + i) for i in range(100)]
+        engine = RuleEngine([rule], max_flows=10)
+        engine.run(packets)
+
+        assert len(engine.context.flows) == 10
+        assert engine.context.flows.evicted_flows == 90
+        assert rule.flows == 100
+
+    def test_timings_per_rule(self):
+        """Test the engine reports the time spent in every rule"""
+        engine = RuleEngine([CountingRule()], timed=True)
+        engine.run([make_packet(1, 'UDP')])
+        assert engine.timings['counting'] > 0
+        assert engine.slowest(1)[0][0] == 'counting'
+
+    def test_batch_input(self):
+        """Test a PacketBatch is accepted and its flows are built column-wise"""
+        rule = CountingRule()
+        RuleEngine([rule]).run(PacketBatch.from_packets([make_packet(1, 'UDP'), make_packet(2, 'UDP')]))
+        assert rule.packets == [1, 2]
+        assert rule.flows == 1
+
+
+class TestPluggableRules:
+    def test_custom_rules(self):
+        """Test a detector can run third-party rules next to the built-ins"""
+        detector = IssueDetector(rules=[CountingRule, *RULES.values()])
+        issues = detector.analyze_packets([make_packet(1, 'UDP')])
+        assert detector.checks[0] == 'counting'
+        assert issues[0]['type'] == 'COUNTED'
+        assert set(detector.rule_timings) == set(detector.checks)
+
+    def test_register_rule(self):
+        """Test registered rules join the default rule set"""
+        @register_rule
+        class PluginRule(DetectionRule):
+            name = 'test_plugin'
+
+        try:
+            assert 'test_plugin' in IssueDetector().checks
+        finally:
+            del RULES['test_plugin']
+        assert 'test_plugin' not in IssueDetector().checks
+
+    @pytest.mark.parametrize('legacy', [False, True])
+    def test_plugin_entry_points(self, monkeypatch, legacy):
+        """Test plugin rules load from entry_points() on old (dict) and new (select) APIs"""
+        class PluginEntryPoint:
+            name = 'counting'
+
+            def load(self):
+                return CountingRule
+
+        class EntryPoints(dict):
+            def select(self, group):
+                return self.get(group, [])
+
+        found = {ENTRY_POINT_GROUP: [PluginEntryPoint()], 'other': []}
+        monkeypatch.setattr(importlib.metadata, 'entry_points',
+                            lambda **kwargs: dict(found) if legacy else EntryPoints(found))
+        try:
+            assert load_plugin_rules.__wrapped__() == ('counting',)
+            assert RULES['counting'] is CountingRule
+        finally:
+            RULES.pop('counting', None)
+
+    def test_rule_needs_name(self):
+        """Test a rule without a name cannot be registered"""
+        with pytest.raises(ValueError):
+            register_rule(type('Nameless', (DetectionRule,), {}))
+
+    def test_unknown_check(self):
+        """Test asking for an unknown check fails clearly"""
+        with pytest.raises(ValueError):
+            IssueDetector().run_checks([make_packet(1)], ['no_such_check'])
+
+
+class TestBuiltinRules:
+    def test_suspicious_port_uses_decoded_ports(self):
+        """Test port 4450 is not mistaken for SMB (445)"""
+        detector = IssueDetector()
+        issues = detector.analyze_packets([make_packet(1, dst_port=445), make_packet(2, dst_port=4450)])
+        ports = [issue for issue in issues if issue['type'] == 'SUSPICIOUS_PORT']
+        assert len(ports) == 1
+        assert 'port 445' in ports[0]['description']
+
+    def test_simulated_packets_fall_back_to_summary(self):
+        """Test packets without decoded ports are still checked via the summary"""
+        packet = {'protocol': 'TCP', 'length': 100, 'summary': 'TCP 10.0.0.1:50000 > 10.0.0.2:3389'}
+        issues = IssueDetector().analyze_packets([packet])
+        assert [issue['type'] for issue in issues] == ['SUSPICIOUS_PORT']
+
+    def test_high_traffic_rate(self):
+        """Test the packet rate is computed over the capture's time span"""
+        issues = IssueDetector().analyze_packets([make_packet(i) for i in range(1, 30)])
+        assert 'HIGH_TRAFFIC_RATE' in [issue['type'] for issue in issues]
@@ -0,0 +1,79 @@
+import gzip
+import json
+import zlib
+import pytest
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.serialization import (SERIALIZERS, get_serializer, compact_packets, expand_packets,
+                               negotiate_encoding, compress)
+from src.batch import PacketBatch
+from src.statistics import TrafficStatistics
+from src.storage import PacketStorage
+
+
+def make_packets():
+    return [{'number': 1, 'protocol': 'TCP', 'length': 60, 'src_ip': '10.0.0.1', 'timestamp': 1.5},
+            {'number': 2, 'protocol': 'DNS', 'length': 80, 'summary': 'DNS query é', 'timestamp': 2.5}]
+
+
+class TestSerializers:
+    @pytest.mark.parametrize('name', sorted(SERIALIZERS))
+    def test_same_json_as_stdlib(self, name):
+        """Test every serializer produces JSON the stdlib reads back identically"""
+        stats = TrafficStatistics().generate_statistics(make_packets())
+        body = get_serializer(name).dumps({'statistics': stats, 'packets': make_packets()})
+        assert json.loads(body) == json.loads(json.dumps({'statistics': stats, 'packets': make_packets()}))
+
+    def test_fallback_for_unknown_types(self):
+        body = get_serializer('json').dumps({'raw': b'\x01\x02'})
+        assert json.loads(body) == {'raw': '0102'}
+
+    def test_unknown_serializer(self):
+        with pytest.raises(ValueError):
+            get_serializer('msgpack')
+
+
+class TestCompactPackets:
+    def test_round_trip(self):
+        """Test the compact layout keeps every field"""
+        compact = compact_packets(make_packets())
+        assert compact['fields'][:3] == ['number', 'protocol', 'length']
+        expanded = expand_packets(compact)
+        assert expanded[1]['summary'] == 'DNS query é'
+        assert expanded[0]['summary'] is None
+
+    def test_packet_batch(self):
+        batch = PacketBatch.from_packets(make_packets())
+        compact = compact_packets(batch, fields=['number', 'protocol'])
+        assert compact['rows'] == [[1, 'TCP'], [2, 'DNS']]
+
+
+class TestCompression:
+    @pytest.mark.parametrize('header, expected', [
+        ('gzip, deflate, br', 'gzip'),
+        ('deflate', 'deflate'),
+        ('gzip;q=0.5, deflate;q=0.8', 'deflate'),
+        ('gzip;q=0, identity', None),
+        ('*', 'gzip'),
+        ('br', None),
+        (None, None),
+    ])
+    def test_negotiation(self, header, expected):
+        assert negotiate_encoding(header) == expected
+
+    def test_compress(self):
+        body = b'{"packets": []}' * 100
+        assert gzip.decompress(compress(body, 'gzip')) == body
+        assert zlib.decompress(compress(body, 'deflate')) == body
+        assert compress(body, None) is body
+
+
+class TestCompactCaptureFiles:
+    def test_save_json_is_compact(self, tmp_path):
+        """Test saved JSON has no indentation and still loads"""
+        storage = PacketStorage(storage_dir=str(tmp_path))
+        storage.save_capture(make_packets(), 'trace', 'json')
+        assert b'\n  ' not in (tmp_path / 'trace.json').read_bytes()
+        assert storage.load_capture('trace.json')[1]['summary'] == 'DNS query é'
@@ -0,0 +1,65 @@
+import pytest
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.sessions import CaptureSessionStore, CaptureNotFoundError
+
+
+class TestCaptureSessionStore:
+    def setup_method(self):
+        self.store = CaptureSessionStore(max_sessions=2)
+        self.packets = [{'number': 1, 'protocol': 'TCP'}, {'number': 2, 'protocol': 'UDP'}]
+
+    def test_create_and_get(self):
+        """Test a capture is stored and found by its ID"""
+        session = self.store.create(self.packets, source='simulation')
+        assert self.store.get(session.capture_id).packets is self.packets
+        assert session.info()['packets'] == 2
+
+    def test_unknown_id(self):
+        """Test unknown IDs raise CaptureNotFoundError"""
+        with pytest.raises(CaptureNotFoundError):
+            self.store.get('missing')
+
+    def test_results_are_cached_per_key(self):
+        """Test each analysis runs once per capture version"""
+        session = self.store.create(self.packets)
+        calls = []
+
+        def count(packets):
+            calls.append(1)
+            return len(packets)
+
+        assert session.cached(('statistics', None), count) == 2
+        assert session.cached(('statistics', None), count) == 2
+        assert session.cached(('statistics', 'tcp'), count) == 2
+        assert len(calls) == 2
+
+    def test_update_invalidates_cache(self):
+        """Test replacing the packets bumps the version and drops results"""
+        session = self.store.create(self.packets)
+        session.cached('total', len)
+        self.store.update(session.capture_id, self.packets[:1])
+
+        assert session.version == 2
+        assert session.cached('total', len) == 1
+
+    def test_least_recently_used_sessions_are_dropped(self):
+        """Test the store keeps at most max_sessions"""
+        first = self.store.create(self.packets)
+        second = self.store.create(self.packets)
+        self.store.get(first.capture_id)
+        self.store.create(self.packets)
+
+        assert len(self.store) == 2
+        with pytest.raises(CaptureNotFoundError):
+            self.store.get(second.capture_id)
+
+    def test_idle_sessions_expire(self):
+        """Test sessions unused for longer than the TTL are removed"""
+        store = CaptureSessionStore(ttl=60)
+        session = store.create(self.packets)
+        session.last_used -= 120
+        with pytest.raises(CaptureNotFoundError):
+            store.get(session.capture_id)
@@ -0,0 +1,138 @@
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import pytest
+
+from src.sketches import LinearCounter, HyperLogLog, hash64
+from src.detector import IssueDetector, PortScanRule, SynFloodRule
+from src.rules import RuleEngine
+
+
+def probe(number, src_ip, dst_ip, dst_port, flags='S', src_port=40000):
+    return {'number': number, 'timestamp': number * 0.001, 'length': 60, 'protocol': 'TCP',
+            'src_ip': src_ip, 'dst_ip': dst_ip, 'src_port': src_port, 'dst_port': dst_port,
+            'tcp_flags': flags}
+
+
+def issues_of(rule, packets):
+    return RuleEngine([rule]).run(packets)[rule.name]
+
+
+class TestSketches:
+    def test_hash_is_stable(self):
+        """Test hashes do not depend on the process (unlike hash())"""
+        assert hash64('10.0.0.1') == hash64('10.0.0.1')
+        assert hash64(80) != hash64(81)
+        assert hash64(0) == 0xE220A8397B1DCDAF
+
+    def test_linear_counter(self):
+        """Test small sets are counted (nearly) exactly and duplicates ignored"""
+        counter = LinearCounter(bits=1024)
+        for port in list(range(100)) * 3:
+            counter.add(port)
+        assert 95 <= counter.count() <= 105
+        assert len(counter._bitmap) == 128
+
+    def test_linear_counter_saturates(self):
+        """Test a full bitmap reports its ceiling instead of failing"""
+        counter = LinearCounter(bits=64)
+        for port in range(10000):
+            counter.add(port)
+        assert counter.saturated
+        assert counter.count() == round(64 * 4.1588830833596715)
+
+    @pytest.mark.parametrize('count', [10, 1000, 100000])
+    def test_hyperloglog_accuracy(self, count):
+        """Test estimates stay within a few standard errors at any scale"""
+        sketch = HyperLogLog(precision=10)
+        for i in range(count):
+            sketch.add(f"10.{i >> 16}.{(i >> 8) & 255}.{i & 255}")
+        assert abs(sketch.count() - count) <= max(2, count * 0.1)
+        assert len(sketch.registers) == 1024
+
+    def test_hyperloglog_merge(self):
+        """Test merged sketches estimate the union"""
+        a, b = HyperLogLog(), HyperLogLog()
+        for i in range(3000):
+            (a if i % 2 else b).add(i)
+        assert abs(a.merge(b).count() - 3000) <= 300
+        with pytest.raises(ValueError):
+            a.merge(HyperLogLog(precision=6))
+
+
+class TestScanRules:
+    def test_vertical_scan(self):
+        """Test one source probing many ports of one host"""
+        packets = [probe(i, '10.0.0.66', '10.0.0.2', port) for i, port in enumerate(range(1, 1025))]
+        issues = issues_of(PortScanRule(), packets)
+        assert len(issues) == 1
+        assert issues[0]['description'] == 'Vertical port scan from 10.0.0.66'
+
+    def test_horizontal_scan(self):
+        """Test one source probing one port across many hosts"""
+        packets = [probe(i, '10.0.0.66', f'10.0.{i // 256}.{i % 256}', 445) for i in range(500)]
+        issues = issues_of(PortScanRule(), packets)
+        assert [issue['description'] for issue in issues] == ['Horizontal port scan from 10.0.0.66']
+
+    def test_established_traffic_is_not_a_scan(self):
+        """Test ACKed traffic (replies, established connections) is ignored"""
+        packets = [probe(i, '10.0.0.2', '10.0.0.66', 40000 + i, flags='SA') for i in range(1000)]
+        packets += [probe(i, '10.0.0.66', '10.0.0.2', 80, flags='A') for i in range(1000)]
+        assert issues_of(PortScanRule(), packets) == []
+
+    def test_answered_udp_is_not_a_scan(self):
+        """Test replies to UDP requests (e.g. DNS answers) are not counted as probes"""
+        packets = []
+        for i in range(200):
+            query = dict(probe(2 * i, '10.0.0.2', '8.8.8.8', 53, src_port=40000 + i), protocol='DNS')
+            answer = dict(probe(2 * i + 1, '8.8.8.8', '10.0.0.2', 40000 + i, src_port=53), protocol='DNS')
+            packets += [query, answer]
+        # A service on a high port: only the reverse 5-tuple marks its replies
+        for i in range(200):
+            request = dict(probe(1000 + 2 * i, '10.0.0.2', '10.0.0.9', 5353, src_port=40000 + i), protocol='UDP')
+            reply = dict(probe(1001 + 2 * i, '10.0.0.9', '10.0.0.2', 40000 + i, src_port=5353), protocol='UDP')
+            packets += [request, reply]
+        assert issues_of(PortScanRule(), packets) == []
+
+    def test_udp_scan(self):
+        """Test unanswered UDP probes still count, even from a service source port"""
+        packets = [dict(probe(i, '10.0.0.66', '10.0.0.2', port, src_port=53), protocol='UDP')
+                   for i, port in enumerate(range(1, 1025))]
+        issues = issues_of(PortScanRule(), packets)
+        assert [issue['description'] for issue in issues] == ['Vertical port scan from 10.0.0.66']
+
+    def test_bounded_sources(self):
+        """Test per-source state stays bounded and scanners still get reported"""
+        rule = PortScanRule(max_sources=16)
+        packets = [probe(i, '10.9.9.9', '10.0.0.2', i + 1) for i in range(200)]
+        packets += [probe(1000 + i, f'172.16.{i // 256}.{i % 256}', '10.0.0.2', 80) for i in range(5000)]
+        issues = issues_of(rule, packets)
+        assert len(rule.sources) == 16
+        assert [issue['description'] for issue in issues] == ['Vertical port scan from 10.9.9.9']
+
+    def test_syn_flood(self):
+        """Test many unanswered SYNs from spoofed sources"""
+        packets = [probe(i, f'198.51.{i // 256}.{i % 256}', '10.0.0.2', 80, src_port=1024 + i)
+                   for i in range(1000)]
+        packets += [probe(2000 + i, '10.0.0.2', '198.51.0.1', 1024, flags='SA', src_port=80) for i in range(50)]
+        issues = issues_of(SynFloodRule(), packets)
+        assert len(issues) == 1
+        assert issues[0]['description'] == 'Possible SYN flood against 10.0.0.2:80'
+        assert '1000 SYNs, 50 SYN-ACKs (5.0% answered)' in issues[0]['details']
+
+    def test_answered_syns_are_not_a_flood(self):
+        """Test a busy server that answers its SYNs"""
+        packets = []
+        for i in range(500):
+            client = f'198.51.0.{i % 200}'
+            packets.append(probe(2 * i, client, '10.0.0.2', 443, src_port=2000 + i))
+            packets.append(probe(2 * i + 1, '10.0.0.2', client, 2000 + i, flags='SA', src_port=443))
+        assert issues_of(SynFloodRule(), packets) == []
+
+    def test_default_detector_runs_scan_rules(self):
+        """Test the scan and flood rules are part of the default rule set"""
+        detector = IssueDetector()
+        assert {'port_scans', 'syn_floods'} <= set(detector.checks)
+        packets = [probe(i, '10.0.0.66', '10.0.0.2', port) for i, port in enumerate(range(1, 300))]
+        assert 'PORT_SCAN' in [issue['type'] for issue in detector.analyze_packets(packets)]
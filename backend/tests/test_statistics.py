@@ -3,7 +3,7 @@ import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-from src.statistics import TrafficStatistics
+from src.statistics import TrafficStatistics, StatsAccumulator
 
 class TestTrafficStatistics:
     def setup_method(self):
@@ -69,4 +69,53 @@ class TestTrafficStatistics:
         """Test displaying empty statistics"""
         result = self.stats.generate_statistics([])
         # Should not raise an exception
-        self.stats.display_statistics(result)
\ No newline at end of file
+        self.stats.display_statistics(result)
+
+class TestStatsAccumulator:
+    def setup_method(self):
+        self.packets = [
+            {'protocol': 'TCP', 'length': 100, 'timestamp': 1000,
+             'src_ip': '10.0.0.1', 'dst_ip': '10.0.0.2', 'src_port': 80, 'dst_port': 5000},
+            {'protocol': 'UDP', 'length': 50, 'timestamp': 1001, 'summary': 'UDP packet 1'},
+            {'protocol': 'TCP', 'length': 1500, 'timestamp': 1002,
+             'src_ip': '10.0.0.1', 'dst_ip': '10.0.0.2', 'src_port': 80, 'dst_port': 5000},
+            {'protocol': 'DNS', 'length': 0, 'timestamp': 1003, 'summary': 'DNS query'},
+            {'protocol': 'TCP', 'length': 200, 'timestamp': 1004.5,
+             'src_ip': '10.0.0.2', 'dst_ip': '10.0.0.1', 'src_port': 5000, 'dst_port': 80}
+        ]
+
+    def test_incremental_matches_batch(self):
+        """Test update() one packet at a time matches generate_statistics"""
+        accumulator = StatsAccumulator()
+        for packet in self.packets:
+            accumulator.update(packet)
+
+        expected = TrafficStatistics().generate_statistics(self.packets)
+        assert accumulator.snapshot() == expected
+        assert expected['total_bytes'] == 100 + 50 + 1500 + 128 + 200  # DNS length estimated
+
+    def test_merge_matches_single_pass(self):
+        """Test merging partial accumulators gives the same statistics"""
+        left, right = StatsAccumulator(), StatsAccumulator()
+        left.update_batch(self.packets[:2])
+        right.update_batch(self.packets[2:])
+
+        merged = left.merge(right).snapshot()
+        expected = TrafficStatistics().generate_statistics(self.packets)
+
+        assert merged == expected
+        # Both directions belong to one bidirectional conversation
+        assert merged['top_conversations'] == [('10.0.0.1:80 → 10.0.0.2:5000', 3)]
+
+    def test_empty_snapshot(self):
+        """Test an empty accumulator returns empty statistics"""
+        assert StatsAccumulator().snapshot()['total_packets'] == 0
+
+    def test_conversations_are_bounded(self):
+        """Test the conversation table never exceeds its cap"""
+        accumulator = StatsAccumulator(max_conversations=8)
+        for i in range(100):
+            accumulator.update({'protocol': 'TCP', 'length': 60, 'timestamp': 1000 + i,
+                                'src_ip': f'10.0.0.{i}', 'dst_ip': '10.0.0.254',
+                                'src_port': 1, 'dst_port': 80})
+        assert len(accumulator.flows) <= 8
@@ -0,0 +1,144 @@
+import asyncio
+import json
+import sys
+import os
+import threading
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.streaming import CaptureStream, format_event
+from src.capturer import PacketCapturer
+
+
+def make_packet(number, protocol='TCP'):
+    return {'number': number, 'timestamp': 100.0 + number, 'length': 100,
+            'protocol': protocol, 'src_ip': '10.0.0.1', 'dst_ip': '10.0.0.2',
+            'summary': f"{protocol} packet", 'real_packet': False}
+
+
+def parse_events(chunks):
+    events = []
+    for chunk in chunks:
+        if chunk.startswith(':'):
+            continue
+        name, data = chunk.strip().split('\n')
+        events.append((name[len('event: '):], json.loads(data[len('data: '):])))
+    return events
+
+
+class TestCaptureStream:
+    def test_batches_and_deltas(self):
+        """Test an update carries the batched summaries and the stats delta"""
+        stream = CaptureStream(flush_interval=0.01, max_batch=10)
+        for number in range(1, 4):
+            stream.publish(make_packet(number, 'UDP' if number == 2 else 'TCP'))
+
+        update = stream.next_update()
+        assert [p['number'] for p in update['packets']] == [1, 2, 3]
+        assert update['delta'] == {'packets': 3, 'bytes': 300, 'protocols': {'TCP': 2, 'UDP': 1}}
+
+        stream.publish(make_packet(4))
+        update = stream.next_update()
+        assert update['delta']['packets'] == 1
+        assert update['totals']['packets'] == 4
+        assert stream.next_update() is None
+
+    def test_full_batch_is_split(self):
+        """Test an update never carries more than max_batch summaries"""
+        stream = CaptureStream(flush_interval=0.01, max_batch=2)
+        for number in range(1, 6):
+            stream.publish(make_packet(number))
+        assert [len(stream.next_update()['packets']) for _ in range(3)] == [2, 2, 1]
+
+    def test_slow_client_is_coalesced(self):
+        """Test the buffer stays bounded and reports what it dropped"""
+        stream = CaptureStream(flush_interval=0.01, max_batch=5, max_pending=5)
+        for number in range(1, 21):
+            stream.publish(make_packet(number))
+
+        update = stream.next_update()
+        assert [p['number'] for p in update['packets']] == [16, 17, 18, 19, 20]
+        assert update['coalesced'] == 15
+        assert update['delta']['packets'] == 20
+        assert stream.coalesced == 15
+
+    def test_events_end_with_complete(self):
+        """Test the SSE stream ends with the final statistics"""
+        stream = CaptureStream(flush_interval=0.01)
+        stream.publish(make_packet(1))
+        stream.close(capture_id='abc')
+
+        events = parse_events(stream.events())
+        assert [name for name, _ in events] == ['batch', 'complete']
+        assert events[1][1]['capture_id'] == 'abc'
+        assert events[1][1]['statistics']['total_packets'] == 1
+
+    def test_async_events(self):
+        """Test the asyncio variant yields the same events"""
+        stream = CaptureStream(flush_interval=0.01, max_batch=2)
+        for number in range(1, 6):
+            stream.publish(make_packet(number))
+        stream.close(capture_id='abc')
+
+        async def collect():
+            return [chunk async for chunk in stream.async_events()]
+
+        events = parse_events(asyncio.run(collect()))
+        assert [name for name, _ in events] == ['batch', 'batch', 'batch', 'complete']
+        assert events[-1][1]['total'] == 5
+
+    def test_error_event(self):
+        """Test a failed capture ends the stream with an error event"""
+        stream = CaptureStream(flush_interval=0.01)
+        stream.close(error='no permission')
+        assert parse_events(stream.events()) == [('error', {'error': 'no permission'})]
+
+    def test_alerts_ride_with_updates(self):
+        """Test detector alerts are delivered without waiting for a full batch"""
+        stream = CaptureStream(flush_interval=5, max_batch=100)
+        stream.publish(make_packet(1))
+        stream.alert({'type': 'HIGH_TRAFFIC_RATE'})
+
+        update = stream.next_update()
+        assert update['alerts'] == [{'type': 'HIGH_TRAFFIC_RATE'}]
+        assert update['packets'][0]['number'] == 1
+        assert stream.next_update(timeout=0) is None
+
+    def test_format_event(self):
+        """Test messages follow the Server-Sent Events wire format"""
+        assert format_event('batch', {'seq': 1}) == 'event: batch\ndata: {"seq":1}\n\n'
+
+
+class TestCapturerListeners:
+    def test_listener_sees_every_packet(self):
+        """Test listeners are called for each captured packet"""
+        capturer = PacketCapturer()
+        seen = []
+        capturer.add_listener(seen.append)
+        capturer.start_capture(5)
+        assert [p['number'] for p in seen] == [1, 2, 3, 4, 5]
+
+    def test_stop_ends_capture(self):
+        """Test stop() ends a running capture early"""
+        capturer = PacketCapturer()
+        capturer.add_listener(lambda packet: capturer.stop() if packet['number'] == 3 else None)
+        capturer.start_capture(10)
+        assert len(capturer.captured_packets) == 3
+
+    def test_stream_from_capture_thread(self):
+        """Test a capture running in another thread streams to completion"""
+        capturer = PacketCapturer()
+        stream = CaptureStream(flush_interval=0.01, max_batch=4)
+        capturer.add_listener(stream.publish)
+
+        def run():
+            capturer.start_capture(10)
+            stream.close(capture_id='live')
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        events = parse_events(stream.events())
+        thread.join()
+
+        batches = [data for name, data in events if name == 'batch']
+        assert sum(len(b['packets']) for b in batches) == 10
+        assert events[-1][1]['total'] == 10
@@ -0,0 +1,141 @@
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.tcp_analysis import (TcpTracker, seq_diff, RETRANSMISSION, OUT_OF_ORDER,
+                              DUPLICATE_ACK, ZERO_WINDOW)
+from src.detector import IssueDetector
+from src.batch import PacketBatch
+
+CLIENT = ('10.0.0.1', 40000)
+SERVER = ('10.0.0.2', 80)
+
+
+def segment(timestamp, seq, payload_length=0, ack=1, flags='A', window=65535, reverse=False, client=CLIENT):
+    (src_ip, src_port), (dst_ip, dst_port) = (SERVER, client) if reverse else (client, SERVER)
+    return {'timestamp': timestamp, 'protocol': 'TCP', 'length': 54 + payload_length,
+            'src_ip': src_ip, 'src_port': src_port, 'dst_ip': dst_ip, 'dst_port': dst_port,
+            'tcp_seq': seq, 'tcp_ack': ack, 'tcp_flags': flags, 'tcp_window': window,
+            'payload_length': payload_length}
+
+
+def events(tracker, packets):
+    return [event for packet in packets for event in tracker.observe(packet)]
+
+
+def handshake():
+    return [segment(0.0, 100, flags='S', ack=0),
+            segment(0.01, 500, flags='SA', ack=101, reverse=True),
+            segment(0.02, 101, ack=501)]
+
+
+class TestTcpTracker:
+    def test_clean_transfer(self):
+        """Test an in-order transfer raises nothing"""
+        packets = handshake() + [segment(0.1 + i * 0.01, 101 + i * 1000, 1000, ack=501) for i in range(5)]
+        packets += [segment(0.2, 501, ack=5101, reverse=True)]
+        tracker = TcpTracker()
+        assert events(tracker, packets) == []
+        assert tracker.segments == len(packets)
+
+    def test_busy_conversation_is_not_a_retransmission(self):
+        """Test many packets in one conversation are not flagged on their own"""
+        packets = [segment(i * 0.01, 1 + i * 100, 100, ack=1) for i in range(100)]
+        assert events(TcpTracker(), packets) == []
+
+    def test_retransmission(self):
+        """Test data sent again below the next expected sequence number"""
+        packets = handshake() + [segment(0.1, 101, 1000, ack=501), segment(0.2, 1101, 1000, ack=501),
+                                 segment(0.5, 101, 1000, ack=501)]
+        tracker = TcpTracker()
+        assert events(tracker, packets) == [RETRANSMISSION]
+        assert next(iter(tracker)).retransmissions == 1
+
+    def test_out_of_order(self):
+        """Test a segment filling an earlier gap is reordering, not a retransmission"""
+        packets = [segment(0.0, 1, 100), segment(0.1, 201, 100), segment(0.2, 101, 100),
+                   segment(0.3, 101, 100)]
+        assert events(TcpTracker(), packets) == [OUT_OF_ORDER, RETRANSMISSION]
+
+    def test_duplicate_acks(self):
+        """Test pure ACKs repeating the last ACK and window"""
+        packets = [segment(i * 0.01, 500, ack=1001, reverse=True) for i in range(4)]
+        tracker = TcpTracker()
+        assert events(tracker, packets) == [DUPLICATE_ACK] * 3
+        assert next(iter(tracker)).fast_retransmits == 1
+
+    def test_window_update_is_not_a_duplicate_ack(self):
+        """Test an ACK that only changes the window is not a duplicate"""
+        packets = [segment(0.0, 500, ack=1001, reverse=True, window=1000),
+                   segment(0.1, 500, ack=1001, reverse=True, window=2000)]
+        assert events(TcpTracker(), packets) == []
+
+    def test_zero_window(self):
+        """Test receivers advertising no buffer space"""
+        packets = [segment(0.0, 500, ack=1001, reverse=True, window=0)]
+        assert events(TcpTracker(), packets) == [ZERO_WINDOW]
+
+    def test_keep_alive(self):
+        """Test keep-alives (one byte below next_seq) are not retransmissions"""
+        packets = [segment(0.0, 1, 100), segment(60.0, 100, 1), segment(120.0, 100, 0)]
+        assert events(TcpTracker(), packets) == []
+
+    def test_sequence_wraparound(self):
+        """Test sequence numbers wrapping past 2**32"""
+        assert seq_diff(5, 2 ** 32 - 5) == 10
+        assert seq_diff(2 ** 32 - 5, 5) == -10
+        packets = [segment(0.0, 2 ** 32 - 100, 100), segment(0.1, 0, 100), segment(0.2, 2 ** 32 - 100, 100)]
+        assert events(TcpTracker(), packets) == [RETRANSMISSION]
+
+
+class TestTcpTrackerMemory:
+    def test_idle_connections_expire(self):
+        """Test connections without segments for idle_timeout are dropped"""
+        ended = []
+        tracker = TcpTracker(idle_timeout=30, on_expire=ended.append)
+        tracker.observe(segment(0.0, 1, 100, client=('10.0.0.5', 1000)))
+        tracker.observe(segment(100.0, 1, 100))
+        assert len(tracker) == 1
+        assert [connection.src_port for connection in ended] == [1000]
+
+    def test_connection_limit(self):
+        """Test the least recently seen connection is evicted when full"""
+        tracker = TcpTracker(max_flows=100)
+        for port in range(1000):
+            tracker.observe(segment(port * 0.001, 1, 10, client=('10.0.0.1', 10000 + port)))
+        assert len(tracker) == 100
+        assert tracker.evicted_flows == 900
+        assert min(connection.src_port for connection in tracker) == 10900
+
+    def test_reset_ends_connection(self):
+        """Test an RST drops the connection state"""
+        tracker = TcpTracker()
+        tracker.observe(segment(0.0, 1, 100))
+        tracker.observe(segment(0.1, 101, flags='R'))
+        assert len(tracker) == 0
+        assert tracker.stats()['expired_flows'] == 1
+
+
+class TestTcpIssues:
+    def issue_types(self, packets):
+        return [issue['type'] for issue in IssueDetector().analyze_packets(packets)]
+
+    def test_detector_reports_real_retransmissions(self):
+        """Test the detector reports tracked anomalies instead of busy conversations"""
+        packets = [segment(i * 0.5, 1 + i * 100, 100) for i in range(20)]
+        assert 'POTENTIAL_RETRANSMISSION' not in self.issue_types(packets)
+        assert 'TCP_RETRANSMISSION' not in self.issue_types(packets)
+
+        packets.append(segment(11.0, 1, 100))
+        packets.append(segment(11.5, 500, ack=2001, window=0, reverse=True))
+        types = self.issue_types(packets)
+        assert 'TCP_RETRANSMISSION' in types
+        assert 'ZERO_WINDOW' in types
+
+    def test_batch_input(self):
+        """Test sequence numbers reach the tracker through a PacketBatch"""
+        packets = [segment(0.0, 1, 100), segment(0.1, 101, 100), segment(0.2, 1, 100)]
+        issues = IssueDetector().run_checks(PacketBatch.from_packets(packets), ['high_retransmissions'])
+        issues = issues['high_retransmissions']
+        assert [issue['type'] for issue in issues] == ['TCP_RETRANSMISSION']
+        assert '1 of 3 segments' in issues[0]['details']
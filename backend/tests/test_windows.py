@@ -0,0 +1,130 @@
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.windows import SlidingCounter
+from src.detector import IssueDetector, RealtimeDetector
+
+
+def make_packet(timestamp, dst_ip='10.0.0.2', dst_port=80, summary=None):
+    return {'timestamp': timestamp, 'length': 100, 'protocol': 'TCP',
+            'src_ip': '10.0.0.1', 'dst_ip': dst_ip, 'src_port': 40000, 'dst_port': dst_port,
+            'summary': summary or f"TCP 10.0.0.1:40000 > {dst_ip}:{dst_port}"}
+
+
+def alert_types(alerts):
+    return [alert['type'] for alert in alerts]
+
+
+class TestSlidingCounter:
+    def test_counts_leave_the_window(self):
+        """Test counts older than the window are subtracted"""
+        counter = SlidingCounter(window=3, bucket=1)
+        counter.add('a', 0.5)
+        counter.add('a', 1.5)
+        counter.add('b', 2.5)
+        assert counter.get('a') == 2
+
+        counter.advance(3.5)  # Bucket 0 leaves the window
+        assert counter.get('a') == 1
+        counter.advance(10)   # Everything leaves the window
+        assert counter.get('a') == 0
+        assert len(counter) == 0
+
+    def test_add_returns_window_total(self):
+        """Test add() returns the key's count over the window"""
+        counter = SlidingCounter(window=2, bucket=1)
+        assert [counter.add('k', t) for t in (0, 0.5, 1, 2.5)] == [1, 2, 3, 2]
+
+    def test_key_limit(self):
+        """Test memory stays bounded when there are too many distinct keys"""
+        counter = SlidingCounter(window=10, bucket=1, max_keys=3)
+        for port in range(10):
+            counter.add(port, 0)
+        assert len(counter) == 3
+        assert counter.overflow == 7
+
+    def test_late_packets_count_in_current_bucket(self):
+        """Test out-of-order timestamps do not move the window back"""
+        counter = SlidingCounter(window=2, bucket=1)
+        counter.add('k', 5)
+        counter.add('k', 1)
+        assert counter.get('k') == 2
+        counter.advance(7)
+        assert counter.get('k') == 0
+
+    def test_span(self):
+        """Test the covered span grows until the window is full"""
+        counter = SlidingCounter(window=5, bucket=1)
+        counter.advance(100.2)
+        assert counter.span() == 1
+        counter.advance(102.7)
+        assert counter.span() == 3
+        counter.advance(200)
+        assert counter.span() == 5
+
+
+class TestRealtimeDetector:
+    def test_burst_in_long_capture(self):
+        """Test a short burst is caught even though the average rate is low"""
+        # One packet a minute for an hour, with a 10-second burst at 100 packets/s
+        timestamps = sorted([minute * 60.0 for minute in range(60)] +
+                            [1800.5 + i * 0.01 for i in range(1000)])
+        packets = [make_packet(t) for t in timestamps]
+
+        detector = RealtimeDetector(window=10)
+        alerts = [alert for packet in packets for alert in detector.observe(packet)]
+        assert alert_types(alerts) == ['HIGH_TRAFFIC_RATE']
+        assert 1800.5 < alerts[0]['timestamp'] < 1810.5
+
+        # The batch detector only sees the hour-long average
+        assert 'HIGH_TRAFFIC_RATE' not in alert_types(IssueDetector().analyze_packets(packets))
+
+    def test_alerts_fire_once_per_window(self):
+        """Test a condition that keeps holding does not flood alerts"""
+        detector = RealtimeDetector(window=5, min_packets=5)
+        alerts = []
+        for i in range(1000):
+            alerts += detector.observe(make_packet(i * 0.01, dst_ip='255.255.255.255'))
+        # 10 seconds of broadcast traffic: one alert per 5-second window per type
+        assert alert_types(alerts).count('POTENTIAL_BROADCAST_STORM') == 2
+
+    def test_repeated_dns_queries(self):
+        """Test DNS repeats are counted per query within the window"""
+        detector = RealtimeDetector(window=10)
+        query = 'DNS Qry "example.com."'
+        alerts = []
+        for t in (0, 1, 20, 21, 22):
+            alerts += detector.observe(make_packet(t, dst_port=53, summary=query))
+        assert alert_types(alerts) == ['REPEATED_DNS_QUERIES']
+        assert alerts[0]['timestamp'] == 22
+
+    def test_suspicious_port_threshold(self):
+        """Test suspicious ports alert on sustained traffic, not every packet"""
+        seen = []
+        detector = RealtimeDetector(window=10, port_threshold=5, on_alert=seen.append)
+        for i in range(12):
+            detector.observe(make_packet(i * 0.1, dst_port=3389))
+        assert alert_types(seen) == ['SUSPICIOUS_PORT']
+        assert list(detector.alerts) == seen
+
+    def test_alert_history_is_capped(self):
+        """Test a burst of distinct alerts keeps only the most recent max_keys"""
+        detector = RealtimeDetector(window=60, dns_repeats=2, port_threshold=2, max_keys=4)
+        alerts = []
+        for i, name in enumerate(['a', 'b', 'c', 'd']):
+            for repeat in range(2):
+                query = f'DNS Qry "{name}.example."'
+                alerts += detector.observe(make_packet(i + repeat * 0.1, dst_port=53, summary=query))
+        for i, port in enumerate([23, 135, 139, 445]):
+            for repeat in range(2):
+                alerts += detector.observe(make_packet(10 + i + repeat * 0.1, dst_port=port))
+        assert alert_types(alerts) == ['REPEATED_DNS_QUERIES'] * 4 + ['SUSPICIOUS_PORT'] * 4
+        assert len(detector._last_fired) == 4
+        assert [key for _, key in detector._last_fired] == [23, 135, 139, 445]
+
+    def test_factory(self):
+        """Test IssueDetector hands out realtime detectors with options"""
+        realtime = IssueDetector().realtime(window=30, rate_threshold=10)
+        assert isinstance(realtime, RealtimeDetector)
+        assert realtime.window == 30
@@ -11,6 +11,7 @@ import './App.css';
 
 function App() {
   const [packets, setPackets] = useState([]);
+  const [captureId, setCaptureId] = useState(null);
   const [analyses, setAnalyses] = useState([]);
   const [statistics, setStatistics] = useState(null);
   const [issues, setIssues] = useState([]);
@@ -48,6 +49,7 @@ function App() {
   };
 
   const handleCaptureComplete = (data) => {
+    setCaptureId(data.captureId || null);
     setPackets(data.packets);
     setAnalyses(data.analyses);
     setStatistics(data.statistics);
@@ -56,6 +58,8 @@ function App() {
   };
 
   const handleFilteredPackets = (filteredPackets) => {
+    // The server-side capture no longer matches what is shown
+    setCaptureId(null);
     setPackets(filteredPackets);
   };
 
@@ -210,7 +214,7 @@ function App() {
         )}
 
         {activeTab === 'storage' && (
-          <StoragePanel packets={packets} onLoad={handleCaptureComplete} />
+          <StoragePanel packets={packets} captureId={captureId} onLoad={handleCaptureComplete} />
         )}
       </main>
 
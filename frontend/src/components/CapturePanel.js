@@ -1,6 +1,6 @@
 // src/components/CapturePanel.js
 import React, { useState } from 'react';
-import { capturePackets, analyzePackets, getStatistics, detectIssues } from '../services/api';
+import { capturePackets, runPipeline } from '../services/api';
 
 const CapturePanel = ({ onCaptureComplete, loading, setLoading }) => {
   const [packetCount, setPacketCount] = useState(10);
@@ -14,20 +14,19 @@ const CapturePanel = ({ onCaptureComplete, loading, setLoading }) => {
       const captureResult = await capturePackets(packetCount, realCapture);
       
       if (captureResult.success) {
-        // Analyze packets
-        const analysisResult = await analyzePackets(captureResult.data.packets);
-        
-        // Get statistics
-        const statsResult = await getStatistics(captureResult.data.packets);
-        
-        // Detect issues
-        const issuesResult = await detectIssues(captureResult.data.packets);
+        // The capture stays on the server; refer to it by ID
+        const captureId = captureResult.data.capture_id;
+
+        // Analyses, statistics and issues in one request
+        const pipelineResult = await runPipeline(captureId, ['analyses', 'statistics', 'issues']);
+        const results = pipelineResult.success ? pipelineResult.data : {};
 
         onCaptureComplete({
+          captureId,
           packets: captureResult.data.packets,
-          analyses: analysisResult.success ? analysisResult.data.analyses : [],
-          statistics: statsResult.success ? statsResult.data.statistics : null,
-          issues: issuesResult.success ? issuesResult.data.issues : [],
+          analyses: results.analyses || [],
+          statistics: results.statistics || null,
+          issues: results.issues || [],
           mode: captureResult.data.mode
         });
       } else {
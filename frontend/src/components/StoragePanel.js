@@ -2,7 +2,7 @@
 import React, { useState, useEffect } from 'react';
 import { saveCapture, loadCapture, listCaptures, deleteCapture } from '../services/api';
 
-const StoragePanel = ({ packets, onLoad }) => {
+const StoragePanel = ({ packets, captureId, onLoad }) => {
   const [filename, setFilename] = useState('my_capture');
   const [savedCaptures, setSavedCaptures] = useState([]);
   const [loading, setLoading] = useState(false);
@@ -37,7 +37,7 @@ const StoragePanel = ({ packets, onLoad }) => {
 
     setLoading(true);
     try {
-      const result = await saveCapture(packets, filename, saveFormat);
+      const result = await saveCapture(captureId || packets, filename, saveFormat);
       if (result.success) {
         alert(`✅ Capture saved as ${filename}.${saveFormat}`);
         loadSavedCaptures(); // Refresh the list
@@ -58,6 +58,7 @@ const StoragePanel = ({ packets, onLoad }) => {
       const result = await loadCapture(captureFilename);
       if (result.success) {
         onLoad({
+          captureId: result.data.capture_id,
           packets: result.data.packets,
           analyses: [],
           statistics: null,
@@ -8,6 +8,50 @@ const api = axios.create({
   timeout: 15000, // Increased timeout for packet capture
 });
 
+// Analysis endpoints accept a server-side capture ID (preferred, no packet
+// upload) or, for backwards compatibility, the packet list itself
+const captureSource = (source) => (
+  typeof source === 'string' ? { capture_id: source } : { packets: source }
+);
+
+// Packet lists can be requested as { fields, rows } (field names sent once);
+// this turns them back into packet objects
+const expandPackets = (packets) => (
+  packets && packets.fields
+    ? packets.rows.map((row) => Object.fromEntries(packets.fields.map((field, i) => [field, row[i]])))
+    : packets
+);
+
+const withPackets = (data) => ({ ...data, packets: expandPackets(data.packets) });
+
+// Last response per (endpoint, body): a refresh sends its ETag as
+// If-None-Match and reuses the data when the server answers 412 (the
+// status for a matching POST; GETs would get 304)
+const conditionalCache = new Map();
+const CONDITIONAL_CACHE_SIZE = 50;
+
+const conditionalPost = async (url, body) => {
+  const key = `${url} ${JSON.stringify(body)}`;
+  const cached = conditionalCache.get(key);
+  const response = await api.post(url, body, {
+    headers: cached ? { 'If-None-Match': cached.etag } : {},
+    validateStatus: (status) => (status >= 200 && status < 300) || status === 304 || status === 412,
+  });
+  if ((response.status === 304 || response.status === 412) && cached) {
+    return cached.data;
+  }
+
+  const etag = response.headers.etag;
+  if (etag) {
+    conditionalCache.delete(key);
+    conditionalCache.set(key, { etag, data: response.data });
+    if (conditionalCache.size > CONDITIONAL_CACHE_SIZE) {
+      conditionalCache.delete(conditionalCache.keys().next().value);
+    }
+  }
+  return response.data;
+};
+
 // Health check endpoint
 export const checkBackendHealth = async () => {
   try {
@@ -27,8 +71,56 @@ export const capturePackets = async (count, realCapture) => {
   try {
     const response = await api.post('/capture', { 
       count, 
-      realCapture 
+      realCapture,
+      compact: true
     });
+    return { success: true, data: withPackets(response.data) };
+  } catch (error) {
+    return { 
+      success: false, 
+      error: error.response?.data?.error || error.message 
+    };
+  }
+};
+
+// Stream a capture over Server-Sent Events. onBatch receives
+// { packets, delta, totals, coalesced } every flushInterval seconds and
+// onComplete the final { capture_id, total, statistics }. Returns a
+// function that stops the stream.
+export const streamCapture = (count, realCapture, handlers = {}, options = {}) => {
+  const params = new URLSearchParams({
+    count,
+    realCapture,
+    flushInterval: options.flushInterval ?? 0.5,
+    maxBatch: options.maxBatch ?? 500,
+    detect: options.detect ?? true,
+  });
+  const source = new EventSource(`${API_BASE}/capture/stream?${params}`);
+
+  source.addEventListener('batch', (event) => {
+    const update = JSON.parse(event.data);
+    handlers.onBatch?.(update);
+    // Sliding-window detector alerts raised since the previous batch
+    update.alerts?.forEach((alert) => handlers.onAlert?.(alert));
+  });
+  source.addEventListener('complete', (event) => {
+    source.close();
+    handlers.onComplete?.(JSON.parse(event.data));
+  });
+  source.addEventListener('error', (event) => {
+    source.close();
+    const error = event.data ? JSON.parse(event.data).error : 'Capture stream disconnected';
+    handlers.onError?.(error);
+  });
+
+  return () => source.close();
+};
+
+// Background jobs: submit returns a job_id at once, then poll getJob
+// until status is 'succeeded' (result attached), 'failed' or 'cancelled'
+export const submitJob = async (type, params) => {
+  try {
+    const response = await api.post('/jobs', { type, ...params });
     return { success: true, data: response.data };
   } catch (error) {
     return { 
@@ -38,10 +130,9 @@ export const capturePackets = async (count, realCapture) => {
   }
 };
 
-// Analyze packets
-export const analyzePackets = async (packets) => {
+export const getJob = async (jobId) => {
   try {
-    const response = await api.post('/analyze', { packets });
+    const response = await api.get(`/jobs/${jobId}`);
     return { success: true, data: response.data };
   } catch (error) {
     return { 
@@ -51,10 +142,9 @@ export const analyzePackets = async (packets) => {
   }
 };
 
-// Get statistics
-export const getStatistics = async (packets) => {
+export const cancelJob = async (jobId) => {
   try {
-    const response = await api.post('/statistics', { packets });
+    const response = await api.delete(`/jobs/${jobId}`);
     return { success: true, data: response.data };
   } catch (error) {
     return { 
@@ -64,11 +154,52 @@ export const getStatistics = async (packets) => {
   }
 };
 
+// Run several analyses in one request and one pass over the capture.
+// outputs: any of 'packets', 'analyses', 'statistics', 'issues';
+// fields optionally trims each output, e.g. { packets: ['number', 'protocol'] }
+export const runPipeline = async (source, outputs, { filter, fields } = {}) => {
+  try {
+    const data = await conditionalPost('/pipeline', { ...captureSource(source), outputs, filter, fields });
+    return { success: true, data };
+  } catch (error) {
+    return { 
+      success: false, 
+      error: error.response?.data?.error || error.message 
+    };
+  }
+};
+
+// Analyze packets
+export const analyzePackets = async (source, filter) => {
+  try {
+    const data = await conditionalPost('/analyze', { ...captureSource(source), filter });
+    return { success: true, data };
+  } catch (error) {
+    return { 
+      success: false, 
+      error: error.response?.data?.error || error.message 
+    };
+  }
+};
+
+// Get statistics
+export const getStatistics = async (source, filter) => {
+  try {
+    const data = await conditionalPost('/statistics', { ...captureSource(source), filter });
+    return { success: true, data };
+  } catch (error) {
+    return { 
+      success: false, 
+      error: error.response?.data?.error || error.message 
+    };
+  }
+};
+
 // Detect issues
-export const detectIssues = async (packets) => {
+export const detectIssues = async (source, filter) => {
   try {
-    const response = await api.post('/detect-issues', { packets });
-    return { success: true, data: response.data };
+    const data = await conditionalPost('/detect-issues', { ...captureSource(source), filter });
+    return { success: true, data };
   } catch (error) {
     return { 
       success: false, 
@@ -80,10 +211,10 @@ export const detectIssues = async (packets) => {
 // ========== STORAGE ENDPOINTS ========== //
 
 // Save capture to server
-export const saveCapture = async (packets, filename, format = 'json') => {
+export const saveCapture = async (source, filename, format = 'json') => {
   try {
     const response = await api.post('/storage/save', { 
-      packets, 
+      ...captureSource(source), 
       filename, 
       format 
     });
@@ -99,8 +230,24 @@ export const saveCapture = async (packets, filename, format = 'json') => {
 // Load capture from server
 export const loadCapture = async (filename) => {
   try {
-    const response = await api.get(`/storage/load/${filename}`);
-    return { success: true, data: response.data };
+    const response = await api.get(`/storage/load/${filename}`, { params: { compact: true } });
+    return { success: true, data: withPackets(response.data) };
+  } catch (error) {
+    return { 
+      success: false, 
+      error: error.response?.data?.error || error.message 
+    };
+  }
+};
+
+// Load one page of a saved capture. Pass { offset, limit } for the first
+// page (or random access) and the returned next_cursor to keep going.
+export const getCapturePage = async (filename, { offset, limit, cursor, filter } = {}) => {
+  try {
+    const response = await api.get(`/storage/captures/${filename}/packets`, {
+      params: { offset, limit, cursor, filter, compact: true },
+    });
+    return { success: true, data: withPackets(response.data) };
   } catch (error) {
     return { 
       success: false, 
@@ -122,6 +269,19 @@ export const listCaptures = async () => {
   }
 };
 
+// Free a server-side capture session
+export const releaseCapture = async (captureId) => {
+  try {
+    const response = await api.delete(`/captures/${captureId}`);
+    return { success: true, data: response.data };
+  } catch (error) {
+    return { 
+      success: false, 
+      error: error.response?.data?.error || error.message 
+    };
+  }
+};
+
 // Delete a capture
 export const deleteCapture = async (filename) => {
   try {